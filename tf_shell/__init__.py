@@ -16,6 +16,7 @@ from __future__ import absolute_import
 from tf_shell.python.shell_tensor import ShellTensor64
 from tf_shell.python.shell_tensor import mod_reduce_tensor64
 from tf_shell.python.shell_tensor import to_shell_plaintext
+from tf_shell.python.shell_tensor import PreparedPlaintext
 from tf_shell.python.shell_tensor import to_encrypted
 from tf_shell.python.shell_tensor import to_tensorflow
 from tf_shell.python.shell_tensor import roll
@@ -31,6 +32,7 @@ from tf_shell.python.shell_tensor import broadcast_to
 from tf_shell.python.shell_tensor import split
 from tf_shell.python.shell_tensor import concat
 from tf_shell.python.shell_tensor import segment_sum
+from tf_shell.python.shell_tensor import ShellIndexedSlices
 from tf_shell.python.shell_tensor import conv2d
 from tf_shell.python.shell_tensor import conv2d_transpose
 from tf_shell.python.shell_tensor import max_unpool2d
@@ -53,6 +55,15 @@ from tf_shell.python.shell_ops import clip_and_noise_labels_party
 
 from tf_shell.python.shell_optimizers import enable_optimization
 from tf_shell.python.shell_optimizers import optimize_shell_graph
+from tf_shell.python.shell_optimizers import autotune_shell_params
+from tf_shell.python.shell_optimizers import take_optimizer_stats
+
+from tf_shell.python.shell_cost_model import benchmark_cost_model
+from tf_shell.python.shell_cost_model import estimate_cost
+
+from tf_shell.python.shell_profiler import enable_profiling
+from tf_shell.python.shell_profiler import take_profile
+from tf_shell.python.shell_profiler import profile
 
 from tf_shell.python.discrete_gaussian import DiscreteGaussianParams
 from tf_shell.python.discrete_gaussian import sample_centered_gaussian_f
@@ -12,9 +12,14 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+#include <optional>
+
+#include "../optimizers/moduli_autotune.h"
+#include "../optimizers/pass_stats.h"
 #include "context_variant.h"
 #include "shell_encryption/context.h"
 #include "shell_encryption/montgomery.h"
+#include "shell_profiler.h"
 #include "tensorflow/core/framework/op.h"
 #include "tensorflow/core/framework/op_kernel.h"
 #include "tensorflow/core/framework/tensor_shape.h"
@@ -104,12 +109,96 @@ class AutoContextOp : public OpKernel {
   }
 };
 
+// Outputs the parameters chosen by the last run of the ModuliAutotuneOptimizer
+// so they can be read without searching the optimized graph for the context.
+class TakeAutotunedParamsOp : public OpKernel {
+ public:
+  explicit TakeAutotunedParamsOp(OpKernelConstruction* op_ctx)
+      : OpKernel(op_ctx) {}
+
+  void Compute(OpKernelContext* op_ctx) override {
+    std::optional<tensorflow::grappler::ShellParams> params =
+        tensorflow::grappler::TakeAutotunedShellParams();
+    int64_t const num_qs = params.has_value() ? params->qs.size() : 0;
+
+    // Allocate the outputs.
+    Tensor* out0;
+    OP_REQUIRES_OK(op_ctx, op_ctx->allocate_output(0, TensorShape{}, &out0));
+    Tensor* out1;
+    OP_REQUIRES_OK(op_ctx, op_ctx->allocate_output(1, TensorShape{}, &out1));
+    Tensor* out2;
+    OP_REQUIRES_OK(op_ctx,
+                   op_ctx->allocate_output(2, TensorShape{num_qs}, &out2));
+    Tensor* out3;
+    OP_REQUIRES_OK(op_ctx, op_ctx->allocate_output(3, TensorShape{}, &out3));
+
+    out0->scalar<bool>()() = params.has_value();
+    out1->scalar<uint64>()() = params.has_value() ? params->log_n : 0;
+    for (int64_t i = 0; i < num_qs; ++i) {
+      out2->flat<uint64>()(i) = params->qs[i];
+    }
+    out3->scalar<uint64>()() = params.has_value() ? params->t : 0;
+  }
+};
+
+// Outputs the statistics recorded by the shell graph optimizers since the last
+// call as a JSON list with one object per optimizer run.
+class TakeShellOptimizerStatsOp : public OpKernel {
+ public:
+  explicit TakeShellOptimizerStatsOp(OpKernelConstruction* op_ctx)
+      : OpKernel(op_ctx) {}
+
+  void Compute(OpKernelContext* op_ctx) override {
+    Tensor* out;
+    OP_REQUIRES_OK(op_ctx, op_ctx->allocate_output(0, TensorShape{}, &out));
+    out->scalar<tstring>()() = tensorflow::grappler::TakeShellPassStatsJson();
+  }
+};
+
+// Turns the profiling of the shell kernels on or off, see shell_profiler.h.
+class EnableShellProfilingOp : public OpKernel {
+ public:
+  explicit EnableShellProfilingOp(OpKernelConstruction* op_ctx)
+      : OpKernel(op_ctx) {}
+
+  void Compute(OpKernelContext* op_ctx) override {
+    OP_REQUIRES_VALUE(bool enabled, op_ctx, GetScalar<bool>(op_ctx, 0));
+    SetShellProfilingEnabled(enabled);
+  }
+};
+
+// Outputs the profile of the shell kernels since the last call as a JSON
+// object keyed by node name.
+class TakeShellProfileOp : public OpKernel {
+ public:
+  explicit TakeShellProfileOp(OpKernelConstruction* op_ctx)
+      : OpKernel(op_ctx) {}
+
+  void Compute(OpKernelContext* op_ctx) override {
+    Tensor* out;
+    OP_REQUIRES_OK(op_ctx, op_ctx->allocate_output(0, TensorShape{}, &out));
+    out->scalar<tstring>()() = TakeShellProfileJson();
+  }
+};
+
 REGISTER_KERNEL_BUILDER(Name("ContextImport64").Device(DEVICE_CPU),
                         ContextImportOp<uint64>);
 
 REGISTER_KERNEL_BUILDER(Name("AutoShellContext64").Device(DEVICE_CPU),
                         AutoContextOp<uint64>);
 
+REGISTER_KERNEL_BUILDER(Name("TakeAutotunedParams64").Device(DEVICE_CPU),
+                        TakeAutotunedParamsOp);
+
+REGISTER_KERNEL_BUILDER(Name("TakeShellOptimizerStats64").Device(DEVICE_CPU),
+                        TakeShellOptimizerStatsOp);
+
+REGISTER_KERNEL_BUILDER(Name("EnableShellProfiling64").Device(DEVICE_CPU),
+                        EnableShellProfilingOp);
+
+REGISTER_KERNEL_BUILDER(Name("TakeShellProfile64").Device(DEVICE_CPU),
+                        TakeShellProfileOp);
+
 typedef ContextVariant<uint64> ContextVariantUint64;
 REGISTER_UNARY_VARIANT_DECODE_FUNCTION(ContextVariantUint64,
                                        ContextVariantUint64::kTypeName);
\ No newline at end of file
@@ -12,6 +12,10 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+#include <algorithm>
+#include <array>
+#include <cstdlib>
+
 #include "context_variant.h"
 #include "polynomial_variant.h"
 #include "rotation_variants.h"
@@ -19,6 +23,7 @@
 #include "shell_encryption/prng/single_thread_hkdf_prng.h"
 #include "shell_encryption/rns/rns_context.h"
 #include "shell_encryption/rns/rns_polynomial.h"
+#include "shell_profiler.h"
 #include "symmetric_variants.h"
 #include "tensorflow/core/framework/op.h"
 #include "tensorflow/core/framework/op_kernel.h"
@@ -81,6 +86,40 @@ static inline StatusOr<rlwe::RnsBgvCiphertext<rlwe::MontgomeryInt<T>>> OpCore(
   return OpCore(b, a, shell_ctx_var);
 }
 
+// Multiplies a ciphertext by a scalar already mapped into the plaintext
+// modulus field, see EncodeFilterScalars.
+template <typename T>
+static inline StatusOr<rlwe::RnsBgvCiphertext<rlwe::MontgomeryInt<T>>> OpCore(
+    SymmetricCtVariant<T> const* a, T const* b,
+    ContextVariant<T> const* shell_ctx_var) {
+  if (TF_PREDICT_FALSE(a == nullptr)) {
+    return InvalidArgument("Ciphertext input a is null.");
+  }
+  TF_RETURN_IF_ERROR(const_cast<SymmetricCtVariant<T>*>(a)->MaybeLazyDecode(
+      shell_ctx_var->ct_context_, shell_ctx_var->error_params_));
+  return a->ct * (*b);
+}
+
+// Maps a TensorFlow tensor of scalars into the plaintext modulus field, the
+// same way MulCtTfScalar64 does.
+template <typename T, typename PtT>
+static inline StatusOr<std::vector<T>> EncodeFilterScalars(
+    Tensor const& filter, ContextVariant<T> const* shell_ctx_var) {
+  auto flat_filter = filter.flat<PtT>();
+  if constexpr (std::is_signed<PtT>::value) {
+    using SignedInteger = std::make_signed_t<T>;
+    std::vector<SignedInteger> signed_vals(flat_filter.size());
+    for (int64_t i = 0; i < flat_filter.size(); ++i) {
+      signed_vals[i] = static_cast<SignedInteger>(flat_filter(i));
+    }
+    return shell_ctx_var->encoder_->template WrapSigned<SignedInteger>(
+        signed_vals);
+  } else {
+    return std::vector<T>(flat_filter.data(),
+                          flat_filter.data() + flat_filter.size());
+  }
+}
+
 template <typename T>
 static inline StatusOr<rlwe::RnsBgvCiphertext<rlwe::MontgomeryInt<T>>> OpCore(
     SymmetricCtVariant<T> const* a, SymmetricCtVariant<T> const* b,
@@ -105,6 +144,41 @@ static inline StatusOr<rlwe::RnsBgvCiphertext<rlwe::MontgomeryInt<T>>> OpCore(
   return a_ct * b_ct;
 }
 
+// Winograd F(3, 2) transforms computing three outputs of a two tap correlation
+// from a four element input tile, built from the points 0, 1, -1, and
+// infinity. The fractions usually in the input transform are removed by
+// scaling it by two, so the 2D convolution comes out multiplied by
+// kWinogradScale. Only the input transform, which is applied to plaintexts,
+// has entries other than 0 and +/-1.
+constexpr int kWinogradTile = 4;
+constexpr int kWinogradOut = 3;
+constexpr int kWinogradTaps = 2;
+constexpr int kWinogradScale = 4;
+constexpr int kWinogradInput[kWinogradTile][kWinogradTile] = {
+    {2, 0, -2, 0}, {0, 1, 1, 0}, {0, -1, 1, 0}, {0, -2, 0, 2}};
+constexpr int kWinogradFilter[kWinogradTile][kWinogradTaps] = {
+    {1, 0}, {1, 1}, {1, -1}, {0, 1}};
+constexpr int kWinogradOutput[kWinogradOut][kWinogradTile] = {
+    {1, 1, 1, 0}, {0, 1, -1, 0}, {0, 1, 1, 1}};
+// Sum of the absolute values of each row of kWinogradInput, which bounds how
+// much the input transform grows a plaintext.
+constexpr int kWinogradInputNorm[kWinogradTile] = {4, 2, 2, 4};
+
+// Adds `multiple` times `b` to `a` where multiple is a small integer.
+template <typename RnsPolynomial, typename Moduli>
+static inline Status AddMultipleInPlace(RnsPolynomial& a,
+                                        RnsPolynomial const& b, int multiple,
+                                        Moduli const& moduli) {
+  for (int i = 0; i < std::abs(multiple); ++i) {
+    if (multiple > 0) {
+      TF_RETURN_IF_ERROR(a.AddInPlace(b, moduli));
+    } else {
+      TF_RETURN_IF_ERROR(a.SubInPlace(b, moduli));
+    }
+  }
+  return OkStatus();
+}
+
 // This Op can multiply either a shell ciphertext or a plaintext polynomial by
 // a plaintext scalar, depending on the class template.
 template <typename T, typename InputCtOrPoly, typename FilterCtOrPoly,
@@ -116,11 +190,19 @@ class Conv2dOp : public OpKernel {
   using SymmetricCt = rlwe::RnsBgvCiphertext<ModularInt>;
   using Context = rlwe::RnsContext<ModularInt>;
   using ErrorParams = rlwe::RnsErrorParams<ModularInt>;
+  using Modulus = rlwe::PrimeModulus<ModularInt>;
+
+  static constexpr bool x_is_ct =
+      std::is_same<InputCtOrPoly, SymmetricCtVariant<T>>::value;
+  static constexpr bool filter_is_ct =
+      std::is_same<FilterCtOrPoly, SymmetricCtVariant<T>>::value;
 
   std::vector<tsl::int32> stride;
   std::vector<tsl::int32> padding;
   std::vector<tsl::int32> dilation;
   std::vector<tsl::int32> output_shape;
+  bool packed = false;
+  bool winograd = false;
 
  public:
   explicit Conv2dOp(OpKernelConstruction* op_ctx) : OpKernel(op_ctx) {
@@ -141,9 +223,28 @@ class Conv2dOp : public OpKernel {
     OP_REQUIRES(
         op_ctx, output_shape.size() == 0 || output_shape.size() == 5,
         InvalidArgument("output_shape must have 5 elements if provided."));
+
+    // Only convolutions between a ciphertext and a plaintext have a packed
+    // implementation.
+    if constexpr (x_is_ct != filter_is_ct) {
+      OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("packed", &packed));
+    }
+
+    // Winograd convolution is implemented for plaintext inputs and ciphertext
+    // filters.
+    if constexpr (!x_is_ct && filter_is_ct) {
+      OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("winograd", &winograd));
+      OP_REQUIRES(op_ctx,
+                  !winograd || (stride[1] == 1 && stride[2] == 1 &&
+                                dilation[1] == 1 && dilation[2] == 1),
+                  InvalidArgument("Winograd convolution requires unit strides "
+                                  "and dilations."));
+    }
   }
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Polynomial polynomial convolution is not implemented.
     if constexpr (std::is_same<InputCtOrPoly, PolynomialVariant<T>>::value &&
                   std::is_same<FilterCtOrPoly, PolynomialVariant<T>>::value) {
@@ -264,6 +365,34 @@ class Conv2dOp : public OpKernel {
     auto shaped_output = output->shaped<Variant, 4>(
         {out_height, out_width, out_channels, filter_out_channels});
 
+    int64_t const num_moduli = shell_ctx_var->ct_context_->NumMainPrimeModuli();
+    profile.SetElements(output->NumElements(), num_moduli);
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(2 * output->NumElements(), num_slots, num_moduli));
+    profile.StartArithmetic();
+
+    if constexpr (!x_is_ct && filter_is_ct) {
+      if (winograd) {
+        ConvolveWinograd(op_ctx, shell_ctx_var, x, filter, output, height,
+                         width, in_channels, filter_height, filter_width,
+                         filter_in_channels, filter_out_channels, out_height,
+                         out_width, out_channels, h_start, w_start);
+        return;
+      }
+    }
+
+    if constexpr (x_is_ct != filter_is_ct) {
+      if (packed) {
+        ConvolvePacked(op_ctx, shell_ctx_var, x, filter, output, height, width,
+                       in_channels, filter_height, filter_width,
+                       filter_in_channels, filter_out_channels, out_height,
+                       out_width, out_channels, h_start, w_start, c_start,
+                       stride_height, stride_width, stride_in_channels,
+                       dilation_height, dilation_width);
+        return;
+      }
+    }
+
     // Perform the convolution by sliding over the input tensor. Parallelize
     // over the height dimension.
     auto convolve_in_range = [&](int64_t start, int64_t end) {
@@ -364,6 +493,474 @@ class Conv2dOp : public OpKernel {
                      num_slots;  // ns measured on log_n = 11
     thread_pool->ParallelFor(out_height, cost, convolve_in_range);
   }
+
+ private:
+  // Gathers the components of every ciphertext in ct_tensor and the
+  // polynomials in pt_tensor. Inputs are decoded here, once each, rather than
+  // once per use. Check op_ctx->status() after calling.
+  void GatherInputs(OpKernelContext* op_ctx,
+                    ContextVariant<T> const* shell_ctx_var,
+                    Tensor const& ct_tensor, Tensor const& pt_tensor,
+                    std::vector<SymmetricCtVariant<T> const*>* ct_vars,
+                    std::vector<std::vector<RnsPolynomial>>* ct_components,
+                    std::vector<RnsPolynomial const*>* pt_polys) {
+    auto flat_ct = ct_tensor.flat<Variant>();
+    auto flat_pt = pt_tensor.flat<Variant>();
+    uint64_t const num_slots = ((uint64_t)1) << shell_ctx_var->log_n_;
+    int64_t const num_moduli = shell_ctx_var->ct_context_->NumMainPrimeModuli();
+    auto thread_pool =
+        op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
+
+    ct_vars->resize(flat_ct.size());
+    ct_components->resize(flat_ct.size());
+    auto gather_cts = [&](int64_t start, int64_t end) {
+      for (int64_t i = start; i < end; ++i) {
+        SymmetricCtVariant<T> const* ct_var =
+            flat_ct(i).get<SymmetricCtVariant<T>>();
+        OP_REQUIRES(op_ctx, ct_var != nullptr,
+                    InvalidArgument("SymmetricCtVariant at flat index: ", i,
+                                    " did not unwrap successfully."));
+        OP_REQUIRES_OK(
+            op_ctx,
+            const_cast<SymmetricCtVariant<T>*>(ct_var)->MaybeLazyDecode(
+                shell_ctx_var->ct_context_, shell_ctx_var->error_params_));
+        (*ct_vars)[i] = ct_var;
+        (*ct_components)[i].reserve(ct_var->ct.Len());
+        for (int k = 0; k < ct_var->ct.Len(); ++k) {
+          OP_REQUIRES_VALUE(RnsPolynomial component, op_ctx,
+                            ct_var->ct.Component(k));
+          (*ct_components)[i].push_back(std::move(component));
+        }
+      }
+    };
+    thread_pool->ParallelFor(flat_ct.size(), 2 * num_slots * num_moduli,
+                             gather_cts);
+
+    pt_polys->resize(flat_pt.size());
+    auto gather_pts = [&](int64_t start, int64_t end) {
+      for (int64_t i = start; i < end; ++i) {
+        PolynomialVariant<T> const* pt_var =
+            flat_pt(i).get<PolynomialVariant<T>>();
+        OP_REQUIRES(op_ctx, pt_var != nullptr,
+                    InvalidArgument("PolynomialVariant at flat index: ", i,
+                                    " did not unwrap successfully."));
+        OP_REQUIRES_OK(
+            op_ctx, const_cast<PolynomialVariant<T>*>(pt_var)->MaybeLazyDecode(
+                        shell_ctx_var->ct_context_));
+        (*pt_polys)[i] = &pt_var->poly;
+      }
+    };
+    thread_pool->ParallelFor(flat_pt.size(), num_slots * num_moduli,
+                             gather_pts);
+  }
+
+  // Convolution between a ciphertext and a plaintext operand in the style of
+  // im2col. The components of every ciphertext and the plaintext polynomials
+  // are gathered once up front, and the input patch of every output position
+  // is listed as (x, filter) index pairs. Each output ciphertext is then a
+  // fused multiply-accumulate of its patch into zero-initialized RNS
+  // polynomials, instead of allocating a new ciphertext per term. Work is
+  // split over the flattened (out_height, out_width, out_channels,
+  // filter_out_channels) outputs so small images still use all threads.
+  void ConvolvePacked(OpKernelContext* op_ctx,
+                      ContextVariant<T> const* shell_ctx_var, Tensor const& x,
+                      Tensor const& filter, Tensor* output, int64_t height,
+                      int64_t width, int64_t in_channels, int64_t filter_height,
+                      int64_t filter_width, int64_t filter_in_channels,
+                      int64_t filter_out_channels, int64_t out_height,
+                      int64_t out_width, int64_t out_channels, int64_t h_start,
+                      int64_t w_start, int64_t c_start, int64_t stride_height,
+                      int64_t stride_width, int64_t stride_in_channels,
+                      int64_t dilation_height, int64_t dilation_width) {
+    Tensor const& ct_tensor = x_is_ct ? x : filter;
+    Tensor const& pt_tensor = x_is_ct ? filter : x;
+    auto flat_output = output->flat<Variant>();
+    int const log_n = shell_ctx_var->log_n_;
+    uint64_t const num_slots = ((uint64_t)1) << log_n;
+    int64_t const num_moduli = shell_ctx_var->ct_context_->NumMainPrimeModuli();
+
+    auto thread_pool =
+        op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
+
+    std::vector<SymmetricCtVariant<T> const*> ct_vars;
+    std::vector<std::vector<RnsPolynomial>> ct_components;
+    std::vector<RnsPolynomial const*> pt_polys;
+    GatherInputs(op_ctx, shell_ctx_var, ct_tensor, pt_tensor, &ct_vars,
+                 &ct_components, &pt_polys);
+    if (!op_ctx->status().ok()) {
+      return;
+    }
+
+    // List the (x, filter) index pairs of every input patch. Filter indices
+    // are for out channel 0, the other out channels follow contiguously.
+    // Taps which fall in the padding are left out.
+    int64_t const num_patches = out_height * out_width * out_channels;
+    std::vector<int64_t> patch_starts;
+    std::vector<std::pair<int64_t, int64_t>> taps;
+    patch_starts.reserve(num_patches + 1);
+    taps.reserve(num_patches * filter_height * filter_width *
+                 filter_in_channels);
+    for (int64_t oh = 0; oh < out_height; ++oh) {
+      for (int64_t ow = 0; ow < out_width; ++ow) {
+        for (int64_t oc = 0; oc < out_channels; ++oc) {
+          patch_starts.push_back(taps.size());
+          int64_t const h = h_start + oh * stride_height;
+          int64_t const w = w_start + ow * stride_width;
+          int64_t const c = c_start + oc * stride_in_channels;
+          for (int64_t i = 0; i < filter_height; ++i) {
+            for (int64_t j = 0; j < filter_width; ++j) {
+              int64_t const in_i = h + (i * dilation_height);
+              int64_t const in_j = w + (j * dilation_width);
+              // Same effect as zero padding the edges.
+              if (in_i < 0 || in_j < 0 || in_i >= height || in_j >= width) {
+                continue;
+              }
+              for (int64_t k = 0; k < filter_in_channels; ++k) {
+                int64_t const x_index =
+                    (in_i * width + in_j) * in_channels + c + k;
+                int64_t const filter_index =
+                    ((i * filter_width + j) * filter_in_channels + k) *
+                    filter_out_channels;
+                taps.emplace_back(x_index, filter_index);
+              }
+            }
+          }
+        }
+      }
+    }
+    patch_starts.push_back(taps.size());
+
+    // The output is laid out as [out_height, out_width, out_channels,
+    // filter_out_channels], i.e. patch major.
+    auto convolve_in_range = [&](int64_t start, int64_t end) {
+      for (int64_t out = start; out < end; ++out) {
+        int64_t const patch = out / filter_out_channels;
+        int64_t const o = out % filter_out_channels;
+
+        SymmetricCtVariant<T> const* first_ct_var = nullptr;
+        absl::Span<Modulus const* const> moduli;
+        std::vector<RnsPolynomial> sum;
+        double error = 0;
+        for (int64_t t = patch_starts[patch]; t < patch_starts[patch + 1];
+             ++t) {
+          int64_t const x_index = taps[t].first;
+          int64_t const filter_index = taps[t].second + o;
+          int64_t const ct_index = x_is_ct ? x_index : filter_index;
+          int64_t const pt_index = x_is_ct ? filter_index : x_index;
+          SymmetricCtVariant<T> const* ct_var = ct_vars[ct_index];
+          std::vector<RnsPolynomial> const& components =
+              ct_components[ct_index];
+
+          if (first_ct_var == nullptr) {
+            first_ct_var = ct_var;
+            moduli = ct_var->ct.Moduli();
+            sum.reserve(components.size());
+            for (size_t k = 0; k < components.size(); ++k) {
+              OP_REQUIRES_VALUE(RnsPolynomial zero, op_ctx,
+                                RnsPolynomial::CreateZero(log_n, moduli));
+              sum.push_back(std::move(zero));
+            }
+          }
+          OP_REQUIRES(
+              op_ctx, components.size() == sum.size(),
+              InvalidArgument("Ciphertexts must all have the same degree."));
+
+          for (size_t k = 0; k < sum.size(); ++k) {
+            OP_REQUIRES_OK(
+                op_ctx, sum[k].FusedMulAddInPlace(components[k],
+                                                  *pt_polys[pt_index], moduli));
+          }
+          // Same error as absorbing the plaintext and adding the product.
+          error += ct_var->ct.Error() * ct_var->ct.ErrorParams()->B_plaintext();
+        }
+        OP_REQUIRES(op_ctx, first_ct_var != nullptr,
+                    Internal("Internal error, input patch is empty."));
+
+        std::vector<Modulus const*> moduli_vector(moduli.begin(), moduli.end());
+        SymmetricCt dot_product(std::move(sum), std::move(moduli_vector),
+                                first_ct_var->ct.PowerOfS(), error,
+                                first_ct_var->ct.ErrorParams());
+        SymmetricCtVariant<T> result_var(std::move(dot_product),
+                                         first_ct_var->ct_context,
+                                         first_ct_var->error_params);
+        flat_output(out) = std::move(result_var);
+      }
+    };
+
+    int64_t const patch_size =
+        filter_height * filter_width * filter_in_channels;
+    int const cost =
+        4 * patch_size * num_slots * num_moduli;  // ns measured on log_n = 11
+    thread_pool->ParallelFor(num_patches * filter_out_channels, cost,
+                             convolve_in_range);
+  }
+
+  // Winograd convolution of a plaintext input with a ciphertext filter, e.g.
+  // the weight gradient of a convolutional layer. Outputs are computed in
+  // 3x3 tiles and the filter is split into 2x2 chunks. Each (tile, chunk)
+  // pair takes 16 ciphertext-plaintext multiplications instead of 36, at the
+  // cost of additions to transform the filter chunks once, the plaintext
+  // input tiles, and the accumulated products. The output is kWinogradScale
+  // times the convolution. Requires unit strides and dilations.
+  void ConvolveWinograd(OpKernelContext* op_ctx,
+                        ContextVariant<T> const* shell_ctx_var, Tensor const& x,
+                        Tensor const& filter, Tensor* output, int64_t height,
+                        int64_t width, int64_t in_channels,
+                        int64_t filter_height, int64_t filter_width,
+                        int64_t filter_in_channels, int64_t filter_out_channels,
+                        int64_t out_height, int64_t out_width,
+                        int64_t out_channels, int64_t h_start,
+                        int64_t w_start) {
+    constexpr int kTileSize = kWinogradTile * kWinogradTile;
+    auto flat_output = output->flat<Variant>();
+    int const log_n = shell_ctx_var->log_n_;
+    uint64_t const num_slots = ((uint64_t)1) << log_n;
+    int64_t const num_moduli = shell_ctx_var->ct_context_->NumMainPrimeModuli();
+
+    auto thread_pool =
+        op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
+
+    OP_REQUIRES(op_ctx, filter.NumElements() > 0,
+                InvalidArgument("Filter must not be empty."));
+    std::vector<SymmetricCtVariant<T> const*> ct_vars;
+    std::vector<std::vector<RnsPolynomial>> ct_components;
+    std::vector<RnsPolynomial const*> pt_polys;
+    GatherInputs(op_ctx, shell_ctx_var, filter, x, &ct_vars, &ct_components,
+                 &pt_polys);
+    if (!op_ctx->status().ok()) {
+      return;
+    }
+
+    // The output takes its level, context, and error parameters from the
+    // first filter ciphertext.
+    SymmetricCtVariant<T> const* ref_ct_var = ct_vars[0];
+    absl::Span<Modulus const* const> moduli = ref_ct_var->ct.Moduli();
+    double const b_plaintext = ref_ct_var->ct.ErrorParams()->B_plaintext();
+    auto zeros = [&](size_t n) -> StatusOr<std::vector<RnsPolynomial>> {
+      std::vector<RnsPolynomial> polys;
+      polys.reserve(n);
+      for (size_t i = 0; i < n; ++i) {
+        TF_ASSIGN_OR_RETURN(RnsPolynomial zero,
+                            RnsPolynomial::CreateZero(log_n, moduli));
+        polys.push_back(std::move(zero));
+      }
+      return polys;
+    };
+
+    int64_t const num_tiles_h = (out_height + kWinogradOut - 1) / kWinogradOut;
+    int64_t const num_tiles_w = (out_width + kWinogradOut - 1) / kWinogradOut;
+    int64_t const num_chunks_h =
+        (filter_height + kWinogradTaps - 1) / kWinogradTaps;
+    int64_t const num_chunks_w =
+        (filter_width + kWinogradTaps - 1) / kWinogradTaps;
+    int64_t const num_chunks = num_chunks_h * num_chunks_w;
+
+    // Transform every 2x2 chunk of the filter, once for all tiles. Entries
+    // which only see taps past the edge of the filter are left empty.
+    struct TransformedCt {
+      std::vector<RnsPolynomial> components;
+      double error = 0;
+    };
+    std::vector<std::array<TransformedCt, kTileSize>> filter_tiles(
+        num_chunks * filter_in_channels * filter_out_channels);
+    auto transform_filter = [&](int64_t start, int64_t end) {
+      for (int64_t f = start; f < end; ++f) {
+        int64_t const o = f % filter_out_channels;
+        int64_t const k = (f / filter_out_channels) % filter_in_channels;
+        int64_t const chunk = f / (filter_out_channels * filter_in_channels);
+        int64_t const i0 = (chunk / num_chunks_w) * kWinogradTaps;
+        int64_t const j0 = (chunk % num_chunks_w) * kWinogradTaps;
+
+        for (int a = 0; a < kWinogradTile; ++a) {
+          for (int b = 0; b < kWinogradTile; ++b) {
+            TransformedCt& entry = filter_tiles[f][a * kWinogradTile + b];
+            for (int p = 0; p < kWinogradTaps; ++p) {
+              for (int q = 0; q < kWinogradTaps; ++q) {
+                int const coef = kWinogradFilter[a][p] * kWinogradFilter[b][q];
+                if (coef == 0 || i0 + p >= filter_height ||
+                    j0 + q >= filter_width) {
+                  continue;
+                }
+                int64_t const ct_index =
+                    (((i0 + p) * filter_width + j0 + q) * filter_in_channels +
+                     k) *
+                        filter_out_channels +
+                    o;
+                std::vector<RnsPolynomial> const& components =
+                    ct_components[ct_index];
+                if (entry.components.empty()) {
+                  OP_REQUIRES_VALUE(entry.components, op_ctx,
+                                    zeros(components.size()));
+                }
+                OP_REQUIRES(
+                    op_ctx, components.size() == entry.components.size(),
+                    InvalidArgument("Ciphertexts must all have the same "
+                                    "degree."));
+                for (size_t m = 0; m < components.size(); ++m) {
+                  OP_REQUIRES_OK(
+                      op_ctx, AddMultipleInPlace(entry.components[m],
+                                                 components[m], coef, moduli));
+                }
+                entry.error += ct_vars[ct_index]->ct.Error();
+              }
+            }
+          }
+        }
+      }
+    };
+    thread_pool->ParallelFor(
+        filter_tiles.size(),
+        kTileSize * kWinogradTaps * kWinogradTaps * num_slots * num_moduli,
+        transform_filter);
+    if (!op_ctx->status().ok()) {
+      return;
+    }
+
+    // Transform the 4x4 input tile under every (output tile, filter chunk)
+    // pair, one channel at a time. Rows then columns, since the transform is
+    // separable. The padding is zero and does not contribute.
+    std::vector<std::vector<RnsPolynomial>> input_tiles(
+        num_tiles_h * num_tiles_w * num_chunks * in_channels);
+    auto transform_input = [&](int64_t start, int64_t end) {
+      for (int64_t t = start; t < end; ++t) {
+        int64_t const c = t % in_channels;
+        int64_t const chunk = (t / in_channels) % num_chunks;
+        int64_t const tile = t / (in_channels * num_chunks);
+        int64_t const h0 = h_start + (tile / num_tiles_w) * kWinogradOut +
+                           (chunk / num_chunks_w) * kWinogradTaps;
+        int64_t const w0 = w_start + (tile % num_tiles_w) * kWinogradOut +
+                           (chunk % num_chunks_w) * kWinogradTaps;
+
+        OP_REQUIRES_VALUE(std::vector<RnsPolynomial> rows, op_ctx,
+                          zeros(kTileSize));
+        for (int r = 0; r < kWinogradTile; ++r) {
+          int64_t const in_i = h0 + r;
+          if (in_i < 0 || in_i >= height) {
+            continue;
+          }
+          for (int s = 0; s < kWinogradTile; ++s) {
+            int64_t const in_j = w0 + s;
+            if (in_j < 0 || in_j >= width) {
+              continue;
+            }
+            RnsPolynomial const& d =
+                *pt_polys[(in_i * width + in_j) * in_channels + c];
+            for (int b = 0; b < kWinogradTile; ++b) {
+              OP_REQUIRES_OK(op_ctx,
+                             AddMultipleInPlace(rows[r * kWinogradTile + b], d,
+                                                kWinogradInput[b][s], moduli));
+            }
+          }
+        }
+
+        OP_REQUIRES_VALUE(input_tiles[t], op_ctx, zeros(kTileSize));
+        for (int a = 0; a < kWinogradTile; ++a) {
+          for (int r = 0; r < kWinogradTile; ++r) {
+            for (int b = 0; b < kWinogradTile; ++b) {
+              OP_REQUIRES_OK(op_ctx, AddMultipleInPlace(
+                                         input_tiles[t][a * kWinogradTile + b],
+                                         rows[r * kWinogradTile + b],
+                                         kWinogradInput[a][r], moduli));
+            }
+          }
+        }
+      }
+    };
+    thread_pool->ParallelFor(input_tiles.size(),
+                             3 * kTileSize * num_slots * num_moduli,
+                             transform_input);
+    if (!op_ctx->status().ok()) {
+      return;
+    }
+
+    // Multiply the transformed filter and input tiles elementwise, summing
+    // over the filter chunks and in channels, then transform the 4x4 sum back
+    // to a 3x3 tile of the output.
+    auto convolve_in_range = [&](int64_t start, int64_t end) {
+      for (int64_t out = start; out < end; ++out) {
+        int64_t const o = out % filter_out_channels;
+        int64_t const oc = (out / filter_out_channels) % out_channels;
+        int64_t const tile = out / (filter_out_channels * out_channels);
+
+        std::array<std::vector<RnsPolynomial>, kTileSize> sums;
+        std::array<double, kTileSize> sum_errors{};
+        size_t num_components = 0;
+        for (int64_t chunk = 0; chunk < num_chunks; ++chunk) {
+          for (int64_t k = 0; k < filter_in_channels; ++k) {
+            auto const& filter_tile =
+                filter_tiles[(chunk * filter_in_channels + k) *
+                                 filter_out_channels +
+                             o];
+            auto const& input_tile =
+                input_tiles[(tile * num_chunks + chunk) * in_channels + oc + k];
+            for (int e = 0; e < kTileSize; ++e) {
+              TransformedCt const& u = filter_tile[e];
+              if (u.components.empty()) {
+                continue;
+              }
+              if (sums[e].empty()) {
+                OP_REQUIRES_VALUE(sums[e], op_ctx, zeros(u.components.size()));
+                num_components = u.components.size();
+              }
+              for (size_t m = 0; m < u.components.size(); ++m) {
+                OP_REQUIRES_OK(op_ctx,
+                               sums[e][m].FusedMulAddInPlace(
+                                   u.components[m], input_tile[e], moduli));
+              }
+              sum_errors[e] += u.error * b_plaintext *
+                               kWinogradInputNorm[e / kWinogradTile] *
+                               kWinogradInputNorm[e % kWinogradTile];
+            }
+          }
+        }
+
+        int64_t const oh0 = (tile / num_tiles_w) * kWinogradOut;
+        int64_t const ow0 = (tile % num_tiles_w) * kWinogradOut;
+        for (int a = 0; a < kWinogradOut; ++a) {
+          for (int b = 0; b < kWinogradOut; ++b) {
+            if (oh0 + a >= out_height || ow0 + b >= out_width) {
+              continue;
+            }
+            OP_REQUIRES_VALUE(std::vector<RnsPolynomial> components, op_ctx,
+                              zeros(num_components));
+            double error = 0;
+            for (int e = 0; e < kTileSize; ++e) {
+              int const coef = kWinogradOutput[a][e / kWinogradTile] *
+                               kWinogradOutput[b][e % kWinogradTile];
+              if (coef == 0 || sums[e].empty()) {
+                continue;
+              }
+              for (size_t m = 0; m < num_components; ++m) {
+                OP_REQUIRES_OK(
+                    op_ctx, AddMultipleInPlace(components[m], sums[e][m], coef,
+                                               moduli));
+              }
+              error += sum_errors[e];
+            }
+
+            std::vector<Modulus const*> moduli_vector(moduli.begin(),
+                                                      moduli.end());
+            SymmetricCt result(std::move(components), std::move(moduli_vector),
+                               ref_ct_var->ct.PowerOfS(), error,
+                               ref_ct_var->ct.ErrorParams());
+            SymmetricCtVariant<T> result_var(std::move(result),
+                                             ref_ct_var->ct_context,
+                                             ref_ct_var->error_params);
+            flat_output(
+                (((oh0 + a) * out_width + ow0 + b) * out_channels + oc) *
+                    filter_out_channels +
+                o) = std::move(result_var);
+          }
+        }
+      }
+    };
+
+    int const cost = 8 * num_chunks * filter_in_channels * kTileSize *
+                     num_slots * num_moduli;  // ns measured on log_n = 11
+    thread_pool->ParallelFor(
+        num_tiles_h * num_tiles_w * out_channels * filter_out_channels, cost,
+        convolve_in_range);
+  }
 };
 
 // This Op can multiply either a shell ciphertext or a plaintext polynomial by
@@ -378,6 +975,12 @@ class Conv2dTransposeOp : public OpKernel {
   using Context = rlwe::RnsContext<ModularInt>;
   using ErrorParams = rlwe::RnsErrorParams<ModularInt>;
 
+  // When FilterCtOrPoly is an integer type, the filter is a TensorFlow tensor
+  // of scalars shared by every slot in the batch.
+  static constexpr bool filter_is_scalar =
+      std::is_integral<FilterCtOrPoly>::value;
+  using FilterVal = std::conditional_t<filter_is_scalar, T, FilterCtOrPoly>;
+
   std::vector<tsl::int32> stride;
   std::vector<tsl::int32> padding;
   std::vector<tsl::int32> dilation;
@@ -444,8 +1047,26 @@ class Conv2dTransposeOp : public OpKernel {
     int64_t const filter_width = filter.dim_size(1);
     int64_t const filter_out_channels = filter.dim_size(2);
     int64_t const filter_in_channels = filter.dim_size(3);
-    auto shaped_filter = filter.shaped<Variant, 4>(
-        {filter_height, filter_width, filter_out_channels, filter_in_channels});
+
+    // Scalar filters are encoded once up front. Otherwise, the filter holds
+    // one plaintext or ciphertext per element.
+    std::vector<T> wrapped_filter;
+    if constexpr (filter_is_scalar) {
+      OP_REQUIRES_VALUE(
+          wrapped_filter, op_ctx,
+          (EncodeFilterScalars<T, FilterCtOrPoly>(filter, shell_ctx_var)));
+    }
+    auto filter_at = [&](int64_t i, int64_t j, int64_t o,
+                         int64_t k) -> FilterVal const* {
+      int64_t const index = ((i * filter_width + j) * filter_out_channels + o) *
+                                filter_in_channels +
+                            k;
+      if constexpr (filter_is_scalar) {
+        return &wrapped_filter[index];
+      } else {
+        return filter.flat<Variant>()(index).template get<FilterCtOrPoly>();
+      }
+    };
 
     if constexpr (!AllowDifferentNumInChannels) {
       OP_REQUIRES(
@@ -557,7 +1178,7 @@ class Conv2dTransposeOp : public OpKernel {
               // first result of i=0, j=0, k=0.
               SymmetricCt* dot_product = nullptr;
               InputCtOrPoly const* x_val = nullptr;
-              FilterCtOrPoly const* filter_val = nullptr;
+              FilterVal const* filter_val = nullptr;
 
               for (int64_t i = 0; i < filter_height; ++i) {
                 for (int64_t j = 0; j < filter_width; ++j) {
@@ -591,8 +1212,7 @@ class Conv2dTransposeOp : public OpKernel {
                     } else {
                       f_k = k;
                     }
-                    filter_val =
-                        shaped_filter(f_i, f_j, o, f_k).get<FilterCtOrPoly>();
+                    filter_val = filter_at(f_i, f_j, o, f_k);
 
                     // Multiply
                     OP_REQUIRES_VALUE(SymmetricCt mul, op_ctx,
@@ -616,7 +1236,7 @@ class Conv2dTransposeOp : public OpKernel {
               // itself to get a zero.
               if (dot_product == nullptr) {
                 x_val = shaped_x(0, 0, 0).get<InputCtOrPoly>();
-                filter_val = shaped_filter(0, 0, 0, 0).get<FilterCtOrPoly>();
+                filter_val = filter_at(0, 0, 0, 0);
                 if constexpr (std::is_same<InputCtOrPoly,
                                            SymmetricCtVariant<T>>::value) {
                   dot_product = new SymmetricCt(x_val->ct);  // copy
@@ -678,6 +1298,7 @@ class MaxUnpool2dCtOp : public OpKernel {
   using Context = rlwe::RnsContext<ModularInt>;
   using ErrorParams = rlwe::RnsErrorParams<ModularInt>;
   using Encoder = rlwe::FiniteFieldEncoder<ModularInt>;
+  using Modulus = rlwe::PrimeModulus<ModularInt>;
 
   std::vector<tsl::int32> pool_size;
   std::vector<tsl::int32> stride;
@@ -764,6 +1385,13 @@ class MaxUnpool2dCtOp : public OpKernel {
     auto shaped_argmax = argmax.shaped<int64_t, 4>(
         {argmax_batch, argmax_height, argmax_width, argmax_channels});
 
+    OP_REQUIRES(op_ctx,
+                argmax_height == height && argmax_width == width &&
+                    argmax_channels == channels,
+                InvalidArgument("Argmax shape must match the shape of x."));
+    OP_REQUIRES(op_ctx, x.NumElements() > 0,
+                InvalidArgument("Input x must not be empty."));
+
     // int64_t const out_batch = output_shape[0];
     int64_t const out_height = output_shape[1];
     int64_t const out_width = output_shape[2];
@@ -778,123 +1406,200 @@ class MaxUnpool2dCtOp : public OpKernel {
     auto shaped_output =
         output->shaped<Variant, 3>({out_height, out_width, out_channels});
 
-    // Perform the convolution by sliding over the input tensor. Parallelization
-    // is difficult because the same output indices may be written to by
-    // consecutive h and w loops.
-    for (int64_t h = 0; h < out_height; h += stride_height) {
-      for (int64_t w = 0; w < out_width; w += stride_width) {
-        for (int64_t c = 0; c < out_channels; c += 1) {
-          // For each patch starting position, multiply the pool patch by
-          // a selection vector.
-          std::vector<uint64_t> selection(num_slots);
-
-          // Iterate over patches of the input tensor of shape:
-          // [batch_sz (implicit), pool_height, pool_width, channel].
-          // Unpool the max value in each patch to the output tensor.
-          for (int64_t i = 0; i < pool_height; ++i) {
-            for (int64_t j = 0; j < pool_width; ++j) {
-              // Inner padding corresponds to an offset between the argmax
-              // index vs the output and selection indices.
-              int64_t const argmax_i = h / stride_height;
-              int64_t const argmax_j = w / stride_width;
-              int64_t const out_i = h - padding_top + i;
-              int64_t const out_j = w - padding_left + j;
-
-              // When the pool kernel runs off the edge of the input.
-              if (out_i < 0 || out_i >= out_height || out_j < 0 ||
-                  out_j >= out_width) {
-                continue;
-              }
+    auto thread_pool =
+        op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
 
-              // When the output shape is larger than the input, the selection
-              // indices will be out of bounds at the outer edges. These
-              // outputs must be zero but SHELL does not support creating zero
-              // valued ciphertexts. While SHELL has "CreateZero", subsequent
-              // operations e.g. AddInPlace fail because the ciphertext degree
-              // does not match the other argument. Therefore, we take the
-              // last valid ciphertext input and multiply by zero.
-              if (argmax_i < 0 || argmax_i >= argmax_height || argmax_j < 0 ||
-                  argmax_j >= argmax_width) {
-                if (!shaped_output(out_i, out_j, c).is_empty()) {
-                  continue;  // Already set.
-                }
-                // Get any valid input ciphertext.
-                SymmetricCtVariant<T> const* x_val =
-                    shaped_x(0, 0, 0).get<SymmetricCtVariant<T>>();
+    // Each element of x is the max of one pool patch. First, decode every
+    // input and count, over the slots, how often each output index is the
+    // argmax of the patch. A count of zero means the selection vector for
+    // that output is all zeros and a count of num_slots means it is all ones,
+    // neither of which needs to be encoded or multiplied.
+    auto flat_x = x.flat<Variant>();
+    int64_t const num_patches = flat_x.size();
+    std::vector<SymmetricCtVariant<T> const*> x_vars(num_patches);
+    std::vector<std::vector<RnsPolynomial>> x_components(num_patches);
+    std::vector<std::vector<std::pair<int64_t, int64_t>>> argmax_counts(
+        num_patches);
+    auto count_in_range = [&](int64_t start, int64_t end) {
+      for (int64_t p = start; p < end; ++p) {
+        SymmetricCtVariant<T> const* x_val =
+            flat_x(p).get<SymmetricCtVariant<T>>();
+        OP_REQUIRES(op_ctx, x_val != nullptr,
+                    InvalidArgument("SymmetricCtVariant at flat index: ", p,
+                                    " did not unwrap successfully."));
+        OP_REQUIRES_OK(
+            op_ctx,
+            const_cast<SymmetricCtVariant<T>*>(x_val)->MaybeLazyDecode(
+                shell_ctx_var->ct_context_, shell_ctx_var->error_params_));
+        x_vars[p] = x_val;
+        x_components[p].reserve(x_val->ct.Len());
+        for (int k = 0; k < x_val->ct.Len(); ++k) {
+          OP_REQUIRES_VALUE(RnsPolynomial component, op_ctx,
+                            x_val->ct.Component(k));
+          x_components[p].push_back(std::move(component));
+        }
 
-                // Multiply by 0.
-                SymmetricCt mul = x_val->ct;
-                OP_REQUIRES_OK(op_ctx, mul.AbsorbInPlace(0));
+        int64_t const argmax_i = p / (width * channels);
+        int64_t const argmax_j = (p / channels) % width;
+        int64_t const c = p % channels;
+        auto& counts = argmax_counts[p];
+        for (int64_t b = 0; b < num_slots; ++b) {
+          int64_t const index = shaped_argmax(b, argmax_i, argmax_j, c);
+          // A patch only has pool_height * pool_width candidates, so a linear
+          // search is cheap.
+          auto it =
+              std::find_if(counts.begin(), counts.end(),
+                           [&](auto const& e) { return e.first == index; });
+          if (it == counts.end()) {
+            counts.emplace_back(index, 1);
+          } else {
+            ++it->second;
+          }
+        }
+      }
+    };
+    thread_pool->ParallelFor(num_patches, 10 * num_slots, count_in_range);
+    if (!op_ctx->status().ok()) {
+      return;
+    }
 
-                SymmetricCtVariant<T> result_var(
-                    std::move(mul), x_val->ct_context, x_val->error_params);
-                shaped_output(out_i, out_j, c) = std::move(result_var);
-                continue;
-              }
+    // Next, compute every output element from the patches which cover it.
+    // Unlike sliding the pool over the input, each output element is written
+    // by exactly one thread, so the outputs can be computed in parallel. The
+    // masked inputs are accumulated into the output components with a fused
+    // multiply-add instead of allocating a ciphertext per patch.
+    SymmetricCtVariant<T> const* ref_x_val = x_vars[0];
+    absl::Span<Modulus const* const> moduli = ref_x_val->ct.Moduli();
+    int const log_n = shell_ctx_var->log_n_;
+    size_t const num_components = ref_x_val->ct.Len();
+    double const b_plaintext = ref_x_val->ct.ErrorParams()->B_plaintext();
+
+    auto unpool_in_range = [&](int64_t start, int64_t end) {
+      std::vector<uint64_t> selection(num_slots);
+      for (int64_t out = start; out < end; ++out) {
+        int64_t const out_i = out / (out_width * out_channels);
+        int64_t const out_j = (out / out_channels) % out_width;
+        int64_t const c = out % out_channels;
+        int64_t const output_index = (out_i * out_width + out_j) * channels + c;
+
+        bool covered = false;
+        std::vector<RnsPolynomial> sum;
+        double error = 0;
+        auto accumulate = [&](int64_t p, RnsPolynomial const* mask) -> Status {
+          if (sum.empty()) {
+            for (size_t k = 0; k < num_components; ++k) {
+              TF_ASSIGN_OR_RETURN(RnsPolynomial zero,
+                                  RnsPolynomial::CreateZero(log_n, moduli));
+              sum.push_back(std::move(zero));
+            }
+          }
+          std::vector<RnsPolynomial> const& components = x_components[p];
+          if (TF_PREDICT_FALSE(components.size() != num_components)) {
+            return InvalidArgument(
+                "Ciphertexts must all have the same degree.");
+          }
+          for (size_t k = 0; k < num_components; ++k) {
+            RnsPolynomial const& component = components[k];
+            if (mask == nullptr) {
+              TF_RETURN_IF_ERROR(sum[k].AddInPlace(component, moduli));
+            } else {
+              TF_RETURN_IF_ERROR(
+                  sum[k].FusedMulAddInPlace(component, *mask, moduli));
+            }
+          }
+          double const x_error = x_vars[p]->ct.Error();
+          error += mask == nullptr ? x_error : x_error * b_plaintext;
+          return OkStatus();
+        };
+
+        // The pool patches which start at multiples of the stride and whose
+        // window, shifted by the padding, contains this output element.
+        int64_t const h_first =
+            std::max<int64_t>(0, out_i + padding_top - pool_height + 1);
+        int64_t const w_first =
+            std::max<int64_t>(0, out_j + padding_left - pool_width + 1);
+        int64_t const h_last =
+            std::min<int64_t>(out_height - 1, out_i + padding_top);
+        int64_t const w_last =
+            std::min<int64_t>(out_width - 1, out_j + padding_left);
+        for (int64_t h =
+                 (h_first + stride_height - 1) / stride_height * stride_height;
+             h <= h_last; h += stride_height) {
+          for (int64_t w =
+                   (w_first + stride_width - 1) / stride_width * stride_width;
+               w <= w_last; w += stride_width) {
+            covered = true;
+            int64_t const argmax_i = h / stride_height;
+            int64_t const argmax_j = w / stride_width;
+
+            // When the output shape is larger than the input, the patches at
+            // the outer edges have no input and contribute zero.
+            if (argmax_i >= argmax_height || argmax_j >= argmax_width) {
+              continue;
+            }
 
-              // Create a selection vector which is 1 if argmax matches this
-              // index and 0 otherwise.
-              bool at_least_one_selection = false;
-              for (int64_t b = 0; b < num_slots; ++b) {
-                int64_t const output_index =
-                    ((out_i)*out_width + (out_j)) * channels + c;
-                bool match =
-                    shaped_argmax(b, argmax_i, argmax_j, c) == output_index;
-                // TensorFlow as a bug where argmax may exceed the size of the
-                // input tensor. This is a workaround.
-                // int64_t const argmax_val =
-                //     shaped_argmax(b, argmax_i, argmax_j, c);
-                // int64_t const tf_i = argmax_val / (out_width * channels);
-                // int64_t const tf_j = (argmax_val / channels) % out_width;
-                // int64_t const tf_c = argmax_val % channels;
-                // bool match = tf_i == out_i && tf_j == out_j;
-
-                selection[b] = match;
-                at_least_one_selection |= match;
-              }
-              auto cur_output =
-                  shaped_output(out_i, out_j, c).get<SymmetricCtVariant<T>>();
-              if (!at_least_one_selection && cur_output != nullptr) {
-                // Only skip if the selection vector is all zeros and the output
-                // is not already set. This prevents leaving empty outputs.
-                continue;
-              }
+            int64_t const p = (argmax_i * width + argmax_j) * channels + c;
+            auto const& counts = argmax_counts[p];
+            auto it = std::find_if(
+                counts.begin(), counts.end(),
+                [&](auto const& e) { return e.first == output_index; });
+            if (it == counts.end()) {
+              continue;  // Not the max of this patch in any slot.
+            }
 
-              // Encode the selection as a polynomial.
-              OP_REQUIRES_VALUE(
-                  RnsPolynomial selection_poly, op_ctx,
-                  encoder->EncodeBgv(selection, shell_ctx->MainPrimeModuli()));
+            if (it->second == num_slots) {
+              // The max in every slot, no mask needed.
+              OP_REQUIRES_OK(op_ctx, accumulate(p, nullptr));
+              continue;
+            }
 
-              // Get the input ciphertext.
-              SymmetricCtVariant<T> const* x_val =
-                  shaped_x(argmax_i, argmax_j, c).get<SymmetricCtVariant<T>>();
-              OP_REQUIRES(op_ctx, x_val != nullptr,
-                          InvalidArgument("Ciphertext input x is null."));
-              OP_REQUIRES_OK(
-                  op_ctx,
-                  const_cast<SymmetricCtVariant<T>*>(x_val)->MaybeLazyDecode(
-                      shell_ctx_var->ct_context_,
-                      shell_ctx_var->error_params_));
-
-              // Multiply the input by the selection polynomial.
-              SymmetricCt mul = x_val->ct;
-              OP_REQUIRES_OK(op_ctx, mul.AbsorbInPlace(selection_poly));
-
-              if (cur_output == nullptr) {
-                // If the output at this position has not yet been set,
-                // create it.
-                SymmetricCtVariant<T> result_var(
-                    std::move(mul), x_val->ct_context, x_val->error_params);
-                shaped_output(out_i, out_j, c) = std::move(result_var);
-              } else {
-                // If the output is already set, add to it.
-                OP_REQUIRES_OK(op_ctx, cur_output->ct.AddInPlace(mul));
-              }
+            // Create a selection vector which is 1 if argmax matches this
+            // index and 0 otherwise, and encode it as a polynomial.
+            for (int64_t b = 0; b < num_slots; ++b) {
+              selection[b] =
+                  shaped_argmax(b, argmax_i, argmax_j, c) == output_index;
             }
-          }  // End patch
+            OP_REQUIRES_VALUE(
+                RnsPolynomial selection_poly, op_ctx,
+                encoder->EncodeBgv(selection, shell_ctx->MainPrimeModuli()));
+            OP_REQUIRES_OK(op_ctx, accumulate(p, &selection_poly));
+          }
+        }
+
+        // Outputs not covered by any patch are left empty, as before.
+        if (!covered) {
+          continue;
         }
+
+        // Outputs which are never the max are zero. SHELL cannot encrypt a
+        // zero without the key, so use all-zero components with the level
+        // and parameters of the first input.
+        if (sum.empty()) {
+          for (size_t k = 0; k < num_components; ++k) {
+            OP_REQUIRES_VALUE(RnsPolynomial zero, op_ctx,
+                              RnsPolynomial::CreateZero(log_n, moduli));
+            sum.push_back(std::move(zero));
+          }
+        }
+
+        std::vector<Modulus const*> moduli_vector(moduli.begin(), moduli.end());
+        SymmetricCt result(std::move(sum), std::move(moduli_vector),
+                           ref_x_val->ct.PowerOfS(), error,
+                           ref_x_val->ct.ErrorParams());
+        SymmetricCtVariant<T> result_var(
+            std::move(result), ref_x_val->ct_context, ref_x_val->error_params);
+        shaped_output(out_i, out_j, c) = std::move(result_var);
       }
-    }
+    };
+
+    int64_t const patches_per_output =
+        ((pool_height + stride_height - 1) / stride_height) *
+        ((pool_width + stride_width - 1) / stride_width);
+    int64_t const num_moduli = moduli.size();
+    int const cost = 20 * patches_per_output * num_slots *
+                     num_moduli;  // ns measured on log_n = 11
+    thread_pool->ParallelFor(out_height * out_width * out_channels, cost,
+                             unpool_in_range);
   }
 };
 
@@ -930,6 +1635,18 @@ REGISTER_KERNEL_BUILDER(Name("Conv2dTransposeCtPt64").Device(DEVICE_CPU),
                         Conv2dTransposeOp<uint64, SymmetricCtVariant<uint64_t>,
                                           PolynomialVariant<uint64>, false>);
 
+REGISTER_KERNEL_BUILDER(
+    Name("Conv2dTransposeCtTfScalar64")
+        .Device(DEVICE_CPU)
+        .TypeConstraint<uint64>("Dtype"),
+    Conv2dTransposeOp<uint64, SymmetricCtVariant<uint64_t>, uint64, false>);
+
+REGISTER_KERNEL_BUILDER(
+    Name("Conv2dTransposeCtTfScalar64")
+        .Device(DEVICE_CPU)
+        .TypeConstraint<int64>("Dtype"),
+    Conv2dTransposeOp<uint64, SymmetricCtVariant<uint64_t>, int64, false>);
+
 REGISTER_KERNEL_BUILDER(Name("Conv2dTransposeCtCt64").Device(DEVICE_CPU),
                         Conv2dTransposeOp<uint64, SymmetricCtVariant<uint64_t>,
                                           SymmetricCtVariant<uint64_t>, false>);
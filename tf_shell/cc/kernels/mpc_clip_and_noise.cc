@@ -12,6 +12,15 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+#include <algorithm>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <optional>
+#include <string>
+#include <vector>
+
+#include "absl/strings/str_join.h"
 #include "emp-sh2pc/emp-sh2pc.h"
 #include "emp-tool/emp-tool.h"
 #include "emp-tool/io/net_io_channel.h"
@@ -35,59 +44,379 @@ int const FEATURES_PARTY = emp::BOB;  // Bob is the evaluator.
 int const LABELS_PARTY = emp::ALICE;  // Alice is the garbler.
 constexpr bool const debug = false;
 
+// EMP stores the active protocol in process-wide globals
+// (CircuitExecution::circ_exec and ProtocolExecution::prot_exec), so only one
+// MPC protocol may run at a time. This mutex serializes all clip and noise
+// kernels in the process.
+std::mutex mpc_mutex;
+
+// An established network connection and semi-honest protocol state which can
+// be reused across op invocations (i.e. training steps) to avoid reconnecting
+// and re-running the base OTs each time.
+struct MpcSession {
+  NetIO* io;
+  CircuitExecution* circ_exec;
+  ProtocolExecution* prot_exec;
+  uint64_t last_used = 0;  // Only tracked for persistent sessions.
+};
+
+// Tears down the session's protocol state and closes its connection. The
+// caller must hold mpc_mutex.
+void CloseSession(MpcSession& session) {
+  // finalize_semi_honest() deletes the active protocol state, so reinstate the
+  // session's first.
+  CircuitExecution::circ_exec = session.circ_exec;
+  ProtocolExecution::prot_exec = session.prot_exec;
+  finalize_semi_honest();
+  session.io->flush();
+  delete session.io;
+}
+
+// The most persistent sessions kept open at once. Each holds a socket and the
+// protocol's OT state, so the least recently used session is closed when a new
+// one would exceed the limit. Both parties see the same sequence of sessions
+// and so evict the same one.
+constexpr size_t const kMaxMpcSessions = 8;
+
+// Persistent sessions, keyed by party, host, and port. Any still open are
+// closed when the process exits. Guarded by mpc_mutex.
+struct MpcSessionCache {
+  std::map<std::string, MpcSession> sessions;
+  uint64_t clock = 0;
+
+  ~MpcSessionCache() {
+    for (auto& [key, session] : sessions) {
+      CloseSession(session);
+    }
+  }
+
+  // Closes the least recently used session.
+  void EvictOldest() {
+    auto oldest = sessions.begin();
+    for (auto it = sessions.begin(); it != sessions.end(); ++it) {
+      if (it->second.last_used < oldest->second.last_used) {
+        oldest = it;
+      }
+    }
+    if constexpr (debug) {
+      std::cout << "Closing MPC session " << oldest->first << std::endl;
+    }
+    CloseSession(oldest->second);
+    sessions.erase(oldest);
+  }
+};
+MpcSessionCache mpc_sessions;
+
+// Returns a session for the given party connected to the peer. When
+// `reuse_connection` is true, the session is looked up in (or added to) the
+// cache of persistent sessions. Otherwise a fresh session is created and must
+// be released with `ReleaseSession`. The caller must hold mpc_mutex.
+MpcSession AcquireSession(int party, std::string const& host, int port,
+                          bool reuse_connection) {
+  std::string key =
+      std::to_string(party) + ":" + host + ":" + std::to_string(port);
+  if (reuse_connection) {
+    auto it = mpc_sessions.sessions.find(key);
+    if (it != mpc_sessions.sessions.end()) {
+      // Reinstate the protocol state of the cached session.
+      it->second.last_used = ++mpc_sessions.clock;
+      CircuitExecution::circ_exec = it->second.circ_exec;
+      ProtocolExecution::prot_exec = it->second.prot_exec;
+      return it->second;
+    }
+    if (mpc_sessions.sessions.size() >= kMaxMpcSessions) {
+      mpc_sessions.EvictOldest();
+    }
+  }
+
+  if constexpr (debug) {
+    std::cout << (party == FEATURES_PARTY ? "FEATURES_PARTY connecting to "
+                                          : "LABELS_PARTY serving on ")
+              << host << ":" << port << std::endl;
+  }
+  NetIO* io = new NetIO(party == FEATURES_PARTY ? host.c_str() : nullptr, port);
+  setup_semi_honest(io, party);
+  if constexpr (debug) {
+    std::cout << "Party " << party << " connected" << std::endl;
+  }
+
+  MpcSession session{io, CircuitExecution::circ_exec,
+                     ProtocolExecution::prot_exec};
+  if (reuse_connection) {
+    session.last_used = ++mpc_sessions.clock;
+    mpc_sessions.sessions[key] = session;
+  }
+  return session;
+}
+
+// Flushes the session's network buffers. If the session is not persistent, the
+// protocol state and the connection are torn down. The caller must hold
+// mpc_mutex.
+void ReleaseSession(MpcSession& session, bool reuse_connection) {
+  if (reuse_connection) {
+    session.io->flush();
+    return;
+  }
+  CloseSession(session);
+}
+
+// Sends this party's protocol parameters to the peer and compares them with
+// the peer's. Parties with different parameters would build different circuits
+// and desynchronize, so both abort instead. The caller must hold mpc_mutex.
+tensorflow::Status CheckPeerParams(MpcSession const& session, int party,
+                                   std::vector<int64_t> const& params) {
+  std::vector<int64_t> peer_params(params.size());
+  size_t const num_bytes = params.size() * sizeof(int64_t);
+  if (party == LABELS_PARTY) {
+    session.io->send_data(params.data(), num_bytes);
+    session.io->flush();
+    session.io->recv_data(peer_params.data(), num_bytes);
+  } else {
+    session.io->recv_data(peer_params.data(), num_bytes);
+    session.io->send_data(params.data(), num_bytes);
+    session.io->flush();
+  }
+  if (params != peer_params) {
+    return InvalidArgument(
+        "Clip and noise parameters (Bitwidth, number of elements, WindowSize, "
+        "GradBitwidth) differ between the parties: ",
+        absl::StrJoin(params, ", "), " vs. ", absl::StrJoin(peer_params, ", "));
+  }
+  return OkStatus();
+}
+
+// The parameters which determine the circuit, normalized as in ClipAndNoise().
+std::vector<int64_t> CircuitParams(int bitwidth, int grad_size, int window_size,
+                                   int grad_bitwidth) {
+  if (window_size <= 0 || window_size > grad_size) {
+    window_size = grad_size;
+  }
+  if (grad_bitwidth <= 0 || grad_bitwidth > bitwidth) {
+    grad_bitwidth = bitwidth;
+  }
+  return {bitwidth, grad_size, window_size, grad_bitwidth};
+}
+
+// Feeds `n` values of width `bitwidth` from `party` into the circuit with a
+// single call to the protocol, i.e. one batch of OTs for the evaluator's inputs
+// instead of one per element. The party which does not own the input passes
+// dummy values.
+template <typename T>
+void FeedBatch(int bitwidth, T const* values, int n, int party,
+               std::vector<Integer>& out) {
+  size_t num_bits = static_cast<size_t>(n) * bitwidth;
+  std::unique_ptr<bool[]> plain_bits(new bool[num_bits]);
+  for (int i = 0; i < n; ++i) {
+    uint64_t v = static_cast<uint64_t>(values[i]);
+    for (int b = 0; b < bitwidth; ++b) {
+      plain_bits[i * bitwidth + b] = (v >> b) & 1;  // LSB first, as EMP.
+    }
+  }
+
+  std::vector<block> labels(num_bits);
+  ProtocolExecution::prot_exec->feed(labels.data(), party, plain_bits.get(),
+                                     num_bits);
+
+  out.reserve(out.size() + n);
+  for (int i = 0; i < n; ++i) {
+    Integer x;
+    x.bits.reserve(bitwidth);
+    for (int b = 0; b < bitwidth; ++b) {
+      x.bits.emplace_back(labels[i * bitwidth + b]);
+    }
+    out.push_back(std::move(x));
+  }
+}
+
+// Reveals a batch of integers to the features party in a single round. On the
+// features party, the sign extended results are written to `results`.
+template <typename T, int Bitwidth, int Party>
+void RevealBatch(std::vector<Integer> const& values, T* results) {
+  size_t num_bits = values.size() * Bitwidth;
+  std::vector<block> labels(num_bits);
+  for (size_t i = 0; i < values.size(); ++i) {
+    for (int b = 0; b < Bitwidth; ++b) {
+      labels[i * Bitwidth + b] = values[i].bits[b].bit;
+    }
+  }
+
+  std::unique_ptr<bool[]> plain_bits(new bool[num_bits]);
+  ProtocolExecution::prot_exec->reveal(plain_bits.get(), FEATURES_PARTY,
+                                       labels.data(), num_bits);
+
+  if constexpr (Party == FEATURES_PARTY) {
+    for (size_t i = 0; i < values.size(); ++i) {
+      uint64_t v = 0;
+      for (int b = 0; b < Bitwidth; ++b) {
+        v |= static_cast<uint64_t>(plain_bits[i * Bitwidth + b]) << b;
+      }
+      T res = static_cast<T>(v);
+      // Sign extend manually.
+      res = (res << (sizeof(T) * 8 - Bitwidth)) >> (sizeof(T) * 8 - Bitwidth);
+      results[i] = res;
+    }
+  }
+}
+
+// Accumulates the squared L2-norm of a gradient with a balanced adder tree.
+// The partial sums are kept in a binary counter (one slot per tree level) so
+// only O(log n) partial sums are live at once, and each level is only one bit
+// wider than the level below it. When the gradient's range is known to fit in
+// `grad_bitwidth` bits, the squares are computed at 2 * `grad_bitwidth` bits
+// instead of `max_bitwidth`, which is where most of the AND gates go. Elements
+// outside of that range would be truncated, so the tree tracks whether any
+// element overflowed and the caller must then clip.
+class SquaredNormTree {
+ public:
+  SquaredNormTree(int grad_bitwidth, int max_bitwidth)
+      : grad_bitwidth_(grad_bitwidth),
+        square_bitwidth_(std::min(2 * grad_bitwidth, max_bitwidth)),
+        max_bitwidth_(max_bitwidth),
+        overflow_(false, PUBLIC) {}
+
+  // Squares `grad` (a `max_bitwidth` integer) at the reduced bitwidth and adds
+  // it to the tree.
+  void Add(Integer const& grad) {
+    // The element fits in grad_bitwidth bits iff the bits above are copies of
+    // its sign bit in grad_bitwidth bits.
+    Bit const& sign = grad.bits[grad_bitwidth_ - 1];
+    for (int b = grad_bitwidth_; b < max_bitwidth_; ++b) {
+      overflow_ = overflow_ | (grad.bits[b] ^ sign);
+    }
+
+    Integer x = grad;
+    x.resize(grad_bitwidth_, false);  // Truncate, exact if grad is in range.
+    x.resize(square_bitwidth_, true);
+    Insert(x * x, 0);
+  }
+
+  // Whether any element added so far does not fit in grad_bitwidth bits, in
+  // which case the squared norm is wrong.
+  Bit const& Overflow() const { return overflow_; }
+
+  // Folds the remaining levels together and returns the squared norm as a
+  // `max_bitwidth` integer.
+  Integer Result() {
+    Integer sum(max_bitwidth_, 0, PUBLIC);
+    for (auto& level : levels_) {
+      if (level.has_value()) {
+        level->resize(max_bitwidth_, false);
+        sum = sum + *level;
+      }
+    }
+    return sum;
+  }
+
+ private:
+  void Insert(Integer x, size_t level) {
+    while (true) {
+      if (levels_.size() <= level) {
+        levels_.resize(level + 1);
+      }
+      if (!levels_[level].has_value()) {
+        levels_[level] = std::move(x);
+        return;
+      }
+      // Squares are non-negative, so each sum of two partial sums needs at
+      // most one more bit than the wider of the two.
+      Integer& other = *levels_[level];
+      int width = std::min(std::max(x.size(), other.size()) + 1, max_bitwidth_);
+      x.resize(width, false);
+      other.resize(width, false);
+      x = x + other;
+      levels_[level].reset();
+      ++level;
+    }
+  }
+
+  int grad_bitwidth_;
+  int square_bitwidth_;
+  int max_bitwidth_;
+  Bit overflow_;
+  std::vector<std::optional<Integer>> levels_;
+};
+
+// Runs the clip and noise protocol over windows of `window_size` elements. The
+// inputs of each window are fed in a batch and the outputs of each window are
+// revealed in a single round. A `window_size` of 0 processes the entire
+// gradient as one window. The unmasked gradient elements should fit in
+// `grad_bitwidth` bits (two's complement), which sets the width of the
+// squared-norm computation. If one does not, the gradient is clipped
+// regardless of its norm. A `grad_bitwidth` of 0 uses the full `Bitwidth`.
 template <typename T, int Bitwidth, int Party>
 void ClipAndNoise(int grad_size, T const* masks, T const* masked_grads,
                   T clipping_threshold, T const* noises,
-                  T* features_party_results) {
+                  T* features_party_results, int window_size,
+                  int grad_bitwidth) {
+  if (window_size <= 0 || window_size > grad_size) {
+    window_size = grad_size;
+  }
+  if (grad_bitwidth <= 0 || grad_bitwidth > Bitwidth) {
+    grad_bitwidth = Bitwidth;
+  }
+
   Integer emp_clipping_threshold(Bitwidth, clipping_threshold, LABELS_PARTY);
 
-  Integer two_norm = Integer(Bitwidth, 0, PUBLIC);
+  SquaredNormTree norm_tree(grad_bitwidth, Bitwidth);
 
   // First unmask the gradient and calculate the L2-norm squared.
   std::vector<Integer> grads;
   grads.reserve(grad_size);
-  for (int i = 0; i < grad_size; ++i) {
-    Integer mask(Bitwidth, &masks[i], FEATURES_PARTY);
-    Integer masked_grad(Bitwidth, &masked_grads[i], LABELS_PARTY);
+  for (int start = 0; start < grad_size; start += window_size) {
+    int n = std::min(window_size, grad_size - start);
+
+    std::vector<Integer> emp_masks;
+    std::vector<Integer> emp_masked_grads;
+    FeedBatch<T>(Bitwidth, masks + start, n, FEATURES_PARTY, emp_masks);
+    FeedBatch<T>(Bitwidth, masked_grads + start, n, LABELS_PARTY,
+                 emp_masked_grads);
 
-    // Unmask the gradient.
-    grads.emplace_back(masked_grad - mask);
+    for (int i = 0; i < n; ++i) {
+      // Unmask the gradient.
+      grads.emplace_back(emp_masked_grads[i] - emp_masks[i]);
 
-    // Calculate the L2-norm squared.
-    two_norm = two_norm + (grads[i] * grads[i]);
+      // Calculate the L2-norm squared.
+      norm_tree.Add(grads.back());
+    }
+  }
+  Integer two_norm = norm_tree.Result();
+
+  // The clipping decision depends only on the norm, so compute it once. The
+  // norm is unknown if an element overflowed the reduced bitwidth, so clip.
+  Bit choose = two_norm.geq(emp_clipping_threshold) | norm_tree.Overflow();
+
+  if constexpr (debug && Party == FEATURES_PARTY) {
+    std::cout << "ClipAndNoise" << std::endl;
+    std::cout << " Ct: " << emp_clipping_threshold.reveal<T>(FEATURES_PARTY)
+              << std::endl;
+    std::cout << " Choose: " << choose.reveal<bool>(FEATURES_PARTY)
+              << std::endl;
+  } else if constexpr (debug) {
+    emp_clipping_threshold.reveal<T>(FEATURES_PARTY);
+    choose.reveal<bool>(FEATURES_PARTY);
   }
 
-  for (int i = 0; i < grad_size; ++i) {
-    Integer noise(Bitwidth, &noises[i], LABELS_PARTY);
+  for (int start = 0; start < grad_size; start += window_size) {
+    int n = std::min(window_size, grad_size - start);
 
-    // Clip the gradient.
-    Bit choose = two_norm.geq(emp_clipping_threshold);
-    // EMP NOTE: new value = falseValue.If(bool, trueValue)
-    Integer grad_or_threshold = grads[i].If(choose, emp_clipping_threshold);
+    std::vector<Integer> emp_noises;
+    FeedBatch<T>(Bitwidth, noises + start, n, LABELS_PARTY, emp_noises);
 
-    // Add noise.
-    Integer noised_grad = grad_or_threshold + noise;
-    T res = noised_grad.reveal<T>(FEATURES_PARTY);
-    if constexpr (Party == FEATURES_PARTY) {
-      // Sign extend manually.
-      res = (res << (sizeof(T) * 8 - Bitwidth)) >> (sizeof(T) * 8 - Bitwidth);
-      features_party_results[i] = res;
-    }
+    std::vector<Integer> noised_grads;
+    noised_grads.reserve(n);
+    for (int i = 0; i < n; ++i) {
+      // Clip the gradient.
+      // EMP NOTE: new value = falseValue.If(bool, trueValue)
+      Integer grad_or_threshold =
+          grads[start + i].If(choose, emp_clipping_threshold);
 
-    if constexpr (debug && Party == FEATURES_PARTY) {
-      std::cout << "ClipAndNoise" << std::endl;
-      std::cout << " Grad: " << res << std::endl;
-      std::cout << " Ct: " << emp_clipping_threshold.reveal<T>(FEATURES_PARTY)
-                << std::endl;
-      std::cout << " Choose: " << choose.reveal<bool>(FEATURES_PARTY)
-                << std::endl;
-      std::cout << " Grad_or_threshold: "
-                << grad_or_threshold.reveal<T>(FEATURES_PARTY) << std::endl;
-    } else if constexpr (debug) {
-      emp_clipping_threshold.reveal<T>(FEATURES_PARTY);
-      choose.reveal<bool>(FEATURES_PARTY);
-      grad_or_threshold.reveal<T>(FEATURES_PARTY);
+      // Add noise.
+      noised_grads.emplace_back(grad_or_threshold + emp_noises[i]);
     }
+
+    RevealBatch<T, Bitwidth, Party>(
+        noised_grads,
+        Party == FEATURES_PARTY ? features_party_results + start : nullptr);
   }
 }
 
@@ -96,32 +425,31 @@ class ClipAndNoiseFeaturesParty : public OpKernel {
  private:
   int port{0};
   std::string host{""};
+  bool reuse_connection{false};
+  int window_size{0};
+  int grad_bitwidth{0};
 
  public:
   explicit ClipAndNoiseFeaturesParty(OpKernelConstruction* op_ctx)
       : OpKernel(op_ctx) {
     OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("StartPort", &port));
     OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("LabelPartyHost", &host));
+    OP_REQUIRES_OK(op_ctx,
+                   op_ctx->GetAttr("ReuseConnection", &reuse_connection));
+    OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("WindowSize", &window_size));
+    OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("GradBitwidth", &grad_bitwidth));
 
     OP_REQUIRES(op_ctx, port > 0,
                 InvalidArgument("Port must be a positive integer"));
     OP_REQUIRES(op_ctx, !host.empty(),
                 InvalidArgument("Host must be a non-empty string"));
+    OP_REQUIRES(op_ctx, window_size >= 0,
+                InvalidArgument("Window size must be non-negative"));
+    OP_REQUIRES(op_ctx, grad_bitwidth >= 0 && grad_bitwidth <= Bitwidth,
+                InvalidArgument("Gradient bitwidth must be in [0, Bitwidth]"));
   }
 
   void Compute(OpKernelContext* op_ctx) override {
-    if constexpr (debug) {
-      std::cout << "FEATURES_PARTY connecting to " << this->host << ":" << port
-                << std::endl;
-    }
-    NetIO* io = new NetIO(this->host.c_str(), port);
-    OP_REQUIRES(op_ctx, io != nullptr,
-                InvalidArgument("Failed to create NetIO"));
-    setup_semi_honest(io, FEATURES_PARTY);
-    if constexpr (debug) {
-      std::cout << "FEATURES_PARTY connected" << std::endl;
-    }
-
     // Get the input tensors.
     Tensor const& masks_tensor = op_ctx->input(0);
     auto flat_masks = masks_tensor.flat<T>();
@@ -135,15 +463,23 @@ class ClipAndNoiseFeaturesParty : public OpKernel {
     // Setup dummy inputs for the MPC protocol.
     std::vector<T> zeros(num_masks, 0);
 
+    std::lock_guard<std::mutex> lock(mpc_mutex);
+    MpcSession session =
+        AcquireSession(FEATURES_PARTY, host, port, reuse_connection);
+    tensorflow::Status params_status = CheckPeerParams(
+        session, FEATURES_PARTY,
+        CircuitParams(Bitwidth, num_masks, window_size, grad_bitwidth));
+    if (!params_status.ok()) {
+      ReleaseSession(session, reuse_connection);
+    }
+    OP_REQUIRES_OK(op_ctx, params_status);
+
     // Run the MPC protocol.
-    ClipAndNoise<T, Bitwidth, FEATURES_PARTY>(num_masks, flat_masks.data(),
-                                              zeros.data(), 0, zeros.data(),
-                                              output->flat<T>().data());
+    ClipAndNoise<T, Bitwidth, FEATURES_PARTY>(
+        num_masks, flat_masks.data(), zeros.data(), 0, zeros.data(),
+        output->flat<T>().data(), window_size, grad_bitwidth);
 
-    finalize_semi_honest();
-    io->flush();
-    delete io;
-    return;
+    ReleaseSession(session, reuse_connection);
   }
 };
 
@@ -152,32 +488,31 @@ class ClipAndNoiseLabelsParty : public OpKernel {
  private:
   int port{0};
   std::string host{""};
+  bool reuse_connection{false};
+  int window_size{0};
+  int grad_bitwidth{0};
 
  public:
   explicit ClipAndNoiseLabelsParty(OpKernelConstruction* op_ctx)
       : OpKernel(op_ctx) {
     OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("StartPort", &port));
     OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("FeaturePartyHost", &host));
+    OP_REQUIRES_OK(op_ctx,
+                   op_ctx->GetAttr("ReuseConnection", &reuse_connection));
+    OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("WindowSize", &window_size));
+    OP_REQUIRES_OK(op_ctx, op_ctx->GetAttr("GradBitwidth", &grad_bitwidth));
 
     OP_REQUIRES(op_ctx, port > 0,
                 InvalidArgument("Port must be a positive integer"));
     OP_REQUIRES(op_ctx, !host.empty(),
                 InvalidArgument("Host must be a non-empty string"));
+    OP_REQUIRES(op_ctx, window_size >= 0,
+                InvalidArgument("Window size must be non-negative"));
+    OP_REQUIRES(op_ctx, grad_bitwidth >= 0 && grad_bitwidth <= Bitwidth,
+                InvalidArgument("Gradient bitwidth must be in [0, Bitwidth]"));
   }
 
   void Compute(OpKernelContext* op_ctx) override {
-    if constexpr (debug) {
-      std::cout << "LABELS_PARTY serving on " << this->host << ":" << port
-                << std::endl;
-    }
-    NetIO* io = new NetIO(nullptr, port);
-    OP_REQUIRES(op_ctx, io != nullptr,
-                InvalidArgument("Failed to create NetIO"));
-    setup_semi_honest(io, LABELS_PARTY);
-    if constexpr (debug) {
-      std::cout << "LABELS_PARTY connected" << std::endl;
-    }
-
     // Get the input tensors.
     Tensor const& masked_grads_tensor = op_ctx->input(0);
     Tensor const& clipping_threshold_tensor = op_ctx->input(1);
@@ -199,15 +534,36 @@ class ClipAndNoiseLabelsParty : public OpKernel {
     int num_grads = flat_masked_grads.dimension(0);
     std::vector<T> zeros(num_grads, 0);
 
+    std::lock_guard<std::mutex> lock(mpc_mutex);
+    MpcSession session =
+        AcquireSession(LABELS_PARTY, host, port, reuse_connection);
+    tensorflow::Status params_status = CheckPeerParams(
+        session, LABELS_PARTY,
+        CircuitParams(Bitwidth, num_grads, window_size, grad_bitwidth));
+    if (!params_status.ok()) {
+      ReleaseSession(session, reuse_connection);
+    }
+    OP_REQUIRES_OK(op_ctx, params_status);
+
+    // The labels party garbles the circuit. In debug builds it reports the
+    // number of AND gates, which dominate the cost of the protocol.
+    [[maybe_unused]] uint64_t const and_gates_before =
+        CircuitExecution::circ_exec->num_and();
+
     // Run the MPC protocol.
     ClipAndNoise<T, Bitwidth, LABELS_PARTY>(
         num_grads, zeros.data(), flat_masked_grads.data(), clipping_threshold,
-        flat_noises.data(), nullptr);
+        flat_noises.data(), nullptr, window_size, grad_bitwidth);
 
-    finalize_semi_honest();
-    io->flush();
-    delete io;
-    return;
+    if constexpr (debug) {
+      uint64_t and_gates =
+          CircuitExecution::circ_exec->num_and() - and_gates_before;
+      std::cout << "ClipAndNoise AND gates: " << and_gates << " ("
+                << static_cast<double>(and_gates) / num_grads << " per element)"
+                << std::endl;
+    }
+
+    ReleaseSession(session, reuse_connection);
   }
 };
 
@@ -19,6 +19,7 @@
 #include "shell_encryption/prng/single_thread_hkdf_prng.h"
 #include "shell_encryption/rns/rns_context.h"
 #include "shell_encryption/rns/rns_polynomial.h"
+#include "shell_profiler.h"
 #include "symmetric_variants.h"
 #include "tensorflow/core/framework/op.h"
 #include "tensorflow/core/framework/op_kernel.h"
@@ -53,6 +54,8 @@ class MulCtCtOp : public OpKernel {
   explicit MulCtCtOp(OpKernelConstruction* op_ctx) : OpKernel(op_ctx) {}
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Unpack the input arguments.
     OP_REQUIRES_VALUE(ContextVariant<T> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<T>>(op_ctx, 0));
@@ -128,6 +131,12 @@ class MulCtCtOp : public OpKernel {
       }
     };
 
+    // The product of two ciphertexts has three components.
+    profile.SetElements(flat_output.size(), num_components);
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(3 * flat_output.size(), num_slots, num_components));
+    profile.StartArithmetic();
+
     auto thread_pool =
         op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
     int const cost_per_mul = 30 * num_slots * num_components;
@@ -147,6 +156,8 @@ class MulCtPtOp : public OpKernel {
   explicit MulCtPtOp(OpKernelConstruction* op_ctx) : OpKernel(op_ctx) {}
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Unpack the input arguments.
     OP_REQUIRES_VALUE(ContextVariant<T> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<T>>(op_ctx, 0));
@@ -223,6 +234,11 @@ class MulCtPtOp : public OpKernel {
       }
     };
 
+    profile.SetElements(flat_output.size(), num_components);
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(2 * flat_output.size(), num_slots, num_components));
+    profile.StartArithmetic();
+
     auto thread_pool =
         op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
     int const cost_per_mul = 30 * num_slots * num_components;
@@ -659,6 +675,8 @@ class MatMulPtCtOp : public OpKernel {
   }
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Get the input tensors.
     OP_REQUIRES_VALUE(ContextVariant<T> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<T>>(op_ctx, 0));
@@ -754,6 +772,18 @@ class MatMulPtCtOp : public OpKernel {
     std::vector<Modulus const*> main_moduli_vector;
     main_moduli_vector.assign(main_moduli.begin(), main_moduli.end());
 
+    // Each row of the plaintext matrix is encoded once, and the product with
+    // each ciphertext is reduced with one key switch per rotation.
+    int64_t const num_outputs = flat_output.size();
+    profile.SetElements(num_outputs, main_moduli.size());
+    profile.AddEstimatedNtts(num_pt_outer_dims * num_pt_inner_rows);
+    if (reduction == galois_reduction) {
+      profile.AddEstimatedKeySwitches(num_outputs * (shell_ctx->LogN() - 1));
+    }
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(2 * num_outputs, num_slots, main_moduli.size()));
+    profile.StartArithmetic();
+
     // Setup constants used in parallelizing the computation.
     auto thread_pool =
         op_ctx->device()->tensorflow_cpu_worker_threads()->workers;
@@ -20,6 +20,7 @@
 #include "shell_encryption/prng/single_thread_hkdf_prng.h"
 #include "shell_encryption/rns/rns_bgv_ciphertext.h"
 #include "shell_encryption/rns/rns_galois_key.h"
+#include "shell_profiler.h"
 #include "symmetric_variants.h"
 #include "tensorflow/core/framework/op.h"
 #include "tensorflow/core/framework/op_kernel.h"
@@ -155,6 +156,8 @@ class RollOp : public OpKernel {
   explicit RollOp(OpKernelConstruction* op_ctx) : OpKernel(op_ctx) {}
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Get the input tensors.
     OP_REQUIRES_VALUE(ContextVariant<T> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<T>>(op_ctx, 0));
@@ -216,6 +219,12 @@ class RollOp : public OpKernel {
       key = keys[shift].get();
     }
 
+    profile.SetElements(flat_output.size(), num_components);
+    if (shift != 0) profile.AddEstimatedKeySwitches(flat_output.size());
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(2 * flat_output.size(), num_slots, num_components));
+    profile.StartArithmetic();
+
     auto roll_in_range = [&](int start, int end) {
       for (int i = start; i < end; ++i) {
         SymmetricCtVariant<T> const* ct_var =
@@ -276,6 +285,8 @@ class ReduceSumByRotationCtOp : public OpKernel {
       : OpKernel(op_ctx) {}
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Recover the inputs.
     OP_REQUIRES_VALUE(ContextVariant<T> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<T>>(op_ctx, 0));
@@ -319,6 +330,13 @@ class ReduceSumByRotationCtOp : public OpKernel {
     OP_REQUIRES_OK(op_ctx, op_ctx->allocate_output(0, value.shape(), &output));
     auto flat_output = output->flat<Variant>();
 
+    // Each ciphertext is rotated log2(num_slots / 2) times.
+    profile.SetElements(flat_output.size(), num_components);
+    profile.AddEstimatedKeySwitches(flat_output.size() * (ct.LogN() - 1));
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(2 * flat_output.size(), num_slots, num_components));
+    profile.StartArithmetic();
+
     auto reduce_in_range = [&](int start, int end) {
       for (int i = start; i < end; ++i) {
         // Learn how many slots there are from first ciphertext and create a
@@ -12,6 +12,12 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+#include <algorithm>
+#include <atomic>
+#include <optional>
+#include <unordered_map>
+#include <utility>
+
 #include "context_variant.h"
 #include "polynomial_variant.h"
 #include "rotation_variants.h"
@@ -63,6 +69,15 @@ EIGEN_ALWAYS_INLINE EIGEN_DEVICE_FUNC bool FastBoundsCheck(Ta const index,
                          static_cast<UIndex>(limit));
 }
 
+// FNV-1a style constants used to hash the slot pattern of a mask, one slot
+// index per step.
+constexpr uint64_t const kSlotPatternHashSeed = 0xcbf29ce484222325ULL;
+constexpr uint64_t const kSlotPatternHashPrime = 0x100000001b3ULL;
+
+// Upper bound on the memory used to cache encoded masks in one invocation of
+// the segment reduction.
+constexpr int64_t const kMaxCachedMaskBytes = int64_t{256} << 20;
+
 // Based on segment_reduction_ops in TensorFlow core with a few changes
 // to handle ciphertext batching.
 // https://github.com/tensorflow/tensorflow/blob/675237fd0af29df7ebffd9dd2a2f721cd542475b/tensorflow/core/kernels/segment_reduction_ops_impl.h#L353
@@ -139,13 +154,6 @@ struct UnsortedSegmentFunctor<CPUDevice, T, Index, InitialValueF, ReductionF> {
       return;
     }
 
-    // Initialize slot counter.
-    for (int i = 0; i < slot_counter.dimension(0); ++i) {
-      for (int ii = 0; ii < slot_counter.dimension(1); ++ii) {
-        slot_counter(i, ii) = 0;
-      }
-    }
-
     // Reduce `N` rows input to `num_segments` rows output.
     int64_t const N = segment_ids.dimension(1);
     int64_t const num_segments = output.dimension(1);
@@ -155,34 +163,172 @@ struct UnsortedSegmentFunctor<CPUDevice, T, Index, InitialValueF, ReductionF> {
     Encoder const* encoder = shell_ctx_var->encoder_.get();
     ReductionF reduction;
 
-    bool trivial_reduction = true;
+    auto thread_pool = ctx->device()->tensorflow_cpu_worker_threads()->workers;
 
     // `slot_counter` records which slots in the unreduced_output ciphertext
     // contain real data. This is used to rotate the occupied slots in
     // unreduced_output to the first (and mid) positions for the real output.
-    for (int64_t slot = 0; slot < num_slots; ++slot) {
-      for (int64_t i = 0; i < N; ++i) {
-        Index j = segment_ids(slot, i);
-        if (j < 0) {
-          continue;
+    // Each row of the counter belongs to one slot, so counting is
+    // parallelized over slots without any two threads writing the same row.
+    std::atomic<bool> trivial_reduction = true;
+    auto countWorker = [&](int64_t begin, int64_t end) -> void {
+      bool found_segment = false;
+      for (int64_t slot = begin; slot < end; ++slot) {
+        for (int64_t j = 0; j < num_segments; ++j) {
+          slot_counter(slot, j) = 0;
         }
-        OP_REQUIRES(
-            ctx, FastBoundsCheck(j, num_segments),
-            InvalidArgument("segment_ids[", slot, ",", i, "] = ", j,
-                            " is out of range [0, ", num_segments, ")"));
-        trivial_reduction = false;
-        ++slot_counter(slot, j);
+        for (int64_t i = 0; i < N; ++i) {
+          Index j = segment_ids(slot, i);
+          if (j < 0) {
+            continue;
+          }
+          OP_REQUIRES(
+              ctx, FastBoundsCheck(j, num_segments),
+              InvalidArgument("segment_ids[", slot, ",", i, "] = ", j,
+                              " is out of range [0, ", num_segments, ")"));
+          found_segment = true;
+          ++slot_counter(slot, j);
+        }
+      }
+      if (found_segment) {
+        trivial_reduction.store(false, std::memory_order_relaxed);
       }
+    };
+    int const cost_per_count = 2 * (N + num_segments);  // ns
+    thread_pool->ParallelFor(num_slots, cost_per_count, countWorker);
+    if (!ctx->status().ok()) {
+      return;
     }
 
-    auto thread_pool = ctx->device()->tensorflow_cpu_worker_threads()->workers;
-
     // Step 1: Reduce over the ciphertext dimension. There are many slots in a
     // ciphertext, and some slots may be assigned to the same output. The
-    // `reductionWorker1D` will extract the all slots for the same destination
+    // `reductionWorker` will extract the all slots for the same destination
     // in one mask (multiplication) and one addition (to store the running total
     // over all ciphertexts).
     //
+    // First, group the slots of each ciphertext by segment in one pass over
+    // the slots. The set of slots in a group is the pattern of its mask.
+    struct SlotGroup {
+      Index segment;
+      std::vector<int32_t> slots;  // Ascending.
+      uint64_t hash;
+    };
+    std::vector<std::vector<SlotGroup>> slot_groups(N);
+    auto groupWorker = [&](int64_t begin, int64_t end) -> void {
+      std::vector<std::pair<Index, int32_t>> assigned_slots;
+      assigned_slots.reserve(num_slots);
+      for (int64_t i = begin; i < end; ++i) {
+        assigned_slots.clear();
+        for (int64_t slot = 0; slot < num_slots; ++slot) {
+          // Segment ids were bounds checked while counting.
+          Index j = segment_ids(slot, i);
+          if (j >= 0) {
+            assigned_slots.emplace_back(j, static_cast<int32_t>(slot));
+          }
+        }
+        std::sort(assigned_slots.begin(), assigned_slots.end());
+
+        for (size_t k = 0; k < assigned_slots.size();) {
+          SlotGroup group{assigned_slots[k].first, {}, kSlotPatternHashSeed};
+          for (; k < assigned_slots.size() &&
+                 assigned_slots[k].first == group.segment;
+               ++k) {
+            group.slots.push_back(assigned_slots[k].second);
+            group.hash =
+                (group.hash ^ assigned_slots[k].second) * kSlotPatternHashPrime;
+          }
+          slot_groups[i].push_back(std::move(group));
+        }
+      }
+    };
+    if (!trivial_reduction) {
+      int const cost_per_group = 20 * num_slots;  // ns
+      thread_pool->ParallelFor(N, cost_per_group, groupWorker);
+    }
+
+    // Many (ciphertext, segment) pairs can share a pattern, e.g. when the
+    // segment ids repeat over the ciphertexts. Give each distinct pattern an
+    // id, looking patterns up by hash and comparing the slots to resolve
+    // collisions, and list the work of each segment as (ciphertext, pattern)
+    // pairs in ciphertext order.
+    std::vector<std::vector<int32_t> const*> patterns;
+    std::vector<int64_t> pattern_uses;
+    std::vector<std::vector<std::pair<int64_t, int64_t>>> segment_work(
+        num_segments);
+    std::unordered_map<uint64_t, std::vector<int64_t>> patterns_by_hash;
+    for (int64_t i = 0; i < N; ++i) {
+      for (SlotGroup const& group : slot_groups[i]) {
+        std::vector<int64_t>& candidates = patterns_by_hash[group.hash];
+        int64_t pattern = -1;
+        for (int64_t candidate : candidates) {
+          if (*patterns[candidate] == group.slots) {
+            pattern = candidate;
+            break;
+          }
+        }
+        if (pattern < 0) {
+          pattern = patterns.size();
+          patterns.push_back(&group.slots);
+          pattern_uses.push_back(0);
+          candidates.push_back(pattern);
+        }
+        ++pattern_uses[pattern];
+        segment_work[group.segment].emplace_back(i, pattern);
+      }
+    }
+    patterns_by_hash.clear();
+
+    auto encodeMask =
+        [&](std::vector<int32_t> const& slots,
+            std::vector<uint64_t>& mask) -> rlwe::StatusOr<Polynomial> {
+      std::fill(mask.begin(), mask.end(), 0);
+      for (int32_t slot : slots) {
+        mask[slot] = 1;
+      }
+      return encoder->EncodeBgv(mask, shell_ctx->MainPrimeModuli());
+    };
+
+    // Encode the patterns which are used more than once up front, in
+    // parallel, and cache them for the duration of the op. The most used
+    // patterns are cached first, up to a memory budget. The remaining
+    // patterns are encoded where they are used.
+    std::vector<int64_t> shared_patterns;
+    for (int64_t pattern = 0; pattern < (int64_t)patterns.size(); ++pattern) {
+      if (pattern_uses[pattern] > 1) {
+        shared_patterns.push_back(pattern);
+      }
+    }
+    std::stable_sort(shared_patterns.begin(), shared_patterns.end(),
+                     [&](int64_t a, int64_t b) {
+                       return pattern_uses[a] > pattern_uses[b];
+                     });
+    int64_t const mask_bytes =
+        num_slots * shell_ctx->NumMainPrimeModuli() * sizeof(T);
+    int64_t const max_cached_masks = kMaxCachedMaskBytes / mask_bytes;
+    if ((int64_t)shared_patterns.size() > max_cached_masks) {
+      shared_patterns.resize(max_cached_masks);
+    }
+
+    std::vector<int64_t> cached_mask_index(patterns.size(), -1);
+    std::vector<std::optional<Polynomial>> cached_masks(shared_patterns.size());
+    auto maskEncodeWorker = [&](int64_t begin, int64_t end) -> void {
+      std::vector<uint64_t> mask(num_slots);
+      for (int64_t k = begin; k < end; ++k) {
+        OP_REQUIRES_VALUE(cached_masks[k], ctx,
+                          encodeMask(*patterns[shared_patterns[k]], mask));
+      }
+    };
+    int const cost_per_mask =
+        20 * num_slots * shell_ctx->NumMainPrimeModuli();  // ns
+    thread_pool->ParallelFor(shared_patterns.size(), cost_per_mask,
+                             maskEncodeWorker);
+    if (!ctx->status().ok()) {
+      return;
+    }
+    for (int64_t k = 0; k < (int64_t)shared_patterns.size(); ++k) {
+      cached_mask_index[shared_patterns[k]] = k;
+    }
+
     // Parallelize by `num_segments`. It's simple, efficient and safe
     // (no data dependency):
     //
@@ -193,35 +339,21 @@ struct UnsortedSegmentFunctor<CPUDevice, T, Index, InitialValueF, ReductionF> {
     //   | b1 |  | 1 |
     //   | a1 |  | 0 |
     auto reductionWorker = [&](int64_t begin, int64_t end) -> void {
-      // Records which segments IDs have been reduced in a given ciphertext.
-      std::unordered_set<int64_t> segment_ids_already_reduced;
-      segment_ids_already_reduced.reserve(num_slots);
-
-      for (int64_t i = 0; i < N; ++i) {
-        // If this is a new ciphertext, reset which segment IDs were reduced.
-        segment_ids_already_reduced.clear();
-
-        for (int64_t slot = 0; slot < num_slots; ++slot) {
-          std::vector<uint64_t> mask(num_slots, 0);
-
-          Index j = segment_ids(slot, i);
-
-          // Only act if `j` is in work scope of this worker. Also make sure
-          // this segment was not convered by the mask in a previous reduction.
-          if (j < begin || j >= end ||
-              segment_ids_already_reduced.find(j) !=
-                  segment_ids_already_reduced.end()) {
-            continue;
-          }
-
-          segment_ids_already_reduced.insert(j);
+      std::vector<uint64_t> mask(num_slots);
 
+      for (int64_t j = begin; j < end; ++j) {
+        for (auto const& [i, pattern] : segment_work[j]) {
           // Collect a ciphertext-worth of reductions to do in one shot to
-          // minimize noise growth. Store which slots are valid in `mask`.
-          for (int64_t remaining_slot = slot; remaining_slot < num_slots;
-               ++remaining_slot) {
-            Index jj = segment_ids(remaining_slot, i);
-            mask[remaining_slot] = jj == j;
+          // minimize noise growth. The same slots are selected in every
+          // chip, so the mask is encoded at most once here.
+          std::optional<Polynomial> uncached_mask;
+          Polynomial const* mask_pt;
+          if (cached_mask_index[pattern] >= 0) {
+            mask_pt = &*cached_masks[cached_mask_index[pattern]];
+          } else {
+            OP_REQUIRES_VALUE(uncached_mask, ctx,
+                              encodeMask(*patterns[pattern], mask));
+            mask_pt = &*uncached_mask;
           }
 
           for (int64_t chip = 0; chip < inner_dim; ++chip) {
@@ -237,14 +369,11 @@ struct UnsortedSegmentFunctor<CPUDevice, T, Index, InitialValueF, ReductionF> {
 
             // Select the desired slots in the ciphertext, masking off the
             // others.
-            OP_REQUIRES_VALUE(
-                Polynomial mask_pt, ctx,
-                encoder->EncodeBgv(mask, shell_ctx->MainPrimeModuli()));
             OP_REQUIRES_VALUE(SymmetricCt masked_data_ct, ctx,
-                              data_var->ct * mask_pt);
+                              data_var->ct * *mask_pt);
 
             SymmetricCtVariant<T>* output_var =
-                output(0, (int64_t)j, chip).get<SymmetricCtVariant<T>>();
+                output(0, j, chip).get<SymmetricCtVariant<T>>();
             OP_REQUIRES(ctx, output_var != nullptr,
                         InvalidArgument("SymmetricCtVariant for output did not "
                                         "unwrap successfully."));
@@ -258,7 +387,7 @@ struct UnsortedSegmentFunctor<CPUDevice, T, Index, InitialValueF, ReductionF> {
               // input's context to prevent premature deletion of the moduli.
               SymmetricCtVariant var(masked_data_ct, data_var->ct_context,
                                      data_var->error_params);
-              output(0, (int64_t)j, chip) = std::move(var);
+              output(0, j, chip) = std::move(var);
             } else {
               OP_REQUIRES_OK(ctx, reduction(masked_data_ct, output_var->ct));
             }
@@ -276,6 +405,9 @@ struct UnsortedSegmentFunctor<CPUDevice, T, Index, InitialValueF, ReductionF> {
       thread_pool->ParallelFor(num_segments, reduction_scheduling_params,
                                reductionWorker);
     }
+    if (!ctx->status().ok()) {
+      return;
+    }
 
     // Step 2: Reduce over the slotting dimension. This requires rotating any
     // non-empty slots in the output ciphertexts to the first slot using
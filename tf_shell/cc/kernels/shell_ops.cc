@@ -24,6 +24,7 @@ using tensorflow::errors::InvalidArgument;
 using tensorflow::shape_inference::ConcatShape;
 using tensorflow::shape_inference::DimensionHandle;
 using tensorflow::shape_inference::InferenceContext;
+using tensorflow::shape_inference::NoOutputs;
 using tensorflow::shape_inference::ScalarShape;
 using tensorflow::shape_inference::ShapeHandle;
 using tensorflow::shape_inference::UnchangedShape;
@@ -58,6 +59,35 @@ REGISTER_OP("AutoShellContext64")
     .Output("new_pt_modulus: uint64")
     .SetShapeFn(MultiScalarOut<2>);
 
+REGISTER_OP("TakeAutotunedParams64")
+    .Output("found: bool")
+    .Output("log_n: uint64")
+    .Output("main_moduli: uint64")
+    .Output("plaintext_modulus: uint64")
+    .SetIsStateful()  // Reads and clears state left by the graph optimizer.
+    .SetShapeFn([](InferenceContext* c) {
+      c->set_output(0, c->Scalar());
+      c->set_output(1, c->Scalar());
+      c->set_output(2, c->Vector(c->UnknownDim()));
+      c->set_output(3, c->Scalar());
+      return OkStatus();
+    });
+
+REGISTER_OP("TakeShellOptimizerStats64")
+    .Output("stats: string")
+    .SetIsStateful()  // Reads and clears state left by the graph optimizers.
+    .SetShapeFn(ScalarShape);
+
+REGISTER_OP("EnableShellProfiling64")
+    .Input("enabled: bool")
+    .SetIsStateful()
+    .SetShapeFn(NoOutputs);
+
+REGISTER_OP("TakeShellProfile64")
+    .Output("profile: string")
+    .SetIsStateful()  // Reads and clears state left by the shell kernels.
+    .SetShapeFn(ScalarShape);
+
 REGISTER_OP("PolynomialImport64")
     .Attr(
         "Dtype: {uint8, int8, int16, uint16, int32, uint32, int64, uint64, "
@@ -480,6 +510,8 @@ REGISTER_OP("Conv2dPtCt64")
     .Attr("dilations: list(int)")
     .Attr("filter_num_elements: int")
     .Attr("output_shape: list(int)")
+    .Attr("packed: bool = false")
+    .Attr("winograd: bool = false")
     .Output("output: variant")
     .SetShapeFn(ShellConv2d);
 
@@ -492,6 +524,7 @@ REGISTER_OP("Conv2dCtPt64")
     .Attr("dilations: list(int)")
     .Attr("filter_num_elements: int")
     .Attr("output_shape: list(int)")
+    .Attr("packed: bool = false")
     .Output("output: variant")
     .SetShapeFn(ShellConv2d);
 
@@ -516,6 +549,8 @@ REGISTER_OP("Conv2dWithChanPtCt64")
     .Attr("dilations: list(int)")
     .Attr("filter_num_elements: int")
     .Attr("output_shape: list(int)")
+    .Attr("packed: bool = false")
+    .Attr("winograd: bool = false")
     .Output("output: variant")
     .SetShapeFn(ShellConv2dWithChan);
 
@@ -528,6 +563,7 @@ REGISTER_OP("Conv2dWithChanCtPt64")
     .Attr("dilations: list(int)")
     .Attr("filter_num_elements: int")
     .Attr("output_shape: list(int)")
+    .Attr("packed: bool = false")
     .Output("output: variant")
     .SetShapeFn(ShellConv2dWithChan);
 
@@ -567,6 +603,19 @@ REGISTER_OP("Conv2dTransposeCtPt64")
     .Output("output: variant")
     .SetShapeFn(ShellConv2dTranspose);
 
+REGISTER_OP("Conv2dTransposeCtTfScalar64")
+    .Attr("Dtype: {uint64, int64}")
+    .Input("shell_context: variant")
+    .Input("x: variant")
+    .Input("filter: Dtype")
+    .Attr("strides: list(int)")
+    .Attr("padding: list(int)")
+    .Attr("dilations: list(int)")
+    .Attr("filter_num_elements: int")
+    .Attr("output_shape: list(int)")
+    .Output("output: variant")
+    .SetShapeFn(ShellConv2dTranspose);
+
 REGISTER_OP("Conv2dTransposeCtCt64")
     .Input("shell_context: variant")
     .Input("x: variant")
@@ -634,6 +683,9 @@ REGISTER_OP("ClipAndNoiseFeaturesParty")
     .Attr("Bitwidth: int")
     .Attr("StartPort: int")
     .Attr("LabelPartyHost: string")
+    .Attr("ReuseConnection: bool = false")
+    .Attr("WindowSize: int = 0")
+    .Attr("GradBitwidth: int = 0")
     .Input("mask: Dtype")
     .Output("clipped_noised_grad: Dtype")
     .SetShapeFn(UnchangedArgShape<0>)
@@ -644,6 +696,9 @@ REGISTER_OP("ClipAndNoiseLabelsParty")
     .Attr("Bitwidth: int")
     .Attr("StartPort: int")
     .Attr("FeaturePartyHost: string")
+    .Attr("ReuseConnection: bool = false")
+    .Attr("WindowSize: int = 0")
+    .Attr("GradBitwidth: int = 0")
     .Input("masked_grads: Dtype")
     .Input("clipping_thresh: Dtype")
     .Input("noise: Dtype")
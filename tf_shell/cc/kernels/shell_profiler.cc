@@ -0,0 +1,128 @@
+// Copyright 2023 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//      http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "shell_profiler.h"
+
+#include <atomic>
+#include <map>
+#include <mutex>
+#include <vector>
+
+#include "../common/json_utils.h"
+#include "absl/strings/str_cat.h"
+#include "absl/strings/str_join.h"
+#include "tensorflow/core/profiler/lib/traceme_encode.h"
+
+namespace {
+
+struct ShellOpRecord {
+  std::string op;
+  int64_t calls = 0;
+  int64_t elements = 0;
+  int64_t level = 0;
+  int64_t ntts_estimate = 0;
+  int64_t key_switches_estimate = 0;
+  int64_t bytes_allocated = 0;
+  int64_t total_ns = 0;
+  int64_t arithmetic_ns = 0;
+  int64_t allocation_ns = 0;
+};
+
+struct ShellProfile {
+  std::atomic<bool> enabled{false};
+  std::mutex mutex;
+  std::map<std::string, ShellOpRecord> records;  // Keyed by node name.
+};
+
+ShellProfile& GetShellProfile() {
+  static ShellProfile* profile = new ShellProfile();
+  return *profile;
+}
+
+int64_t ElapsedNs(std::chrono::steady_clock::time_point start,
+                  std::chrono::steady_clock::time_point end) {
+  return std::chrono::duration_cast<std::chrono::nanoseconds>(end - start)
+      .count();
+}
+
+}  // namespace
+
+bool ShellProfilingEnabled() {
+  return GetShellProfile().enabled.load(std::memory_order_relaxed);
+}
+
+void SetShellProfilingEnabled(bool enabled) {
+  GetShellProfile().enabled.store(enabled, std::memory_order_relaxed);
+}
+
+std::string TakeShellProfileJson() {
+  ShellProfile& profile = GetShellProfile();
+  std::lock_guard<std::mutex> lock(profile.mutex);
+  std::vector<std::string> entries;
+  for (auto const& [node, r] : profile.records) {
+    entries.push_back(absl::StrCat(
+        JsonString(node), ": {\"op\": ", JsonString(r.op),
+        ", \"calls\": ", r.calls, ", \"elements\": ", r.elements,
+        ", \"level\": ", r.level, ", \"ntts_estimate\": ", r.ntts_estimate,
+        ", \"key_switches_estimate\": ", r.key_switches_estimate,
+        ", \"bytes_allocated\": ", r.bytes_allocated, ", \"total_us\": ",
+        r.total_ns / 1e3, ", \"arithmetic_us\": ", r.arithmetic_ns / 1e3,
+        ", \"allocation_us\": ", r.allocation_ns / 1e3, "}"));
+  }
+  profile.records.clear();
+  return absl::StrCat("{", absl::StrJoin(entries, ", "), "}");
+}
+
+ShellOpProfile::ShellOpProfile(tensorflow::OpKernelContext* op_ctx)
+    : enabled_(ShellProfilingEnabled()) {
+  if (!enabled_) return;
+  node_ = op_ctx->op_kernel().name();
+  op_ = op_ctx->op_kernel().type_string();
+  trace_.emplace([&] { return absl::StrCat(op_, ":", node_); });
+  start_ = std::chrono::steady_clock::now();
+}
+
+void ShellOpProfile::StartArithmetic() {
+  if (!enabled_) return;
+  arithmetic_start_ = std::chrono::steady_clock::now();
+}
+
+ShellOpProfile::~ShellOpProfile() {
+  if (!enabled_) return;
+  auto const end = std::chrono::steady_clock::now();
+  auto const arithmetic_start = arithmetic_start_.value_or(end);
+
+  trace_->AppendMetadata([&] {
+    return tensorflow::profiler::TraceMeEncode(
+        {{"elements", elements_},
+         {"level", level_},
+         {"ntts_estimate", ntts_estimate_},
+         {"key_switches_estimate", key_switches_estimate_},
+         {"bytes_allocated", bytes_allocated_}});
+  });
+
+  ShellProfile& profile = GetShellProfile();
+  std::lock_guard<std::mutex> lock(profile.mutex);
+  ShellOpRecord& record = profile.records[node_];
+  record.op = op_;
+  record.calls += 1;
+  record.elements += elements_;
+  record.level = level_;
+  record.ntts_estimate += ntts_estimate_;
+  record.key_switches_estimate += key_switches_estimate_;
+  record.bytes_allocated += bytes_allocated_;
+  record.total_ns += ElapsedNs(start_, end);
+  record.arithmetic_ns += ElapsedNs(arithmetic_start, end);
+  record.allocation_ns += ElapsedNs(start_, arithmetic_start);
+}
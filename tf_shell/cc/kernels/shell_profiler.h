@@ -0,0 +1,88 @@
+// Copyright 2023 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//      http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#pragma once
+
+#include <chrono>
+#include <cstdint>
+#include <optional>
+#include <string>
+
+#include "tensorflow/core/framework/op_kernel.h"
+#include "tensorflow/core/profiler/lib/traceme.h"
+
+// Opt-in profiling of the shell kernels. While enabled, each instrumented
+// kernel records per op instance the number of ciphertexts or plaintexts it
+// outputs, the number of moduli they hold, estimates of the number of NTTs
+// and key switches, the bytes of the outputs, and how long it spent unpacking
+// inputs and allocating outputs versus in modular arithmetic. The records are
+// also attached to TraceMe events so they show in the TensorFlow profiler
+// trace.
+bool ShellProfilingEnabled();
+void SetShellProfilingEnabled(bool enabled);
+
+// Returns the records since the last call as a JSON object keyed by node name
+// and clears them.
+std::string TakeShellProfileJson();
+
+// Returns the size of the coefficients of num_polys polynomials in RNS form.
+template <typename T>
+int64_t PolynomialBytes(int64_t num_polys, int64_t num_slots,
+                        int64_t num_moduli) {
+  return num_polys * num_slots * num_moduli * sizeof(T);
+}
+
+// Profiles one run of a kernel, from construction to destruction. All methods
+// are no-ops when profiling is disabled.
+class ShellOpProfile {
+ public:
+  explicit ShellOpProfile(tensorflow::OpKernelContext* op_ctx);
+  ~ShellOpProfile();
+
+  bool enabled() const { return enabled_; }
+
+  // Sets the number of ciphertexts or plaintexts the kernel computes and the
+  // number of moduli they hold.
+  void SetElements(int64_t elements, int64_t level) {
+    elements_ = elements;
+    level_ = level;
+  }
+
+  // Estimates the NTTs and inverse NTTs outside of key switching and the key
+  // switches from the sizes of the inputs. They are not counted as they run.
+  // Each key switch additionally performs an inverse NTT and one NTT per
+  // gadget digit.
+  void AddEstimatedNtts(int64_t count) { ntts_estimate_ += count; }
+  void AddEstimatedKeySwitches(int64_t count) {
+    key_switches_estimate_ += count;
+  }
+  void AddAllocatedBytes(int64_t bytes) { bytes_allocated_ += bytes; }
+
+  // Marks the end of unpacking the inputs and allocating the outputs. The time
+  // until destruction counts as modular arithmetic.
+  void StartArithmetic();
+
+ private:
+  bool const enabled_;
+  std::string node_;
+  std::string op_;
+  std::chrono::steady_clock::time_point start_;
+  std::optional<std::chrono::steady_clock::time_point> arithmetic_start_;
+  std::optional<tensorflow::profiler::TraceMe> trace_;
+  int64_t elements_ = 0;
+  int64_t level_ = 0;
+  int64_t ntts_estimate_ = 0;
+  int64_t key_switches_estimate_ = 0;
+  int64_t bytes_allocated_ = 0;
+};
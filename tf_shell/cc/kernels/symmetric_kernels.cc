@@ -18,6 +18,7 @@
 #include "shell_encryption/modulus_conversion.h"
 #include "shell_encryption/prng/single_thread_hkdf_prng.h"
 #include "shell_encryption/rns/rns_bgv_ciphertext.h"
+#include "shell_profiler.h"
 #include "symmetric_variants.h"
 #include "tensorflow/core/framework/op.h"
 #include "tensorflow/core/framework/op_kernel.h"
@@ -91,6 +92,8 @@ class EncryptOp : public OpKernel {
   explicit EncryptOp(OpKernelConstruction* op_ctx) : OpKernel(op_ctx) {}
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Get the input tensors.
     OP_REQUIRES_VALUE(ContextVariant<T> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<T>>(op_ctx, 0));
@@ -116,6 +119,14 @@ class EncryptOp : public OpKernel {
     auto flat_input = input.flat<Variant>();
     auto flat_output = output->flat<Variant>();
 
+    // The error of each ciphertext is sampled in coefficient form.
+    int64_t const num_moduli = shell_ctx->NumMainPrimeModuli();
+    profile.SetElements(flat_output.size(), num_moduli);
+    profile.AddEstimatedNtts(flat_output.size());
+    profile.AddAllocatedBytes(
+        PolynomialBytes<T>(2 * flat_output.size(), num_slots, num_moduli));
+    profile.StartArithmetic();
+
     auto enc_in_range = [&](int start, int end, int worker_id) {
       int prng_i = worker_id % shell_ctx_var->prng_.size();
       auto* prng = shell_ctx_var->prng_[prng_i].get();
@@ -166,6 +177,8 @@ class DecryptOp : public OpKernel {
   explicit DecryptOp(OpKernelConstruction* op_ctx) : OpKernel(op_ctx) {}
 
   void Compute(OpKernelContext* op_ctx) override {
+    ShellOpProfile profile(op_ctx);
+
     // Get the input tensors.
     OP_REQUIRES_VALUE(ContextVariant<From> const* shell_ctx_var, op_ctx,
                       GetVariant<ContextVariant<From>>(op_ctx, 0));
@@ -195,6 +208,12 @@ class DecryptOp : public OpKernel {
 
     auto flat_output = output->flat_outer_dims<To>();
 
+    // Decryption takes the inverse NTT of each ciphertext.
+    profile.SetElements(flat_input.size(), shell_ctx->NumMainPrimeModuli());
+    profile.AddEstimatedNtts(flat_input.size());
+    profile.AddAllocatedBytes(output->TotalBytes());
+    profile.StartArithmetic();
+
     auto dec_in_range = [&](int start, int end) {
       for (int i = start; i < end; ++i) {
         SymmetricCtVariant<From> const* ct_var =
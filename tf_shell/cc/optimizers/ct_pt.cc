@@ -1,5 +1,6 @@
 #include "ct_pt.h"
 
+#include "pass_stats.h"
 #include "tensorflow/core/grappler/clusters/cluster.h"
 #include "tensorflow/core/grappler/costs/graph_properties.h"
 #include "tensorflow/core/grappler/grappler_item.h"
@@ -215,6 +216,7 @@ Status CtPtOptimizer::Init(
 
 Status CtPtOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
                                GraphDef* optimized_graph) {
+  PassStats stats(name_);
   GrapplerItem mutable_item(item);
   Status status;
   utils::MutableGraphView graph_view(&mutable_item.graph, &status);
@@ -237,6 +239,7 @@ Status CtPtOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
       // Remap op( op(ct, pt), pt) to op(ct, op(pt, pt)).
       ReorderArith reorder;
       if (FindAddOrSub(graph_view, i, &reorder)) {
+        stats.AddMatched();
         TF_RETURN_IF_ERROR(
             ApplyReorderArith(graph_view, reorder, &nodes_to_delete));
         finished = false;
@@ -254,6 +257,7 @@ Status CtPtOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
   }
 
   *optimized_graph = std::move(mutable_item.graph);
+  stats.Record(item, *optimized_graph);
 
   return OkStatus();
 }
@@ -3,11 +3,28 @@
 #include <algorithm>
 #include <bit>
 #include <cstdlib>
-#include <ctime>
+#include <deque>
+#include <fstream>
 #include <iostream>
+#include <limits>
+#include <map>
+#include <mutex>
+#include <numeric>
+#include <optional>
+#include <sstream>
+#include <string>
+#include <tuple>
+#include <utility>
 #include <vector>
 
+#include "../common/json_utils.h"
+#include "absl/numeric/bits.h"
+#include "absl/strings/str_cat.h"
+#include "absl/strings/str_join.h"
+#include "ntt_primes.h"
+#include "pass_stats.h"
 #include "shell_encryption/rns/rns_error_params.h"
+#include "tensorflow/core/graph/tensor_id.h"
 #include "tensorflow/core/grappler/clusters/cluster.h"
 #include "tensorflow/core/grappler/costs/graph_properties.h"
 #include "tensorflow/core/grappler/grappler_item.h"
@@ -35,11 +52,33 @@ constexpr uint64_t const kMaxPrimeBitsPlaintext = 58;
 constexpr uint64_t const kMaxPrimeBitsCiphertext = 60;
 constexpr uint64_t const kMinPrimeBits = 3;
 
-struct ShellParams {
-  uint64_t log_n;
-  uint64_t t;
-  std::vector<uint64_t> qs;
-};
+// Version of the parameter selection algorithm. Persisted autotune cache
+// entries written by a different version are ignored, so bump this whenever
+// ChooseShellParams() may select different parameters.
+constexpr uint64_t const kParamsCacheVersion = 2;
+
+constexpr char const kAutotuneCachePathParam[] = "autotune_cache_path";
+constexpr char const kAutotuneCostModelPathParam[] = "autotune_cost_model_path";
+constexpr char const kAutoModReduceParam[] = "auto_mod_reduce";
+
+// Largest ring degree considered when searching for the fastest parameters.
+constexpr uint64_t const kMaxLogN = 15;
+
+// Winograd convolution (see conv_kernels.cc) scales its output by 4, which
+// takes two more bits of plaintext modulus. Its noise grows with the 2D norms
+// of the transforms: 16 for the plaintext input transform, 4 for the
+// ciphertext filter transform and 9 for the output transform.
+constexpr uint64_t const kWinogradPlaintextBits = 2;
+constexpr uint64_t const kWinogradNoiseGrowth = 16 * 4 * 9;
+
+// Operations in the cost model, see ShellCostModel.
+constexpr char const kCostEncrypt[] = "encrypt";
+constexpr char const kCostDecrypt[] = "decrypt";
+constexpr char const kCostAdd[] = "add";
+constexpr char const kCostMulCtPt[] = "mul_ct_pt";
+constexpr char const kCostMulCtCt[] = "mul_ct_ct";
+constexpr char const kCostRotate[] = "rotate";
+constexpr char const kCostModulusReduce[] = "modulus_reduce";
 
 struct ShellAutoParams {
   uint64_t cleartext_bits;
@@ -108,8 +147,7 @@ Status AddScalarConstNode(T value, utils::Mutation* mutation,
   } else {
     []<bool flag = false>() {
       static_assert(flag, "AddScalarConstNode does not support this type");
-    }
-    ();
+    }();
   }
   tensor->set_allocated_tensor_shape(tensor_shape.release());
   (*node.mutable_attr())["value"].set_allocated_tensor(tensor.release());
@@ -178,6 +216,11 @@ StatusOr<bool> DecryptUsesSameContext(utils::MutableNodeView const* node_view,
   }
   trace = trace->GetRegularFanin(0).node_view();
 
+  // Skip contexts reduced by InsertModulusReductions().
+  while (IsModulusReduceContext(*trace->node())) {
+    trace = trace->GetRegularFanin(0).node_view();
+  }
+
   // The next op should be a strided slice.
   if (trace->GetOp() != "StridedSlice") {
     return errors::InvalidArgument(
@@ -249,6 +292,24 @@ StatusOr<int64_t> MaxScalingFactor(utils::MutableGraphView& graph_view,
   return max_sf;
 }
 
+bool IsWinogradConv2d(NodeDef const& node) {
+  bool winograd = false;
+  return IsConv2d(node) && TryGetNodeAttr(node, "winograd", &winograd) &&
+         winograd;
+}
+
+// Returns the extra plaintext bits needed by the operations in the graph whose
+// output carries a scaling factor the cleartext bits do not account for.
+uint64_t ExtraPlaintextBits(utils::MutableGraphView& graph_view) {
+  int const num_nodes = graph_view.NumNodes();
+  for (int i = 0; i < num_nodes; ++i) {
+    if (IsWinogradConv2d(*graph_view.GetNode(i)->node())) {
+      return kWinogradPlaintextBits;
+    }
+  }
+  return 0;
+}
+
 // Function for modular exponentiation
 uint64_t modPow(uint64_t base, uint64_t exp, uint64_t modulus) {
   typedef unsigned __int128 uint128_t;
@@ -262,27 +323,59 @@ uint64_t modPow(uint64_t base, uint64_t exp, uint64_t modulus) {
   return result;
 }
 
-// Fermat's prime test.
-bool CheckPrime(uint64_t const n, uint64_t const k, std::mt19937& engine) {
-  if (n == 2) return true;
-  if ((n & 1) == 0) return false;
+// Deterministic Miller-Rabin prime test. The bases below are sufficient for
+// all n < 2^64.
+bool IsPrime(uint64_t const n) {
+  typedef unsigned __int128 uint128_t;
+  constexpr uint64_t const bases[] = {2,  3,  5,  7,  11, 13,
+                                      17, 19, 23, 29, 31, 37};
 
-  std::uniform_int_distribution<uint64_t> dist(2, n - 2);
+  if (n < 2) return false;
+  for (uint64_t p : bases) {
+    if (n % p == 0) return n == p;
+  }
 
-  for (uint64_t i = 0; i < k; ++i) {
-    uint64_t a = dist(engine);
-    if (modPow(a, n - 1, n) != 1) return false;
+  uint64_t const s = absl::countr_zero(n - 1);
+  uint64_t const d = (n - 1) >> s;
+  for (uint64_t a : bases) {
+    uint64_t x = modPow(a, d, n);
+    if (x == 1 || x == n - 1) continue;
+    bool composite = true;
+    for (uint64_t r = 1; r < s; ++r) {
+      x = (uint128_t(x) * x) % n;
+      if (x == n - 1) {
+        composite = false;
+        break;
+      }
+    }
+    if (composite) return false;
   }
   return true;
 }
 
+// Returns the precomputed primes congruent to 1 mod 2n nearest to 2^bits, in
+// the order a search from 2^bits would find them, or nullptr if log_n or bits
+// are outside the table. Missing primes are 0.
+uint64_t const* TabulatedPrimes(uint64_t const two_n, uint64_t const bits,
+                                bool const reverse) {
+  if (!absl::has_single_bit(two_n)) return nullptr;
+  uint64_t const log_n = absl::countr_zero(two_n) - 1;
+  if (log_n < ntt_primes::kMinLogN || log_n > ntt_primes::kMaxLogN) {
+    return nullptr;
+  }
+  if (bits < ntt_primes::kMinBits || bits > ntt_primes::kMaxBits) {
+    return nullptr;
+  }
+  auto const& table =
+      reverse ? ntt_primes::kPrimesBelow : ntt_primes::kPrimesAbove;
+  return table[log_n - ntt_primes::kMinLogN][bits - ntt_primes::kMinBits];
+}
+
 uint64_t FindPrimeMod2n(uint64_t const two_n, uint64_t const bits_start,
                         uint64_t const bits_end,
                         std::vector<uint64_t> const& qs = {},
                         uint64_t const t = 0) {
-  // Prepare for random number generation.
-  std::mt19937 engine(static_cast<long unsigned int>(std::time(nullptr)));
-
+  typedef unsigned __int128 uint128_t;
   uint64_t const start = uint64_t(1) << bits_start;
   uint64_t const end = uint64_t(1) << bits_end;
 
@@ -295,35 +388,55 @@ uint64_t FindPrimeMod2n(uint64_t const two_n, uint64_t const bits_start,
               << std::endl;
   }
 
-  for (uint64_t i = start; reverse ? i > end : i < end; reverse ? --i : ++i) {
-    // Check i mod t is 1.
-    if constexpr (qs_mod_t_is_one) {
-      if (t != 0) {
-        uint64_t i_mod_t = i % t;
-        if (i_mod_t != 1) {
-          // Given i mod t is not 1, skip ahead.
-          if (i_mod_t != 0 && i > t) {
-            if (reverse) {
-              i -= (i_mod_t - 2);
-            } else {
-              i += t - i_mod_t;
-            }
-          }
-          continue;
-        }
-      }
+  auto in_range = [&](uint64_t i) { return reverse ? i > end : i < end; };
+  auto is_used = [&](uint64_t i) {
+    return std::find(qs.begin(), qs.end(), i) != qs.end();
+  };
+
+  bool const constrain_mod_t = qs_mod_t_is_one && t != 0;
+
+  // The table holds the primes congruent to 1 mod 2n nearest to 2^bits_start
+  // in search order, so the first one in range, unused, and when constrained
+  // also congruent to 1 mod t, is the result. Ciphertext moduli, which are
+  // constrained, only rarely find one and continue the search past them.
+  uint64_t resume_after = 0;
+  if (uint64_t const* primes = TabulatedPrimes(two_n, bits_start, reverse)) {
+    for (uint64_t j = 0; j < ntt_primes::kPrimesPerEntry; ++j) {
+      if (primes[j] == 0 || !in_range(primes[j])) return 0;
+      if (is_used(primes[j])) continue;
+      if (!constrain_mod_t || (primes[j] - 1) % t == 0) return primes[j];
     }
+    resume_after = primes[ntt_primes::kPrimesPerEntry - 1];
+  }
+
+  // Candidates must be congruent to 1 mod 2n, and when constrained also 1 mod
+  // t, i.e. congruent to 1 mod lcm(2n, t). Step through them directly,
+  // starting from 2^bits_start or past the tabulated primes.
+  uint128_t const step = constrain_mod_t
+                             ? uint128_t(two_n / std::gcd(two_n, t)) * t
+                             : uint128_t(two_n);
+  uint128_t i;
+  if (reverse) {
+    uint128_t const bound =
+        resume_after ? uint128_t(resume_after) - 2 : uint128_t(start) - 1;
+    i = (bound / step) * step + 1;
+  } else {
+    uint128_t const bound =
+        resume_after ? uint128_t(resume_after) : uint128_t(start) - 1;
+    i = ((bound + step - 1) / step) * step + 1;
+  }
 
-    // Check if i is congruent to 1 mod 2n.
-    if (i % two_n != 1) continue;
+  for (; reverse ? i > end : i < end; reverse ? i -= step : i += step) {
+    if (i > std::numeric_limits<uint64_t>::max()) return 0;
+    uint64_t const candidate = static_cast<uint64_t>(i);
 
-    // Check if i is in the qs list.
-    if (std::find(qs.begin(), qs.end(), i) != qs.end()) continue;
+    // Check if candidate is in the qs list.
+    if (is_used(candidate)) continue;
 
-    // Check if i is prime. This is the most computationally expensive test so
-    // perform it last.
-    if (!CheckPrime(i, 10, engine)) continue;
-    return i;
+    // Check if candidate is prime. This is the most computationally expensive
+    // test so perform it last.
+    if (!IsPrime(candidate)) continue;
+    return candidate;
   }
   return 0;
 }
@@ -453,7 +566,7 @@ uint64_t EstimateLogN(uint64_t log_q) {
   return 0;
 }
 
-Status ChooseShellParams(ShellParams& params, uint64_t const total_pt_bits,
+Status SearchShellParams(ShellParams& params, uint64_t const total_pt_bits,
                          uint64_t total_ct_bits) {
   // Estimate log_n from the needed number of ct bits.
   uint64_t log_n = EstimateLogN(total_ct_bits);
@@ -510,7 +623,7 @@ Status ChooseShellParams(ShellParams& params, uint64_t const total_pt_bits,
   if (new_log_n != log_n) {
     // log_n has changed, all parameters must be updated.
     log_n = new_log_n;
-    return ChooseShellParams(params, total_pt_bits, found_ct_bits);
+    return SearchShellParams(params, total_pt_bits, found_ct_bits);
   }
 
   params.log_n = log_n;
@@ -530,6 +643,395 @@ Status ChooseShellParams(ShellParams& params, uint64_t const total_pt_bits,
   return OkStatus();
 }
 
+// Like SearchShellParams() but with a fixed ring degree, which must be large
+// enough for the ciphertext modulus to be secure. The aggression parameter is
+// passed to ChooseRnsCtModuli() and trades the number of moduli for their
+// size.
+Status SearchShellParamsAtLogN(ShellParams& params,
+                               uint64_t const total_pt_bits,
+                               uint64_t const total_ct_bits,
+                               uint64_t const log_n,
+                               uint64_t const aggression) {
+  uint64_t two_n = 1 << (log_n + 1);
+  uint64_t bounded_total_pt_bits = std::max(total_pt_bits, kMinPrimeBits);
+
+  uint64_t t =
+      FindPrimeMod2n(two_n, bounded_total_pt_bits, kMaxPrimeBitsPlaintext);
+  if (t == 0) {
+    return errors::FailedPrecondition(
+        "Could not find a prime for plaintext modulus.");
+  }
+
+  std::vector<uint64_t> qs =
+      ChooseRnsCtModuli(two_n, t, total_ct_bits, aggression);
+  if (qs.empty()) {
+    return errors::FailedPrecondition(
+        "Could not find prime(s) for ciphertext modulus.");
+  }
+
+  uint64_t found_ct_bits = 0;
+  for (auto const& q : qs) {
+    found_ct_bits += BitWidth(q) - 1;
+  }
+  uint64_t min_log_n = EstimateLogN(found_ct_bits);
+  if (min_log_n == 0 || min_log_n > log_n) {
+    return errors::FailedPrecondition("Ciphertext modulus is not secure for ",
+                                      "log_n ", log_n, ".");
+  }
+
+  params.log_n = log_n;
+  params.t = t;
+  params.qs = std::move(qs);
+  return OkStatus();
+}
+
+// Caches the result of SearchShellParams(), which is deterministic in the
+// number of plaintext and ciphertext bits but dominated by the prime search.
+// Results are kept for the lifetime of the process and, when a path is set,
+// appended to a file so new processes skip the search as well. Each line of
+// the file holds:
+//   version total_pt_bits total_ct_bits ok log_n t num_qs q_0 ... q_{num_qs-1}
+class ShellParamsCache {
+ public:
+  // Loads the persisted entries from path and persists entries only held in
+  // memory. Subsequent insertions are appended to the same file. An empty path
+  // disables persistence.
+  void SetPath(std::string const& path) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (path == path_) return;
+    path_ = path;
+    if (path_.empty()) return;
+
+    std::map<std::pair<uint64_t, uint64_t>, Entry> persisted;
+    std::ifstream file(path_);
+    std::string line;
+    while (std::getline(file, line)) {
+      std::istringstream fields(line);
+      uint64_t version, pt_bits, ct_bits, num_qs;
+      Entry entry;
+      if (!(fields >> version >> pt_bits >> ct_bits >> entry.ok >>
+            entry.params.log_n >> entry.params.t >> num_qs)) {
+        continue;
+      }
+      if (version != kParamsCacheVersion) continue;
+      entry.params.qs.resize(num_qs);
+      bool complete = true;
+      for (auto& q : entry.params.qs) {
+        complete &= static_cast<bool>(fields >> q);
+      }
+      if (!complete) continue;
+      persisted.insert_or_assign({pt_bits, ct_bits}, std::move(entry));
+    }
+
+    for (auto const& [key, entry] : entries_) {
+      if (persisted.count(key) == 0) Persist(key, entry);
+    }
+    entries_.merge(persisted);
+  }
+
+  // Returns true and sets status and params if the key is cached.
+  bool Lookup(uint64_t const total_pt_bits, uint64_t const total_ct_bits,
+              Status* status, ShellParams* params) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto const it = entries_.find({total_pt_bits, total_ct_bits});
+    if (it == entries_.end()) return false;
+    if (it->second.ok) {
+      *params = it->second.params;
+      *status = OkStatus();
+    } else {
+      *status = errors::FailedPrecondition(
+          "No suitable parameters (cached autotune result).");
+    }
+    return true;
+  }
+
+  void Insert(uint64_t const total_pt_bits, uint64_t const total_ct_bits,
+              bool const ok, ShellParams const& params) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    Entry entry{ok, ok ? params : ShellParams{0, 0, {}}};
+    Persist({total_pt_bits, total_ct_bits}, entry);
+    entries_.insert_or_assign({total_pt_bits, total_ct_bits}, std::move(entry));
+  }
+
+ private:
+  struct Entry {
+    bool ok;
+    ShellParams params;
+  };
+
+  // Appends an entry to the file. Requires mutex_ to be held.
+  void Persist(std::pair<uint64_t, uint64_t> const& key, Entry const& entry) {
+    if (path_.empty()) return;
+    std::ofstream file(path_, std::ios::app);
+    file << kParamsCacheVersion << " " << key.first << " " << key.second << " "
+         << entry.ok << " " << entry.params.log_n << " " << entry.params.t
+         << " " << entry.params.qs.size();
+    for (auto const& q : entry.params.qs) {
+      file << " " << q;
+    }
+    file << std::endl;
+  }
+
+  std::mutex mutex_;
+  std::string path_;
+  std::map<std::pair<uint64_t, uint64_t>, Entry> entries_;
+};
+
+ShellParamsCache& GetShellParamsCache() {
+  static ShellParamsCache* cache = new ShellParamsCache();
+  return *cache;
+}
+
+// The parameters most recently selected for an autocontext, see
+// TakeAutotunedShellParams().
+struct AutotunedShellParams {
+  std::mutex mutex;
+  std::optional<ShellParams> params;
+};
+
+AutotunedShellParams& GetAutotunedShellParams() {
+  static AutotunedShellParams* autotuned = new AutotunedShellParams();
+  return *autotuned;
+}
+
+Status ChooseShellParams(ShellParams& params, uint64_t const total_pt_bits,
+                         uint64_t const total_ct_bits) {
+  ShellParamsCache& cache = GetShellParamsCache();
+  Status status;
+  if (cache.Lookup(total_pt_bits, total_ct_bits, &status, &params)) {
+    if constexpr (debug_moduli) {
+      std::cout << "Autotune cache hit for " << total_pt_bits
+                << " plaintext bits and " << total_ct_bits
+                << " ciphertext bits." << std::endl;
+    }
+    return status;
+  }
+
+  status = SearchShellParams(params, total_pt_bits, total_ct_bits);
+  // Only cache failures to find parameters, not other errors.
+  if (status.ok() || errors::IsFailedPrecondition(status)) {
+    cache.Insert(total_pt_bits, total_ct_bits, status.ok(), params);
+  }
+  return status;
+}
+
+// Measured cost of shell operations in nanoseconds per ciphertext, for each
+// ring degree and number of RNS moduli. The model is written by
+// tf_shell.benchmark_cost_model() and each line of the file holds:
+//   log_n num_moduli op nanoseconds
+// Costs which were not measured are extrapolated from the nearest measurement,
+// assuming linear scaling in the number of moduli and n log n scaling in the
+// ring degree.
+class ShellCostModel {
+ public:
+  void Load(std::string const& path) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (path == path_) return;
+    path_ = path;
+    costs_.clear();
+    if (path_.empty()) return;
+
+    std::ifstream file(path_);
+    if (!file.is_open()) {
+      std::cout << "WARNING: Could not open autotune cost model " << path_
+                << "." << std::endl;
+      return;
+    }
+    std::string line;
+    while (std::getline(file, line)) {
+      if (line.empty() || line[0] == '#') continue;
+      std::istringstream fields(line);
+      uint64_t log_n, num_moduli;
+      std::string op;
+      double ns;
+      if (!(fields >> log_n >> num_moduli >> op >> ns)) continue;
+      costs_.insert_or_assign({op, log_n, num_moduli}, ns);
+    }
+  }
+
+  bool empty() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return costs_.empty();
+  }
+
+  // Returns the cost of op in nanoseconds per ciphertext, or 0 if op was
+  // never measured.
+  double Cost(std::string const& op, uint64_t const log_n,
+              uint64_t const num_moduli) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto const exact = costs_.find({op, log_n, num_moduli});
+    if (exact != costs_.end()) return exact->second;
+
+    // Find the nearest measurement, preferring the same ring degree.
+    double cost = 0;
+    uint64_t best_log_n_distance = std::numeric_limits<uint64_t>::max();
+    uint64_t best_moduli_distance = std::numeric_limits<uint64_t>::max();
+    for (auto const& [key, ns] : costs_) {
+      auto const& [key_op, key_log_n, key_num_moduli] = key;
+      if (key_op != op) continue;
+      uint64_t log_n_distance =
+          key_log_n > log_n ? key_log_n - log_n : log_n - key_log_n;
+      uint64_t moduli_distance = key_num_moduli > num_moduli
+                                     ? key_num_moduli - num_moduli
+                                     : num_moduli - key_num_moduli;
+      if (std::make_pair(log_n_distance, moduli_distance) >=
+          std::make_pair(best_log_n_distance, best_moduli_distance)) {
+        continue;
+      }
+      best_log_n_distance = log_n_distance;
+      best_moduli_distance = moduli_distance;
+      cost = ns * static_cast<double>(num_moduli) / key_num_moduli *
+             (static_cast<double>(uint64_t(1) << log_n) * log_n) /
+             (static_cast<double>(uint64_t(1) << key_log_n) * key_log_n);
+    }
+    return cost;
+  }
+
+ private:
+  std::mutex mutex_;
+  std::string path_;
+  std::map<std::tuple<std::string, uint64_t, uint64_t>, double> costs_;
+};
+
+ShellCostModel& GetShellCostModel() {
+  static ShellCostModel* cost_model = new ShellCostModel();
+  return *cost_model;
+}
+
+// Number of ciphertexts output by each node, keyed by node name. Nodes whose
+// output shape is not statically known are omitted and counted as one.
+using CiphertextCounts = std::map<std::string, int64_t>;
+
+CiphertextCounts GetCiphertextCounts(GrapplerItem const& item) {
+  CiphertextCounts counts;
+  GraphProperties properties(item);
+  if (!properties.InferStatically(/*assume_valid_feeds=*/false).ok()) {
+    return counts;
+  }
+  for (auto const& node : item.graph.node()) {
+    if (!properties.HasOutputProperties(node.name())) continue;
+    auto const& outputs = properties.GetOutputProperties(node.name());
+    if (outputs.empty() || outputs[0].dtype() != DT_VARIANT) continue;
+    auto const& shape = outputs[0].shape();
+    if (shape.unknown_rank()) continue;
+    int64_t count = 1;
+    for (auto const& dim : shape.dim()) {
+      if (dim.size() < 0) {
+        count = -1;
+        break;
+      }
+      count *= dim.size();
+    }
+    if (count > 0) counts[node.name()] = count;
+  }
+  return counts;
+}
+
+// Returns the number of each operation in the cost model performed per output
+// ciphertext of the node.
+std::vector<std::pair<char const*, uint64_t>> NodeOpCounts(
+    NodeDef const& node, uint64_t const log_n) {
+  if (IsEncrypt(node)) return {{kCostEncrypt, 1}};
+  if (IsDecrypt(node)) return {{kCostDecrypt, 1}};
+  if (IsAddCtCt(node) || IsSubCtCt(node) || IsAddCtPt(node) ||
+      IsSubCtPt(node) || IsNegCt(node)) {
+    return {{kCostAdd, 1}};
+  }
+  if (IsMulCtPt(node) || IsMulCtTfScalar(node)) return {{kCostMulCtPt, 1}};
+  if (IsMulCtCt(node)) return {{kCostMulCtCt, 1}};
+  if (IsModulusReduceCt(node)) return {{kCostModulusReduce, 1}};
+  if (IsRoll(node)) return {{kCostRotate, 1}};
+  if (IsReduceSumByRotation(node)) {
+    return {{kCostRotate, log_n}, {kCostAdd, log_n}};
+  }
+  if (IsFastReduceSumByRotation(node)) return {{kCostAdd, log_n}};
+  if (IsReduceSum(node)) {
+    uint64_t size = std::max<int64_t>(node.attr().at("reduce_dim_size").i(), 1);
+    return {{kCostAdd, size}};
+  }
+  if (IsMatMulCtPt(node)) {
+    uint64_t size = std::max<int64_t>(node.attr().at("reduce_dim_size").i(), 1);
+    return {{kCostMulCtPt, size}, {kCostAdd, size}};
+  }
+  if (IsMatMulPtCt(node) || IsFastMatMulPtCt(node)) {
+    // The slots of each ciphertext are reduced with rotations.
+    if (IsFastMatMulPtCt(node) || node.attr().at("reduction").s() != "galois") {
+      return {{kCostMulCtPt, 1}, {kCostAdd, log_n}};
+    }
+    return {{kCostMulCtPt, 1}, {kCostRotate, log_n}, {kCostAdd, log_n}};
+  }
+  if (IsConv2d(node)) {
+    // Each output is a dot product over one output channel of the filter.
+    auto const& output_shape = node.attr().at("output_shape").list();
+    int64_t out_channels = output_shape.i_size() > 0
+                               ? output_shape.i(output_shape.i_size() - 1)
+                               : 1;
+    uint64_t size =
+        std::max<int64_t>(node.attr().at("filter_num_elements").i() /
+                              std::max<int64_t>(out_channels, 1),
+                          1);
+    char const* mul =
+        IsCtCtConv2dOrTranspose(node) ? kCostMulCtCt : kCostMulCtPt;
+    return {{mul, size}, {kCostAdd, size}};
+  }
+  return {};
+}
+
+struct ShellCostEstimate {
+  double step_ns = 0;
+  double example_ns = 0;
+  std::map<std::string, double> ns_by_op;
+  std::map<std::string, uint64_t> count_by_op;
+};
+
+// Estimates the runtime of the graph with the given parameters. Encoded and
+// encrypted values start with all moduli and each modulus reduction drops one.
+ShellCostEstimate EstimateGraphCost(utils::MutableGraphView& graph_view,
+                                    ShellParams const& params,
+                                    CiphertextCounts const& ct_counts) {
+  ShellCostModel& cost_model = GetShellCostModel();
+  int const num_nodes = graph_view.NumNodes();
+  std::vector<uint64_t> node_moduli(num_nodes, 0);
+  ShellCostEstimate estimate;
+
+  for (int i = 0; i < num_nodes; ++i) {
+    auto const* node_view = graph_view.GetNode(i);
+    auto const* node_def = node_view->node();
+
+    // Number of moduli the operation runs at. Modulus reduction runs at the
+    // level of its input.
+    uint64_t op_moduli = 0;
+    if (IsEncode(*node_def) || IsEncrypt(*node_def)) {
+      node_moduli[i] = params.qs.size();
+    } else if (IsModulusReduceCt(*node_def) || IsModulusReducePt(*node_def)) {
+      op_moduli = node_moduli[node_view->GetRegularFanin(1).node_index()];
+      node_moduli[i] = std::max<uint64_t>(op_moduli, 2) - 1;
+    } else {
+      for (int j = 0; j < node_view->NumRegularFanins(); ++j) {
+        node_moduli[i] =
+            std::max(node_moduli[i],
+                     node_moduli[node_view->GetRegularFanin(j).node_index()]);
+      }
+    }
+    if (op_moduli == 0) op_moduli = node_moduli[i];
+    if (op_moduli == 0) continue;
+
+    auto const ct_count = ct_counts.find(node_def->name());
+    uint64_t const num_cts = ct_count == ct_counts.end() ? 1 : ct_count->second;
+    for (auto const& [op, count] : NodeOpCounts(*node_def, params.log_n)) {
+      double ns =
+          cost_model.Cost(op, params.log_n, op_moduli) * count * num_cts;
+      estimate.step_ns += ns;
+      estimate.ns_by_op[op] += ns;
+      estimate.count_by_op[op] += count * num_cts;
+    }
+  }
+
+  // Each slot of the ciphertexts holds one example.
+  estimate.example_ns = estimate.step_ns / (uint64_t(1) << params.log_n);
+  return estimate;
+}
+
 // Returns the noise budget of the current node.
 template <typename T>
 Status EstimateNodeNoise(
@@ -741,6 +1243,9 @@ Status EstimateNodeNoise(
     } else {
       *this_noise += BitWidth(filter_elems - 1);
     }
+    if (IsWinogradConv2d(*node_def)) {
+      *this_noise += BitWidth(kWinogradNoiseGrowth);
+    }
   }
 
   else if (IsMaxUnpool2d(*node_def)) {
@@ -782,6 +1287,12 @@ Status EstimateNodeNoise(
     *this_noise = node_noise[node_view->GetRegularFanin(0).node_index()];
   }
 
+  // Modulus reduction. Which modulus is dropped depends on the level, so
+  // conservatively assume the noise does not shrink.
+  else if (IsModulusReduceCt(*node_def)) {
+    *this_noise = noise_a;
+  }
+
   else if (IsDecrypt(*node_def)) {
     *this_noise = noise_b;
   }
@@ -795,15 +1306,8 @@ Status EstimateNodeNoise(
 }
 
 template <typename T>
-Status EstimateNoiseGrowth(utils::MutableGraphView& graph_view,
-                           utils::MutableNodeView const* autocontext,
-                           ShellParams const& params,
-                           uint64_t const noise_varaince, uint64_t* log_noise) {
-  // Estimate the ciphertext noise growth by traversing the graph.
-  int const num_nodes = graph_view.NumNodes();
-  std::vector<uint64_t> node_noise(num_nodes);
-
-  // Create RnsErrorParams.
+StatusOr<rlwe::RnsErrorParams<rlwe::MontgomeryInt<T>>> CreateErrorParams(
+    ShellParams const& params, uint64_t const noise_varaince) {
   using ModularInt = rlwe::MontgomeryInt<T>;
   using PrimeModulus = rlwe::PrimeModulus<ModularInt>;
   std::vector<PrimeModulus*> main_moduli;
@@ -822,8 +1326,25 @@ Status EstimateNoiseGrowth(utils::MutableGraphView& graph_view,
         new PrimeModulus{std::move(mod_params_q), std::move(ntt_params_q_ptr)};
     main_moduli.push_back(std::move(modulus_q));
   }
-  auto error_params_or = rlwe::RnsErrorParams<ModularInt>::Create(
+  return rlwe::RnsErrorParams<ModularInt>::Create(
       params.log_n, main_moduli, {}, BitWidth(params.t), noise_varaince);
+}
+
+// Estimates the noise of every node and returns the maximum over the decrypt
+// nodes of the autocontext. If node_noise_out is not null, it is set to the
+// noise of each node.
+template <typename T>
+Status EstimateNoiseGrowth(utils::MutableGraphView& graph_view,
+                           utils::MutableNodeView const* autocontext,
+                           ShellParams const& params,
+                           uint64_t const noise_varaince, uint64_t* log_noise,
+                           std::vector<uint64_t>* node_noise_out = nullptr) {
+  // Estimate the ciphertext noise growth by traversing the graph.
+  int const num_nodes = graph_view.NumNodes();
+  std::vector<uint64_t> node_noise(num_nodes);
+
+  using ModularInt = rlwe::MontgomeryInt<T>;
+  auto error_params_or = CreateErrorParams<T>(params, noise_varaince);
   if (!error_params_or.ok()) {
     return error_params_or.status();
   }
@@ -870,6 +1391,404 @@ Status EstimateNoiseGrowth(utils::MutableGraphView& graph_view,
   }
 
   *log_noise = log_max_noise;
+  if (node_noise_out != nullptr) {
+    *node_noise_out = std::move(node_noise);
+  }
+  return OkStatus();
+}
+
+// Searches ring degrees and moduli chains which satisfy the noise budget for
+// the one minimizing the estimated runtime per example. Larger ring degrees
+// pack more examples per ciphertext and fewer, larger moduli make each
+// operation cheaper, which can outweigh the extra cost per ciphertext. params
+// holds the smallest parameters found by the noise budget search on input and
+// is only replaced by cheaper ones.
+Status ChooseShellParamsByCost(utils::MutableGraphView& graph_view,
+                               utils::MutableNodeView const* autocontext,
+                               ShellAutoParams const& auto_params,
+                               uint64_t const total_pt_bits,
+                               uint64_t const min_log_q,
+                               CiphertextCounts const& ct_counts,
+                               ShellParams& params,
+                               ShellCostEstimate& estimate) {
+  estimate = EstimateGraphCost(graph_view, params, ct_counts);
+
+  for (uint64_t log_n = params.log_n; log_n <= kMaxLogN; ++log_n) {
+    for (uint64_t aggression = 1; aggression < 8; ++aggression) {
+      // Larger ring degrees add noise so the ciphertext modulus may need to
+      // grow. Iterate until the noise budget is met.
+      ShellParams candidate;
+      uint64_t log_q = min_log_q;
+      bool found = false;
+      for (int attempt = 0; attempt < 8 && !found; ++attempt) {
+        if (!SearchShellParamsAtLogN(candidate, total_pt_bits, log_q, log_n,
+                                     aggression)
+                 .ok()) {
+          break;
+        }
+        uint64_t log_max_noise = 0;
+        TF_RETURN_IF_ERROR(EstimateNoiseGrowth<uint64_t>(
+            graph_view, autocontext, candidate, auto_params.noise_variance,
+            &log_max_noise));
+        int64_t const needed_ct_bits = BitWidth(candidate.t) + log_max_noise +
+                                       auto_params.noise_offset_bits;
+        if (needed_ct_bits <= static_cast<int64_t>(log_q)) {
+          found = true;
+        } else {
+          log_q = needed_ct_bits;
+        }
+      }
+      if (!found) continue;
+
+      ShellCostEstimate candidate_estimate =
+          EstimateGraphCost(graph_view, candidate, ct_counts);
+      if constexpr (debug_moduli) {
+        std::cout << "Candidate log_n: " << candidate.log_n
+                  << " num moduli: " << candidate.qs.size()
+                  << " estimated ns per example: "
+                  << candidate_estimate.example_ns << std::endl;
+      }
+      if (candidate_estimate.example_ns < estimate.example_ns) {
+        params = std::move(candidate);
+        estimate = std::move(candidate_estimate);
+      }
+    }
+  }
+  return OkStatus();
+}
+
+// Ciphertext ops which can run at a lower level if their context, ciphertext
+// and plaintext operands are all reduced together.
+bool IsReducibleOp(NodeDef const& node) {
+  return IsAddCtCt(node) || IsSubCtCt(node) || IsMulCtCt(node) ||
+         IsAddCtPt(node) || IsSubCtPt(node) || IsMulCtPt(node) ||
+         IsNegCt(node) || IsMulCtTfScalar(node) ||
+         IsConv2dTransposeCtTfScalar(node);
+}
+
+std::string FaninName(utils::MutableFanoutView const& fanin) {
+  if (fanin.index() == 0) return fanin.node_view()->GetName();
+  return absl::StrCat(fanin.node_view()->GetName(), ":", fanin.index());
+}
+
+// Adds ModulusReduce*64 nodes to a mutation. Reductions of the same input are
+// shared between all of its users.
+class ModulusReductionBuilder {
+ public:
+  explicit ModulusReductionBuilder(utils::Mutation* mutation)
+      : mutation_(mutation) {}
+
+  // Returns the name of the context reduced num_reductions times.
+  StatusOr<std::string> Context(utils::MutableFanoutView const& context,
+                                uint64_t const num_reductions) {
+    std::string name = FaninName(context);
+    for (uint64_t i = 0; i < num_reductions; ++i) {
+      auto const it = contexts_.find(name);
+      if (it != contexts_.end()) {
+        name = it->second;
+        continue;
+      }
+      std::string reduced_name =
+          NewName(context.node_view()->GetName() + "/AutoModReduceContext");
+      TF_RETURN_IF_ERROR(AddNode(kModulusReduceContext, reduced_name,
+                                 context.node_view()->GetDevice(), {name}));
+      contexts_[name] = reduced_name;
+      name = std::move(reduced_name);
+    }
+    return name;
+  }
+
+  // Returns the name of the key reduced num_reductions times.
+  StatusOr<std::string> Key(utils::MutableFanoutView const& context,
+                            utils::MutableFanoutView const& key,
+                            uint64_t const num_reductions) {
+    std::string name = FaninName(key);
+    for (uint64_t i = 0; i < num_reductions; ++i) {
+      auto const it = keys_.find(name);
+      if (it != keys_.end()) {
+        name = it->second;
+        continue;
+      }
+      TF_ASSIGN_OR_RETURN(std::string reduced_context, Context(context, i));
+      std::string reduced_name =
+          NewName(key.node_view()->GetName() + "/AutoModReduceKey");
+      TF_RETURN_IF_ERROR(AddNode(kModulusReduceKey, reduced_name,
+                                 key.node_view()->GetDevice(),
+                                 {reduced_context, name}));
+      keys_[name] = reduced_name;
+      name = std::move(reduced_name);
+    }
+    return name;
+  }
+
+  // Returns the name of the ciphertext or plaintext value reduced
+  // num_reductions times.
+  StatusOr<std::string> Value(utils::MutableFanoutView const& context,
+                              utils::MutableFanoutView const& value,
+                              bool const is_ct, uint64_t const num_reductions) {
+    std::string name = FaninName(value);
+    for (uint64_t i = 0; i < num_reductions; ++i) {
+      auto const it = values_.find(name);
+      if (it != values_.end()) {
+        name = it->second;
+        continue;
+      }
+      TF_ASSIGN_OR_RETURN(std::string reduced_context, Context(context, i));
+      std::string reduced_name =
+          NewName(value.node_view()->GetName() + "/AutoModReduce");
+      TF_RETURN_IF_ERROR(AddNode(is_ct ? kModulusReduceCt : kModulusReducePt,
+                                 reduced_name, value.node_view()->GetDevice(),
+                                 {reduced_context, name}));
+      values_[name] = reduced_name;
+      name = std::move(reduced_name);
+    }
+    return name;
+  }
+
+  // Names referenced by the mutation must outlive it.
+  TensorId Keep(std::string name) {
+    names_.push_back(std::move(name));
+    return ParseTensorName(names_.back());
+  }
+
+  int num_added() const { return num_added_; }
+
+ private:
+  std::string NewName(std::string const& prefix) {
+    return absl::StrCat(prefix, "_", num_added_);
+  }
+
+  Status AddNode(char const* op, std::string const& name,
+                 std::string const& device,
+                 std::vector<std::string> const& inputs) {
+    NodeDef node;
+    node.set_op(op);
+    node.set_name(name);
+    node.set_device(device);
+    for (auto const& input : inputs) {
+      node.add_input(input);
+    }
+    Status status;
+    mutation_->AddNode(std::move(node), &status);
+    ++num_added_;
+    return status;
+  }
+
+  utils::Mutation* mutation_;
+  std::map<std::string, std::string> contexts_;
+  std::map<std::string, std::string> keys_;
+  std::map<std::string, std::string> values_;
+  std::deque<std::string> names_;
+  int num_added_ = 0;
+};
+
+// Reduces the moduli of ciphertexts as early as the noise budget allows.
+// Each decryption is preceded by a chain of reducible ops which only feed the
+// next op in the chain. Dropping a modulus divides the noise by that modulus
+// (up to a rounding error), so once the noise has grown enough, the rest of
+// the chain can run with fewer moduli without exceeding the budget at
+// decryption. For every chain, this finds the earliest point and number of
+// moduli which satisfy the budget and inserts the reductions there, reducing
+// the operands, contexts, and decryption key of the rest of the chain to
+// match. Plaintext operands are reduced with ModulusReducePt64, which
+// preserves their value. The estimated savings are added to stats.
+Status InsertModulusReductions(utils::MutableGraphView& graph_view,
+                               utils::MutableNodeView const* autocontext,
+                               ShellParams const& params,
+                               ShellAutoParams const& auto_params,
+                               CiphertextCounts const& ct_counts,
+                               PassStats* stats) {
+  if (params.qs.size() < 2) return OkStatus();
+  // Applying the mutation invalidates the node views.
+  std::string const autocontext_name = autocontext->GetName();
+
+  uint64_t log_max_noise = 0;
+  std::vector<uint64_t> node_noise;
+  TF_RETURN_IF_ERROR(EstimateNoiseGrowth<uint64_t>(
+      graph_view, autocontext, params, auto_params.noise_variance,
+      &log_max_noise, &node_noise));
+  TF_ASSIGN_OR_RETURN(
+      auto error_params,
+      CreateErrorParams<uint64_t>(params, auto_params.noise_variance));
+
+  // Modulus switching adds a rounding error of roughly t times the secret key
+  // norm. Bound it conservatively by t * 8n.
+  uint64_t const rounding_noise = BitWidth(params.t) + params.log_n + 3;
+
+  // Noise after dropping the last num_reductions moduli.
+  auto reduced_noise = [&](uint64_t noise, uint64_t num_reductions) {
+    for (uint64_t i = 0; i < num_reductions; ++i) {
+      uint64_t const q_bits = BitWidth(params.qs[params.qs.size() - 1 - i]) - 1;
+      noise = std::max(noise > q_bits ? noise - q_bits : 0, rounding_noise);
+    }
+    return noise;
+  };
+
+  // Bits available for the noise with the last num_reductions moduli dropped.
+  // Like the autotuner, the plaintext modulus and noise offset are reserved.
+  auto noise_budget = [&](uint64_t num_reductions) {
+    int64_t ct_bits = 0;
+    for (uint64_t i = 0; i < params.qs.size() - num_reductions; ++i) {
+      ct_bits += BitWidth(params.qs[i]) - 1;
+    }
+    return ct_bits - static_cast<int64_t>(BitWidth(params.t)) -
+           auto_params.noise_offset_bits;
+  };
+
+  utils::Mutation* mutation = graph_view.GetMutationBuilder();
+  ModulusReductionBuilder builder(mutation);
+  ShellCostModel& cost_model = GetShellCostModel();
+  bool const use_cost_model = !cost_model.empty();
+  double saved_ns = 0;
+  uint64_t num_reduced_ops = 0;
+  uint64_t saved_limb_ops = 0;
+  uint64_t total_limb_ops = 0;
+
+  int const num_nodes = graph_view.NumNodes();
+  for (int d = 0; d < num_nodes; ++d) {
+    auto* decrypt = graph_view.GetNode(d);
+    if (IsReducibleOp(*decrypt->node())) {
+      // Count the work of every reducible op to report the savings relative
+      // to it.
+      auto const ct_count = ct_counts.find(decrypt->GetName());
+      uint64_t const num_cts =
+          ct_count == ct_counts.end() ? 1 : ct_count->second;
+      total_limb_ops += num_cts * params.qs.size();
+    }
+    if (!IsPlainDerypt(*decrypt->node())) continue;
+    TF_ASSIGN_OR_RETURN(bool is_same_autocontext,
+                        DecryptUsesSameContext(decrypt, autocontext));
+    if (!is_same_autocontext) continue;
+
+    // Walk back from the decryption along the first operand. chain[0] is the
+    // decryption and chain[i] feeds chain[i - 1].
+    std::vector<utils::MutableNodeView*> chain{decrypt};
+    while (true) {
+      int const value_port = chain.size() == 1 ? 2 : 1;
+      auto* prev = chain.back()->GetRegularFanin(value_port).node_view();
+      if (!IsReducibleOp(*prev->node()) || prev->NumRegularFanouts() != 1) {
+        break;
+      }
+      chain.push_back(prev);
+    }
+
+    // Simulate inserting num_reductions reductions in front of chain[start],
+    // reducing every op from chain[start] to the decryption.
+    auto simulate = [&](size_t start,
+                        uint64_t num_reductions) -> StatusOr<bool> {
+      std::vector<uint64_t> noise = node_noise;
+      for (size_t i = start + 1; i-- > 0;) {
+        auto* node = chain[i];
+        int const value_port = i == 0 ? 2 : 1;
+        if (i == start) {
+          int const input = node->GetRegularFanin(value_port).node_index();
+          noise[input] = reduced_noise(node_noise[input], num_reductions);
+        }
+        if (IsAddCtCt(*node->node()) || IsSubCtCt(*node->node()) ||
+            IsMulCtCt(*node->node())) {
+          int const other = node->GetRegularFanin(2).node_index();
+          noise[other] = reduced_noise(node_noise[other], num_reductions);
+        }
+        TF_RETURN_IF_ERROR(EstimateNodeNoise<uint64_t>(
+            graph_view, node->node_index(), noise, params, error_params));
+      }
+      return static_cast<int64_t>(noise[decrypt->node_index()]) <=
+             noise_budget(num_reductions);
+    };
+
+    // Prefer dropping more moduli from more ops, earlier in the chain.
+    size_t best_start = 0;
+    uint64_t best_reductions = 0;
+    for (uint64_t r = params.qs.size() - 1; r > 0; --r) {
+      for (size_t start = chain.size(); start-- > 0;) {
+        if (r * (start + 1) <= best_reductions * (best_start + 1)) break;
+        TF_ASSIGN_OR_RETURN(bool fits, simulate(start, r));
+        if (fits) {
+          best_start = start;
+          best_reductions = r;
+          break;
+        }
+      }
+    }
+    if (best_reductions == 0) continue;
+
+    // Rewrite the chain.
+    for (size_t i = 0; i <= best_start; ++i) {
+      auto* node = chain[i];
+      auto const& context = node->GetRegularFanin(0);
+      TF_ASSIGN_OR_RETURN(std::string reduced_context,
+                          builder.Context(context, best_reductions));
+      mutation->AddOrUpdateRegularFanin(node, 0, builder.Keep(reduced_context));
+
+      if (i == 0) {
+        TF_ASSIGN_OR_RETURN(
+            std::string reduced_key,
+            builder.Key(context, node->GetRegularFanin(1), best_reductions));
+        mutation->AddOrUpdateRegularFanin(node, 1, builder.Keep(reduced_key));
+      }
+
+      // Reduce the operands which do not come from the chain.
+      auto const* node_def = node->node();
+      std::vector<std::pair<int, bool>> operands;  // (port, is_ct)
+      if (i == best_start) operands.push_back({i == 0 ? 2 : 1, true});
+      if (IsAddCtCt(*node_def) || IsSubCtCt(*node_def) ||
+          IsMulCtCt(*node_def)) {
+        operands.push_back({2, true});
+      } else if (IsAddCtPt(*node_def) || IsSubCtPt(*node_def) ||
+                 IsMulCtPt(*node_def)) {
+        operands.push_back({2, false});
+      }
+      for (auto const& [port, is_ct] : operands) {
+        TF_ASSIGN_OR_RETURN(std::string reduced_value,
+                            builder.Value(context, node->GetRegularFanin(port),
+                                          is_ct, best_reductions));
+        mutation->AddOrUpdateRegularFanin(node, port,
+                                          builder.Keep(reduced_value));
+      }
+
+      if (i == 0) continue;
+      ++num_reduced_ops;
+      auto const ct_count = ct_counts.find(node->GetName());
+      uint64_t const num_cts =
+          ct_count == ct_counts.end() ? 1 : ct_count->second;
+      saved_limb_ops += num_cts * best_reductions;
+      if (use_cost_model) {
+        for (auto const& [op, count] : NodeOpCounts(*node_def, params.log_n)) {
+          saved_ns += (cost_model.Cost(op, params.log_n, params.qs.size()) -
+                       cost_model.Cost(op, params.log_n,
+                                       params.qs.size() - best_reductions)) *
+                      count * num_cts;
+        }
+      }
+    }
+  }
+
+  if (builder.num_added() == 0) return OkStatus();
+  TF_RETURN_IF_ERROR(mutation->Apply());
+
+  std::string savings =
+      absl::StrCat("{\"node\": ", JsonString(autocontext_name),
+                   ", \"reduction_nodes\": ", builder.num_added(),
+                   ", \"reduced_ops\": ", num_reduced_ops,
+                   ", \"saved_limb_ops\": ", saved_limb_ops,
+                   ", \"total_limb_ops\": ", total_limb_ops);
+  if (use_cost_model) {
+    absl::StrAppend(&savings, ", \"saved_ns_per_step\": ", saved_ns);
+  }
+  absl::StrAppend(&savings, "}");
+  stats->AddDetail("mod_reductions", std::move(savings));
+
+  if constexpr (debug_output_params) {
+    std::cout << "Inserted " << builder.num_added()
+              << " modulus reduction nodes. " << num_reduced_ops
+              << " ciphertext ops run with fewer moduli, saving "
+              << saved_limb_ops << " of " << total_limb_ops
+              << " RNS limb operations";
+    if (use_cost_model) {
+      std::cout << " (estimated " << saved_ns / 1e6 << " ms per step)";
+    }
+    std::cout << "." << std::endl;
+  }
   return OkStatus();
 }
 
@@ -966,8 +1885,30 @@ Status ReplaceAutoparamWithContext(utils::MutableGraphView& graph_view,
   return OkStatus();
 }
 
+// Returns the chosen parameters and the estimated noise of each tf-shell node
+// using them as a JSON object for the optimizer statistics.
+std::string AutocontextStatsJson(utils::MutableGraphView& graph_view,
+                                 utils::MutableNodeView const* autocontext,
+                                 ShellParams const& params,
+                                 uint64_t const log_max_noise,
+                                 std::vector<uint64_t> const& node_noise) {
+  std::vector<std::string> noise_bits;
+  for (int i = 0; i < static_cast<int>(node_noise.size()); ++i) {
+    if (node_noise[i] == 0) continue;
+    noise_bits.push_back(absl::StrCat(
+        JsonString(graph_view.GetNode(i)->GetName()), ": ", node_noise[i]));
+  }
+  return absl::StrCat(
+      "{\"node\": ", JsonString(autocontext->GetName()),
+      ", \"log_n\": ", params.log_n, ", \"t\": ", params.t, ", \"qs\": [",
+      absl::StrJoin(params.qs, ", "), "], \"log_max_noise\": ", log_max_noise,
+      ", \"noise_bits\": {", absl::StrJoin(noise_bits, ", "), "}}");
+}
+
 Status OptimizeAutocontext(utils::MutableGraphView& graph_view,
-                           utils::MutableNodeView* autocontext) {
+                           utils::MutableNodeView* autocontext,
+                           CiphertextCounts const& ct_counts,
+                           bool const auto_mod_reduce, PassStats* stats) {
   // Use GetScalarConstValue to get value of plaintext modulus,
   // etc.
   ShellAutoParams auto_params;
@@ -980,7 +1921,8 @@ Status OptimizeAutocontext(utils::MutableGraphView& graph_view,
   // TF_ASSIGN_OR_RETURN(int64_t max_sf,
   //                     MaxScalingFactor(graph_view, autocontext));
   // uint64_t sf_bits = BitWidth(max_sf);
-  uint64_t total_plaintext_bits = auto_params.cleartext_bits;
+  uint64_t total_plaintext_bits =
+      auto_params.cleartext_bits + ExtraPlaintextBits(graph_view);
 
   if constexpr (debug_moduli) {
     // std::cout << "Max bits of scaling factor upon decryption: " << sf_bits
@@ -1066,6 +2008,20 @@ Status OptimizeAutocontext(utils::MutableGraphView& graph_view,
   }
 
   TF_RETURN_IF_ERROR(ChooseShellParams(params, total_plaintext_bits, log_q));
+
+  // When a cost model is available, trade the smallest parameters for the
+  // fastest ones.
+  bool const use_cost_model = !GetShellCostModel().empty();
+  ShellCostEstimate estimate;
+  if (use_cost_model) {
+    TF_RETURN_IF_ERROR(ChooseShellParamsByCost(
+        graph_view, autocontext, auto_params, total_plaintext_bits, log_q,
+        ct_counts, params, estimate));
+    TF_RETURN_IF_ERROR(EstimateNoiseGrowth<uint64_t>(
+        graph_view, autocontext, params, auto_params.noise_variance,
+        &log_max_noise));
+  }
+
   if constexpr (debug_output_params) {
     std::cout << "Selected BGV parameters:" << std::endl;
     std::cout << "log_n: " << params.log_n << std::endl;
@@ -1084,24 +2040,80 @@ Status OptimizeAutocontext(utils::MutableGraphView& graph_view,
               << " + offset:" << auto_params.noise_offset_bits << ")"
               << std::endl;
   }
+  if (debug_output_params && use_cost_model) {
+    std::cout << "Estimated step time: " << estimate.step_ns / 1e6 << " ms ("
+              << estimate.example_ns / 1e3 << " us per example)" << std::endl;
+    for (auto const& [op, ns] : estimate.ns_by_op) {
+      std::cout << "  " << op << ": " << estimate.count_by_op[op]
+                << " ciphertext ops, " << ns / 1e6 << " ms" << std::endl;
+    }
+  }
+
+  // Record the noise before modulus reductions are inserted, which is what
+  // determined the parameters.
+  std::vector<uint64_t> node_noise;
+  TF_RETURN_IF_ERROR(EstimateNoiseGrowth<uint64_t>(
+      graph_view, autocontext, params, auto_params.noise_variance,
+      &log_max_noise, &node_noise));
+  stats->AddDetail("autocontexts",
+                   AutocontextStatsJson(graph_view, autocontext, params,
+                                        log_max_noise, node_noise));
+
+  if (auto_mod_reduce) {
+    // Inserting nodes invalidates the node views, so find the autocontext
+    // again afterwards.
+    std::string const autocontext_name = autocontext->GetName();
+    TF_RETURN_IF_ERROR(InsertModulusReductions(graph_view, autocontext, params,
+                                               auto_params, ct_counts, stats));
+    TF_RETURN_IF_ERROR(
+        graph_view.SortTopologically(/*ignore_cycles=*/false, {}));
+    autocontext = graph_view.GetNode(autocontext_name);
+  }
 
   TF_RETURN_IF_ERROR(ReplaceAutoparamWithContext(graph_view, autocontext,
                                                  params, auto_params));
+
+  AutotunedShellParams& autotuned = GetAutotunedShellParams();
+  std::lock_guard<std::mutex> lock(autotuned.mutex);
+  autotuned.params = params;
   return OkStatus();
 }
 
 }  // namespace
 
+std::optional<ShellParams> TakeAutotunedShellParams() {
+  AutotunedShellParams& autotuned = GetAutotunedShellParams();
+  std::lock_guard<std::mutex> lock(autotuned.mutex);
+  std::optional<ShellParams> params = std::move(autotuned.params);
+  autotuned.params.reset();
+  return params;
+}
+
 ModuliAutotuneOptimizer::ModuliAutotuneOptimizer() {}
 
 Status ModuliAutotuneOptimizer::Init(
     tensorflow::RewriterConfig_CustomGraphOptimizer const* config) {
+  if (config == nullptr) return OkStatus();
+
+  auto const& parameters = config->parameter_map();
+  auto const cache_path = parameters.find(kAutotuneCachePathParam);
+  if (cache_path != parameters.end()) {
+    GetShellParamsCache().SetPath(cache_path->second.s());
+  }
+  // Unlike the parameter cache, the cost model only applies when requested.
+  auto const auto_mod_reduce = parameters.find(kAutoModReduceParam);
+  auto_mod_reduce_ =
+      auto_mod_reduce != parameters.end() && auto_mod_reduce->second.b();
+  auto const cost_model_path = parameters.find(kAutotuneCostModelPathParam);
+  GetShellCostModel().Load(
+      cost_model_path != parameters.end() ? cost_model_path->second.s() : "");
   return OkStatus();
 }
 
 Status ModuliAutotuneOptimizer::Optimize(Cluster* cluster,
                                          GrapplerItem const& item,
                                          GraphDef* optimized_graph) {
+  PassStats stats(name_);
   GrapplerItem mutable_item(item);
   Status status;
   utils::MutableGraphView graph_view(&mutable_item.graph, &status);
@@ -1110,10 +2122,18 @@ Status ModuliAutotuneOptimizer::Optimize(Cluster* cluster,
   // Topological sort so all subsequent traversals are in order.
   TF_RETURN_IF_ERROR(graph_view.SortTopologically(/*ignore_cycles=*/false, {}));
 
+  // Shape inference is only needed to estimate costs.
+  CiphertextCounts ct_counts;
+  if (!GetShellCostModel().empty() || auto_mod_reduce_) {
+    ct_counts = GetCiphertextCounts(item);
+  }
+
   // Optimize each autocontext op in the graph.
   utils::MutableNodeView* autocontext = GetNextAutoShellContextNode(graph_view);
   while (autocontext != nullptr) {
-    TF_RETURN_IF_ERROR(OptimizeAutocontext(graph_view, autocontext));
+    stats.AddMatched();
+    TF_RETURN_IF_ERROR(OptimizeAutocontext(graph_view, autocontext, ct_counts,
+                                           auto_mod_reduce_, &stats));
     autocontext = GetNextAutoShellContextNode(graph_view);
   }
 
@@ -1126,6 +2146,7 @@ Status ModuliAutotuneOptimizer::Optimize(Cluster* cluster,
   }
 
   *optimized_graph = std::move(mutable_item.graph);
+  stats.Record(item, *optimized_graph);
 
   return OkStatus();
 }
@@ -1,5 +1,9 @@
 #pragma once
 
+#include <cstdint>
+#include <optional>
+#include <vector>
+
 #include "tensorflow/core/grappler/clusters/cluster.h"
 #include "tensorflow/core/grappler/grappler_item.h"
 #include "tensorflow/core/grappler/optimizers/custom_graph_optimizer_registry.h"
@@ -8,6 +12,18 @@
 namespace tensorflow {
 namespace grappler {
 
+struct ShellParams {
+  uint64_t log_n;
+  uint64_t t;
+  std::vector<uint64_t> qs;
+};
+
+// Returns the parameters most recently selected by the ModuliAutotuneOptimizer
+// and clears them, so callers can read the result of an optimization pass
+// without searching the optimized graph. Returns std::nullopt if no
+// autocontext was optimized since the last call.
+std::optional<ShellParams> TakeAutotunedShellParams();
+
 class ModuliAutotuneOptimizer : public CustomGraphOptimizer {
  public:
   ModuliAutotuneOptimizer();
@@ -24,6 +40,7 @@ class ModuliAutotuneOptimizer : public CustomGraphOptimizer {
 
  private:
   string const name_ = "ModuliAutotuneOptimizer";
+  bool auto_mod_reduce_ = false;
 };
 
 }  // namespace grappler
@@ -0,0 +1,1015 @@
+// Generated by tools/gen_ntt_primes.py. Do not edit.
+#pragma once
+
+#include <cstdint>
+
+namespace tensorflow {
+namespace grappler {
+namespace ntt_primes {
+
+constexpr uint64_t const kMinLogN = 10;
+constexpr uint64_t const kMaxLogN = 15;
+constexpr uint64_t const kMinBits = 3;
+constexpr uint64_t const kMaxBits = 60;
+constexpr uint64_t const kPrimesPerEntry = 4;
+constexpr uint64_t const kNumLogN = kMaxLogN - kMinLogN + 1;
+constexpr uint64_t const kNumBits = kMaxBits - kMinBits + 1;
+
+// kPrimesAbove[log_n - kMinLogN][bits - kMinBits] holds the smallest primes
+// >= 2^bits which are congruent to 1 mod 2^(log_n + 1), in increasing order.
+constexpr uint64_t const kPrimesAbove[kNumLogN][kNumBits][kPrimesPerEntry] = {
+    // log_n = 10
+    {
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {12289ULL, 18433ULL, 40961ULL, 59393ULL},
+        {18433ULL, 40961ULL, 59393ULL, 61441ULL},
+        {40961ULL, 59393ULL, 61441ULL, 65537ULL},
+        {65537ULL, 79873ULL, 83969ULL, 86017ULL},
+        {133121ULL, 147457ULL, 151553ULL, 163841ULL},
+        {270337ULL, 286721ULL, 301057ULL, 307201ULL},
+        {534529ULL, 557057ULL, 575489ULL, 577537ULL},
+        {1054721ULL, 1062913ULL, 1067009ULL, 1073153ULL},
+        {2101249ULL, 2107393ULL, 2119681ULL, 2123777ULL},
+        {4206593ULL, 4208641ULL, 4263937ULL, 4270081ULL},
+        {8404993ULL, 8427521ULL, 8441857ULL, 8452097ULL},
+        {16801793ULL, 16807937ULL, 16832513ULL, 16844801ULL},
+        {33564673ULL, 33574913ULL, 33617921ULL, 33650689ULL},
+        {67127297ULL, 67153921ULL, 67209217ULL, 67213313ULL},
+        {134246401ULL, 134250497ULL, 134275073ULL, 134330369ULL},
+        {268441601ULL, 268460033ULL, 268496897ULL, 268515329ULL},
+        {536881153ULL, 536903681ULL, 536924161ULL, 536952833ULL},
+        {1073750017ULL, 1073754113ULL, 1073815553ULL, 1073842177ULL},
+        {2147493889ULL, 2147555329ULL, 2147565569ULL, 2147573761ULL},
+        {4294991873ULL, 4295049217ULL, 4295053313ULL, 4295145473ULL},
+        {8589987841ULL, 8590047233ULL, 8590090241ULL, 8590108673ULL},
+        {17179875329ULL, 17179887617ULL, 17179912193ULL, 17179926529ULL},
+        {34359754753ULL, 34359771137ULL, 34359777281ULL, 34359795713ULL},
+        {68719484929ULL, 68719503361ULL, 68719562753ULL, 68719564801ULL},
+        {137439004673ULL, 137439006721ULL, 137439010817ULL, 137439016961ULL},
+        {274877908993ULL, 274877921281ULL, 274877976577ULL, 274877995009ULL},
+        {549755860993ULL, 549755873281ULL, 549755904001ULL, 549755932673ULL},
+        {1099511678977ULL, 1099511683073ULL, 1099511795713ULL,
+         1099511799809ULL},
+        {2199023265793ULL, 2199023269889ULL, 2199023288321ULL,
+         2199023290369ULL},
+        {4398046523393ULL, 4398046525441ULL, 4398046529537ULL,
+         4398046547969ULL},
+        {8796093048833ULL, 8796093050881ULL, 8796093112321ULL,
+         8796093134849ULL},
+        {17592186062849ULL, 17592186064897ULL, 17592186075137ULL,
+         17592186089473ULL},
+        {35184372103169ULL, 35184372121601ULL, 35184372140033ULL,
+         35184372172801ULL},
+        {70368744183809ULL, 70368744210433ULL, 70368744232961ULL,
+         70368744296449ULL},
+        {140737488357377ULL, 140737488476161ULL, 140737488486401ULL,
+         140737488498689ULL},
+        {281474976749569ULL, 281474976768001ULL, 281474976778241ULL,
+         281474976829441ULL},
+        {562949953443841ULL, 562949953497089ULL, 562949953505281ULL,
+         562949953548289ULL},
+        {1125899906856961ULL, 1125899906949121ULL, 1125899906977793ULL,
+         1125899906990081ULL},
+        {2251799813773313ULL, 2251799813824513ULL, 2251799813922817ULL,
+         2251799813971969ULL},
+        {4503599627446273ULL, 4503599627481089ULL, 4503599627499521ULL,
+         4503599627542529ULL},
+        {9007199254751233ULL, 9007199254755329ULL, 9007199254781953ULL,
+         9007199254812673ULL},
+        {18014398509500417ULL, 18014398509506561ULL, 18014398509524993ULL,
+         18014398509537281ULL},
+        {36028797018972161ULL, 36028797018990593ULL, 36028797019035649ULL,
+         36028797019082753ULL},
+        {72057594037934081ULL, 72057594037948417ULL, 72057594038028289ULL,
+         72057594038081537ULL},
+        {144115188075878401ULL, 144115188075907073ULL, 144115188076060673ULL,
+         144115188076167169ULL},
+        {288230376151748609ULL, 288230376151760897ULL, 288230376151779329ULL,
+         288230376151812097ULL},
+        {576460752303439873ULL, 576460752303476737ULL, 576460752303486977ULL,
+         576460752303568897ULL},
+        {1152921504606877697ULL, 1152921504606902273ULL, 1152921504606904321ULL,
+         1152921504606965761ULL},
+    },
+    // log_n = 11
+    {
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {12289ULL, 40961ULL, 61441ULL, 65537ULL},
+        {40961ULL, 61441ULL, 65537ULL, 86017ULL},
+        {40961ULL, 61441ULL, 65537ULL, 86017ULL},
+        {65537ULL, 86017ULL, 114689ULL, 147457ULL},
+        {147457ULL, 151553ULL, 163841ULL, 176129ULL},
+        {270337ULL, 286721ULL, 307201ULL, 319489ULL},
+        {557057ULL, 577537ULL, 638977ULL, 643073ULL},
+        {1073153ULL, 1093633ULL, 1097729ULL, 1130497ULL},
+        {2101249ULL, 2236417ULL, 2277377ULL, 2297857ULL},
+        {4206593ULL, 4263937ULL, 4300801ULL, 4304897ULL},
+        {8404993ULL, 8441857ULL, 8466433ULL, 8519681ULL},
+        {16801793ULL, 16863233ULL, 16900097ULL, 16957441ULL},
+        {33574913ULL, 33673217ULL, 33681409ULL, 33697793ULL},
+        {67153921ULL, 67219457ULL, 67227649ULL, 67239937ULL},
+        {134246401ULL, 134250497ULL, 134275073ULL, 134336513ULL},
+        {268460033ULL, 268496897ULL, 268582913ULL, 268640257ULL},
+        {536903681ULL, 536924161ULL, 536952833ULL, 536973313ULL},
+        {1073750017ULL, 1073754113ULL, 1073815553ULL, 1073872897ULL},
+        {2147565569ULL, 2147573761ULL, 2147577857ULL, 2147721217ULL},
+        {4294991873ULL, 4295049217ULL, 4295053313ULL, 4295188481ULL},
+        {8589987841ULL, 8590090241ULL, 8590151681ULL, 8590163969ULL},
+        {17179926529ULL, 17179967489ULL, 17180041217ULL, 17180123137ULL},
+        {34359754753ULL, 34359771137ULL, 34359795713ULL, 34359820289ULL},
+        {68719484929ULL, 68719562753ULL, 68719595521ULL, 68719644673ULL},
+        {137439006721ULL, 137439010817ULL, 137439072257ULL, 137439240193ULL},
+        {274877976577ULL, 274878017537ULL, 274878062593ULL, 274878078977ULL},
+        {549755904001ULL, 549755932673ULL, 549755965441ULL, 549755969537ULL},
+        {1099511795713ULL, 1099511799809ULL, 1099511836673ULL,
+         1099511922689ULL},
+        {2199023288321ULL, 2199023296513ULL, 2199023357953ULL,
+         2199023362049ULL},
+        {4398046523393ULL, 4398046547969ULL, 4398046556161ULL,
+         4398046568449ULL},
+        {8796093050881ULL, 8796093112321ULL, 8796093161473ULL,
+         8796093202433ULL},
+        {17592186064897ULL, 17592186089473ULL, 17592186155009ULL,
+         17592186175489ULL},
+        {35184372121601ULL, 35184372203521ULL, 35184372355073ULL,
+         35184372375553ULL},
+        {70368744210433ULL, 70368744296449ULL, 70368744312833ULL,
+         70368744435713ULL},
+        {140737488486401ULL, 140737488498689ULL, 140737488654337ULL,
+         140737488756737ULL},
+        {281474976768001ULL, 281474976829441ULL, 281474976894977ULL,
+         281474976919553ULL},
+        {562949953548289ULL, 562949953671169ULL, 562949953761281ULL,
+         562949954093057ULL},
+        {1125899906949121ULL, 1125899906977793ULL, 1125899906990081ULL,
+         1125899907063809ULL},
+        {2251799813824513ULL, 2251799813922817ULL, 2251799813971969ULL,
+         2251799814045697ULL},
+        {4503599627481089ULL, 4503599627542529ULL, 4503599627554817ULL,
+         4503599627575297ULL},
+        {9007199254781953ULL, 9007199254843393ULL, 9007199254847489ULL,
+         9007199254908929ULL},
+        {18014398509506561ULL, 18014398509715457ULL, 18014398509764609ULL,
+         18014398509797377ULL},
+        {36028797018972161ULL, 36028797019082753ULL, 36028797019164673ULL,
+         36028797019217921ULL},
+        {72057594037948417ULL, 72057594038149121ULL, 72057594038321153ULL,
+         72057594038333441ULL},
+        {144115188076060673ULL, 144115188076167169ULL, 144115188076228609ULL,
+         144115188076240897ULL},
+        {288230376151748609ULL, 288230376151760897ULL, 288230376151994369ULL,
+         288230376152027137ULL},
+        {576460752303439873ULL, 576460752303476737ULL, 576460752303640577ULL,
+         576460752303702017ULL},
+        {1152921504606904321ULL, 1152921504606965761ULL, 1152921504606994433ULL,
+         1152921504607019009ULL},
+    },
+    // log_n = 12
+    {
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {40961ULL, 65537ULL, 114689ULL, 147457ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {147457ULL, 163841ULL, 188417ULL, 270337ULL},
+        {270337ULL, 286721ULL, 319489ULL, 417793ULL},
+        {557057ULL, 638977ULL, 737281ULL, 778241ULL},
+        {1073153ULL, 1097729ULL, 1130497ULL, 1146881ULL},
+        {2236417ULL, 2277377ULL, 2424833ULL, 2482177ULL},
+        {4300801ULL, 4366337ULL, 4423681ULL, 4464641ULL},
+        {8404993ULL, 8519681ULL, 8527873ULL, 8650753ULL},
+        {16801793ULL, 16900097ULL, 16957441ULL, 17006593ULL},
+        {33710081ULL, 33832961ULL, 33939457ULL, 34037761ULL},
+        {67239937ULL, 67280897ULL, 67411969ULL, 67452929ULL},
+        {134250497ULL, 134275073ULL, 134348801ULL, 134397953ULL},
+        {268460033ULL, 268582913ULL, 268640257ULL, 268664833ULL},
+        {536903681ULL, 536952833ULL, 536977409ULL, 537026561ULL},
+        {1073750017ULL, 1073815553ULL, 1073872897ULL, 1073971201ULL},
+        {2147565569ULL, 2147573761ULL, 2147721217ULL, 2147934209ULL},
+        {4294991873ULL, 4295049217ULL, 4295188481ULL, 4295294977ULL},
+        {8590090241ULL, 8590163969ULL, 8590245889ULL, 8590458881ULL},
+        {17179926529ULL, 17179967489ULL, 17180041217ULL, 17180123137ULL},
+        {34359754753ULL, 34359771137ULL, 34359795713ULL, 34359820289ULL},
+        {68719484929ULL, 68719747073ULL, 68719943681ULL, 68720050177ULL},
+        {137439010817ULL, 137439240193ULL, 137439510529ULL, 137439731713ULL},
+        {274878062593ULL, 274878078977ULL, 274878136321ULL, 274878177281ULL},
+        {549755904001ULL, 549755969537ULL, 549756026881ULL, 549756174337ULL},
+        {1099511799809ULL, 1099511922689ULL, 1099512004609ULL,
+         1099512094721ULL},
+        {2199023288321ULL, 2199023296513ULL, 2199023362049ULL,
+         2199023566849ULL},
+        {4398046568449ULL, 4398046666753ULL, 4398046781441ULL,
+         4398047027201ULL},
+        {8796093112321ULL, 8796093161473ULL, 8796093202433ULL,
+         8796093259777ULL},
+        {17592186175489ULL, 17592186273793ULL, 17592186290177ULL,
+         17592186372097ULL},
+        {35184372121601ULL, 35184372203521ULL, 35184372375553ULL,
+         35184372637697ULL},
+        {70368744210433ULL, 70368744529921ULL, 70368744570881ULL,
+         70368744620033ULL},
+        {140737488486401ULL, 140737488756737ULL, 140737488928769ULL,
+         140737489149953ULL},
+        {281474976768001ULL, 281474976980993ULL, 281474977079297ULL,
+         281474977308673ULL},
+        {562949954093057ULL, 562949954142209ULL, 562949954224129ULL,
+         562949954519041ULL},
+        {1125899906949121ULL, 1125899906990081ULL, 1125899907063809ULL,
+         1125899907096577ULL},
+        {2251799813824513ULL, 2251799813922817ULL, 2251799813971969ULL,
+         2251799814045697ULL},
+        {4503599627542529ULL, 4503599627575297ULL, 4503599627763713ULL,
+         4503599627796481ULL},
+        {9007199254781953ULL, 9007199254847489ULL, 9007199254929409ULL,
+         9007199255019521ULL},
+        {18014398509506561ULL, 18014398509998081ULL, 18014398510637057ULL,
+         18014398510645249ULL},
+        {36028797018972161ULL, 36028797019217921ULL, 36028797019365377ULL,
+         36028797019389953ULL},
+        {72057594038149121ULL, 72057594038321153ULL, 72057594038427649ULL,
+         72057594038665217ULL},
+        {144115188076060673ULL, 144115188076167169ULL, 144115188076240897ULL,
+         144115188076781569ULL},
+        {288230376151760897ULL, 288230376152137729ULL, 288230376152154113ULL,
+         288230376152227841ULL},
+        {576460752303439873ULL, 576460752303702017ULL, 576460752304439297ULL,
+         576460752304545793ULL},
+        {1152921504606904321ULL, 1152921504606994433ULL, 1152921504607019009ULL,
+         1152921504607117313ULL},
+    },
+    // log_n = 13
+    {
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {65537ULL, 114689ULL, 147457ULL, 163841ULL},
+        {147457ULL, 163841ULL, 557057ULL, 638977ULL},
+        {557057ULL, 638977ULL, 737281ULL, 786433ULL},
+        {557057ULL, 638977ULL, 737281ULL, 786433ULL},
+        {1097729ULL, 1130497ULL, 1146881ULL, 1179649ULL},
+        {2277377ULL, 2424833ULL, 2572289ULL, 2654209ULL},
+        {4423681ULL, 4620289ULL, 4816897ULL, 4866049ULL},
+        {8404993ULL, 8519681ULL, 8650753ULL, 8667137ULL},
+        {16957441ULL, 17006593ULL, 17252353ULL, 17367041ULL},
+        {33832961ULL, 34062337ULL, 34160641ULL, 34308097ULL},
+        {67239937ULL, 67452929ULL, 67502081ULL, 67584001ULL},
+        {134250497ULL, 134348801ULL, 134397953ULL, 134823937ULL},
+        {268582913ULL, 268664833ULL, 268730369ULL, 268779521ULL},
+        {536903681ULL, 536952833ULL, 537133057ULL, 537149441ULL},
+        {1073872897ULL, 1073971201ULL, 1074266113ULL, 1074282497ULL},
+        {2147565569ULL, 2148155393ULL, 2148384769ULL, 2148728833ULL},
+        {4295049217ULL, 4295294977ULL, 4295344129ULL, 4295589889ULL},
+        {8590163969ULL, 8590245889ULL, 8590458881ULL, 8590688257ULL},
+        {17179967489ULL, 17180262401ULL, 17180295169ULL, 17180393473ULL},
+        {34359754753ULL, 34359771137ULL, 34359820289ULL, 34360508417ULL},
+        {68720050177ULL, 68720066561ULL, 68720295937ULL, 68720459777ULL},
+        {137439510529ULL, 137439870977ULL, 137440051201ULL, 137440198657ULL},
+        {274878136321ULL, 274878349313ULL, 274878447617ULL, 274878529537ULL},
+        {549756026881ULL, 549756174337ULL, 549756239873ULL, 549756420097ULL},
+        {1099511922689ULL, 1099512004609ULL, 1099512266753ULL,
+         1099512299521ULL},
+        {2199023288321ULL, 2199023566849ULL, 2199023763457ULL,
+         2199024107521ULL},
+        {4398047051777ULL, 4398047232001ULL, 4398047543297ULL,
+         4398047772673ULL},
+        {8796093202433ULL, 8796093349889ULL, 8796093431809ULL,
+         8796093530113ULL},
+        {17592186175489ULL, 17592186273793ULL, 17592186290177ULL,
+         17592186372097ULL},
+        {35184372121601ULL, 35184372203521ULL, 35184372744193ULL,
+         35184373006337ULL},
+        {70368744210433ULL, 70368744570881ULL, 70368744620033ULL,
+         70368744701953ULL},
+        {140737488486401ULL, 140737488928769ULL, 140737489256449ULL,
+         140737489354753ULL},
+        {281474977349633ULL, 281474977595393ULL, 281474978185217ULL,
+         281474978414593ULL},
+        {562949954093057ULL, 562949954142209ULL, 562949954224129ULL,
+         562949954519041ULL},
+        {1125899906990081ULL, 1125899907219457ULL, 1125899907776513ULL,
+         1125899908005889ULL},
+        {2251799814045697ULL, 2251799814291457ULL, 2251799814356993ULL,
+         2251799814799361ULL},
+        {4503599627763713ULL, 4503599627796481ULL, 4503599627943937ULL,
+         4503599628337153ULL},
+        {9007199255019521ULL, 9007199255347201ULL, 9007199255560193ULL,
+         9007199255658497ULL},
+        {18014398510645249ULL, 18014398510661633ULL, 18014398510743553ULL,
+         18014398511333377ULL},
+        {36028797019389953ULL, 36028797019488257ULL, 36028797019635713ULL,
+         36028797019963393ULL},
+        {72057594038321153ULL, 72057594038665217ULL, 72057594038747137ULL,
+         72057594039205889ULL},
+        {144115188076167169ULL, 144115188077445121ULL, 144115188077985793ULL,
+         144115188078297089ULL},
+        {288230376151760897ULL, 288230376152137729ULL, 288230376152154113ULL,
+         288230376152350721ULL},
+        {576460752303439873ULL, 576460752303702017ULL, 576460752304439297ULL,
+         576460752304619521ULL},
+        {1152921504606994433ULL, 1152921504607191041ULL, 1152921504607223809ULL,
+         1152921504607338497ULL},
+    },
+    // log_n = 14
+    {
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {65537ULL, 163841ULL, 557057ULL, 786433ULL},
+        {163841ULL, 557057ULL, 786433ULL, 1146881ULL},
+        {557057ULL, 786433ULL, 1146881ULL, 1179649ULL},
+        {557057ULL, 786433ULL, 1146881ULL, 1179649ULL},
+        {1146881ULL, 1179649ULL, 1376257ULL, 1769473ULL},
+        {2424833ULL, 2654209ULL, 2752513ULL, 3604481ULL},
+        {4423681ULL, 4620289ULL, 4816897ULL, 4882433ULL},
+        {8519681ULL, 8650753ULL, 8716289ULL, 8814593ULL},
+        {17006593ULL, 17367041ULL, 18382849ULL, 18644993ULL},
+        {34308097ULL, 34570241ULL, 34897921ULL, 35094529ULL},
+        {67239937ULL, 67502081ULL, 67731457ULL, 68190209ULL},
+        {134250497ULL, 134348801ULL, 135135233ULL, 135823361ULL},
+        {268664833ULL, 268730369ULL, 268861441ULL, 269221889ULL},
+        {536903681ULL, 537133057ULL, 537296897ULL, 537591809ULL},
+        {1073872897ULL, 1073971201ULL, 1074266113ULL, 1074429953ULL},
+        {2148728833ULL, 2148794369ULL, 2149810177ULL, 2150072321ULL},
+        {4295294977ULL, 4295589889ULL, 4295688193ULL, 4296540161ULL},
+        {8590163969ULL, 8590458881ULL, 8590688257ULL, 8590983169ULL},
+        {17179967489ULL, 17180262401ULL, 17180295169ULL, 17180393473ULL},
+        {34359771137ULL, 34360754177ULL, 34362163201ULL, 34362228737ULL},
+        {68720066561ULL, 68720295937ULL, 68720459777ULL, 68722032641ULL},
+        {137439510529ULL, 137439870977ULL, 137440198657ULL, 137440264193ULL},
+        {274878136321ULL, 274878529537ULL, 274879184897ULL, 274879414273ULL},
+        {549756174337ULL, 549756239873ULL, 549757157377ULL, 549757222913ULL},
+        {1099511922689ULL, 1099512938497ULL, 1099514314753ULL,
+         1099514478593ULL},
+        {2199023288321ULL, 2199024107521ULL, 2199025057793ULL,
+         2199026466817ULL},
+        {4398047232001ULL, 4398048575489ULL, 4398048706561ULL,
+         4398048903169ULL},
+        {8796093349889ULL, 8796093775873ULL, 8796094627841ULL,
+         8796094824449ULL},
+        {17592186175489ULL, 17592186273793ULL, 17592186372097ULL,
+         17592186634241ULL},
+        {35184372121601ULL, 35184372744193ULL, 35184373006337ULL,
+         35184373989377ULL},
+        {70368744210433ULL, 70368744570881ULL, 70368744701953ULL,
+         70368744964097ULL},
+        {140737488486401ULL, 140737490092033ULL, 140737490354177ULL,
+         140737490976769ULL},
+        {281474977595393ULL, 281474978185217ULL, 281474978414593ULL,
+         281474978676737ULL},
+        {562949954142209ULL, 562949954961409ULL, 562949955125249ULL,
+         562949955551233ULL},
+        {1125899908022273ULL, 1125899908612097ULL, 1125899909038081ULL,
+         1125899909398529ULL},
+        {2251799814045697ULL, 2251799814799361ULL, 2251799814930433ULL,
+         2251799815094273ULL},
+        {4503599627763713ULL, 4503599627796481ULL, 4503599628353537ULL,
+         4503599628746753ULL},
+        {9007199255560193ULL, 9007199255658497ULL, 9007199256051713ULL,
+         9007199256248321ULL},
+        {18014398510661633ULL, 18014398511382529ULL, 18014398512136193ULL,
+         18014398512365569ULL},
+        {36028797019389953ULL, 36028797019488257ULL, 36028797020209153ULL,
+         36028797020602369ULL},
+        {72057594038321153ULL, 72057594038747137ULL, 72057594039205889ULL,
+         72057594039992321ULL},
+        {144115188077985793ULL, 144115188078673921ULL, 144115188079656961ULL,
+         144115188079820801ULL},
+        {288230376152137729ULL, 288230376152727553ULL, 288230376154267649ULL,
+         288230376154300417ULL},
+        {576460752304439297ULL, 576460752304832513ULL, 576460752306339841ULL,
+         576460752308273153ULL},
+        {1152921504607338497ULL, 1152921504608747521ULL, 1152921504609239041ULL,
+         1152921504612646913ULL},
+    },
+    // log_n = 15
+    {
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {65537ULL, 786433ULL, 1179649ULL, 1376257ULL},
+        {786433ULL, 1179649ULL, 1376257ULL, 1769473ULL},
+        {786433ULL, 1179649ULL, 1376257ULL, 1769473ULL},
+        {786433ULL, 1179649ULL, 1376257ULL, 1769473ULL},
+        {1179649ULL, 1376257ULL, 1769473ULL, 2424833ULL},
+        {2424833ULL, 2752513ULL, 3604481ULL, 3735553ULL},
+        {5308417ULL, 5767169ULL, 6684673ULL, 6750209ULL},
+        {8519681ULL, 8650753ULL, 8716289ULL, 9502721ULL},
+        {17367041ULL, 19070977ULL, 19529729ULL, 20054017ULL},
+        {35389441ULL, 35454977ULL, 36175873ULL, 36372481ULL},
+        {67239937ULL, 67502081ULL, 68485121ULL, 68681729ULL},
+        {134348801ULL, 135135233ULL, 136314881ULL, 136511489ULL},
+        {269221889ULL, 270532609ULL, 270794753ULL, 272760833ULL},
+        {537133057ULL, 537591809ULL, 537722881ULL, 538116097ULL},
+        {1073872897ULL, 1074266113ULL, 1077477377ULL, 1079443457ULL},
+        {2148728833ULL, 2148794369ULL, 2150301697ULL, 2150563841ULL},
+        {4295294977ULL, 4295688193ULL, 4296540161ULL, 4297261057ULL},
+        {8590458881ULL, 8590983169ULL, 8591835137ULL, 8592949249ULL},
+        {17180262401ULL, 17180393473ULL, 17181442049ULL, 17183014913ULL},
+        {34362163201ULL, 34362228737ULL, 34362359809ULL, 34362818561ULL},
+        {68720066561ULL, 68720459777ULL, 68722032641ULL, 68724326401ULL},
+        {137439870977ULL, 137440198657ULL, 137440264193ULL, 137440854017ULL},
+        {274879414273ULL, 274880987137ULL, 274881052673ULL, 274882035713ULL},
+        {549757714433ULL, 549760073729ULL, 549760204801ULL, 549760663553ULL},
+        {1099512938497ULL, 1099514314753ULL, 1099515691009ULL,
+         1099516280833ULL},
+        {2199024107521ULL, 2199026466817ULL, 2199028891649ULL,
+         2199029874689ULL},
+        {4398047232001ULL, 4398049591297ULL, 4398049853441ULL,
+         4398050246657ULL},
+        {8796093349889ULL, 8796096233473ULL, 8796098854913ULL,
+         8796099248129ULL},
+        {17592186175489ULL, 17592186372097ULL, 17592186634241ULL,
+         17592186765313ULL},
+        {35184372744193ULL, 35184373006337ULL, 35184373989377ULL,
+         35184376545281ULL},
+        {70368744570881ULL, 70368744701953ULL, 70368744964097ULL,
+         70368745750529ULL},
+        {140737488486401ULL, 140737490976769ULL, 140737493729281ULL,
+         140737496154113ULL},
+        {281474978414593ULL, 281474978676737ULL, 281474979987457ULL,
+         281474980380673ULL},
+        {562949954142209ULL, 562949955125249ULL, 562949957287937ULL,
+         562949959581697ULL},
+        {1125899908022273ULL, 1125899908612097ULL, 1125899909398529ULL,
+         1125899910316033ULL},
+        {2251799814799361ULL, 2251799814930433ULL, 2251799815520257ULL,
+         2251799816568833ULL},
+        {4503599627763713ULL, 4503599628353537ULL, 4503599628746753ULL,
+         4503599628943361ULL},
+        {9007199255658497ULL, 9007199256051713ULL, 9007199256248321ULL,
+         9007199257362433ULL},
+        {18014398510661633ULL, 18014398511382529ULL, 18014398512365569ULL,
+         18014398514200577ULL},
+        {36028797019488257ULL, 36028797020209153ULL, 36028797020602369ULL,
+         36028797020864513ULL},
+        {72057594038321153ULL, 72057594040680449ULL, 72057594042449921ULL,
+         72057594042646529ULL},
+        {144115188078673921ULL, 144115188079656961ULL, 144115188081819649ULL,
+         144115188082409473ULL},
+        {288230376154267649ULL, 288230376155185153ULL, 288230376155250689ULL,
+         288230376156758017ULL},
+        {576460752308273153ULL, 576460752312401921ULL, 576460752313712641ULL,
+         576460752314368001ULL},
+        {1152921504608747521ULL, 1152921504614055937ULL, 1152921504615628801ULL,
+         1152921504615694337ULL},
+    },
+};
+
+// kPrimesBelow[log_n - kMinLogN][bits - kMinBits] holds the largest primes
+// < 2^bits which are congruent to 1 mod 2^(log_n + 1), in decreasing order.
+// Missing primes are 0.
+constexpr uint64_t const kPrimesBelow[kNumLogN][kNumBits][kPrimesPerEntry] = {
+    // log_n = 10
+    {
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {12289ULL, 0ULL, 0ULL, 0ULL},
+        {18433ULL, 12289ULL, 0ULL, 0ULL},
+        {61441ULL, 59393ULL, 40961ULL, 18433ULL},
+        {120833ULL, 114689ULL, 86017ULL, 83969ULL},
+        {249857ULL, 202753ULL, 188417ULL, 184321ULL},
+        {520193ULL, 514049ULL, 495617ULL, 473089ULL},
+        {1038337ULL, 1032193ULL, 1017857ULL, 995329ULL},
+        {2056193ULL, 2052097ULL, 2021377ULL, 1990657ULL},
+        {4188161ULL, 4171777ULL, 4169729ULL, 4165633ULL},
+        {8380417ULL, 8378369ULL, 8318977ULL, 8304641ULL},
+        {16760833ULL, 16736257ULL, 16709633ULL, 16699393ULL},
+        {33550337ULL, 33540097ULL, 33538049ULL, 33533953ULL},
+        {67104769ULL, 67090433ULL, 67086337ULL, 67084289ULL},
+        {134215681ULL, 134203393ULL, 134176769ULL, 134111233ULL},
+        {268369921ULL, 268367873ULL, 268361729ULL, 268343297ULL},
+        {536856577ULL, 536823809ULL, 536819713ULL, 536813569ULL},
+        {1073707009ULL, 1073698817ULL, 1073692673ULL, 1073682433ULL},
+        {2147473409ULL, 2147389441ULL, 2147387393ULL, 2147377153ULL},
+        {4294957057ULL, 4294955009ULL, 4294924289ULL, 4294914049ULL},
+        {8589905921ULL, 8589899777ULL, 8589895681ULL, 8589862913ULL},
+        {17179826177ULL, 17179809793ULL, 17179801601ULL, 17179791361ULL},
+        {34359724033ULL, 34359709697ULL, 34359699457ULL, 34359697409ULL},
+        {68719464449ULL, 68719446017ULL, 68719423489ULL, 68719403009ULL},
+        {137438939137ULL, 137438902273ULL, 137438822401ULL, 137438814209ULL},
+        {274877847553ULL, 274877827073ULL, 274877822977ULL, 274877820929ULL},
+        {549755809793ULL, 549755779073ULL, 549755754497ULL, 549755731969ULL},
+        {1099511592961ULL, 1099511590913ULL, 1099511560193ULL,
+         1099511556097ULL},
+        {2199023251457ULL, 2199023228929ULL, 2199023210497ULL,
+         2199023190017ULL},
+        {4398046504961ULL, 4398046486529ULL, 4398046482433ULL,
+         4398046369793ULL},
+        {8796092987393ULL, 8796092971009ULL, 8796092962817ULL,
+         8796092878849ULL},
+        {17592186028033ULL, 17592185997313ULL, 17592185982977ULL,
+         17592185853953ULL},
+        {35184372060161ULL, 35184371986433ULL, 35184371961857ULL,
+         35184371884033ULL},
+        {70368744067073ULL, 70368744019969ULL, 70368743974913ULL,
+         70368743925761ULL},
+        {140737488340993ULL, 140737488273409ULL, 140737488252929ULL,
+         140737488230401ULL},
+        {281474976694273ULL, 281474976636929ULL, 281474976577537ULL,
+         281474976575489ULL},
+        {562949953392641ULL, 562949953361921ULL, 562949953349633ULL,
+         562949953318913ULL},
+        {1125899906826241ULL, 1125899906820097ULL, 1125899906738177ULL,
+         1125899906732033ULL},
+        {2251799813640193ULL, 2251799813632001ULL, 2251799813613569ULL,
+         2251799813560321ULL},
+        {4503599627366401ULL, 4503599627364353ULL, 4503599627347969ULL,
+         4503599627216897ULL},
+        {9007199254614017ULL, 9007199254571009ULL, 9007199254566913ULL,
+         9007199254515713ULL},
+        {18014398509404161ULL, 18014398509395969ULL, 18014398509355009ULL,
+         18014398509309953ULL},
+        {36028797018820609ULL, 36028797018802177ULL, 36028797018789889ULL,
+         36028797018746881ULL},
+        {72057594037897217ULL, 72057594037774337ULL, 72057594037641217ULL,
+         72057594037616641ULL},
+        {144115188075835393ULL, 144115188075827201ULL, 144115188075814913ULL,
+         144115188075749377ULL},
+        {288230376151683073ULL, 288230376151625729ULL, 288230376151601153ULL,
+         288230376151554049ULL},
+        {576460752303421441ULL, 576460752303419393ULL, 576460752303415297ULL,
+         576460752303384577ULL},
+        {1152921504606830593ULL, 1152921504606791681ULL, 1152921504606748673ULL,
+         1152921504606683137ULL},
+    },
+    // log_n = 11
+    {
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {12289ULL, 0ULL, 0ULL, 0ULL},
+        {12289ULL, 0ULL, 0ULL, 0ULL},
+        {61441ULL, 40961ULL, 12289ULL, 0ULL},
+        {114689ULL, 86017ULL, 65537ULL, 61441ULL},
+        {249857ULL, 188417ULL, 184321ULL, 176129ULL},
+        {520193ULL, 495617ULL, 471041ULL, 430081ULL},
+        {1032193ULL, 995329ULL, 974849ULL, 962561ULL},
+        {2056193ULL, 2052097ULL, 1990657ULL, 1908737ULL},
+        {4169729ULL, 4165633ULL, 4141057ULL, 4120577ULL},
+        {8380417ULL, 8318977ULL, 8286209ULL, 8273921ULL},
+        {16760833ULL, 16736257ULL, 16699393ULL, 16674817ULL},
+        {33550337ULL, 33538049ULL, 33533953ULL, 33411073ULL},
+        {67104769ULL, 67084289ULL, 67043329ULL, 66998273ULL},
+        {134176769ULL, 134111233ULL, 134025217ULL, 134012929ULL},
+        {268369921ULL, 268361729ULL, 268271617ULL, 268238849ULL},
+        {536813569ULL, 536752129ULL, 536743937ULL, 536719361ULL},
+        {1073692673ULL, 1073668097ULL, 1073655809ULL, 1073651713ULL},
+        {2147389441ULL, 2147377153ULL, 2147352577ULL, 2147295233ULL},
+        {4294955009ULL, 4294914049ULL, 4294828033ULL, 4294807553ULL},
+        {8589905921ULL, 8589852673ULL, 8589844481ULL, 8589832193ULL},
+        {17179791361ULL, 17179754497ULL, 17179672577ULL, 17179648001ULL},
+        {34359709697ULL, 34359697409ULL, 34359570433ULL, 34359451649ULL},
+        {68719464449ULL, 68719423489ULL, 68719403009ULL, 68719390721ULL},
+        {137438822401ULL, 137438814209ULL, 137438773249ULL, 137438760961ULL},
+        {274877820929ULL, 274877816833ULL, 274877796353ULL, 274877734913ULL},
+        {549755809793ULL, 549755731969ULL, 549755523073ULL, 549755514881ULL},
+        {1099511590913ULL, 1099511549953ULL, 1099511525377ULL,
+         1099511492609ULL},
+        {2199023251457ULL, 2199023210497ULL, 2199023190017ULL,
+         2199023136769ULL},
+        {4398046486529ULL, 4398046482433ULL, 4398046334977ULL,
+         4398046240769ULL},
+        {8796092878849ULL, 8796092858369ULL, 8796092846081ULL,
+         8796092833793ULL},
+        {17592186028033ULL, 17592185982977ULL, 17592185819137ULL,
+         17592185659393ULL},
+        {35184372060161ULL, 35184371986433ULL, 35184371961857ULL,
+         35184371884033ULL},
+        {70368744067073ULL, 70368743755777ULL, 70368743669761ULL,
+         70368743587841ULL},
+        {140737488273409ULL, 140737488252929ULL, 140737488125953ULL,
+         140737488089089ULL},
+        {281474976694273ULL, 281474976636929ULL, 281474976575489ULL,
+         281474976546817ULL},
+        {562949953392641ULL, 562949953318913ULL, 562949953253377ULL,
+         562949953216513ULL},
+        {1125899906826241ULL, 1125899906732033ULL, 1125899906629633ULL,
+         1125899906437121ULL},
+        {2251799813640193ULL, 2251799813632001ULL, 2251799813554177ULL,
+         2251799813517313ULL},
+        {4503599627366401ULL, 4503599627149313ULL, 4503599627124737ULL,
+         4503599626924033ULL},
+        {9007199254614017ULL, 9007199254515713ULL, 9007199254429697ULL,
+         9007199254368257ULL},
+        {18014398509404161ULL, 18014398509395969ULL, 18014398509355009ULL,
+         18014398509309953ULL},
+        {36028797018820609ULL, 36028797018746881ULL, 36028797018652673ULL,
+         36028797018615809ULL},
+        {72057594037641217ULL, 72057594037616641ULL, 72057594037555201ULL,
+         72057594037370881ULL},
+        {144115188075835393ULL, 144115188075827201ULL, 144115188075814913ULL,
+         144115188075749377ULL},
+        {288230376151683073ULL, 288230376151625729ULL, 288230376151601153ULL,
+         288230376151388161ULL},
+        {576460752303419393ULL, 576460752303415297ULL, 576460752303353857ULL,
+         576460752303210497ULL},
+        {1152921504606830593ULL, 1152921504606748673ULL, 1152921504606683137ULL,
+         1152921504606601217ULL},
+    },
+    // log_n = 12
+    {
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {40961ULL, 0ULL, 0ULL, 0ULL},
+        {114689ULL, 65537ULL, 40961ULL, 0ULL},
+        {188417ULL, 163841ULL, 147457ULL, 114689ULL},
+        {417793ULL, 319489ULL, 286721ULL, 270337ULL},
+        {1032193ULL, 974849ULL, 925697ULL, 786433ULL},
+        {2056193ULL, 1990657ULL, 1908737ULL, 1892353ULL},
+        {4169729ULL, 4120577ULL, 4104193ULL, 4079617ULL},
+        {8380417ULL, 8273921ULL, 8257537ULL, 8183809ULL},
+        {16760833ULL, 16736257ULL, 16588801ULL, 16580609ULL},
+        {33538049ULL, 33349633ULL, 33292289ULL, 33177601ULL},
+        {67084289ULL, 67043329ULL, 66994177ULL, 66969601ULL},
+        {134176769ULL, 134111233ULL, 134012929ULL, 133963777ULL},
+        {268369921ULL, 268361729ULL, 268271617ULL, 268238849ULL},
+        {536813569ULL, 536690689ULL, 536641537ULL, 536616961ULL},
+        {1073692673ULL, 1073668097ULL, 1073651713ULL, 1073643521ULL},
+        {2147377153ULL, 2147352577ULL, 2147295233ULL, 2147205121ULL},
+        {4294828033ULL, 4294729729ULL, 4294483969ULL, 4294475777ULL},
+        {8589852673ULL, 8589844481ULL, 8589680641ULL, 8589475841ULL},
+        {17179754497ULL, 17179672577ULL, 17179648001ULL, 17179549697ULL},
+        {34359697409ULL, 34359451649ULL, 34359410689ULL, 34359361537ULL},
+        {68719403009ULL, 68719230977ULL, 68719206401ULL, 68719190017ULL},
+        {137438822401ULL, 137438814209ULL, 137438773249ULL, 137438691329ULL},
+        {274877816833ULL, 274877734913ULL, 274877718529ULL, 274877562881ULL},
+        {549755731969ULL, 549755486209ULL, 549755363329ULL, 549755330561ULL},
+        {1099511480321ULL, 1099511390209ULL, 1099511259137ULL,
+         1099511111681ULL},
+        {2199023190017ULL, 2199022927873ULL, 2199022821377ULL,
+         2199022624769ULL},
+        {4398046486529ULL, 4398046240769ULL, 4398046150657ULL,
+         4398045847553ULL},
+        {8796092858369ULL, 8796092833793ULL, 8796092817409ULL,
+         8796092792833ULL},
+        {17592186028033ULL, 17592185659393ULL, 17592185511937ULL,
+         17592185438209ULL},
+        {35184371884033ULL, 35184371703809ULL, 35184371613697ULL,
+         35184371417089ULL},
+        {70368743669761ULL, 70368743587841ULL, 70368743489537ULL,
+         70368743374849ULL},
+        {140737488273409ULL, 140737488125953ULL, 140737488044033ULL,
+         140737487511553ULL},
+        {281474976694273ULL, 281474976636929ULL, 281474976546817ULL,
+         281474976423937ULL},
+        {562949953216513ULL, 562949952987137ULL, 562949952970753ULL,
+         562949952872449ULL},
+        {1125899906826241ULL, 1125899906629633ULL, 1125899906424833ULL,
+         1125899906260993ULL},
+        {2251799813554177ULL, 2251799813480449ULL, 2251799813472257ULL,
+         2251799813406721ULL},
+        {4503599627149313ULL, 4503599627124737ULL, 4503599626838017ULL,
+         4503599626690561ULL},
+        {9007199254429697ULL, 9007199254364161ULL, 9007199254331393ULL,
+         9007199254241281ULL},
+        {18014398509309953ULL, 18014398509293569ULL, 18014398509211649ULL,
+         18014398508998657ULL},
+        {36028797018652673ULL, 36028797018529793ULL, 36028797018267649ULL,
+         36028797017939969ULL},
+        {72057594037641217ULL, 72057594037616641ULL, 72057594037370881ULL,
+         72057594037338113ULL},
+        {144115188075814913ULL, 144115188075749377ULL, 144115188075593729ULL,
+         144115188075569153ULL},
+        {288230376151130113ULL, 288230376150876161ULL, 288230376150802433ULL,
+         288230376150712321ULL},
+        {576460752303415297ULL, 576460752303210497ULL, 576460752303185921ULL,
+         576460752303136769ULL},
+        {1152921504606830593ULL, 1152921504606748673ULL, 1152921504606683137ULL,
+         1152921504606601217ULL},
+    },
+    // log_n = 13
+    {
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {114689ULL, 65537ULL, 0ULL, 0ULL},
+        {163841ULL, 147457ULL, 114689ULL, 65537ULL},
+        {163841ULL, 147457ULL, 114689ULL, 65537ULL},
+        {1032193ULL, 786433ULL, 737281ULL, 638977ULL},
+        {1785857ULL, 1769473ULL, 1720321ULL, 1589249ULL},
+        {4079617ULL, 4046849ULL, 3850241ULL, 3735553ULL},
+        {8273921ULL, 8257537ULL, 8159233ULL, 7979009ULL},
+        {16760833ULL, 16580609ULL, 16515073ULL, 16465921ULL},
+        {33538049ULL, 33292289ULL, 33177601ULL, 33128449ULL},
+        {67043329ULL, 66994177ULL, 66961409ULL, 66813953ULL},
+        {133857281ULL, 133644289ULL, 133611521ULL, 133513217ULL},
+        {268369921ULL, 268271617ULL, 268238849ULL, 268189697ULL},
+        {536690689ULL, 536641537ULL, 536608769ULL, 536543233ULL},
+        {1073692673ULL, 1073643521ULL, 1073479681ULL, 1073430529ULL},
+        {2147352577ULL, 2147205121ULL, 2147074049ULL, 2146959361ULL},
+        {4294475777ULL, 4293918721ULL, 4293836801ULL, 4293230593ULL},
+        {8589852673ULL, 8589475841ULL, 8589279233ULL, 8588886017ULL},
+        {17179754497ULL, 17179672577ULL, 17179410433ULL, 17179361281ULL},
+        {34359410689ULL, 34359361537ULL, 34359214081ULL, 34358788097ULL},
+        {68719230977ULL, 68718428161ULL, 68718346241ULL, 68717740033ULL},
+        {137438822401ULL, 137438773249ULL, 137438691329ULL, 137438576641ULL},
+        {274877562881ULL, 274877202433ULL, 274877153281ULL, 274877022209ULL},
+        {549755731969ULL, 549755486209ULL, 549754617857ULL, 549754454017ULL},
+        {1099511480321ULL, 1099510890497ULL, 1099510824961ULL,
+         1099510054913ULL},
+        {2199023190017ULL, 2199022927873ULL, 2199022354433ULL,
+         2199022043137ULL},
+        {4398046150657ULL, 4398045708289ULL, 4398045511681ULL,
+         4398045380609ULL},
+        {8796092858369ULL, 8796092792833ULL, 8796092661761ULL,
+         8796092399617ULL},
+        {17592186028033ULL, 17592185438209ULL, 17592184717313ULL,
+         17592184225793ULL},
+        {35184371613697ULL, 35184371417089ULL, 35184371138561ULL,
+         35184371089409ULL},
+        {70368743669761ULL, 70368743587841ULL, 70368743489537ULL,
+         70368743374849ULL},
+        {140737488273409ULL, 140737488125953ULL, 140737488044033ULL,
+         140737487306753ULL},
+        {281474976694273ULL, 281474976546817ULL, 281474976317441ULL,
+         281474975662081ULL},
+        {562949952847873ULL, 562949952798721ULL, 562949952700417ULL,
+         562949952274433ULL},
+        {1125899906826241ULL, 1125899906629633ULL, 1125899905744897ULL,
+         1125899905351681ULL},
+        {2251799813554177ULL, 2251799813472257ULL, 2251799813406721ULL,
+         2251799812980737ULL},
+        {4503599627124737ULL, 4503599626682369ULL, 4503599626321921ULL,
+         4503599626141697ULL},
+        {9007199254429697ULL, 9007199254364161ULL, 9007199254331393ULL,
+         9007199253921793ULL},
+        {18014398508400641ULL, 18014398508138497ULL, 18014398507892737ULL,
+         18014398507794433ULL},
+        {36028797018652673ULL, 36028797017571329ULL, 36028797017456641ULL,
+         36028797017276417ULL},
+        {72057594037616641ULL, 72057594037370881ULL, 72057594037338113ULL,
+         72057594037288961ULL},
+        {144115188075593729ULL, 144115188075134977ULL, 144115188074889217ULL,
+         144115188074790913ULL},
+        {288230376150876161ULL, 288230376150712321ULL, 288230376150630401ULL,
+         288230376150089729ULL},
+        {576460752303210497ULL, 576460752303046657ULL, 576460752302473217ULL,
+         576460752302161921ULL},
+        {1152921504606830593ULL, 1152921504606748673ULL, 1152921504606683137ULL,
+         1152921504606601217ULL},
+    },
+    // log_n = 14
+    {
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {65537ULL, 0ULL, 0ULL, 0ULL},
+        {163841ULL, 65537ULL, 0ULL, 0ULL},
+        {163841ULL, 65537ULL, 0ULL, 0ULL},
+        {786433ULL, 557057ULL, 163841ULL, 65537ULL},
+        {1769473ULL, 1376257ULL, 1179649ULL, 1146881ULL},
+        {3735553ULL, 3604481ULL, 2752513ULL, 2654209ULL},
+        {8257537ULL, 8159233ULL, 7667713ULL, 7569409ULL},
+        {16580609ULL, 16515073ULL, 16384001ULL, 16121857ULL},
+        {33292289ULL, 33128449ULL, 32931841ULL, 32899073ULL},
+        {67043329ULL, 66813953ULL, 66551809ULL, 66420737ULL},
+        {133857281ULL, 132710401ULL, 132612097ULL, 132120577ULL},
+        {268369921ULL, 268271617ULL, 268238849ULL, 268042241ULL},
+        {536641537ULL, 536608769ULL, 536543233ULL, 536215553ULL},
+        {1073643521ULL, 1073479681ULL, 1073184769ULL, 1073053697ULL},
+        {2147352577ULL, 2146959361ULL, 2146336769ULL, 2146041857ULL},
+        {4294475777ULL, 4293918721ULL, 4293230593ULL, 4292804609ULL},
+        {8589475841ULL, 8589279233ULL, 8588886017ULL, 8588820481ULL},
+        {17179672577ULL, 17179410433ULL, 17178525697ULL, 17178198017ULL},
+        {34359410689ULL, 34359214081ULL, 34358788097ULL, 34357805057ULL},
+        {68718428161ULL, 68717740033ULL, 68716036097ULL, 68714954753ULL},
+        {137438822401ULL, 137438691329ULL, 137437806593ULL, 137437511681ULL},
+        {274877153281ULL, 274877022209ULL, 274876334081ULL, 274875842561ULL},
+        {549755486209ULL, 549754109953ULL, 549753978881ULL, 549753782273ULL},
+        {1099510054913ULL, 1099508121601ULL, 1099507695617ULL,
+         1099506515969ULL},
+        {2199023190017ULL, 2199022927873ULL, 2199022043137ULL,
+         2199022010369ULL},
+        {4398046150657ULL, 4398044938241ULL, 4398044577793ULL,
+         4398043594753ULL},
+        {8796092858369ULL, 8796092792833ULL, 8796092661761ULL,
+         8796092399617ULL},
+        {17592183914497ULL, 17592183390209ULL, 17592183324673ULL,
+         17592182833153ULL},
+        {35184371138561ULL, 35184370941953ULL, 35184370352129ULL,
+         35184370155521ULL},
+        {70368743587841ULL, 70368743489537ULL, 70368743292929ULL,
+         70368742408193ULL},
+        {140737488125953ULL, 140737487306753ULL, 140737486716929ULL,
+         140737486553089ULL},
+        {281474976546817ULL, 281474976317441ULL, 281474975662081ULL,
+         281474975563777ULL},
+        {562949952798721ULL, 562949952700417ULL, 562949952274433ULL,
+         562949951979521ULL},
+        {1125899904679937ULL, 1125899903991809ULL, 1125899903827969ULL,
+         1125899903795201ULL},
+        {2251799813554177ULL, 2251799811391489ULL, 2251799810670593ULL,
+         2251799810605057ULL},
+        {4503599626682369ULL, 4503599626321921ULL, 4503599625830401ULL,
+         4503599625535489ULL},
+        {9007199253921793ULL, 9007199252840449ULL, 9007199252807681ULL,
+         9007199252545537ULL},
+        {18014398508400641ULL, 18014398508138497ULL, 18014398507614209ULL,
+         18014398507220993ULL},
+        {36028797017456641ULL, 36028797016178689ULL, 36028797014704129ULL,
+         36028797014573057ULL},
+        {72057594037370881ULL, 72057594037338113ULL, 72057594036879361ULL,
+         72057594036551681ULL},
+        {144115188075593729ULL, 144115188075134977ULL, 144115188071170049ULL,
+         144115188070809601ULL},
+        {288230376150630401ULL, 288230376149975041ULL, 288230376147582977ULL,
+         288230376147386369ULL},
+        {576460752302473217ULL, 576460752302080001ULL, 576460752301785089ULL,
+         576460752301391873ULL},
+        {1152921504606748673ULL, 1152921504606683137ULL, 1152921504606584833ULL,
+         1152921504605962241ULL},
+    },
+    // log_n = 15
+    {
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {0ULL, 0ULL, 0ULL, 0ULL},
+        {65537ULL, 0ULL, 0ULL, 0ULL},
+        {65537ULL, 0ULL, 0ULL, 0ULL},
+        {65537ULL, 0ULL, 0ULL, 0ULL},
+        {786433ULL, 65537ULL, 0ULL, 0ULL},
+        {1769473ULL, 1376257ULL, 1179649ULL, 786433ULL},
+        {3735553ULL, 3604481ULL, 2752513ULL, 2424833ULL},
+        {8257537ULL, 7667713ULL, 7340033ULL, 6946817ULL},
+        {16580609ULL, 16515073ULL, 16384001ULL, 16121857ULL},
+        {33292289ULL, 32899073ULL, 32440321ULL, 31916033ULL},
+        {67043329ULL, 65929217ULL, 65077249ULL, 64946177ULL},
+        {132710401ULL, 132120577ULL, 131923969ULL, 131530753ULL},
+        {268369921ULL, 268238849ULL, 268042241ULL, 267059201ULL},
+        {536608769ULL, 536543233ULL, 536215553ULL, 535756801ULL},
+        {1073479681ULL, 1072496641ULL, 1071513601ULL, 1070727169ULL},
+        {2147352577ULL, 2146959361ULL, 2146041857ULL, 2145976321ULL},
+        {4293918721ULL, 4292804609ULL, 4292149249ULL, 4292018177ULL},
+        {8589475841ULL, 8589279233ULL, 8588886017ULL, 8588820481ULL},
+        {17179672577ULL, 17179410433ULL, 17176854529ULL, 17175674881ULL},
+        {34359410689ULL, 34359214081ULL, 34357444609ULL, 34357116929ULL},
+        {68718428161ULL, 68714954753ULL, 68713512961ULL, 68712923137ULL},
+        {137438822401ULL, 137438691329ULL, 137437511681ULL, 137436659713ULL},
+        {274876334081ULL, 274874695681ULL, 274873778177ULL, 274873188353ULL},
+        {549755486209ULL, 549754109953ULL, 549753978881ULL, 549753782273ULL},
+        {1099510054913ULL, 1099507695617ULL, 1099506515969ULL,
+         1099504549889ULL},
+        {2199023190017ULL, 2199022927873ULL, 2199022010369ULL,
+         2199021813761ULL},
+        {4398044938241ULL, 4398043496449ULL, 4398042972161ULL,
+         4398042513409ULL},
+        {8796090597377ULL, 8796090007553ULL, 8796087582721ULL,
+         8796087386113ULL},
+        {17592182833153ULL, 17592182243329ULL, 17592181260289ULL,
+         17592181129217ULL},
+        {35184368877569ULL, 35184368025601ULL, 35184367828993ULL,
+         35184366911489ULL},
+        {70368743587841ULL, 70368742408193ULL, 70368740769793ULL,
+         70368740442113ULL},
+        {140737487306753ULL, 140737486716929ULL, 140737486520321ULL,
+         140737485864961ULL},
+        {281474976317441ULL, 281474975662081ULL, 281474974482433ULL,
+         281474972188673ULL},
+        {562949952700417ULL, 562949951979521ULL, 562949950537729ULL,
+         562949948833793ULL},
+        {1125899904679937ULL, 1125899903827969ULL, 1125899903500289ULL,
+         1125899903107073ULL},
+        {2251799813554177ULL, 2251799811391489ULL, 2251799810670593ULL,
+         2251799810605057ULL},
+        {4503599626321921ULL, 4503599625535489ULL, 4503599625404417ULL,
+         4503599623045121ULL},
+        {9007199252840449ULL, 9007199252119553ULL, 9007199251660801ULL,
+         9007199250874369ULL},
+        {18014398506729473ULL, 18014398505943041ULL, 18014398499848193ULL,
+         18014398498799617ULL},
+        {36028797017456641ULL, 36028797014704129ULL, 36028797014573057ULL,
+         36028797014376449ULL},
+        {72057594037338113ULL, 72057594036879361ULL, 72057594036551681ULL,
+         72057594035306497ULL},
+        {144115188075593729ULL, 144115188075134977ULL, 144115188070809601ULL,
+         144115188070023169ULL},
+        {288230376147582977ULL, 288230376147386369ULL, 288230376147320833ULL,
+         288230376144568321ULL},
+        {576460752301785089ULL, 576460752301391873ULL, 576460752300015617ULL,
+         576460752298835969ULL},
+        {1152921504606584833ULL, 1152921504598720513ULL, 1152921504597016577ULL,
+         1152921504595968001ULL},
+    },
+};
+
+}  // namespace ntt_primes
+}  // namespace grappler
+}  // namespace tensorflow
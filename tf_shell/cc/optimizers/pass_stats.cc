@@ -0,0 +1,107 @@
+#include "pass_stats.h"
+
+#include <deque>
+#include <mutex>
+#include <unordered_map>
+#include <utility>
+
+#include "../common/json_utils.h"
+#include "absl/strings/str_cat.h"
+#include "absl/strings/str_join.h"
+
+namespace tensorflow {
+namespace grappler {
+
+namespace {
+
+// Statistics are recorded every time a function is optimized, including by
+// enable_optimization(), so only the most recent runs are kept in case they
+// are never read.
+constexpr size_t const kMaxRecordedPasses = 10000;
+
+struct RecordedPassStats {
+  std::mutex mutex;
+  std::deque<std::string> passes;  // One JSON object per pass run.
+};
+
+RecordedPassStats& GetRecordedPassStats() {
+  static RecordedPassStats* recorded = new RecordedPassStats();
+  return *recorded;
+}
+
+// Two nodes are the same if their op and inputs match. Attributes are not
+// compared since constants can be large and no pass only changes attributes.
+bool SameNode(NodeDef const& a, NodeDef const& b) {
+  if (a.op() != b.op() || a.input_size() != b.input_size()) {
+    return false;
+  }
+  for (int i = 0; i < a.input_size(); ++i) {
+    if (a.input(i) != b.input(i)) {
+      return false;
+    }
+  }
+  return true;
+}
+
+}  // namespace
+
+PassStats::PassStats(std::string pass)
+    : pass_(std::move(pass)), start_(std::chrono::steady_clock::now()) {}
+
+void PassStats::AddDetail(std::string const& key, std::string json_value) {
+  details_[key].push_back(std::move(json_value));
+}
+
+void PassStats::Record(GrapplerItem const& item,
+                       GraphDef const& optimized_graph) {
+  int64_t const wall_time_us =
+      std::chrono::duration_cast<std::chrono::microseconds>(
+          std::chrono::steady_clock::now() - start_)
+          .count();
+
+  std::unordered_map<std::string, NodeDef const*> optimized_nodes;
+  for (auto const& node : optimized_graph.node()) {
+    optimized_nodes.emplace(node.name(), &node);
+  }
+  int64_t nodes_rewritten = 0;
+  for (auto const& node : item.graph.node()) {
+    auto const it = optimized_nodes.find(node.name());
+    if (it == optimized_nodes.end() || !SameNode(node, *it->second)) {
+      ++nodes_rewritten;
+    }
+  }
+
+  std::vector<std::string> details;
+  for (auto const& [key, values] : details_) {
+    details.push_back(
+        absl::StrCat(JsonString(key), ": [", absl::StrJoin(values, ", "), "]"));
+  }
+
+  std::string json = absl::StrCat(
+      "{\"pass\": ", JsonString(pass_), ", \"graph\": ", JsonString(item.id),
+      ", \"wall_time_us\": ", wall_time_us,
+      ", \"num_nodes_before\": ", item.graph.node_size(),
+      ", \"num_nodes_after\": ", optimized_graph.node_size(),
+      ", \"nodes_matched\": ", nodes_matched_,
+      ", \"nodes_rewritten\": ", nodes_rewritten, ", \"details\": {",
+      absl::StrJoin(details, ", "), "}}");
+
+  RecordedPassStats& recorded = GetRecordedPassStats();
+  std::lock_guard<std::mutex> lock(recorded.mutex);
+  recorded.passes.push_back(std::move(json));
+  if (recorded.passes.size() > kMaxRecordedPasses) {
+    recorded.passes.pop_front();
+  }
+}
+
+std::string TakeShellPassStatsJson() {
+  RecordedPassStats& recorded = GetRecordedPassStats();
+  std::lock_guard<std::mutex> lock(recorded.mutex);
+  std::string json =
+      absl::StrCat("[", absl::StrJoin(recorded.passes, ", "), "]");
+  recorded.passes.clear();
+  return json;
+}
+
+}  // namespace grappler
+}  // namespace tensorflow
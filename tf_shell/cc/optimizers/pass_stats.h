@@ -0,0 +1,46 @@
+#pragma once
+
+#include <chrono>
+#include <cstdint>
+#include <map>
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/framework/graph.pb.h"
+#include "tensorflow/core/grappler/grappler_item.h"
+
+namespace tensorflow {
+namespace grappler {
+
+// Collects statistics about one run of a shell optimizer over one graph, e.g.
+// the main graph or a function in its library. The timer starts on
+// construction and Record() makes the statistics available to Python through
+// TakeShellPassStatsJson().
+class PassStats {
+ public:
+  explicit PassStats(std::string pass);
+
+  // Counts occurrences of the pattern the pass rewrites.
+  void AddMatched(int64_t count = 1) { nodes_matched_ += count; }
+
+  // Appends a pass-specific entry to the list under key. json_value must be
+  // valid JSON.
+  void AddDetail(std::string const& key, std::string json_value);
+
+  // Stops the timer and records the statistics. Nodes of the original graph
+  // which were removed or changed by the pass count as rewritten.
+  void Record(GrapplerItem const& item, GraphDef const& optimized_graph);
+
+ private:
+  std::string const pass_;
+  std::chrono::steady_clock::time_point const start_;
+  int64_t nodes_matched_ = 0;
+  std::map<std::string, std::vector<std::string>> details_;
+};
+
+// Returns the statistics recorded since the last call as a JSON list with one
+// object per pass run and clears them.
+std::string TakeShellPassStatsJson();
+
+}  // namespace grappler
+}  // namespace tensorflow
@@ -1,5 +1,6 @@
 #include "pt_pt.h"
 
+#include "pass_stats.h"
 #include "tensorflow/core/grappler/clusters/cluster.h"
 #include "tensorflow/core/grappler/costs/graph_properties.h"
 #include "tensorflow/core/grappler/grappler_item.h"
@@ -314,6 +315,7 @@ Status PtPtOptimizer::Init(
 
 Status PtPtOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
                                GraphDef* optimized_graph) {
+  PassStats stats(name_);
   GrapplerItem mutable_item(item);
   Status status;
   utils::MutableGraphView graph_view(&mutable_item.graph, &status);
@@ -338,6 +340,7 @@ Status PtPtOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
       // op=negate has only one.
       ReorderArith reorder;
       if (FindPtPt(graph_view, i, &reorder)) {
+        stats.AddMatched();
         TF_RETURN_IF_ERROR(
             ApplyReorderArith(graph_view, reorder, &nodes_to_delete));
         finished = false;
@@ -361,12 +364,15 @@ Status PtPtOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
     utils::Mutation* mutation = graph_view.GetMutationBuilder();
     int const num_nodes = mutable_item.graph.node_size();
     for (int i = num_nodes - 1; i >= 0; --i) {
-      FindAndRemapEncDec(graph_view, i, mutation);
+      if (FindAndRemapEncDec(graph_view, i, mutation)) {
+        stats.AddMatched();
+      }
     }
     TF_RETURN_IF_ERROR(mutation->Apply());
   }
 
   *optimized_graph = std::move(mutable_item.graph);
+  stats.Record(item, *optimized_graph);
 
   return OkStatus();
 }
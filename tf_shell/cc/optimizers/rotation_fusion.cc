@@ -0,0 +1,312 @@
+#include "rotation_fusion.h"
+
+#include <string>
+#include <unordered_set>
+
+#include "absl/strings/str_cat.h"
+#include "pass_stats.h"
+#include "tensorflow/core/grappler/clusters/cluster.h"
+#include "tensorflow/core/grappler/grappler_item.h"
+#include "tensorflow/core/grappler/optimizers/custom_graph_optimizer_registry.h"
+#include "tensorflow/core/grappler/utils.h"
+#include "tensorflow/core/grappler/utils/graph_view.h"
+#include "tensorflow/core/grappler/utils/topological_sort.h"
+#include "utils.h"
+
+namespace tensorflow {
+namespace grappler {
+
+namespace {
+
+constexpr bool const debug = false;
+
+// How far back the inputs of two rotations are traced to check they compute
+// the same value, e.g. through the strided slice which looks up the rotation
+// key at the ciphertext's level and the constants it slices with.
+constexpr int const kMaxSameValueDepth = 4;
+
+// Rotations are linear, so the sum of two rotations by the same key and shift
+// is the rotation of the sum.
+bool IsLinearRotation(NodeDef const& node) {
+  return IsRoll(node) || IsReduceSumByRotation(node) ||
+         IsFastReduceSumByRotation(node);
+}
+
+// Returns the port of the ciphertext which is rotated.
+int RotatedValuePort(NodeDef const& node) {
+  return IsFastReduceSumByRotation(node) ? 1 : 2;
+}
+
+std::string FaninName(utils::MutableFanoutView const& fanin) {
+  if (fanin.index() == 0) return fanin.node_view()->GetName();
+  return absl::StrCat(fanin.node_view()->GetName(), ":", fanin.index());
+}
+
+// Ops which compute the same value given the same inputs and attributes.
+bool IsDeterministicLookup(NodeDef const& node) {
+  return node.op() == kConstOpName || node.op() == "Cast" ||
+         node.op() == "Identity" || node.op() == "StridedSlice";
+}
+
+// Returns true if the two fanins are known to hold the same value, either
+// because they are the same tensor or because they are computed the same way.
+bool SameValue(utils::MutableFanoutView const& a,
+               utils::MutableFanoutView const& b, int depth) {
+  if (a.node_index() == b.node_index() && a.index() == b.index()) {
+    return true;
+  }
+  if (depth == 0 || a.index() != b.index()) {
+    return false;
+  }
+
+  auto const* a_view = a.node_view();
+  auto const* b_view = b.node_view();
+  auto const* a_def = a_view->node();
+  auto const* b_def = b_view->node();
+  if (a_def->op() != b_def->op() || a_def->device() != b_def->device() ||
+      !IsDeterministicLookup(*a_def)) {
+    return false;
+  }
+
+  if (a_def->attr().size() != b_def->attr().size()) {
+    return false;
+  }
+  for (auto const& [name, value] : a_def->attr()) {
+    auto const it = b_def->attr().find(name);
+    if (it == b_def->attr().end() ||
+        it->second.SerializeAsString() != value.SerializeAsString()) {
+      return false;
+    }
+  }
+
+  if (a_view->NumRegularFanins() != b_view->NumRegularFanins()) {
+    return false;
+  }
+  for (int i = 0; i < a_view->NumRegularFanins(); ++i) {
+    if (!SameValue(a_view->GetRegularFanin(i), b_view->GetRegularFanin(i),
+                   depth - 1)) {
+      return false;
+    }
+  }
+  return true;
+}
+
+struct FuseRotation {
+  int outer_node_index;
+  int rotation_a_node_index;
+  int rotation_b_node_index;
+};
+
+void PrintFuseRotation(utils::MutableGraphView& graph_view,
+                       FuseRotation const& fuse) {
+  auto const* outer_node = graph_view.GetNode(fuse.outer_node_index)->node();
+  auto const* rotation_a_node =
+      graph_view.GetNode(fuse.rotation_a_node_index)->node();
+  auto const* rotation_b_node =
+      graph_view.GetNode(fuse.rotation_b_node_index)->node();
+
+  std::cout << outer_node->name() << " ( " << rotation_a_node->name() << " , "
+            << rotation_b_node->name() << " ) " << std::endl;
+}
+
+// Returns true if the node_index points to the outermost op of the pattern
+// add_or_sub(rotate(a), rotate(b)) where both rotations are the same op with
+// the same context, rotation key, and shift, and fills the FuseRotation struct
+// accordingly.
+bool FindFuseRotation(utils::MutableGraphView& graph_view, int node_index,
+                      std::unordered_set<std::string> const& nodes_to_preserve,
+                      FuseRotation* fuse) {
+  auto const* outer_node_view = graph_view.GetNode(node_index);
+  auto const* outer_node_def = outer_node_view->node();
+
+  if (!IsAddCtCt(*outer_node_def) && !IsSubCtCt(*outer_node_def)) {
+    return false;
+  }
+
+  auto const* rotation_a_view = outer_node_view->GetRegularFanin(1).node_view();
+  auto const* rotation_b_view = outer_node_view->GetRegularFanin(2).node_view();
+  auto const* rotation_a_def = rotation_a_view->node();
+  auto const* rotation_b_def = rotation_b_view->node();
+
+  if (!IsLinearRotation(*rotation_a_def) ||
+      rotation_a_def->op() != rotation_b_def->op() ||
+      rotation_a_view == rotation_b_view) {
+    return false;
+  }
+
+  // The rotations must only be used by the outer op, otherwise they are still
+  // computed and fusing them adds work instead of removing it.
+  for (auto const* rotation_view : {rotation_a_view, rotation_b_view}) {
+    if (rotation_view->NumRegularFanouts() != 1 ||
+        rotation_view->NumControllingFanins() > 0 ||
+        rotation_view->NumControlledFanouts() > 0 ||
+        rotation_view->node()->device() != outer_node_def->device() ||
+        nodes_to_preserve.count(rotation_view->GetName()) > 0) {
+      return false;
+    }
+  }
+
+  // All inputs other than the rotated value, i.e. the context, the rotation
+  // key, and the shift, must match.
+  int const value_port = RotatedValuePort(*rotation_a_def);
+  for (int i = 0; i < rotation_a_view->NumRegularFanins(); ++i) {
+    if (i == value_port) continue;
+    if (!SameValue(rotation_a_view->GetRegularFanin(i),
+                   rotation_b_view->GetRegularFanin(i), kMaxSameValueDepth)) {
+      return false;
+    }
+  }
+
+  fuse->outer_node_index = node_index;
+  fuse->rotation_a_node_index = rotation_a_view->node_index();
+  fuse->rotation_b_node_index = rotation_b_view->node_index();
+
+  if constexpr (debug) {
+    std::cout << "Found pattern: ";
+    PrintFuseRotation(graph_view, *fuse);
+  }
+
+  return true;
+}
+
+// This function replaces the pattern add_or_sub(rotate(a), rotate(b)) with
+// rotate(add_or_sub(a, b)), saving one rotation and its key switching.
+Status ApplyFuseRotation(utils::MutableGraphView& graph_view,
+                         FuseRotation const& fuse,
+                         std::vector<bool>* nodes_to_delete) {
+  utils::Mutation* mutation = graph_view.GetMutationBuilder();
+  Status status;
+
+  auto const* outer_node_view = graph_view.GetNode(fuse.outer_node_index);
+  auto const* rotation_a_view = graph_view.GetNode(fuse.rotation_a_node_index);
+  auto const* rotation_b_view = graph_view.GetNode(fuse.rotation_b_node_index);
+  NodeDef const* outer_node_def = outer_node_view->node();
+  NodeDef const* rotation_a_def = rotation_a_view->node();
+  int const value_port = RotatedValuePort(*rotation_a_def);
+
+  // First, add or subtract the unrotated ciphertexts.
+  NodeDef new_inner;
+  new_inner.set_op(outer_node_def->op());
+  new_inner.set_name(outer_node_def->name() + "_before_rotation");
+  new_inner.set_device(outer_node_def->device());
+  new_inner.add_input(FaninName(outer_node_view->GetRegularFanin(0)));
+  new_inner.add_input(FaninName(rotation_a_view->GetRegularFanin(value_port)));
+  new_inner.add_input(FaninName(rotation_b_view->GetRegularFanin(value_port)));
+  new_inner.mutable_attr()->insert(outer_node_def->attr().begin(),
+                                   outer_node_def->attr().end());
+
+  // Second, rotate the result. Note the name of the new rotation node needs to
+  // be the same as the old output, even though the op is different, so
+  // downstream nodes can still find it.
+  NodeDef new_outer;
+  new_outer.set_op(rotation_a_def->op());
+  new_outer.set_name(outer_node_def->name());  // Same as orig output.
+  new_outer.set_device(outer_node_def->device());
+  for (int i = 0; i < rotation_a_view->NumRegularFanins(); ++i) {
+    if (i == value_port) {
+      new_outer.add_input(new_inner.name());
+    } else {
+      new_outer.add_input(FaninName(rotation_a_view->GetRegularFanin(i)));
+    }
+  }
+  for (auto const& control : outer_node_view->GetControllingFanins()) {
+    new_outer.add_input(AsControlDependency(control.node_view()->GetName()));
+  }
+  new_outer.mutable_attr()->insert(rotation_a_def->attr().begin(),
+                                   rotation_a_def->attr().end());
+
+  if constexpr (debug) {
+    std::cout << "New inner node: \n" << new_inner.DebugString() << std::endl;
+    std::cout << "New outer node: \n" << new_outer.DebugString() << std::endl;
+  }
+
+  mutation->AddNode(std::move(new_inner), &status);
+  TF_RETURN_IF_ERROR(status);
+  mutation->AddNode(std::move(new_outer), &status);
+  TF_RETURN_IF_ERROR(status);
+
+  (*nodes_to_delete)[fuse.outer_node_index] = true;
+  (*nodes_to_delete)[fuse.rotation_a_node_index] = true;
+  (*nodes_to_delete)[fuse.rotation_b_node_index] = true;
+
+  return OkStatus();
+}
+
+}  // namespace
+
+RotationFusionOptimizer::RotationFusionOptimizer() {}
+
+Status RotationFusionOptimizer::Init(
+    tensorflow::RewriterConfig_CustomGraphOptimizer const* config) {
+  return OkStatus();
+}
+
+Status RotationFusionOptimizer::Optimize(Cluster* cluster,
+                                         GrapplerItem const& item,
+                                         GraphDef* optimized_graph) {
+  PassStats stats(name_);
+  GrapplerItem mutable_item(item);
+  Status status;
+  utils::MutableGraphView graph_view(&mutable_item.graph, &status);
+  TF_RETURN_IF_ERROR(status);
+  std::unordered_set<std::string> const nodes_to_preserve =
+      item.NodesToPreserve();
+
+  // Topological sort and process the nodes in order.
+  TF_RETURN_IF_ERROR(graph_view.SortTopologically(/*ignore_cycles=*/false, {}));
+
+  // Sums of more than two rotations, e.g. rotate(a) + rotate(b) + rotate(c),
+  // are fused one pair per pass.
+  int num_fused = 0;
+  bool finished = false;
+  while (!finished) {
+    int const num_nodes = mutable_item.graph.node_size();
+    std::vector<bool> nodes_to_delete(num_nodes);
+    finished = true;
+
+    for (int i = 0; i < num_nodes; ++i) {
+      if (nodes_to_delete[i]) {
+        continue;
+      }
+
+      FuseRotation fuse;
+      if (FindFuseRotation(graph_view, i, nodes_to_preserve, &fuse)) {
+        if (nodes_to_delete[fuse.rotation_a_node_index] ||
+            nodes_to_delete[fuse.rotation_b_node_index]) {
+          continue;
+        }
+        TF_RETURN_IF_ERROR(
+            ApplyFuseRotation(graph_view, fuse, &nodes_to_delete));
+        ++num_fused;
+        stats.AddMatched();
+        finished = false;
+      }
+    }
+
+    // Remove nodes.
+    utils::Mutation* mutation = graph_view.GetMutationBuilder();
+    for (int i = 0; i < num_nodes; ++i) {
+      if (nodes_to_delete[i]) {
+        mutation->RemoveNode(graph_view.GetNode(i));
+      }
+    }
+    TF_RETURN_IF_ERROR(mutation->Apply());
+    TF_RETURN_IF_ERROR(
+        graph_view.SortTopologically(/*ignore_cycles=*/false, {}));
+  }
+
+  if constexpr (debug) {
+    std::cout << "RotationFusionOptimizer removed " << num_fused
+              << " rotations." << std::endl;
+  }
+
+  *optimized_graph = std::move(mutable_item.graph);
+  stats.Record(item, *optimized_graph);
+
+  return OkStatus();
+}
+
+REGISTER_GRAPH_OPTIMIZER(RotationFusionOptimizer);
+
+}  // namespace grappler
+}  // namespace tensorflow
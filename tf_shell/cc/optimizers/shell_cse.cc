@@ -0,0 +1,233 @@
+#include "shell_cse.h"
+
+#include <algorithm>
+#include <set>
+#include <string>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+
+#include "pass_stats.h"
+#include "tensorflow/core/framework/attr_value.pb.h"
+#include "tensorflow/core/framework/types.pb.h"
+#include "tensorflow/core/graph/tensor_id.h"
+#include "tensorflow/core/grappler/clusters/cluster.h"
+#include "tensorflow/core/grappler/grappler_item.h"
+#include "tensorflow/core/grappler/optimizers/custom_graph_optimizer_registry.h"
+#include "tensorflow/core/grappler/utils.h"
+#include "tensorflow/core/grappler/utils/topological_sort.h"
+#include "utils.h"
+
+namespace tensorflow {
+namespace grappler {
+
+namespace {
+
+constexpr bool const debug = false;
+
+// Contexts and keys are stored as a variant tensor holding one entry per
+// level and are looked up with a strided slice each time they are used.
+bool IsLevelLookup(NodeDef const& node) {
+  if (node.op() != "StridedSlice") {
+    return false;
+  }
+  auto const it = node.attr().find("T");
+  return it != node.attr().end() && it->second.type() == DT_VARIANT;
+}
+
+// Ops which always produce the same value for the same inputs, up to the
+// randomness of encryption, and are expensive enough that computing them more
+// than once is worth avoiding. Tensorflow's own common subexpression
+// elimination does not touch these since they produce variant tensors.
+// Constants are included so lookups of the same level match.
+bool IsDedupCandidate(NodeDef const& node) {
+  return IsEncode(node) || IsEncrypt(node) || IsRotationKeyGen(node) ||
+         IsFastRotationKeyGen(node) || IsModulusReduceContext(node) ||
+         IsModulusReduceKey(node) || IsLevelLookup(node) ||
+         node.op() == kConstOpName;
+}
+
+// Stateless tf-shell ops which can be removed when nothing consumes their
+// output.
+bool IsRemovableShellOp(NodeDef const& node) {
+  return IsDedupCandidate(node) || IsArithmetic(node) || IsNegCt(node) ||
+         IsNegPt(node) || IsMulCtTfScalar(node) || IsMulPtTfScalar(node) ||
+         IsTfShellMatMul(node) || IsRoll(node) || IsReduceSumByRotation(node) ||
+         IsFastReduceSumByRotation(node) || IsReduceSum(node) ||
+         IsUnsortedCtSegmentSum(node) || IsConv2d(node) ||
+         IsMaxUnpool2d(node) || IsConcatCt(node) || IsExpandDimsVariant(node) ||
+         IsModulusReduceCt(node) || IsModulusReducePt(node);
+}
+
+// Two nodes with the same signature compute the same value. Attributes are
+// compared by their serialized protos, which may spuriously differ but never
+// spuriously match.
+std::string NodeSignature(NodeDef const& node) {
+  std::string signature = node.op() + "|" + node.device() + "|";
+
+  std::vector<std::string> control_inputs;
+  for (auto const& input : node.input()) {
+    if (IsControlInput(input)) {
+      control_inputs.push_back(input);
+    } else {
+      signature += input + ",";
+    }
+  }
+  std::sort(control_inputs.begin(), control_inputs.end());
+  for (auto const& input : control_inputs) {
+    signature += input + ",";
+  }
+
+  std::vector<std::string> attr_names;
+  for (auto const& attr : node.attr()) {
+    attr_names.push_back(attr.first);
+  }
+  std::sort(attr_names.begin(), attr_names.end());
+  for (auto const& name : attr_names) {
+    signature += "|" + name + "=" + node.attr().at(name).SerializeAsString();
+  }
+  return signature;
+}
+
+// Points an input string at the representative of the node it reads from, if
+// that node was found to be a duplicate.
+void RemapInput(
+    std::unordered_map<std::string, std::string> const& replacements,
+    std::string* input) {
+  TensorId const id = ParseTensorName(*input);
+  auto const it = replacements.find(std::string(id.node()));
+  if (it == replacements.end()) {
+    return;
+  }
+
+  if (id.index() < 0) {
+    *input = AsControlDependency(it->second);
+  } else if (id.index() == 0) {
+    *input = it->second;
+  } else {
+    *input = it->second + ":" + std::to_string(id.index());
+  }
+}
+
+// Replaces nodes which compute the same value as an earlier node with that
+// node. The graph must be topologically sorted so the inputs of a node are
+// deduplicated before the node itself is compared. Returns the number of nodes
+// removed.
+int DedupShellNodes(GraphDef* graph,
+                    std::unordered_set<std::string> const& nodes_to_preserve) {
+  std::unordered_map<std::string, std::string> replacements;
+  std::unordered_map<std::string, int> representatives;
+  std::set<int> nodes_to_delete;
+
+  for (int i = 0; i < graph->node_size(); ++i) {
+    NodeDef* node = graph->mutable_node(i);
+    for (int j = 0; j < node->input_size(); ++j) {
+      RemapInput(replacements, node->mutable_input(j));
+    }
+
+    if (!IsDedupCandidate(*node)) {
+      continue;
+    }
+
+    auto const [it, inserted] =
+        representatives.emplace(NodeSignature(*node), i);
+    if (inserted || nodes_to_preserve.count(node->name()) > 0) {
+      continue;
+    }
+
+    auto const& representative = graph->node(it->second).name();
+    if constexpr (debug) {
+      std::cout << "Replacing " << node->name() << " with " << representative
+                << std::endl;
+    }
+    replacements[node->name()] = representative;
+    nodes_to_delete.insert(i);
+  }
+
+  // Loop back edges may read from nodes later in the topological order.
+  for (int i = 0; i < graph->node_size(); ++i) {
+    NodeDef* node = graph->mutable_node(i);
+    for (int j = 0; j < node->input_size(); ++j) {
+      RemapInput(replacements, node->mutable_input(j));
+    }
+  }
+
+  EraseNodesFromGraph(nodes_to_delete, graph);
+  return nodes_to_delete.size();
+}
+
+// Removes tf-shell ops whose outputs are never used, e.g. gradients which are
+// encoded and then discarded. Walking the topologically sorted graph backwards
+// visits consumers before producers so whole dead chains are removed in one
+// pass. Returns the number of nodes removed.
+int RemoveDeadShellNodes(
+    GraphDef* graph, std::unordered_set<std::string> const& nodes_to_preserve) {
+  std::unordered_map<std::string, int> num_fanouts;
+  for (auto const& node : graph->node()) {
+    for (auto const& input : node.input()) {
+      ++num_fanouts[std::string(ParseTensorName(input).node())];
+    }
+  }
+
+  std::set<int> nodes_to_delete;
+  for (int i = graph->node_size() - 1; i >= 0; --i) {
+    NodeDef const& node = graph->node(i);
+    if (!IsRemovableShellOp(node) || num_fanouts[node.name()] > 0 ||
+        nodes_to_preserve.count(node.name()) > 0) {
+      continue;
+    }
+
+    if constexpr (debug) {
+      std::cout << "Removing dead node " << node.name() << std::endl;
+    }
+    nodes_to_delete.insert(i);
+    for (auto const& input : node.input()) {
+      --num_fanouts[std::string(ParseTensorName(input).node())];
+    }
+  }
+
+  EraseNodesFromGraph(nodes_to_delete, graph);
+  return nodes_to_delete.size();
+}
+
+}  // namespace
+
+ShellCseOptimizer::ShellCseOptimizer() {}
+
+Status ShellCseOptimizer::Init(
+    tensorflow::RewriterConfig_CustomGraphOptimizer const* config) {
+  return OkStatus();
+}
+
+Status ShellCseOptimizer::Optimize(Cluster* cluster, GrapplerItem const& item,
+                                   GraphDef* optimized_graph) {
+  PassStats stats(name_);
+  GrapplerItem mutable_item(item);
+  GraphDef* graph = &mutable_item.graph;
+  std::unordered_set<std::string> const nodes_to_preserve =
+      item.NodesToPreserve();
+
+  TF_RETURN_IF_ERROR(TopologicalSort(graph));
+
+  int const num_deduped = DedupShellNodes(graph, nodes_to_preserve);
+  int const num_dead = RemoveDeadShellNodes(graph, nodes_to_preserve);
+  stats.AddMatched(num_deduped + num_dead);
+  stats.AddDetail("duplicate_nodes", std::to_string(num_deduped));
+  stats.AddDetail("dead_nodes", std::to_string(num_dead));
+
+  if constexpr (debug) {
+    std::cout << "ShellCseOptimizer eliminated " << num_deduped
+              << " duplicate and " << num_dead << " dead tf-shell nodes."
+              << std::endl;
+  }
+
+  *optimized_graph = std::move(mutable_item.graph);
+  stats.Record(item, *optimized_graph);
+
+  return OkStatus();
+}
+
+REGISTER_GRAPH_OPTIMIZER(ShellCseOptimizer);
+
+}  // namespace grappler
+}  // namespace tensorflow
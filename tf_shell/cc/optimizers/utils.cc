@@ -17,6 +17,20 @@ bool IsDecrypt(NodeDef const& node) {
   return IsPlainDerypt(node) || IsFastDecrypt(node);
 }
 
+// Modulus switching ops.
+bool IsModulusReduceContext(NodeDef const& node) {
+  return node.op() == kModulusReduceContext;
+}
+bool IsModulusReduceKey(NodeDef const& node) {
+  return node.op() == kModulusReduceKey;
+}
+bool IsModulusReduceCt(NodeDef const& node) {
+  return node.op() == kModulusReduceCt;
+}
+bool IsModulusReducePt(NodeDef const& node) {
+  return node.op() == kModulusReducePt;
+}
+
 // Arithmetic ops.
 bool IsAddCtCt(NodeDef const& node) { return node.op() == kAddCtCt; }
 bool IsSubCtCt(NodeDef const& node) { return node.op() == kSubCtCt; }
@@ -56,6 +70,12 @@ bool IsTfShellMatMul(NodeDef const& node) {
 }
 
 // Rotation ops.
+bool IsRotationKeyGen(NodeDef const& node) {
+  return node.op() == kRotationKeyGen;
+}
+bool IsFastRotationKeyGen(NodeDef const& node) {
+  return node.op() == kFastRotationKeyGen;
+}
 bool IsRoll(NodeDef const& node) { return node.op() == kRoll; }
 bool IsReduceSumByRotation(NodeDef const& node) {
   return node.op() == kReduceSumByRotation;
@@ -86,7 +106,11 @@ bool IsPtCtConv2dTranspose(NodeDef const& node) {
 }
 bool IsCtPtConv2dTranspose(NodeDef const& node) {
   return node.op() == kConv2dTransposeCtPt64 ||
-         node.op() == kConv2dTransposeWithChanCtPt64;
+         node.op() == kConv2dTransposeWithChanCtPt64 ||
+         IsConv2dTransposeCtTfScalar(node);
+}
+bool IsConv2dTransposeCtTfScalar(NodeDef const& node) {
+  return node.op() == kConv2dTransposeCtTfScalar64;
 }
 bool IsCtCtConv2dTranspose(NodeDef const& node) {
   return node.op() == kConv2dTransposeCtCt64 ||
@@ -22,6 +22,11 @@ constexpr char kEncrypt[] = "Encrypt64";
 constexpr char kDecrypt[] = "Decrypt64";
 constexpr char kFastDecrypt[] = "DecryptFastRotated64";
 
+constexpr char kModulusReduceContext[] = "ModulusReduceContext64";
+constexpr char kModulusReduceKey[] = "ModulusReduceKey64";
+constexpr char kModulusReduceCt[] = "ModulusReduceCt64";
+constexpr char kModulusReducePt[] = "ModulusReducePt64";
+
 constexpr char kAddCtCt[] = "AddCtCt64";
 constexpr char kSubCtCt[] = "SubCtCt64";
 constexpr char kMulCtCt[] = "MulCtCt64";
@@ -44,6 +49,8 @@ constexpr char kMatMulCtPt[] = "MatMulCtPt64";
 constexpr char kMatMulPtCt[] = "MatMulPtCt64";
 constexpr char kFastMatMulPtCt[] = "FastMatMulPtCt64";
 
+constexpr char kRotationKeyGen[] = "RotationKeyGen64";
+constexpr char kFastRotationKeyGen[] = "FastRotationKeyGen64";
 constexpr char kRoll[] = "Roll64";
 constexpr char kReduceSumByRotation[] = "ReduceSumByRotationCt64";
 constexpr char kFastReduceSumByRotation[] = "FastReduceSumByRotation64";
@@ -66,6 +73,7 @@ constexpr char kConv2dTransposeWithChanCtPt64[] =
     "Conv2dTransposeWithChanCtPt64";
 constexpr char kConv2dTransposeWithChanCtCt64[] =
     "Conv2dTransposeWithChanCtCt64";
+constexpr char kConv2dTransposeCtTfScalar64[] = "Conv2dTransposeCtTfScalar64";
 
 constexpr char kMaxUnpool2dCt64[] = "MaxUnpool2dCt64";
 
@@ -90,6 +98,11 @@ bool IsPlainDerypt(NodeDef const& node);
 bool IsFastDecrypt(NodeDef const& node);
 bool IsDecrypt(NodeDef const& node);
 
+bool IsModulusReduceContext(NodeDef const& node);
+bool IsModulusReduceKey(NodeDef const& node);
+bool IsModulusReduceCt(NodeDef const& node);
+bool IsModulusReducePt(NodeDef const& node);
+
 bool IsAddCtCt(NodeDef const& node);
 bool IsSubCtCt(NodeDef const& node);
 bool IsMulCtCt(NodeDef const& node);
@@ -114,6 +127,8 @@ bool IsMatMulPtCt(NodeDef const& node);
 bool IsFastMatMulPtCt(NodeDef const& node);
 bool IsTfShellMatMul(NodeDef const& node);
 
+bool IsRotationKeyGen(NodeDef const& node);
+bool IsFastRotationKeyGen(NodeDef const& node);
 bool IsRoll(NodeDef const& node);
 bool IsReduceSumByRotation(NodeDef const& node);
 bool IsFastReduceSumByRotation(NodeDef const& node);
@@ -126,6 +141,7 @@ bool IsCtPtConv2d(NodeDef const& node);
 bool IsCtCtConv2d(NodeDef const& node);
 bool IsPtCtConv2dTranspose(NodeDef const& node);
 bool IsCtPtConv2dTranspose(NodeDef const& node);
+bool IsConv2dTransposeCtTfScalar(NodeDef const& node);
 bool IsCtCtConv2dTranspose(NodeDef const& node);
 bool IsPtCtConv2dOrTranspose(NodeDef const& node);
 bool IsCtPtConv2dOrTranspose(NodeDef const& node);
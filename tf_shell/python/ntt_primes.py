@@ -0,0 +1,1033 @@
+# Generated by tools/gen_ntt_primes.py. Do not edit.
+
+MIN_LOG_N = 10
+MAX_LOG_N = 15
+MIN_BITS = 3
+MAX_BITS = 60
+
+# Deterministic Miller-Rabin bases for all n < 2**64.
+MILLER_RABIN_BASES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+
+
+def is_prime(n):
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+# PRIMES_ABOVE[log_n - MIN_LOG_N][bits - MIN_BITS] holds the smallest primes
+# >= 2**bits which are congruent to 1 mod 2**(log_n + 1), in increasing order.
+PRIMES_ABOVE = [
+    # log_n = 10
+    [
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [12289, 18433, 40961, 59393],
+        [18433, 40961, 59393, 61441],
+        [40961, 59393, 61441, 65537],
+        [65537, 79873, 83969, 86017],
+        [133121, 147457, 151553, 163841],
+        [270337, 286721, 301057, 307201],
+        [534529, 557057, 575489, 577537],
+        [1054721, 1062913, 1067009, 1073153],
+        [2101249, 2107393, 2119681, 2123777],
+        [4206593, 4208641, 4263937, 4270081],
+        [8404993, 8427521, 8441857, 8452097],
+        [16801793, 16807937, 16832513, 16844801],
+        [33564673, 33574913, 33617921, 33650689],
+        [67127297, 67153921, 67209217, 67213313],
+        [134246401, 134250497, 134275073, 134330369],
+        [268441601, 268460033, 268496897, 268515329],
+        [536881153, 536903681, 536924161, 536952833],
+        [1073750017, 1073754113, 1073815553, 1073842177],
+        [2147493889, 2147555329, 2147565569, 2147573761],
+        [4294991873, 4295049217, 4295053313, 4295145473],
+        [8589987841, 8590047233, 8590090241, 8590108673],
+        [17179875329, 17179887617, 17179912193, 17179926529],
+        [34359754753, 34359771137, 34359777281, 34359795713],
+        [68719484929, 68719503361, 68719562753, 68719564801],
+        [137439004673, 137439006721, 137439010817, 137439016961],
+        [274877908993, 274877921281, 274877976577, 274877995009],
+        [549755860993, 549755873281, 549755904001, 549755932673],
+        [1099511678977, 1099511683073, 1099511795713, 1099511799809],
+        [2199023265793, 2199023269889, 2199023288321, 2199023290369],
+        [4398046523393, 4398046525441, 4398046529537, 4398046547969],
+        [8796093048833, 8796093050881, 8796093112321, 8796093134849],
+        [17592186062849, 17592186064897, 17592186075137, 17592186089473],
+        [35184372103169, 35184372121601, 35184372140033, 35184372172801],
+        [70368744183809, 70368744210433, 70368744232961, 70368744296449],
+        [140737488357377, 140737488476161, 140737488486401, 140737488498689],
+        [281474976749569, 281474976768001, 281474976778241, 281474976829441],
+        [562949953443841, 562949953497089, 562949953505281, 562949953548289],
+        [1125899906856961, 1125899906949121, 1125899906977793, 1125899906990081],
+        [2251799813773313, 2251799813824513, 2251799813922817, 2251799813971969],
+        [4503599627446273, 4503599627481089, 4503599627499521, 4503599627542529],
+        [9007199254751233, 9007199254755329, 9007199254781953, 9007199254812673],
+        [18014398509500417, 18014398509506561, 18014398509524993, 18014398509537281],
+        [36028797018972161, 36028797018990593, 36028797019035649, 36028797019082753],
+        [72057594037934081, 72057594037948417, 72057594038028289, 72057594038081537],
+        [
+            144115188075878401,
+            144115188075907073,
+            144115188076060673,
+            144115188076167169,
+        ],
+        [
+            288230376151748609,
+            288230376151760897,
+            288230376151779329,
+            288230376151812097,
+        ],
+        [
+            576460752303439873,
+            576460752303476737,
+            576460752303486977,
+            576460752303568897,
+        ],
+        [
+            1152921504606877697,
+            1152921504606902273,
+            1152921504606904321,
+            1152921504606965761,
+        ],
+    ],
+    # log_n = 11
+    [
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [12289, 40961, 61441, 65537],
+        [40961, 61441, 65537, 86017],
+        [40961, 61441, 65537, 86017],
+        [65537, 86017, 114689, 147457],
+        [147457, 151553, 163841, 176129],
+        [270337, 286721, 307201, 319489],
+        [557057, 577537, 638977, 643073],
+        [1073153, 1093633, 1097729, 1130497],
+        [2101249, 2236417, 2277377, 2297857],
+        [4206593, 4263937, 4300801, 4304897],
+        [8404993, 8441857, 8466433, 8519681],
+        [16801793, 16863233, 16900097, 16957441],
+        [33574913, 33673217, 33681409, 33697793],
+        [67153921, 67219457, 67227649, 67239937],
+        [134246401, 134250497, 134275073, 134336513],
+        [268460033, 268496897, 268582913, 268640257],
+        [536903681, 536924161, 536952833, 536973313],
+        [1073750017, 1073754113, 1073815553, 1073872897],
+        [2147565569, 2147573761, 2147577857, 2147721217],
+        [4294991873, 4295049217, 4295053313, 4295188481],
+        [8589987841, 8590090241, 8590151681, 8590163969],
+        [17179926529, 17179967489, 17180041217, 17180123137],
+        [34359754753, 34359771137, 34359795713, 34359820289],
+        [68719484929, 68719562753, 68719595521, 68719644673],
+        [137439006721, 137439010817, 137439072257, 137439240193],
+        [274877976577, 274878017537, 274878062593, 274878078977],
+        [549755904001, 549755932673, 549755965441, 549755969537],
+        [1099511795713, 1099511799809, 1099511836673, 1099511922689],
+        [2199023288321, 2199023296513, 2199023357953, 2199023362049],
+        [4398046523393, 4398046547969, 4398046556161, 4398046568449],
+        [8796093050881, 8796093112321, 8796093161473, 8796093202433],
+        [17592186064897, 17592186089473, 17592186155009, 17592186175489],
+        [35184372121601, 35184372203521, 35184372355073, 35184372375553],
+        [70368744210433, 70368744296449, 70368744312833, 70368744435713],
+        [140737488486401, 140737488498689, 140737488654337, 140737488756737],
+        [281474976768001, 281474976829441, 281474976894977, 281474976919553],
+        [562949953548289, 562949953671169, 562949953761281, 562949954093057],
+        [1125899906949121, 1125899906977793, 1125899906990081, 1125899907063809],
+        [2251799813824513, 2251799813922817, 2251799813971969, 2251799814045697],
+        [4503599627481089, 4503599627542529, 4503599627554817, 4503599627575297],
+        [9007199254781953, 9007199254843393, 9007199254847489, 9007199254908929],
+        [18014398509506561, 18014398509715457, 18014398509764609, 18014398509797377],
+        [36028797018972161, 36028797019082753, 36028797019164673, 36028797019217921],
+        [72057594037948417, 72057594038149121, 72057594038321153, 72057594038333441],
+        [
+            144115188076060673,
+            144115188076167169,
+            144115188076228609,
+            144115188076240897,
+        ],
+        [
+            288230376151748609,
+            288230376151760897,
+            288230376151994369,
+            288230376152027137,
+        ],
+        [
+            576460752303439873,
+            576460752303476737,
+            576460752303640577,
+            576460752303702017,
+        ],
+        [
+            1152921504606904321,
+            1152921504606965761,
+            1152921504606994433,
+            1152921504607019009,
+        ],
+    ],
+    # log_n = 12
+    [
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [40961, 65537, 114689, 147457],
+        [65537, 114689, 147457, 163841],
+        [147457, 163841, 188417, 270337],
+        [270337, 286721, 319489, 417793],
+        [557057, 638977, 737281, 778241],
+        [1073153, 1097729, 1130497, 1146881],
+        [2236417, 2277377, 2424833, 2482177],
+        [4300801, 4366337, 4423681, 4464641],
+        [8404993, 8519681, 8527873, 8650753],
+        [16801793, 16900097, 16957441, 17006593],
+        [33710081, 33832961, 33939457, 34037761],
+        [67239937, 67280897, 67411969, 67452929],
+        [134250497, 134275073, 134348801, 134397953],
+        [268460033, 268582913, 268640257, 268664833],
+        [536903681, 536952833, 536977409, 537026561],
+        [1073750017, 1073815553, 1073872897, 1073971201],
+        [2147565569, 2147573761, 2147721217, 2147934209],
+        [4294991873, 4295049217, 4295188481, 4295294977],
+        [8590090241, 8590163969, 8590245889, 8590458881],
+        [17179926529, 17179967489, 17180041217, 17180123137],
+        [34359754753, 34359771137, 34359795713, 34359820289],
+        [68719484929, 68719747073, 68719943681, 68720050177],
+        [137439010817, 137439240193, 137439510529, 137439731713],
+        [274878062593, 274878078977, 274878136321, 274878177281],
+        [549755904001, 549755969537, 549756026881, 549756174337],
+        [1099511799809, 1099511922689, 1099512004609, 1099512094721],
+        [2199023288321, 2199023296513, 2199023362049, 2199023566849],
+        [4398046568449, 4398046666753, 4398046781441, 4398047027201],
+        [8796093112321, 8796093161473, 8796093202433, 8796093259777],
+        [17592186175489, 17592186273793, 17592186290177, 17592186372097],
+        [35184372121601, 35184372203521, 35184372375553, 35184372637697],
+        [70368744210433, 70368744529921, 70368744570881, 70368744620033],
+        [140737488486401, 140737488756737, 140737488928769, 140737489149953],
+        [281474976768001, 281474976980993, 281474977079297, 281474977308673],
+        [562949954093057, 562949954142209, 562949954224129, 562949954519041],
+        [1125899906949121, 1125899906990081, 1125899907063809, 1125899907096577],
+        [2251799813824513, 2251799813922817, 2251799813971969, 2251799814045697],
+        [4503599627542529, 4503599627575297, 4503599627763713, 4503599627796481],
+        [9007199254781953, 9007199254847489, 9007199254929409, 9007199255019521],
+        [18014398509506561, 18014398509998081, 18014398510637057, 18014398510645249],
+        [36028797018972161, 36028797019217921, 36028797019365377, 36028797019389953],
+        [72057594038149121, 72057594038321153, 72057594038427649, 72057594038665217],
+        [
+            144115188076060673,
+            144115188076167169,
+            144115188076240897,
+            144115188076781569,
+        ],
+        [
+            288230376151760897,
+            288230376152137729,
+            288230376152154113,
+            288230376152227841,
+        ],
+        [
+            576460752303439873,
+            576460752303702017,
+            576460752304439297,
+            576460752304545793,
+        ],
+        [
+            1152921504606904321,
+            1152921504606994433,
+            1152921504607019009,
+            1152921504607117313,
+        ],
+    ],
+    # log_n = 13
+    [
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [65537, 114689, 147457, 163841],
+        [147457, 163841, 557057, 638977],
+        [557057, 638977, 737281, 786433],
+        [557057, 638977, 737281, 786433],
+        [1097729, 1130497, 1146881, 1179649],
+        [2277377, 2424833, 2572289, 2654209],
+        [4423681, 4620289, 4816897, 4866049],
+        [8404993, 8519681, 8650753, 8667137],
+        [16957441, 17006593, 17252353, 17367041],
+        [33832961, 34062337, 34160641, 34308097],
+        [67239937, 67452929, 67502081, 67584001],
+        [134250497, 134348801, 134397953, 134823937],
+        [268582913, 268664833, 268730369, 268779521],
+        [536903681, 536952833, 537133057, 537149441],
+        [1073872897, 1073971201, 1074266113, 1074282497],
+        [2147565569, 2148155393, 2148384769, 2148728833],
+        [4295049217, 4295294977, 4295344129, 4295589889],
+        [8590163969, 8590245889, 8590458881, 8590688257],
+        [17179967489, 17180262401, 17180295169, 17180393473],
+        [34359754753, 34359771137, 34359820289, 34360508417],
+        [68720050177, 68720066561, 68720295937, 68720459777],
+        [137439510529, 137439870977, 137440051201, 137440198657],
+        [274878136321, 274878349313, 274878447617, 274878529537],
+        [549756026881, 549756174337, 549756239873, 549756420097],
+        [1099511922689, 1099512004609, 1099512266753, 1099512299521],
+        [2199023288321, 2199023566849, 2199023763457, 2199024107521],
+        [4398047051777, 4398047232001, 4398047543297, 4398047772673],
+        [8796093202433, 8796093349889, 8796093431809, 8796093530113],
+        [17592186175489, 17592186273793, 17592186290177, 17592186372097],
+        [35184372121601, 35184372203521, 35184372744193, 35184373006337],
+        [70368744210433, 70368744570881, 70368744620033, 70368744701953],
+        [140737488486401, 140737488928769, 140737489256449, 140737489354753],
+        [281474977349633, 281474977595393, 281474978185217, 281474978414593],
+        [562949954093057, 562949954142209, 562949954224129, 562949954519041],
+        [1125899906990081, 1125899907219457, 1125899907776513, 1125899908005889],
+        [2251799814045697, 2251799814291457, 2251799814356993, 2251799814799361],
+        [4503599627763713, 4503599627796481, 4503599627943937, 4503599628337153],
+        [9007199255019521, 9007199255347201, 9007199255560193, 9007199255658497],
+        [18014398510645249, 18014398510661633, 18014398510743553, 18014398511333377],
+        [36028797019389953, 36028797019488257, 36028797019635713, 36028797019963393],
+        [72057594038321153, 72057594038665217, 72057594038747137, 72057594039205889],
+        [
+            144115188076167169,
+            144115188077445121,
+            144115188077985793,
+            144115188078297089,
+        ],
+        [
+            288230376151760897,
+            288230376152137729,
+            288230376152154113,
+            288230376152350721,
+        ],
+        [
+            576460752303439873,
+            576460752303702017,
+            576460752304439297,
+            576460752304619521,
+        ],
+        [
+            1152921504606994433,
+            1152921504607191041,
+            1152921504607223809,
+            1152921504607338497,
+        ],
+    ],
+    # log_n = 14
+    [
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [65537, 163841, 557057, 786433],
+        [163841, 557057, 786433, 1146881],
+        [557057, 786433, 1146881, 1179649],
+        [557057, 786433, 1146881, 1179649],
+        [1146881, 1179649, 1376257, 1769473],
+        [2424833, 2654209, 2752513, 3604481],
+        [4423681, 4620289, 4816897, 4882433],
+        [8519681, 8650753, 8716289, 8814593],
+        [17006593, 17367041, 18382849, 18644993],
+        [34308097, 34570241, 34897921, 35094529],
+        [67239937, 67502081, 67731457, 68190209],
+        [134250497, 134348801, 135135233, 135823361],
+        [268664833, 268730369, 268861441, 269221889],
+        [536903681, 537133057, 537296897, 537591809],
+        [1073872897, 1073971201, 1074266113, 1074429953],
+        [2148728833, 2148794369, 2149810177, 2150072321],
+        [4295294977, 4295589889, 4295688193, 4296540161],
+        [8590163969, 8590458881, 8590688257, 8590983169],
+        [17179967489, 17180262401, 17180295169, 17180393473],
+        [34359771137, 34360754177, 34362163201, 34362228737],
+        [68720066561, 68720295937, 68720459777, 68722032641],
+        [137439510529, 137439870977, 137440198657, 137440264193],
+        [274878136321, 274878529537, 274879184897, 274879414273],
+        [549756174337, 549756239873, 549757157377, 549757222913],
+        [1099511922689, 1099512938497, 1099514314753, 1099514478593],
+        [2199023288321, 2199024107521, 2199025057793, 2199026466817],
+        [4398047232001, 4398048575489, 4398048706561, 4398048903169],
+        [8796093349889, 8796093775873, 8796094627841, 8796094824449],
+        [17592186175489, 17592186273793, 17592186372097, 17592186634241],
+        [35184372121601, 35184372744193, 35184373006337, 35184373989377],
+        [70368744210433, 70368744570881, 70368744701953, 70368744964097],
+        [140737488486401, 140737490092033, 140737490354177, 140737490976769],
+        [281474977595393, 281474978185217, 281474978414593, 281474978676737],
+        [562949954142209, 562949954961409, 562949955125249, 562949955551233],
+        [1125899908022273, 1125899908612097, 1125899909038081, 1125899909398529],
+        [2251799814045697, 2251799814799361, 2251799814930433, 2251799815094273],
+        [4503599627763713, 4503599627796481, 4503599628353537, 4503599628746753],
+        [9007199255560193, 9007199255658497, 9007199256051713, 9007199256248321],
+        [18014398510661633, 18014398511382529, 18014398512136193, 18014398512365569],
+        [36028797019389953, 36028797019488257, 36028797020209153, 36028797020602369],
+        [72057594038321153, 72057594038747137, 72057594039205889, 72057594039992321],
+        [
+            144115188077985793,
+            144115188078673921,
+            144115188079656961,
+            144115188079820801,
+        ],
+        [
+            288230376152137729,
+            288230376152727553,
+            288230376154267649,
+            288230376154300417,
+        ],
+        [
+            576460752304439297,
+            576460752304832513,
+            576460752306339841,
+            576460752308273153,
+        ],
+        [
+            1152921504607338497,
+            1152921504608747521,
+            1152921504609239041,
+            1152921504612646913,
+        ],
+    ],
+    # log_n = 15
+    [
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [65537, 786433, 1179649, 1376257],
+        [786433, 1179649, 1376257, 1769473],
+        [786433, 1179649, 1376257, 1769473],
+        [786433, 1179649, 1376257, 1769473],
+        [1179649, 1376257, 1769473, 2424833],
+        [2424833, 2752513, 3604481, 3735553],
+        [5308417, 5767169, 6684673, 6750209],
+        [8519681, 8650753, 8716289, 9502721],
+        [17367041, 19070977, 19529729, 20054017],
+        [35389441, 35454977, 36175873, 36372481],
+        [67239937, 67502081, 68485121, 68681729],
+        [134348801, 135135233, 136314881, 136511489],
+        [269221889, 270532609, 270794753, 272760833],
+        [537133057, 537591809, 537722881, 538116097],
+        [1073872897, 1074266113, 1077477377, 1079443457],
+        [2148728833, 2148794369, 2150301697, 2150563841],
+        [4295294977, 4295688193, 4296540161, 4297261057],
+        [8590458881, 8590983169, 8591835137, 8592949249],
+        [17180262401, 17180393473, 17181442049, 17183014913],
+        [34362163201, 34362228737, 34362359809, 34362818561],
+        [68720066561, 68720459777, 68722032641, 68724326401],
+        [137439870977, 137440198657, 137440264193, 137440854017],
+        [274879414273, 274880987137, 274881052673, 274882035713],
+        [549757714433, 549760073729, 549760204801, 549760663553],
+        [1099512938497, 1099514314753, 1099515691009, 1099516280833],
+        [2199024107521, 2199026466817, 2199028891649, 2199029874689],
+        [4398047232001, 4398049591297, 4398049853441, 4398050246657],
+        [8796093349889, 8796096233473, 8796098854913, 8796099248129],
+        [17592186175489, 17592186372097, 17592186634241, 17592186765313],
+        [35184372744193, 35184373006337, 35184373989377, 35184376545281],
+        [70368744570881, 70368744701953, 70368744964097, 70368745750529],
+        [140737488486401, 140737490976769, 140737493729281, 140737496154113],
+        [281474978414593, 281474978676737, 281474979987457, 281474980380673],
+        [562949954142209, 562949955125249, 562949957287937, 562949959581697],
+        [1125899908022273, 1125899908612097, 1125899909398529, 1125899910316033],
+        [2251799814799361, 2251799814930433, 2251799815520257, 2251799816568833],
+        [4503599627763713, 4503599628353537, 4503599628746753, 4503599628943361],
+        [9007199255658497, 9007199256051713, 9007199256248321, 9007199257362433],
+        [18014398510661633, 18014398511382529, 18014398512365569, 18014398514200577],
+        [36028797019488257, 36028797020209153, 36028797020602369, 36028797020864513],
+        [72057594038321153, 72057594040680449, 72057594042449921, 72057594042646529],
+        [
+            144115188078673921,
+            144115188079656961,
+            144115188081819649,
+            144115188082409473,
+        ],
+        [
+            288230376154267649,
+            288230376155185153,
+            288230376155250689,
+            288230376156758017,
+        ],
+        [
+            576460752308273153,
+            576460752312401921,
+            576460752313712641,
+            576460752314368001,
+        ],
+        [
+            1152921504608747521,
+            1152921504614055937,
+            1152921504615628801,
+            1152921504615694337,
+        ],
+    ],
+]
+
+# PRIMES_BELOW[log_n - MIN_LOG_N][bits - MIN_BITS] holds the largest primes
+# < 2**bits which are congruent to 1 mod 2**(log_n + 1), in decreasing order.
+# Missing primes are 0.
+PRIMES_BELOW = [
+    # log_n = 10
+    [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [12289, 0, 0, 0],
+        [18433, 12289, 0, 0],
+        [61441, 59393, 40961, 18433],
+        [120833, 114689, 86017, 83969],
+        [249857, 202753, 188417, 184321],
+        [520193, 514049, 495617, 473089],
+        [1038337, 1032193, 1017857, 995329],
+        [2056193, 2052097, 2021377, 1990657],
+        [4188161, 4171777, 4169729, 4165633],
+        [8380417, 8378369, 8318977, 8304641],
+        [16760833, 16736257, 16709633, 16699393],
+        [33550337, 33540097, 33538049, 33533953],
+        [67104769, 67090433, 67086337, 67084289],
+        [134215681, 134203393, 134176769, 134111233],
+        [268369921, 268367873, 268361729, 268343297],
+        [536856577, 536823809, 536819713, 536813569],
+        [1073707009, 1073698817, 1073692673, 1073682433],
+        [2147473409, 2147389441, 2147387393, 2147377153],
+        [4294957057, 4294955009, 4294924289, 4294914049],
+        [8589905921, 8589899777, 8589895681, 8589862913],
+        [17179826177, 17179809793, 17179801601, 17179791361],
+        [34359724033, 34359709697, 34359699457, 34359697409],
+        [68719464449, 68719446017, 68719423489, 68719403009],
+        [137438939137, 137438902273, 137438822401, 137438814209],
+        [274877847553, 274877827073, 274877822977, 274877820929],
+        [549755809793, 549755779073, 549755754497, 549755731969],
+        [1099511592961, 1099511590913, 1099511560193, 1099511556097],
+        [2199023251457, 2199023228929, 2199023210497, 2199023190017],
+        [4398046504961, 4398046486529, 4398046482433, 4398046369793],
+        [8796092987393, 8796092971009, 8796092962817, 8796092878849],
+        [17592186028033, 17592185997313, 17592185982977, 17592185853953],
+        [35184372060161, 35184371986433, 35184371961857, 35184371884033],
+        [70368744067073, 70368744019969, 70368743974913, 70368743925761],
+        [140737488340993, 140737488273409, 140737488252929, 140737488230401],
+        [281474976694273, 281474976636929, 281474976577537, 281474976575489],
+        [562949953392641, 562949953361921, 562949953349633, 562949953318913],
+        [1125899906826241, 1125899906820097, 1125899906738177, 1125899906732033],
+        [2251799813640193, 2251799813632001, 2251799813613569, 2251799813560321],
+        [4503599627366401, 4503599627364353, 4503599627347969, 4503599627216897],
+        [9007199254614017, 9007199254571009, 9007199254566913, 9007199254515713],
+        [18014398509404161, 18014398509395969, 18014398509355009, 18014398509309953],
+        [36028797018820609, 36028797018802177, 36028797018789889, 36028797018746881],
+        [72057594037897217, 72057594037774337, 72057594037641217, 72057594037616641],
+        [
+            144115188075835393,
+            144115188075827201,
+            144115188075814913,
+            144115188075749377,
+        ],
+        [
+            288230376151683073,
+            288230376151625729,
+            288230376151601153,
+            288230376151554049,
+        ],
+        [
+            576460752303421441,
+            576460752303419393,
+            576460752303415297,
+            576460752303384577,
+        ],
+        [
+            1152921504606830593,
+            1152921504606791681,
+            1152921504606748673,
+            1152921504606683137,
+        ],
+    ],
+    # log_n = 11
+    [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [12289, 0, 0, 0],
+        [12289, 0, 0, 0],
+        [61441, 40961, 12289, 0],
+        [114689, 86017, 65537, 61441],
+        [249857, 188417, 184321, 176129],
+        [520193, 495617, 471041, 430081],
+        [1032193, 995329, 974849, 962561],
+        [2056193, 2052097, 1990657, 1908737],
+        [4169729, 4165633, 4141057, 4120577],
+        [8380417, 8318977, 8286209, 8273921],
+        [16760833, 16736257, 16699393, 16674817],
+        [33550337, 33538049, 33533953, 33411073],
+        [67104769, 67084289, 67043329, 66998273],
+        [134176769, 134111233, 134025217, 134012929],
+        [268369921, 268361729, 268271617, 268238849],
+        [536813569, 536752129, 536743937, 536719361],
+        [1073692673, 1073668097, 1073655809, 1073651713],
+        [2147389441, 2147377153, 2147352577, 2147295233],
+        [4294955009, 4294914049, 4294828033, 4294807553],
+        [8589905921, 8589852673, 8589844481, 8589832193],
+        [17179791361, 17179754497, 17179672577, 17179648001],
+        [34359709697, 34359697409, 34359570433, 34359451649],
+        [68719464449, 68719423489, 68719403009, 68719390721],
+        [137438822401, 137438814209, 137438773249, 137438760961],
+        [274877820929, 274877816833, 274877796353, 274877734913],
+        [549755809793, 549755731969, 549755523073, 549755514881],
+        [1099511590913, 1099511549953, 1099511525377, 1099511492609],
+        [2199023251457, 2199023210497, 2199023190017, 2199023136769],
+        [4398046486529, 4398046482433, 4398046334977, 4398046240769],
+        [8796092878849, 8796092858369, 8796092846081, 8796092833793],
+        [17592186028033, 17592185982977, 17592185819137, 17592185659393],
+        [35184372060161, 35184371986433, 35184371961857, 35184371884033],
+        [70368744067073, 70368743755777, 70368743669761, 70368743587841],
+        [140737488273409, 140737488252929, 140737488125953, 140737488089089],
+        [281474976694273, 281474976636929, 281474976575489, 281474976546817],
+        [562949953392641, 562949953318913, 562949953253377, 562949953216513],
+        [1125899906826241, 1125899906732033, 1125899906629633, 1125899906437121],
+        [2251799813640193, 2251799813632001, 2251799813554177, 2251799813517313],
+        [4503599627366401, 4503599627149313, 4503599627124737, 4503599626924033],
+        [9007199254614017, 9007199254515713, 9007199254429697, 9007199254368257],
+        [18014398509404161, 18014398509395969, 18014398509355009, 18014398509309953],
+        [36028797018820609, 36028797018746881, 36028797018652673, 36028797018615809],
+        [72057594037641217, 72057594037616641, 72057594037555201, 72057594037370881],
+        [
+            144115188075835393,
+            144115188075827201,
+            144115188075814913,
+            144115188075749377,
+        ],
+        [
+            288230376151683073,
+            288230376151625729,
+            288230376151601153,
+            288230376151388161,
+        ],
+        [
+            576460752303419393,
+            576460752303415297,
+            576460752303353857,
+            576460752303210497,
+        ],
+        [
+            1152921504606830593,
+            1152921504606748673,
+            1152921504606683137,
+            1152921504606601217,
+        ],
+    ],
+    # log_n = 12
+    [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [40961, 0, 0, 0],
+        [114689, 65537, 40961, 0],
+        [188417, 163841, 147457, 114689],
+        [417793, 319489, 286721, 270337],
+        [1032193, 974849, 925697, 786433],
+        [2056193, 1990657, 1908737, 1892353],
+        [4169729, 4120577, 4104193, 4079617],
+        [8380417, 8273921, 8257537, 8183809],
+        [16760833, 16736257, 16588801, 16580609],
+        [33538049, 33349633, 33292289, 33177601],
+        [67084289, 67043329, 66994177, 66969601],
+        [134176769, 134111233, 134012929, 133963777],
+        [268369921, 268361729, 268271617, 268238849],
+        [536813569, 536690689, 536641537, 536616961],
+        [1073692673, 1073668097, 1073651713, 1073643521],
+        [2147377153, 2147352577, 2147295233, 2147205121],
+        [4294828033, 4294729729, 4294483969, 4294475777],
+        [8589852673, 8589844481, 8589680641, 8589475841],
+        [17179754497, 17179672577, 17179648001, 17179549697],
+        [34359697409, 34359451649, 34359410689, 34359361537],
+        [68719403009, 68719230977, 68719206401, 68719190017],
+        [137438822401, 137438814209, 137438773249, 137438691329],
+        [274877816833, 274877734913, 274877718529, 274877562881],
+        [549755731969, 549755486209, 549755363329, 549755330561],
+        [1099511480321, 1099511390209, 1099511259137, 1099511111681],
+        [2199023190017, 2199022927873, 2199022821377, 2199022624769],
+        [4398046486529, 4398046240769, 4398046150657, 4398045847553],
+        [8796092858369, 8796092833793, 8796092817409, 8796092792833],
+        [17592186028033, 17592185659393, 17592185511937, 17592185438209],
+        [35184371884033, 35184371703809, 35184371613697, 35184371417089],
+        [70368743669761, 70368743587841, 70368743489537, 70368743374849],
+        [140737488273409, 140737488125953, 140737488044033, 140737487511553],
+        [281474976694273, 281474976636929, 281474976546817, 281474976423937],
+        [562949953216513, 562949952987137, 562949952970753, 562949952872449],
+        [1125899906826241, 1125899906629633, 1125899906424833, 1125899906260993],
+        [2251799813554177, 2251799813480449, 2251799813472257, 2251799813406721],
+        [4503599627149313, 4503599627124737, 4503599626838017, 4503599626690561],
+        [9007199254429697, 9007199254364161, 9007199254331393, 9007199254241281],
+        [18014398509309953, 18014398509293569, 18014398509211649, 18014398508998657],
+        [36028797018652673, 36028797018529793, 36028797018267649, 36028797017939969],
+        [72057594037641217, 72057594037616641, 72057594037370881, 72057594037338113],
+        [
+            144115188075814913,
+            144115188075749377,
+            144115188075593729,
+            144115188075569153,
+        ],
+        [
+            288230376151130113,
+            288230376150876161,
+            288230376150802433,
+            288230376150712321,
+        ],
+        [
+            576460752303415297,
+            576460752303210497,
+            576460752303185921,
+            576460752303136769,
+        ],
+        [
+            1152921504606830593,
+            1152921504606748673,
+            1152921504606683137,
+            1152921504606601217,
+        ],
+    ],
+    # log_n = 13
+    [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [114689, 65537, 0, 0],
+        [163841, 147457, 114689, 65537],
+        [163841, 147457, 114689, 65537],
+        [1032193, 786433, 737281, 638977],
+        [1785857, 1769473, 1720321, 1589249],
+        [4079617, 4046849, 3850241, 3735553],
+        [8273921, 8257537, 8159233, 7979009],
+        [16760833, 16580609, 16515073, 16465921],
+        [33538049, 33292289, 33177601, 33128449],
+        [67043329, 66994177, 66961409, 66813953],
+        [133857281, 133644289, 133611521, 133513217],
+        [268369921, 268271617, 268238849, 268189697],
+        [536690689, 536641537, 536608769, 536543233],
+        [1073692673, 1073643521, 1073479681, 1073430529],
+        [2147352577, 2147205121, 2147074049, 2146959361],
+        [4294475777, 4293918721, 4293836801, 4293230593],
+        [8589852673, 8589475841, 8589279233, 8588886017],
+        [17179754497, 17179672577, 17179410433, 17179361281],
+        [34359410689, 34359361537, 34359214081, 34358788097],
+        [68719230977, 68718428161, 68718346241, 68717740033],
+        [137438822401, 137438773249, 137438691329, 137438576641],
+        [274877562881, 274877202433, 274877153281, 274877022209],
+        [549755731969, 549755486209, 549754617857, 549754454017],
+        [1099511480321, 1099510890497, 1099510824961, 1099510054913],
+        [2199023190017, 2199022927873, 2199022354433, 2199022043137],
+        [4398046150657, 4398045708289, 4398045511681, 4398045380609],
+        [8796092858369, 8796092792833, 8796092661761, 8796092399617],
+        [17592186028033, 17592185438209, 17592184717313, 17592184225793],
+        [35184371613697, 35184371417089, 35184371138561, 35184371089409],
+        [70368743669761, 70368743587841, 70368743489537, 70368743374849],
+        [140737488273409, 140737488125953, 140737488044033, 140737487306753],
+        [281474976694273, 281474976546817, 281474976317441, 281474975662081],
+        [562949952847873, 562949952798721, 562949952700417, 562949952274433],
+        [1125899906826241, 1125899906629633, 1125899905744897, 1125899905351681],
+        [2251799813554177, 2251799813472257, 2251799813406721, 2251799812980737],
+        [4503599627124737, 4503599626682369, 4503599626321921, 4503599626141697],
+        [9007199254429697, 9007199254364161, 9007199254331393, 9007199253921793],
+        [18014398508400641, 18014398508138497, 18014398507892737, 18014398507794433],
+        [36028797018652673, 36028797017571329, 36028797017456641, 36028797017276417],
+        [72057594037616641, 72057594037370881, 72057594037338113, 72057594037288961],
+        [
+            144115188075593729,
+            144115188075134977,
+            144115188074889217,
+            144115188074790913,
+        ],
+        [
+            288230376150876161,
+            288230376150712321,
+            288230376150630401,
+            288230376150089729,
+        ],
+        [
+            576460752303210497,
+            576460752303046657,
+            576460752302473217,
+            576460752302161921,
+        ],
+        [
+            1152921504606830593,
+            1152921504606748673,
+            1152921504606683137,
+            1152921504606601217,
+        ],
+    ],
+    # log_n = 14
+    [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [65537, 0, 0, 0],
+        [163841, 65537, 0, 0],
+        [163841, 65537, 0, 0],
+        [786433, 557057, 163841, 65537],
+        [1769473, 1376257, 1179649, 1146881],
+        [3735553, 3604481, 2752513, 2654209],
+        [8257537, 8159233, 7667713, 7569409],
+        [16580609, 16515073, 16384001, 16121857],
+        [33292289, 33128449, 32931841, 32899073],
+        [67043329, 66813953, 66551809, 66420737],
+        [133857281, 132710401, 132612097, 132120577],
+        [268369921, 268271617, 268238849, 268042241],
+        [536641537, 536608769, 536543233, 536215553],
+        [1073643521, 1073479681, 1073184769, 1073053697],
+        [2147352577, 2146959361, 2146336769, 2146041857],
+        [4294475777, 4293918721, 4293230593, 4292804609],
+        [8589475841, 8589279233, 8588886017, 8588820481],
+        [17179672577, 17179410433, 17178525697, 17178198017],
+        [34359410689, 34359214081, 34358788097, 34357805057],
+        [68718428161, 68717740033, 68716036097, 68714954753],
+        [137438822401, 137438691329, 137437806593, 137437511681],
+        [274877153281, 274877022209, 274876334081, 274875842561],
+        [549755486209, 549754109953, 549753978881, 549753782273],
+        [1099510054913, 1099508121601, 1099507695617, 1099506515969],
+        [2199023190017, 2199022927873, 2199022043137, 2199022010369],
+        [4398046150657, 4398044938241, 4398044577793, 4398043594753],
+        [8796092858369, 8796092792833, 8796092661761, 8796092399617],
+        [17592183914497, 17592183390209, 17592183324673, 17592182833153],
+        [35184371138561, 35184370941953, 35184370352129, 35184370155521],
+        [70368743587841, 70368743489537, 70368743292929, 70368742408193],
+        [140737488125953, 140737487306753, 140737486716929, 140737486553089],
+        [281474976546817, 281474976317441, 281474975662081, 281474975563777],
+        [562949952798721, 562949952700417, 562949952274433, 562949951979521],
+        [1125899904679937, 1125899903991809, 1125899903827969, 1125899903795201],
+        [2251799813554177, 2251799811391489, 2251799810670593, 2251799810605057],
+        [4503599626682369, 4503599626321921, 4503599625830401, 4503599625535489],
+        [9007199253921793, 9007199252840449, 9007199252807681, 9007199252545537],
+        [18014398508400641, 18014398508138497, 18014398507614209, 18014398507220993],
+        [36028797017456641, 36028797016178689, 36028797014704129, 36028797014573057],
+        [72057594037370881, 72057594037338113, 72057594036879361, 72057594036551681],
+        [
+            144115188075593729,
+            144115188075134977,
+            144115188071170049,
+            144115188070809601,
+        ],
+        [
+            288230376150630401,
+            288230376149975041,
+            288230376147582977,
+            288230376147386369,
+        ],
+        [
+            576460752302473217,
+            576460752302080001,
+            576460752301785089,
+            576460752301391873,
+        ],
+        [
+            1152921504606748673,
+            1152921504606683137,
+            1152921504606584833,
+            1152921504605962241,
+        ],
+    ],
+    # log_n = 15
+    [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [65537, 0, 0, 0],
+        [65537, 0, 0, 0],
+        [65537, 0, 0, 0],
+        [786433, 65537, 0, 0],
+        [1769473, 1376257, 1179649, 786433],
+        [3735553, 3604481, 2752513, 2424833],
+        [8257537, 7667713, 7340033, 6946817],
+        [16580609, 16515073, 16384001, 16121857],
+        [33292289, 32899073, 32440321, 31916033],
+        [67043329, 65929217, 65077249, 64946177],
+        [132710401, 132120577, 131923969, 131530753],
+        [268369921, 268238849, 268042241, 267059201],
+        [536608769, 536543233, 536215553, 535756801],
+        [1073479681, 1072496641, 1071513601, 1070727169],
+        [2147352577, 2146959361, 2146041857, 2145976321],
+        [4293918721, 4292804609, 4292149249, 4292018177],
+        [8589475841, 8589279233, 8588886017, 8588820481],
+        [17179672577, 17179410433, 17176854529, 17175674881],
+        [34359410689, 34359214081, 34357444609, 34357116929],
+        [68718428161, 68714954753, 68713512961, 68712923137],
+        [137438822401, 137438691329, 137437511681, 137436659713],
+        [274876334081, 274874695681, 274873778177, 274873188353],
+        [549755486209, 549754109953, 549753978881, 549753782273],
+        [1099510054913, 1099507695617, 1099506515969, 1099504549889],
+        [2199023190017, 2199022927873, 2199022010369, 2199021813761],
+        [4398044938241, 4398043496449, 4398042972161, 4398042513409],
+        [8796090597377, 8796090007553, 8796087582721, 8796087386113],
+        [17592182833153, 17592182243329, 17592181260289, 17592181129217],
+        [35184368877569, 35184368025601, 35184367828993, 35184366911489],
+        [70368743587841, 70368742408193, 70368740769793, 70368740442113],
+        [140737487306753, 140737486716929, 140737486520321, 140737485864961],
+        [281474976317441, 281474975662081, 281474974482433, 281474972188673],
+        [562949952700417, 562949951979521, 562949950537729, 562949948833793],
+        [1125899904679937, 1125899903827969, 1125899903500289, 1125899903107073],
+        [2251799813554177, 2251799811391489, 2251799810670593, 2251799810605057],
+        [4503599626321921, 4503599625535489, 4503599625404417, 4503599623045121],
+        [9007199252840449, 9007199252119553, 9007199251660801, 9007199250874369],
+        [18014398506729473, 18014398505943041, 18014398499848193, 18014398498799617],
+        [36028797017456641, 36028797014704129, 36028797014573057, 36028797014376449],
+        [72057594037338113, 72057594036879361, 72057594036551681, 72057594035306497],
+        [
+            144115188075593729,
+            144115188075134977,
+            144115188070809601,
+            144115188070023169,
+        ],
+        [
+            288230376147582977,
+            288230376147386369,
+            288230376147320833,
+            288230376144568321,
+        ],
+        [
+            576460752301785089,
+            576460752301391873,
+            576460752300015617,
+            576460752298835969,
+        ],
+        [
+            1152921504606584833,
+            1152921504598720513,
+            1152921504597016577,
+            1152921504595968001,
+        ],
+    ],
+]
+
+
+def find_prime_mod_2n(log_n, bits, not_in=[]):
+    """Returns the smallest prime >= 2**bits which is congruent to 1 mod 2n and
+    not in `not_in`. The table answers most queries, others are searched."""
+    two_n = 2 ** (log_n + 1)
+    i = ((2**bits - 1 + two_n - 1) // two_n) * two_n + 1
+    if MIN_LOG_N <= log_n <= MAX_LOG_N and MIN_BITS <= bits <= MAX_BITS:
+        primes = PRIMES_ABOVE[log_n - MIN_LOG_N][bits - MIN_BITS]
+        for p in primes:
+            if p not in not_in:
+                return p
+        # All tabulated primes are in use, search past them.
+        i = primes[-1] + two_n
+    while i in not_in or not is_prime(i):
+        i += two_n
+    return i
@@ -0,0 +1,430 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import tensorflow as tf
+from tf_shell.python.ntt_primes import is_prime
+from tf_shell.python.shell_context import create_context64
+from tf_shell.python.shell_key import create_key64
+from tf_shell.python.shell_key import create_rotation_key64
+from tf_shell.python.shell_optimizers import autotune_shell_params
+from tf_shell.python.shell_tensor import mod_reduce_tensor64
+from tf_shell.python.shell_tensor import roll
+from tf_shell.python.shell_tensor import to_encrypted
+from tf_shell.python.shell_tensor import to_shell_plaintext
+from tf_shell.python.shell_tensor import to_tensorflow
+
+
+def _benchmark_moduli(log_n, num_moduli, plaintext_bits=16, moduli_bits=50):
+    """Returns a plaintext modulus and `num_moduli` ciphertext moduli which are
+    congruent to 1 mod 2n (and the moduli to 1 mod t), as the autotuner
+    requires. The cost of operations does not depend on the exact primes."""
+    two_n = 2 ** (log_n + 1)
+    t = ((2**plaintext_bits) // two_n + 1) * two_n + 1
+    while not is_prime(t):
+        t += two_n
+
+    step = two_n * t
+    q = ((2**moduli_bits - 1) // step) * step + 1
+    qs = []
+    while len(qs) < num_moduli:
+        if is_prime(q):
+            qs.append(q)
+        q -= step
+    return t, qs
+
+
+def _time_ns(fn, iterations):
+    fn()  # Warm up, e.g. trace the function.
+    best = float("inf")
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        best = min(best, time.perf_counter_ns() - start)
+    return best
+
+
+def benchmark_cost_model(
+    path=None,
+    log_ns=range(10, 16),
+    max_num_moduli=6,
+    num_ciphertexts=16,
+    iterations=5,
+):
+    """Measures the cost of shell operations for the ModuliAutotuneOptimizer.
+
+    Each operation is timed on `num_ciphertexts` ciphertexts for every ring
+    degree in `log_ns` and every number of moduli from 1 to `max_num_moduli`.
+    The results map (log_n, num_moduli, op) to nanoseconds per ciphertext and,
+    if `path` is given, are written to a file which can be passed as
+    `autotune_cost_model_path` to `tf_shell.enable_optimization()` or
+    `tf_shell.optimize_shell_graph()`. Covering all ring degrees may take
+    several minutes.
+    """
+    costs = {}
+    for log_n in log_ns:
+        for num_moduli in range(1, max_num_moduli + 1):
+            t, qs = _benchmark_moduli(log_n, num_moduli)
+            context = create_context64(log_n=log_n, main_moduli=qs, plaintext_modulus=t)
+            key = create_key64(context)
+            rotation_key = create_rotation_key64(context, key)
+
+            values = tf.random.uniform(
+                [2**log_n, num_ciphertexts], maxval=8, dtype=tf.int64
+            )
+            ct = to_encrypted(values, key, context)
+            pt = to_shell_plaintext(values, context)
+
+            ops = {
+                "encrypt": lambda: to_encrypted(values, key, context),
+                "decrypt": lambda: to_tensorflow(ct, key),
+                "add": lambda: ct + ct,
+                "mul_ct_pt": lambda: ct * pt,
+                "mul_ct_ct": lambda: ct * ct,
+                "rotate": lambda: roll(ct, 1, rotation_key),
+            }
+            if num_moduli > 1:
+                ops["modulus_reduce"] = lambda: mod_reduce_tensor64(ct)
+
+            for op, fn in ops.items():
+                ns = _time_ns(fn, iterations) / num_ciphertexts
+                costs[(log_n, num_moduli, op)] = ns
+
+    if path is not None:
+        with open(path, "w") as f:
+            f.write("# log_n num_moduli op nanoseconds\n")
+            for (log_n, num_moduli, op), ns in sorted(costs.items()):
+                f.write(f"{log_n} {num_moduli} {op} {ns:.1f}\n")
+
+    return costs
+
+
+def _load_cost_model(path):
+    costs = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith("#") or len(fields) != 4:
+                continue
+            log_n, num_moduli, op, ns = fields
+            costs[(int(log_n), int(num_moduli), op)] = float(ns)
+    return costs
+
+
+def _cost_ns(costs, op, log_n, num_moduli):
+    """Returns the cost of `op` in nanoseconds per ciphertext, extrapolated from
+    the nearest measurement like the ModuliAutotuneOptimizer does, or 0 if
+    `op` was never measured."""
+    if (log_n, num_moduli, op) in costs:
+        return costs[(log_n, num_moduli, op)]
+
+    cost = 0
+    best_distance = None
+    for (key_log_n, key_num_moduli, key_op), ns in costs.items():
+        if key_op != op:
+            continue
+        distance = (abs(key_log_n - log_n), abs(key_num_moduli - num_moduli))
+        if best_distance is not None and distance >= best_distance:
+            continue
+        best_distance = distance
+        cost = (
+            ns
+            * num_moduli
+            / key_num_moduli
+            * (2**log_n * log_n)
+            / (2**key_log_n * key_log_n)
+        )
+    return cost
+
+
+# Shell ops whose output holds ciphertexts or plaintexts, respectively.
+_ciphertext_ops = {
+    "Encrypt64",
+    "AddCtCt64",
+    "AddCtPt64",
+    "SubCtCt64",
+    "SubCtPt64",
+    "NegCt64",
+    "MulCtCt64",
+    "MulCtPt64",
+    "MulCtTfScalar64",
+    "MatMulCtPt64",
+    "MatMulPtCt64",
+    "Roll64",
+    "ReduceSumByRotationCt64",
+    "FastReduceSumByRotation64",
+    "ReduceSumCt64",
+    "ModulusReduceCt64",
+    "ConcatCt64",
+    "UnsortedCtSegmentSum",
+    "MaxUnpool2dCt64",
+    "Conv2dPtCt64",
+    "Conv2dCtPt64",
+    "Conv2dCtCt64",
+    "Conv2dWithChanPtCt64",
+    "Conv2dWithChanCtPt64",
+    "Conv2dWithChanCtCt64",
+    "Conv2dTransposePtCt64",
+    "Conv2dTransposeCtPt64",
+    "Conv2dTransposeCtCt64",
+    "Conv2dTransposeWithChanPtCt64",
+    "Conv2dTransposeWithChanCtPt64",
+    "Conv2dTransposeWithChanCtCt64",
+    "Conv2dTransposeCtTfScalar64",
+}
+_plaintext_ops = {
+    "PolynomialImport64",
+    "AddPtPt64",
+    "SubPtPt64",
+    "NegPt64",
+    "MulPtPt64",
+    "MulPtTfScalar64",
+    "ModulusReducePt64",
+    "ConcatPt64",
+}
+# Shell ops which decrypt ciphertexts into a TensorFlow tensor.
+_decrypt_ops = {"Decrypt64", "DecryptFastRotated64"}
+
+
+def _op_counts(op, log_n):
+    """Returns the number of each operation in the cost model performed per
+    ciphertext of `op`, matching the ModuliAutotuneOptimizer."""
+    if op.type == "Encrypt64":
+        return {"encrypt": 1}
+    if op.type in _decrypt_ops:
+        return {"decrypt": 1}
+    if op.type in ("AddCtCt64", "SubCtCt64", "AddCtPt64", "SubCtPt64", "NegCt64"):
+        return {"add": 1}
+    if op.type in ("MulCtPt64", "MulCtTfScalar64"):
+        return {"mul_ct_pt": 1}
+    if op.type == "MulCtCt64":
+        return {"mul_ct_ct": 1}
+    if op.type == "ModulusReduceCt64":
+        return {"modulus_reduce": 1}
+    if op.type == "Roll64":
+        return {"rotate": 1}
+    if op.type == "ReduceSumByRotationCt64":
+        return {"rotate": log_n, "add": log_n}
+    if op.type == "FastReduceSumByRotation64":
+        return {"add": log_n}
+    if op.type in ("ReduceSumCt64", "MatMulCtPt64"):
+        size = max(op.get_attr("reduce_dim_size"), 1)
+        if op.type == "ReduceSumCt64":
+            return {"add": size}
+        return {"mul_ct_pt": size, "add": size}
+    if op.type == "MatMulPtCt64":
+        # The slots of each ciphertext are reduced with rotations.
+        if op.get_attr("reduction") != b"galois":
+            return {"mul_ct_pt": 1, "add": log_n}
+        return {"mul_ct_pt": 1, "rotate": log_n, "add": log_n}
+    if op.type.startswith("Conv2d"):
+        # Each output is a dot product over one output channel of the filter.
+        output_shape = op.get_attr("output_shape")
+        out_channels = output_shape[-1] if output_shape else 1
+        size = max(op.get_attr("filter_num_elements") // max(out_channels, 1), 1)
+        mul = "mul_ct_ct" if op.type.endswith("CtCt64") else "mul_ct_pt"
+        return {mul: size, "add": size}
+    return {}
+
+
+def _num_elements(tensor):
+    shape = tensor.shape
+    if shape.rank is None or not shape.is_fully_defined():
+        return None
+    return shape.num_elements()
+
+
+def _static_shell_params(func):
+    """Returns the ring degree and number of moduli of the contexts created in
+    `func`, or None if `func` does not create a context."""
+    params = set()
+    ops = func.graph.get_operations()
+
+    # All autocontexts in the graph are autotuned at once.
+    if any(op.type == "AutoShellContext64" for op in ops):
+        autotuned = autotune_shell_params(func)
+        if autotuned is None:
+            raise ValueError(
+                "Could not autotune the parameters of the autocontext. Pass "
+                "`log_n` and `num_moduli` to `estimate_cost`."
+            )
+        params.add((autotuned["log_n"], len(autotuned["main_moduli"])))
+
+    for op in ops:
+        if op.type == "ContextImport64":
+            log_n = tf.get_static_value(op.inputs[0])
+            main_moduli = tf.get_static_value(op.inputs[1])
+            if log_n is None or main_moduli is None:
+                raise ValueError(
+                    f"The parameters of context {op.name} are not static. Pass "
+                    "`log_n` and `num_moduli` to `estimate_cost`."
+                )
+            params.add((int(log_n), len(main_moduli)))
+
+    if len(params) > 1:
+        raise ValueError(
+            "The function uses contexts with different parameters. Pass "
+            "`log_n` and `num_moduli` to `estimate_cost`."
+        )
+    return params.pop() if params else None
+
+
+def estimate_cost(func, cost_model=None, log_n=None, num_moduli=None):
+    """Estimates the cost of running the traced `func`, a concrete function,
+    without executing it.
+
+    The shell ops in the graph of `func` are counted by type, number of moduli
+    (level) and number of ciphertexts, where values start with all moduli when
+    encoded or encrypted and each modulus reduction drops one. The counts are
+    combined with `cost_model`, the costs measured by `benchmark_cost_model()`
+    or the path of the file it writes, to estimate the step time.
+
+    The ring degree and number of moduli are read from the contexts created in
+    `func`, running the ModuliAutotuneOptimizer if it uses an autocontext. If
+    the context is an argument of `func`, pass `log_n` and `num_moduli`.
+
+    Returns a dict with the keys:
+      `log_n`, `num_moduli`: The parameters used for the estimate.
+      `ops`: Maps (op type, number of moduli) to a dict with the number of
+        `nodes` and `ciphertexts`.
+      `cost_by_op`: Maps each operation in the cost model, e.g. `rotate`, to a
+        dict with its `count` and estimated `ns`.
+      `step_ns`, `example_ns`: Estimated runtime of one call and per example,
+        i.e. per slot. None without a `cost_model`.
+      `peak_ciphertext_bytes`: Largest total size of the ciphertexts and
+        plaintexts alive at once, running the ops in the order they were
+        traced.
+      `cross_device_bytes`: Size of the statically shaped tensors passed
+        between ops placed on different devices.
+      `unknown_shapes`: Number of shell ops whose output shape is not static,
+        which are counted as a single ciphertext.
+
+    Ops inside the bodies of control flow, e.g. `tf.while_loop`, are not
+    counted.
+    """
+    if isinstance(cost_model, str):
+        cost_model = _load_cost_model(cost_model)
+
+    if log_n is None or num_moduli is None:
+        params = _static_shell_params(func)
+        if params is None:
+            raise ValueError(
+                "Could not find a context in the function. Pass `log_n` and "
+                "`num_moduli` to `estimate_cost`."
+            )
+        log_n = params[0] if log_n is None else log_n
+        num_moduli = params[1] if num_moduli is None else num_moduli
+
+    operations = func.graph.get_operations()
+    ops = {}
+    cost_by_op = {}
+    step_ns = 0.0
+    unknown_shapes = 0
+    cross_device_bytes = 0
+
+    # Number of moduli of each tensor holding ciphertexts or plaintexts, when
+    # known, and the size of each such tensor in bytes.
+    levels = {}
+    value_bytes = {}
+    produced_at = {}
+    last_use = {}
+
+    for i, op in enumerate(operations):
+        known_levels = [levels[t.ref()] for t in op.inputs if t.ref() in levels]
+        is_value_op = op.type in _ciphertext_ops or op.type in _plaintext_ops
+
+        if op.type in ("PolynomialImport64", "Encrypt64"):
+            op_level = out_level = num_moduli
+        elif op.type in ("ModulusReduceCt64", "ModulusReducePt64"):
+            # Modulus reduction runs at the level of its input.
+            op_level = levels.get(op.inputs[1].ref(), num_moduli)
+            out_level = max(op_level, 2) - 1
+        elif known_levels:
+            op_level = out_level = max(known_levels)
+        elif is_value_op or op.type in _decrypt_ops:
+            # Inputs of the function are assumed to have all moduli.
+            op_level = out_level = num_moduli
+        else:
+            op_level = out_level = None
+
+        for t in op.inputs:
+            last_use[t.ref()] = i
+            if op.device and t.op.device and op.device != t.op.device:
+                if t.ref() in value_bytes:
+                    cross_device_bytes += value_bytes[t.ref()]
+                elif t.dtype != tf.variant and _num_elements(t) is not None:
+                    cross_device_bytes += _num_elements(t) * t.dtype.size
+
+        variant_outputs = [t for t in op.outputs if t.dtype == tf.variant]
+        if out_level is not None:
+            for t in variant_outputs:
+                levels[t.ref()] = out_level
+
+        if not is_value_op and op.type not in _decrypt_ops:
+            continue
+
+        # Decryption outputs a tensor, so count the ciphertexts it decrypts.
+        counted = variant_outputs if variant_outputs else [op.inputs[2]]
+        num_cts = _num_elements(counted[0])
+        if num_cts is None:
+            num_cts = 1
+            unknown_shapes += 1
+
+        entry = ops.setdefault((op.type, op_level), {"nodes": 0, "ciphertexts": 0})
+        entry["nodes"] += 1
+        entry["ciphertexts"] += num_cts
+
+        for cost_op, count in _op_counts(op, log_n).items():
+            entry = cost_by_op.setdefault(cost_op, {"count": 0, "ns": 0.0})
+            entry["count"] += count * num_cts
+            if cost_model is not None:
+                ns = _cost_ns(cost_model, cost_op, log_n, op_level) * count * num_cts
+                entry["ns"] += ns
+                step_ns += ns
+
+        # A ciphertext holds two polynomials and a plaintext one, each with a
+        # 64-bit coefficient per slot and modulus.
+        if is_value_op:
+            polys = 2 if op.type in _ciphertext_ops else 1
+            ref = variant_outputs[0].ref()
+            value_bytes[ref] = num_cts * polys * 2**log_n * out_level * 8
+            produced_at[ref] = i
+
+    # Values are freed after their last use, except the outputs of the function.
+    for t in func.graph.outputs:
+        last_use[t.ref()] = len(operations)
+    allocated = [0] * (len(operations) + 1)
+    freed = [0] * (len(operations) + 1)
+    for ref, size in value_bytes.items():
+        allocated[produced_at[ref]] += size
+        freed[max(last_use.get(ref, 0), produced_at[ref])] += size
+
+    live_bytes = 0
+    peak_ciphertext_bytes = 0
+    for i in range(len(operations)):
+        live_bytes += allocated[i]
+        peak_ciphertext_bytes = max(peak_ciphertext_bytes, live_bytes)
+        live_bytes -= freed[i]
+
+    has_cost = cost_model is not None
+    return {
+        "log_n": log_n,
+        "num_moduli": num_moduli,
+        "ops": ops,
+        "cost_by_op": cost_by_op,
+        "step_ns": step_ns if has_cost else None,
+        "example_ns": step_ns / 2**log_n if has_cost else None,
+        "peak_ciphertext_bytes": peak_ciphertext_bytes,
+        "cross_device_bytes": cross_device_bytes,
+        "unknown_shapes": unknown_shapes,
+    }
@@ -84,6 +84,7 @@ conv2d_with_chan_ct_pt64 = shell_ops.conv2d_with_chan_ct_pt64
 conv2d_with_chan_ct_ct64 = shell_ops.conv2d_with_chan_ct_ct64
 conv2d_transpose_pt_ct64 = shell_ops.conv2d_transpose_pt_ct64
 conv2d_transpose_ct_pt64 = shell_ops.conv2d_transpose_ct_pt64
+conv2d_transpose_ct_tf_scalar64 = shell_ops.conv2d_transpose_ct_tf_scalar64
 conv2d_transpose_ct_ct64 = shell_ops.conv2d_transpose_ct_ct64
 conv2d_transpose_with_chan_pt_ct64 = shell_ops.conv2d_transpose_with_chan_pt_ct64
 conv2d_transpose_with_chan_ct_pt64 = shell_ops.conv2d_transpose_with_chan_ct_pt64
@@ -97,3 +98,7 @@ clip_and_noise_labels_party = shell_ops.clip_and_noise_labels_party
 # Distribution sampling ops.
 sample_centered_gaussian_f64 = shell_ops.sample_centered_gaussian_f64
 sample_centered_gaussian_l64 = shell_ops.sample_centered_gaussian_l64
+
+# Profiling.
+enable_shell_profiling64 = shell_ops.enable_shell_profiling64
+take_shell_profile64 = shell_ops.take_shell_profile64
@@ -15,6 +15,10 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import itertools
+import json
+import threading
+
 from tensorflow.python.framework import load_library
 from tensorflow.python.platform import resource_loader
 
@@ -41,36 +45,62 @@ from tensorflow.core.function.polymorphism import function_type as function_type
 all_shell_optimizers = [
     "CtPtOptimizer",
     "PtPtOptimizer",
+    "ShellCseOptimizer",
+    "RotationFusionOptimizer",
     "ModuliAutotuneOptimizer",
 ]
 
 
-def optimize_shell_graph(
-    func, optimizers=all_shell_optimizers, skip_convert_to_constants=False
+def _shell_rewriter_config(
+    optimizers, autotune_cache_path, autotune_cost_model_path, auto_mod_reduce
 ):
     rewriter_config = rewriter_config_pb2.RewriterConfig()
     rewriter_config.meta_optimizer_iterations = rewriter_config_pb2.RewriterConfig.ONE
     for optimizer in optimizers:
         custom_optimizer = rewriter_config.custom_optimizers.add()
         custom_optimizer.name = optimizer
+        if optimizer != "ModuliAutotuneOptimizer":
+            continue
+        # The autotuner persists the parameters it selects to this file so
+        # later traces and processes skip the search for primes.
+        if autotune_cache_path is not None:
+            custom_optimizer.parameter_map["autotune_cache_path"].s = (
+                autotune_cache_path.encode()
+            )
+        # With a cost model from benchmark_cost_model(), the autotuner picks
+        # the parameters with the lowest estimated runtime per example instead
+        # of the smallest ones.
+        if autotune_cost_model_path is not None:
+            custom_optimizer.parameter_map["autotune_cost_model_path"].s = (
+                autotune_cost_model_path.encode()
+            )
+        # Reduce the moduli of ciphertexts as early as the noise budget allows
+        # so the remaining operations before decryption are cheaper.
+        custom_optimizer.parameter_map["auto_mod_reduce"].b = auto_mod_reduce
+    return rewriter_config
 
-    # Converting var2consts for larger models might take a long time
-    if not skip_convert_to_constants:
-        frozen_func = convert_to_constants.convert_variables_to_constants_v2(
-            func, lower_control_flow=False, aggressive_inlining=True
-        )
-    else:
-        frozen_func = func
 
+# Statistics which optimize_shell_graph() took from the optimizers but which
+# belong to other runs, e.g. of functions run with `enable_optimization`. They
+# are returned by the next call to take_optimizer_stats().
+_other_optimizer_stats = []
+_other_optimizer_stats_lock = threading.Lock()
+
+# Distinguishes the graphs of different optimize_shell_graph() calls in the
+# optimizer statistics.
+_graph_ids = itertools.count()
+
+
+def _run_grappler(func, rewriter_config, graph_id=b"tf_graph"):
     meta_graph_def = saver.export_meta_graph(
-        graph_def=frozen_func.graph.as_graph_def(add_shapes=False),
-        graph=frozen_func.graph,
+        graph_def=func.graph.as_graph_def(add_shapes=False),
+        graph=func.graph,
     )
 
     # print("orig graph def", meta_graph_def)
 
     fetch_collection = meta_graph_pb2.CollectionDef()
-    for array in frozen_func.outputs:
+    for array in func.outputs:
         fetch_collection.node_list.value.append(array.name)
 
     # Grappler determines fetch ops from collection 'train_op'.
@@ -84,11 +114,55 @@ def optimize_shell_graph(
 
     grappler_session_config.graph_options.rewrite_options.CopyFrom(rewriter_config)
     optimized_graph_def = tf_optimizer.OptimizeGraph(
-        grappler_session_config, meta_graph_def, graph_id=b"tf_graph"
+        grappler_session_config, meta_graph_def, graph_id=graph_id
     )
 
     # print("opt graph def", optimized_graph_def)
 
+    return optimized_graph_def
+
+
+def optimize_shell_graph(
+    func,
+    optimizers=all_shell_optimizers,
+    skip_convert_to_constants=False,
+    autotune_cache_path=None,
+    autotune_cost_model_path=None,
+    auto_mod_reduce=False,
+):
+    rewriter_config = _shell_rewriter_config(
+        optimizers, autotune_cache_path, autotune_cost_model_path, auto_mod_reduce
+    )
+
+    # Converting var2consts for larger models might take a long time
+    if not skip_convert_to_constants:
+        frozen_func = convert_to_constants.convert_variables_to_constants_v2(
+            func, lower_control_flow=False, aggressive_inlining=True
+        )
+    else:
+        frozen_func = func
+
+    # Statistics are recorded per graph, i.e. for the main graph and each
+    # function in its library. Use a unique id for the main graph to tell the
+    # statistics of this optimization apart from those of other runs.
+    graph_id = f"tf_shell_graph_{next(_graph_ids)}"
+    graphs = {graph_id}
+    graphs.update(
+        f.signature.name for f in frozen_func.graph.as_graph_def().library.function
+    )
+
+    optimized_graph_def = _run_grappler(
+        frozen_func, rewriter_config, graph_id=graph_id.encode()
+    )
+
+    optimizer_stats = []
+    with _other_optimizer_stats_lock:
+        for stats in json.loads(shell_ops.take_shell_optimizer_stats64().numpy()):
+            if stats["graph"] in graphs:
+                optimizer_stats.append(stats)
+            else:
+                _other_optimizer_stats.append(stats)
+
     # Swap original function with optimized function in TF's context
     for f in optimized_graph_def.library.function:
         while context.context().has_function(f.signature.name):
@@ -144,17 +218,90 @@ def optimize_shell_graph(
     )
     optimized_func._function_type = updated_fn_type
 
+    # Keep the statistics of the passes which produced this function, see
+    # `take_optimizer_stats`.
+    optimized_func.shell_optimizer_stats = optimizer_stats
+
     return optimized_func
 
 
+def take_optimizer_stats():
+    """Returns the statistics recorded by the shell optimizers since the last
+    call and clears them, as a list with one dict per optimizer run over a
+    graph or function in its library.
+
+    Each dict has the keys `pass`, `graph`, `wall_time_us`,
+    `num_nodes_before`, `num_nodes_after`, `nodes_matched` (occurrences of the
+    pattern the pass rewrites), `nodes_rewritten` (nodes of the input graph
+    removed or changed by the pass), and `details`, which holds pass-specific
+    entries. For example, `details["autocontexts"]` of the
+    ModuliAutotuneOptimizer lists the chosen parameters and the estimated
+    noise bits of each node per autocontext, and with `auto_mod_reduce`,
+    `details["mod_reductions"]` lists the inserted reductions and the RNS limb
+    operations (and with a cost model, the nanoseconds per step) they save.
+
+    Statistics are recorded whenever the optimizers run, including for
+    functions run with `enable_optimization`. `optimize_shell_graph` attaches
+    the statistics of its own run to the returned function as
+    `shell_optimizer_stats` instead of returning them here.
+    """
+    with _other_optimizer_stats_lock:
+        stats = _other_optimizer_stats + json.loads(
+            shell_ops.take_shell_optimizer_stats64().numpy()
+        )
+        _other_optimizer_stats.clear()
+    return stats
+
+
+def autotune_shell_params(
+    func,
+    optimizers=all_shell_optimizers,
+    autotune_cache_path=None,
+    autotune_cost_model_path=None,
+    auto_mod_reduce=False,
+):
+    """Runs the shell optimizers on the traced `func` and returns the
+    parameters the ModuliAutotuneOptimizer selected for its autocontext, as a
+    dict with keys `log_n`, `main_moduli`, and `plaintext_modulus`. Returns
+    None if `func` does not use an autocontext.
+
+    This is much faster than `optimize_shell_graph` when only the parameters
+    are needed, e.g. to choose the batch size, since the graph is neither
+    frozen nor wrapped into a new function, and the parameters are read from
+    the optimizer instead of the optimized graph. The arguments are the same
+    as for `optimize_shell_graph` so the same parameters are selected.
+    """
+    rewriter_config = _shell_rewriter_config(
+        optimizers, autotune_cache_path, autotune_cost_model_path, auto_mod_reduce
+    )
+
+    # Discard parameters left over from earlier optimizations, e.g. of
+    # functions run with `enable_optimization`.
+    shell_ops.take_autotuned_params64()
+
+    _run_grappler(func, rewriter_config)
+
+    found, log_n, main_moduli, plaintext_modulus = shell_ops.take_autotuned_params64()
+    if not found:
+        return None
+    return {
+        "log_n": int(log_n),
+        "main_moduli": main_moduli.numpy().tolist(),
+        "plaintext_modulus": int(plaintext_modulus),
+    }
+
+
 # Here is a method to enable custom optimizers described by
 # https://github.com/tensorflow/tensorflow/issues/55451#issuecomment-1147065792
-def enable_optimization(optimizers=all_shell_optimizers):
-    rewriter_config = rewriter_config_pb2.RewriterConfig()
-    rewriter_config.meta_optimizer_iterations = rewriter_config_pb2.RewriterConfig.ONE
-    for optimizer in optimizers:
-        custom_optimizer = rewriter_config.custom_optimizers.add()
-        custom_optimizer.name = optimizer
+def enable_optimization(
+    optimizers=all_shell_optimizers,
+    autotune_cache_path=None,
+    autotune_cost_model_path=None,
+    auto_mod_reduce=False,
+):
+    rewriter_config = _shell_rewriter_config(
+        optimizers, autotune_cache_path, autotune_cost_model_path, auto_mod_reduce
+    )
     grappler_session_config = context.context().config
     grappler_session_config.graph_options.rewrite_options.CopyFrom(rewriter_config)
 
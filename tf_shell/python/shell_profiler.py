@@ -0,0 +1,64 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import contextlib
+import json
+import tf_shell.python.shell_ops as shell_ops
+
+
+def enable_profiling(enabled=True):
+    """Turns the profiling of the shell kernels on or off.
+
+    While enabled, the encryption, decryption, multiplication, rotation, and
+    convolution kernels record per op instance the number of ciphertexts
+    computed (`elements`), the number of moduli they hold (`level`),
+    estimates of the number of NTTs outside of key switching
+    (`ntts_estimate`) and of key switches (`key_switches_estimate`) derived
+    from the sizes of the inputs, the bytes of their outputs
+    (`bytes_allocated`), and the time spent unpacking inputs and allocating
+    outputs (`allocation_us`) versus in modular arithmetic (`arithmetic_us`).
+    The records are read with `take_profile()`.
+
+    The same statistics are attached to the kernels' events in the TensorFlow
+    profiler trace, e.g. when profiling with `tf.profiler.experimental.start`.
+    """
+    shell_ops.enable_shell_profiling64(enabled)
+
+
+def take_profile():
+    """Returns the records of the shell kernels since the last call as a dict
+    keyed by node name and clears them. Each record is a dict with the op type
+    (`op`), the number of times the node ran (`calls`), and the statistics
+    described in `enable_profiling()`, summed over calls except for the level
+    of the last call."""
+    return json.loads(shell_ops.take_shell_profile64().numpy())
+
+
+@contextlib.contextmanager
+def profile():
+    """Profiles the shell kernels run inside the context. The yielded dict is
+    filled with the records, see `take_profile()`, when the context exits.
+
+    Example:
+        with tf_shell.profile() as records:
+            train_step(x, y)
+        slowest = max(records.values(), key=lambda r: r["total_us"])
+    """
+    take_profile()  # Discard records from earlier runs.
+    records = {}
+    enable_profiling(True)
+    try:
+        yield records
+    finally:
+        enable_profiling(False)
+        records.update(take_profile())
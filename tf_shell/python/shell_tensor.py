@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import math
+import typing
 import tensorflow as tf
 import tf_shell.python.shell_ops as shell_ops
 from tf_shell.python.shell_context import ShellContext64
@@ -151,6 +152,9 @@ class ShellTensor64(tf.experimental.ExtensionType):
             so = to_shell_plaintext(other, self._context)
             return self + so
 
+        elif isinstance(other, PreparedPlaintext):
+            return self + other._operand_for(self)
+
         else:
             # Try to import the unknown operand to a TensorFlow tensor and
             # attempt the subtraction again.
@@ -228,6 +232,8 @@ class ShellTensor64(tf.experimental.ExtensionType):
             # factor as self and attempt the subtraction again.
             shell_other = to_shell_plaintext(other, self._context)
             return self - shell_other
+        elif isinstance(other, PreparedPlaintext):
+            return self - other._operand_for(self)
         else:
             # Try to import the unknown operand to a TensorFlow tensor and
             # attempt the subtraction again.
@@ -286,6 +292,11 @@ class ShellTensor64(tf.experimental.ExtensionType):
                 _is_enc=self._is_enc,
                 _is_fast_rotated=self._is_fast_rotated,
             )
+        elif isinstance(other, PreparedPlaintext):
+            operand = other._operand_for(self)
+            if isinstance(operand, ShellTensor64):
+                return operand - self
+            return self.__rsub__(operand)
         else:
             # Try to import the unknown operand to a TensorFlow tensor and
             # attempt the the rsub again.
@@ -410,6 +421,9 @@ class ShellTensor64(tf.experimental.ExtensionType):
 
                 return self * shell_other
 
+        elif isinstance(other, PreparedPlaintext):
+            return self * other._operand_for(self)
+
         else:
             # Try to import the unknown multiplicand to a TensorFlow tensor and
             # attempt the multiplication again.
@@ -652,6 +666,177 @@ def to_shell_plaintext(tensor, context, override_scaling_factor=None):
             raise ValueError(f"Cannot convert to ShellTensor64. Got {type(tensor)}.")
 
 
+# Methods of tf.Variable which assign to it. Keras optimizers and Keras
+# variables assign through these methods of the underlying tf.Variable.
+_VARIABLE_ASSIGN_METHODS = [
+    "assign",
+    "assign_add",
+    "assign_sub",
+    "scatter_update",
+    "scatter_add",
+    "scatter_sub",
+    "scatter_nd_update",
+    "scatter_nd_add",
+    "scatter_nd_sub",
+]
+
+
+def _assignment_version(variable):
+    """Returns an int64 tf.Variable counting the assignments to `variable`, a
+    tf.Variable or a Keras variable, made through its assign methods from now
+    on, eagerly or in a tf.function."""
+    if not isinstance(variable, tf.Variable):
+        # Keras variables hold a tf.Variable.
+        variable = variable.value
+    version = getattr(variable, "_tf_shell_assignment_version", None)
+    if version is not None:
+        return version
+
+    with tf.init_scope():
+        version = tf.Variable(0, dtype=tf.int64, trainable=False)
+
+    def tracked(assign):
+        def tracked_assign(*args, **kwargs):
+            result = assign(*args, **kwargs)
+            version.assign_add(1)
+            return result
+
+        return tracked_assign
+
+    for name in _VARIABLE_ASSIGN_METHODS:
+        setattr(variable, name, tracked(getattr(variable, name)))
+    variable._tf_shell_assignment_version = version
+    return version
+
+
+class PreparedPlaintext:
+    """A plaintext weight whose tf-shell encodings are cached for reuse.
+
+    Every ct-pt operation with a TensorFlow tensor scales the tensor to
+    integers and, unless the operation multiplies by scalars, imports it into
+    a polynomial (NTT) and modulus reduces it to the level of the ciphertext.
+    When the same weight is used across many calls, e.g. when serving or
+    evaluating a model, a PreparedPlaintext performs each encoding once.
+    matmul(), conv2d(), conv2d_transpose() and the arithmetic operators of
+    ShellTensor64 accept a PreparedPlaintext wherever they accept a plaintext
+    TensorFlow tensor.
+
+    `transform`, if given, is applied to the value before it is encoded, e.g.
+    to scale a layer's kernel or repeat it across the slots.
+
+    Encodings are only cached when created eagerly. In a tf.function, an
+    existing eager encoding is captured as a constant, otherwise the weight
+    is encoded inline like a TensorFlow tensor.
+
+    When the weight is a tf.Variable or a Keras variable, the number of times
+    it was assigned is tracked, eagerly and in tf.functions, and the cache is
+    dropped once it changes. A tf.function always encodes a variable inline,
+    since the variable may be assigned after the function is traced.
+    invalidate() drops the cache explicitly and increments `version`.
+    """
+
+    def __init__(self, value, transform=None):
+        self._assignments = None
+        if isinstance(value, tf.Variable) or isinstance(
+            getattr(value, "value", None), tf.Variable
+        ):
+            self._assignments = _assignment_version(value)
+        elif not isinstance(value, tf.Tensor):
+            value = tf.convert_to_tensor(value)
+        self.value = value
+        self._transform = transform
+        self.version = 0
+        self._cache = {}
+        self._cached_assignments = None
+
+        # Assignments keep the shape and dtype of a variable.
+        spec = tf.TensorSpec.from_tensor(self._tensor())
+        self._shape = spec.shape
+        self._dtype = spec.dtype
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def invalidate(self):
+        self.version += 1
+        self._cache = {}
+        self._cached_assignments = None
+
+    def _tensor(self):
+        # The value to encode, read from the variable if there is one.
+        tensor = tf.identity(self.value)
+        if self._transform is not None:
+            tensor = self._transform(tensor)
+        return tensor
+
+    def _cached(self, key, encode_fn):
+        if not tf.executing_eagerly():
+            if self._assignments is not None or key not in self._cache:
+                return encode_fn()
+            return self._cache[key]
+
+        if self._assignments is not None:
+            assignments = int(self._assignments.numpy())
+            if assignments != self._cached_assignments:
+                self.invalidate()
+                self._cached_assignments = assignments
+        if key not in self._cache:
+            self._cache[key] = encode_fn()
+        return self._cache[key]
+
+    def scaled(self, scaling_factor):
+        """Returns the weight scaled to integers, as used by ct-pt ops which
+        multiply by scalars, e.g. matmul."""
+        return self._cached(
+            ("scaled", scaling_factor),
+            lambda: _encode_scaling(self._tensor(), scaling_factor),
+        )
+
+    def plaintext(self, context, num_mod_reductions=0, scaling_factor=None):
+        """Returns the weight as a ShellTensor64 plaintext in `context`,
+        modulus reduced `num_mod_reductions` times."""
+        if scaling_factor is None:
+            scaling_factor = context.scaling_factor
+
+        def encode():
+            pt = to_shell_plaintext(
+                self._tensor(),
+                context,
+                override_scaling_factor=scaling_factor,
+            )
+            for _ in range(num_mod_reductions):
+                pt = mod_reduce_tensor64(pt)
+            return pt
+
+        return self._cached(
+            ("plaintext", context.id_str, num_mod_reductions, scaling_factor),
+            encode,
+        )
+
+    def _operand_for(self, shell_tensor):
+        # Scalars and weights broadcast over the slots take the TensorFlow
+        # tensor paths of the ShellTensor64 operators, which handle the
+        # broadcasting and do not import a full polynomial.
+        if self.shape.rank == 0 or self.shape[0] == 1:
+            return self._tensor()
+        return self.plaintext(shell_tensor._context, shell_tensor._num_mod_reductions)
+
+
+def _resolve_prepared(x, y):
+    # A PreparedPlaintext only helps when the other operand is a ShellTensor64.
+    # Otherwise, fall back to the underlying TensorFlow value.
+    if isinstance(x, PreparedPlaintext) and not isinstance(y, ShellTensor64):
+        x = x._tensor()
+    if isinstance(y, PreparedPlaintext) and not isinstance(x, ShellTensor64):
+        y = y._tensor()
+    return x, y
+
+
 def to_encrypted(x, key, context=None):
     """Encrypts a plaintext tensor or ShellTensor using the provided key. If
     the input is a Tensorflow tensor, a context must also be provided. If the
@@ -989,14 +1174,19 @@ def matmul(x, y, rotation_key=None, pt_ct_reduction="galois", emulate_pt_ct=Fals
             f"matmul not supported for tensors with rank < 2. Got {x.shape} and {y.shape}."
         )
 
-    if isinstance(x, ShellTensor64) and isinstance(y, tf.Tensor):
+    x, y = _resolve_prepared(x, y)
+
+    if isinstance(x, ShellTensor64) and isinstance(y, (tf.Tensor, PreparedPlaintext)):
         if x._underlying_dtype != y.dtype:
             raise ValueError(
                 f"Underlying dtypes must match. Got {x._underlying_dtype} and {y.dtype}"
             )
 
         # Encode the plaintext y to the same scaling factor as x.
-        scaled_y = _encode_scaling(y, x._scaling_factor)
+        if isinstance(y, PreparedPlaintext):
+            scaled_y = y.scaled(x._scaling_factor)
+        else:
+            scaled_y = _encode_scaling(y, x._scaling_factor)
 
         return ShellTensor64(
             _raw_tensor=shell_ops.mat_mul_ct_pt64(
@@ -1014,7 +1204,7 @@ def matmul(x, y, rotation_key=None, pt_ct_reduction="galois", emulate_pt_ct=Fals
             _is_fast_rotated=x._is_fast_rotated,
         )
 
-    elif isinstance(x, tf.Tensor) and isinstance(y, ShellTensor64):
+    elif isinstance(x, (tf.Tensor, PreparedPlaintext)) and isinstance(y, ShellTensor64):
         if x.dtype != y._underlying_dtype:
             raise ValueError(
                 f"Underlying dtypes must match. Got {x.dtype} and {y._underlying_dtype}"
@@ -1026,7 +1216,10 @@ def matmul(x, y, rotation_key=None, pt_ct_reduction="galois", emulate_pt_ct=Fals
             )
 
         # Encode the plaintext x to the same scaling factor as y.
-        scaled_x = _encode_scaling(x, y._context.scaling_factor)
+        if isinstance(x, PreparedPlaintext):
+            scaled_x = x.scaled(y._context.scaling_factor)
+        else:
+            scaled_x = _encode_scaling(x, y._context.scaling_factor)
 
         if pt_ct_reduction == "galois":
             if not isinstance(rotation_key, ShellRotationKey64):
@@ -1286,6 +1479,22 @@ def concat(x, axis=0):
         raise ValueError("Unsupported type for concat")
 
 
+class ShellIndexedSlices(typing.NamedTuple):
+    """The output of segment_sum for only the segments which were used, in the
+    style of tf.IndexedSlices.
+
+    `values` is the segment_sum output (a ShellTensor64 or TensorFlow tensor)
+    where the segments axis holds only the segments listed in `indices`, in
+    the same order. The segments axis is the one of size `num_segments` in the
+    dense output. Segments which are not listed are zero. Padding segments,
+    see segment_sum(), have index `num_segments` and zero values.
+    """
+
+    values: typing.Any
+    indices: tf.Tensor
+    num_segments: typing.Any
+
+
 def segment_sum(
     x,
     segments,
@@ -1293,10 +1502,66 @@ def segment_sum(
     rotation_key=None,
     reduction="galois",
     skip_pt_counts=False,
+    sparse_output=False,
+    max_sparse_segments=None,
 ):
+    """Sums the elements of x which have the same segment id, per example.
+
+    When sparse_output is True, only the segments which appear in `segments`
+    are computed and the result is returned as a ShellIndexedSlices. The cost
+    then scales with the number of distinct segment ids instead of
+    num_segments. The reduction counts are also only returned for these
+    segments.
+
+    Note the size of a sparse output reveals the number of distinct segment
+    ids to anyone who sees it, e.g. a party which decrypts it. Setting
+    max_sparse_segments pads the output to that many segments to hide it.
+    There must be at most max_sparse_segments distinct segment ids.
+    """
     if not isinstance(segments, tf.Tensor):
         raise ValueError("`segments` must be a TensorFlow tensor.")
 
+    if sparse_output:
+        with tf.name_scope("sparse_segment_ids"):
+            # Sort the distinct non-negative segment ids, then renumber the
+            # segments by their position in the sorted list.
+            flat_segments = tf.reshape(segments, [-1])
+            used = tf.sort(
+                tf.unique(tf.boolean_mask(flat_segments, flat_segments >= 0))[0]
+            )
+            if max_sparse_segments is not None:
+                # Pad with segments which are never used. Their index
+                # num_segments sorts after the used segment ids.
+                num_used = tf.size(used, out_type=segments.dtype)
+                with tf.control_dependencies(
+                    [
+                        tf.debugging.assert_less_equal(
+                            num_used,
+                            tf.cast(max_sparse_segments, segments.dtype),
+                            message="More distinct segment ids than max_sparse_segments.",
+                        )
+                    ]
+                ):
+                    used = tf.pad(
+                        used,
+                        [[0, max_sparse_segments - num_used]],
+                        constant_values=tf.cast(num_segments, segments.dtype),
+                    )
+                used = tf.ensure_shape(used, [max_sparse_segments])
+            positions = tf.searchsorted(used, flat_segments, out_type=segments.dtype)
+            dense_segments = tf.reshape(
+                tf.where(flat_segments >= 0, positions, -1), tf.shape(segments)
+            )
+        values, counts = segment_sum(
+            x,
+            dense_segments,
+            tf.size(used, out_type=segments.dtype),
+            rotation_key=rotation_key,
+            reduction=reduction,
+            skip_pt_counts=skip_pt_counts,
+        )
+        return ShellIndexedSlices(values, used, num_segments), counts
+
     if isinstance(x, ShellTensor64):
         if reduction not in ["galois", "none"]:
             raise ValueError(f"Reduction must be 'galois' or 'none'. Got {reduction}.")
@@ -1417,7 +1682,17 @@ def segment_sum(
         raise ValueError("Unsupported type for segment_sum")
 
 
-def _conv2d(x, filt, strides, padding, dilations, output_shape, func):
+def _conv2d(
+    x,
+    filt,
+    strides,
+    padding,
+    dilations,
+    output_shape,
+    func,
+    extra_scaling_factor=1,
+    **kwargs,
+):
     if not x._is_enc and not filt._is_enc:
         raise ValueError("At least one input must be encrypted ShellTensor64.")
 
@@ -1438,12 +1713,15 @@ def _conv2d(x, filt, strides, padding, dilations, output_shape, func):
             dilations,
             filter_num_elements=matched_filt._raw_tensor.shape.num_elements(),
             output_shape=output_shape,
+            **kwargs,
         ),
         _context=matched_x._context,
         _level=matched_x._level,
         _num_mod_reductions=matched_x._num_mod_reductions,
         _underlying_dtype=matched_x._underlying_dtype,
-        _scaling_factor=matched_x._scaling_factor * matched_filt._scaling_factor,
+        _scaling_factor=matched_x._scaling_factor
+        * matched_filt._scaling_factor
+        * extra_scaling_factor,
         _is_enc=True,
         _is_fast_rotated=False,
     )
@@ -1457,6 +1735,8 @@ def conv2d(
     dilations=[1, 1, 1, 1],
     with_channel=False,
     output_shape=None,
+    packed=False,
+    winograd=False,
 ):
     """Convolution (technically cross-correlation) of x with filt.
 
@@ -1475,8 +1755,23 @@ def conv2d(
     [batch, in_height, in_width, in_channels].
 
     The order of strides padding, and dilations is top, bottom, left, right.
+
+    When one of x and filt is a plaintext, packed=True selects the im2col-style
+    kernel which gathers the input patches once and accumulates each output in
+    place instead of the original kernel. It is off by default until its
+    speedup has been benchmarked.
+
+    When x is a plaintext and filt is encrypted, e.g. for the weight gradient
+    of a convolutional layer, winograd=True computes the output in 3x3 tiles
+    with the Winograd F(3x3, 2x2) algorithm, which takes 16 instead of 36
+    ciphertext-plaintext multiplications per tile and 2x2 chunk of the
+    filter. strides and dilations must be 1, and filt must hold floating
+    point values. The result carries an extra scaling factor of 4 and so needs
+    two more bits of plaintext modulus.
     """
 
+    x, filt = _resolve_prepared(x, filt)
+
     # Plaintext implementation of tf-shell's conv2d using tensorflow ops.
     if not isinstance(x, ShellTensor64) and not isinstance(filt, ShellTensor64):
         # When the number of channels in x and filt are the same, perform
@@ -1550,6 +1845,10 @@ def conv2d(
             res = tf.slice(res, [0, 0, 0, 0, 0], output_shape)
         return res
 
+    if isinstance(x, PreparedPlaintext):
+        x = x.plaintext(filt._context, filt._num_mod_reductions)
+    if isinstance(filt, PreparedPlaintext):
+        filt = filt.plaintext(x._context, x._num_mod_reductions)
     if not isinstance(x, ShellTensor64):
         x = to_shell_plaintext(x, filt._context)
     if not isinstance(filt, ShellTensor64):
@@ -1578,7 +1877,41 @@ def conv2d(
         elif not x._is_enc and filt._is_enc:
             func = shell_ops.conv2d_with_chan_pt_ct64
 
-    return _conv2d(x, filt, strides, padding, dilations, output_shape, func)
+    # Only the ciphertext-plaintext kernels have a packed implementation.
+    kwargs = {} if x._is_enc and filt._is_enc else {"packed": packed}
+    extra_scaling_factor = 1
+    if winograd:
+        if x._is_enc or not filt._is_enc:
+            raise ValueError(
+                "Winograd convolution requires a plaintext x and an encrypted filt."
+            )
+        if any(s != 1 for s in strides) or any(d != 1 for d in dilations):
+            raise ValueError(
+                "Winograd convolution requires strides and dilations of 1."
+            )
+        if filt._underlying_dtype not in [tf.float16, tf.float32, tf.float64]:
+            # Integer types are decoded without the scaling factor, which
+            # cannot remove the factor of 4 below.
+            raise ValueError(
+                "Winograd convolution requires a floating point filt. Got "
+                f"{filt._underlying_dtype}."
+            )
+        kwargs["winograd"] = True
+        # The Winograd transforms are scaled to be integral, which multiplies
+        # the output by 4.
+        extra_scaling_factor = 4
+
+    return _conv2d(
+        x,
+        filt,
+        strides,
+        padding,
+        dilations,
+        output_shape,
+        func,
+        extra_scaling_factor=extra_scaling_factor,
+        **kwargs,
+    )
 
 
 def conv2d_transpose(
@@ -1607,10 +1940,61 @@ def conv2d_transpose(
     [batch, in_height, in_width, in_channels].
 
     The order of strides and padding is top, bottom, left, right.
+
+    When filt is a TensorFlow tensor, it may also be a single filter of shape
+    [filter_height, filter_width, out_channels, in_channels] (or have a batch
+    dimension of 1) which is shared by every example in the batch. When x is
+    encrypted, the filter is then multiplied in as plaintext scalars instead of
+    being repeated across the batch and encoded as plaintext polynomials.
     """
 
+    x, filt = _resolve_prepared(x, filt)
+
+    # Check if the filter is shared by every example in the batch.
+    broadcast_filt = isinstance(filt, tf.Tensor) and (
+        filt.shape.rank == 4 or (filt.shape.rank == 5 and filt.shape[0] == 1)
+    )
+    if broadcast_filt:
+        filt = tf.reshape(filt, filt.shape[-4:])
+        if with_channel:
+            # Sliding over the channels dimension has no broadcasting version,
+            # so repeat the filter across the batch.
+            batch_size = (
+                x._context.num_slots if isinstance(x, ShellTensor64) else tf.shape(x)[0]
+            )
+            filt = tf.repeat(tf.expand_dims(filt, 0), batch_size, axis=0)
+            broadcast_filt = False
+
     # Plaintext implementation of tf-shell's conv2d using tensorflow ops.
     if not isinstance(x, ShellTensor64) and not isinstance(filt, ShellTensor64):
+        if broadcast_filt:
+            # The same filter is used for every example, which is exactly what
+            # TensorFlow's conv2d_transpose computes.
+            tf_padding = [
+                [0, 0],
+                [padding[0], padding[1]],  # top, bottom
+                [padding[2], padding[3]],  # left, right
+                [0, 0],
+            ]
+            if output_shape is not None:
+                tf_output_shape = [tf.shape(x)[0]] + list(output_shape[1:])
+            else:
+                tf_output_shape = [
+                    tf.shape(x)[0],
+                    ((x.shape[1] - 1) * strides[1])
+                    + filt.shape[0]
+                    - padding[0]
+                    - padding[1],
+                    ((x.shape[2] - 1) * strides[2])
+                    + filt.shape[1]
+                    - padding[2]
+                    - padding[3],
+                    filt.shape[2],  # Output channel dim.
+                ]
+            return tf.nn.conv2d_transpose(
+                x, filt, tf_output_shape, strides=strides, padding=tf_padding
+            )
+
         # When the number of channels in x and filt are the same, perform
         # element-wise convolution for each x and filt pair in the batch.
         if not with_channel:
@@ -1699,6 +2083,41 @@ def conv2d_transpose(
 
         return res
 
+    if broadcast_filt and x._is_enc:
+        if x._is_fast_rotated:
+            raise ValueError(
+                "A ShellTensor which has been fast-rotated or fast-reduced-summed cannot be an input to conv2d."
+            )
+        # Encode the filter to the context scaling factor, as when multiplying
+        # by a TensorFlow scalar.
+        scalar_filt = _encode_scaling(filt, x._context.scaling_factor)
+        return ShellTensor64(
+            _raw_tensor=shell_ops.conv2d_transpose_ct_tf_scalar64(
+                x._context._get_context_at_level(x._level),
+                x._raw_tensor,
+                scalar_filt,
+                strides,
+                padding,
+                [1, 1, 1, 1],
+                filter_num_elements=filt.shape.num_elements(),
+                output_shape=output_shape,
+            ),
+            _context=x._context,
+            _level=x._level,
+            _num_mod_reductions=x._num_mod_reductions,
+            _underlying_dtype=x._underlying_dtype,
+            _scaling_factor=x._scaling_factor * x._context.scaling_factor,
+            _is_enc=True,
+            _is_fast_rotated=False,
+        )
+    if broadcast_filt:
+        # x is a plaintext ShellTensor, which has no broadcasting version.
+        filt = tf.repeat(tf.expand_dims(filt, 0), x._context.num_slots, axis=0)
+
+    if isinstance(x, PreparedPlaintext):
+        x = x.plaintext(filt._context, filt._num_mod_reductions)
+    if isinstance(filt, PreparedPlaintext):
+        filt = filt.plaintext(x._context, x._num_mod_reductions)
     if not isinstance(x, ShellTensor64):
         x = to_shell_plaintext(x, filt._context)
     if not isinstance(filt, ShellTensor64):
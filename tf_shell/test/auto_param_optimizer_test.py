@@ -1,3 +1,5 @@
+import os
+import tempfile
 import tensorflow as tf
 import tf_shell
 
@@ -221,6 +223,29 @@ def ct_concat(cleartext_a, cleartext_b, use_auto_context=False):
     return result
 
 
+@tf.function
+def ct_conv2d_transpose_broadcast_filter(
+    cleartext_a, cleartext_b, use_auto_context=False
+):
+    # The filter sums at most 7 inputs, which takes 3 extra bits.
+    shell_context = (
+        gen_autocontext(test_values_num_bits + 3, 0)
+        if use_auto_context
+        else gen_context()
+    )
+    key = tf_shell.create_key64(shell_context)
+    a = tf_shell.to_encrypted(
+        tf.reshape(cleartext_a, [cleartext_a.shape[0], 3, 4, 1]), key, shell_context
+    )
+    # A single filter shared by every example in the batch.
+    filt = tf.constant([[[[1]], [[2]]], [[[3]], [[1]]]], dtype=tf.uint64)
+
+    intermediate = tf_shell.conv2d_transpose(a, filt)
+
+    result = tf_shell.to_tensorflow(intermediate, key)
+    return tf.reshape(result, [result.shape[0], -1])
+
+
 @tf.function
 def multi_context(cleartext_a, cleartext_b, use_auto_context=False):
     shell_context1 = (
@@ -260,7 +285,7 @@ def count_ops(graph, op_name):
 
 class TestAutoParamOptimizer(tf.test.TestCase):
 
-    def _test_func(self, tf_func, num_autocontexts=1):
+    def _test_func(self, tf_func, num_autocontexts=1, auto_mod_reduce=False):
         shape = [100, 12]
         a = tf.random.uniform(
             shape,
@@ -288,7 +313,7 @@ class TestAutoParamOptimizer(tf.test.TestCase):
 
         # Optimize the graph using tf_shells HE-specific optimizers.
         optimized_func = tf_shell.optimize_shell_graph(
-            func, ["ModuliAutotuneOptimizer"]
+            func, ["ModuliAutotuneOptimizer"], auto_mod_reduce=auto_mod_reduce
         )
 
         # print("\noptimized graph:")
@@ -334,6 +359,7 @@ class TestAutoParamOptimizer(tf.test.TestCase):
             c = pad_first_dim(c, max_fist_dim)
 
         self.assertAllEqual(c, eager_c)
+        return optimized_func
 
     def test_func(self):
         with self.subTest(f"Optimizer for func ct_ct_add."):
@@ -372,9 +398,45 @@ class TestAutoParamOptimizer(tf.test.TestCase):
         with self.subTest(f"Optimizer for concat."):
             self._test_func(ct_concat)
 
+        with self.subTest(f"Optimizer for conv2d_transpose with a broadcast filter."):
+            self._test_func(ct_conv2d_transpose_broadcast_filter)
+
         with self.subTest(f"Optimizer for multi context."):
             self._test_func(multi_context, num_autocontexts=2)
 
+    def test_func_auto_mod_reduce(self):
+        # Modulus reductions inserted by the optimizer must not change the
+        # decrypted values.
+        for name, tf_func in [
+            ("ct_ct_mul", ct_ct_mul),
+            ("ct_pt_mul", ct_pt_mul),
+            ("long_arith", long_arith),
+            ("long_arith_with_scaling", long_arith_with_scaling),
+        ]:
+            with self.subTest(f"Auto modulus reduction for {name}."):
+                optimized_func = self._test_func(tf_func, auto_mod_reduce=True)
+                self.assertGreater(
+                    count_ops(optimized_func.graph, "ModulusReduceCt64"), 0
+                )
+
+                # The estimated savings are reported in the pass statistics.
+                savings = [
+                    r
+                    for s in optimized_func.shell_optimizer_stats
+                    for r in s["details"].get("mod_reductions", [])
+                ]
+                self.assertLen(savings, 1)
+                self.assertGreater(savings[0]["saved_limb_ops"], 0)
+                self.assertLessEqual(
+                    savings[0]["saved_limb_ops"], savings[0]["total_limb_ops"]
+                )
+
+        with self.subTest(f"Auto modulus reduction for multi context."):
+            optimized_func = self._test_func(
+                multi_context, num_autocontexts=2, auto_mod_reduce=True
+            )
+            self.assertGreater(count_ops(optimized_func.graph, "ModulusReduceCt64"), 0)
+
 
 class TestAutoParamEnableOptimizer(tf.test.TestCase):
     def test_func(self):
@@ -400,5 +462,158 @@ class TestAutoParamEnableOptimizer(tf.test.TestCase):
         self.assertNotEqual(c.shape, shape)
 
 
+class TestAutoParamCache(tf.test.TestCase):
+    def test_cache(self):
+        shape = [100, 12]
+        a = tf.random.uniform(
+            shape, dtype=tf.int64, minval=0, maxval=2**test_values_num_bits - 1
+        )
+        a = tf.cast(a, tf.uint64)
+        func = ct_ct_mul.get_concrete_function(a, a, True)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, "autotune_params")
+
+            tf_shell.optimize_shell_graph(
+                func, ["ModuliAutotuneOptimizer"], autotune_cache_path=cache_path
+            )
+            with open(cache_path) as f:
+                entries = f.readlines()
+            self.assertNotEmpty(entries)
+
+            # Optimizing again finds every parameter set in the cache, so no
+            # new entries are persisted.
+            optimized_func = tf_shell.optimize_shell_graph(
+                func, ["ModuliAutotuneOptimizer"], autotune_cache_path=cache_path
+            )
+            with open(cache_path) as f:
+                self.assertEqual(f.readlines(), entries)
+
+            c = optimized_func(a, a, True)
+            c = optimized_func.function_type.pack_output(c)
+            self.assertAllEqual(c[: shape[0]], ct_ct_mul(a, a, False)[: shape[0]])
+
+
+class TestAutoParamCostModel(tf.test.TestCase):
+    def test_cost_model(self):
+        with tempfile.TemporaryDirectory() as cost_dir:
+            cost_model_path = os.path.join(cost_dir, "cost_model")
+            costs = tf_shell.benchmark_cost_model(
+                cost_model_path,
+                log_ns=[10, 11],
+                max_num_moduli=2,
+                num_ciphertexts=2,
+                iterations=1,
+            )
+            self.assertIn((11, 2, "mul_ct_ct"), costs)
+            self.assertNotIn((10, 1, "modulus_reduce"), costs)
+            with open(cost_model_path) as f:
+                entries = [l for l in f.readlines() if not l.startswith("#")]
+            self.assertLen(entries, len(costs))
+
+            # Parameters chosen by cost must still satisfy the noise budget.
+            shape = [100, 12]
+            a = tf.random.uniform(
+                shape, dtype=tf.int64, minval=0, maxval=2**test_values_num_bits - 1
+            )
+            a = tf.cast(a, tf.uint64)
+            func = ct_ct_mul.get_concrete_function(a, a, True)
+            optimized_func = tf_shell.optimize_shell_graph(
+                func,
+                ["ModuliAutotuneOptimizer"],
+                autotune_cost_model_path=cost_model_path,
+            )
+            c = optimized_func(a, a, True)
+            c = optimized_func.function_type.pack_output(c)
+            self.assertAllEqual(c[: shape[0]], ct_ct_mul(a, a, False)[: shape[0]])
+
+
+class TestAutotuneShellParams(tf.test.TestCase):
+    def test_params(self):
+        shape = [100, 12]
+        a = tf.random.uniform(
+            shape, dtype=tf.int64, minval=0, maxval=2**test_values_num_bits - 1
+        )
+        a = tf.cast(a, tf.uint64)
+        func = ct_ct_mul.get_concrete_function(a, a, True)
+
+        params = tf_shell.autotune_shell_params(func, ["ModuliAutotuneOptimizer"])
+        self.assertIsNotNone(params)
+        self.assertNotEmpty(params["main_moduli"])
+
+        # The parameters match those of the fully optimized function, whose
+        # output is padded to the number of slots.
+        optimized_func = tf_shell.optimize_shell_graph(
+            func, ["ModuliAutotuneOptimizer"]
+        )
+        c = optimized_func(a, a, True)
+        c = optimized_func.function_type.pack_output(c)
+        self.assertEqual(c.shape[0], 2 ** params["log_n"])
+
+        # Without an autocontext there is nothing to autotune.
+        func = ct_ct_mul.get_concrete_function(a, a, False)
+        self.assertIsNone(
+            tf_shell.autotune_shell_params(func, ["ModuliAutotuneOptimizer"])
+        )
+
+
+class TestOptimizerStats(tf.test.TestCase):
+    def test_autocontext_stats(self):
+        shape = [100, 12]
+        a = tf.random.uniform(
+            shape, dtype=tf.int64, minval=0, maxval=2**test_values_num_bits - 1
+        )
+        a = tf.cast(a, tf.uint64)
+        func = ct_ct_mul.get_concrete_function(a, a, True)
+        optimized_func = tf_shell.optimize_shell_graph(
+            func, ["ModuliAutotuneOptimizer"]
+        )
+
+        stats = [
+            s
+            for s in optimized_func.shell_optimizer_stats
+            if s["pass"] == "ModuliAutotuneOptimizer" and s["nodes_matched"] > 0
+        ]
+        self.assertLen(stats, 1)
+        self.assertGreaterEqual(stats[0]["wall_time_us"], 0)
+        self.assertGreater(stats[0]["nodes_rewritten"], 0)
+
+        # The chosen parameters and the noise estimates are reported.
+        autocontexts = stats[0]["details"]["autocontexts"]
+        self.assertLen(autocontexts, 1)
+        self.assertNotEmpty(autocontexts[0]["qs"])
+        self.assertNotEmpty(autocontexts[0]["noise_bits"])
+        self.assertGreaterEqual(
+            max(autocontexts[0]["noise_bits"].values()),
+            autocontexts[0]["log_max_noise"],
+        )
+
+        # The statistics were taken by optimize_shell_graph.
+        self.assertEmpty(tf_shell.take_optimizer_stats())
+
+    def test_other_runs_stats_kept(self):
+        shape = [100, 12]
+        a = tf.random.uniform(
+            shape, dtype=tf.int64, minval=0, maxval=2**test_values_num_bits - 1
+        )
+        a = tf.cast(a, tf.uint64)
+        func = ct_ct_mul.get_concrete_function(a, a, True)
+        tf_shell.take_optimizer_stats()
+
+        # The statistics of another run, e.g. of a function run with
+        # enable_optimization, are not lost when optimizing a graph.
+        tf_shell.autotune_shell_params(func, ["ModuliAutotuneOptimizer"])
+        optimized_func = tf_shell.optimize_shell_graph(
+            func, ["ModuliAutotuneOptimizer"]
+        )
+
+        other_stats = tf_shell.take_optimizer_stats()
+        self.assertNotEmpty(other_stats)
+        own_graphs = {s["graph"] for s in optimized_func.shell_optimizer_stats}
+        for s in other_stats:
+            self.assertNotIn(s["graph"], own_graphs)
+        self.assertEmpty(tf_shell.take_optimizer_stats())
+
+
 if __name__ == "__main__":
     tf.test.main()
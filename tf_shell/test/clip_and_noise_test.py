@@ -70,13 +70,17 @@ class TestClipAndNoise(tf.test.TestCase):
             )
         )
 
-    def _test_clip_and_noise(self, test_context):
+    def _max_grad(self, test_context):
+        # The maximum value of all elements which will not overflow when
+        # computing the L2 norm squared of the flattened gradient.
+        max_val = 2 ** (test_context.num_bits - 1) - 1
+        return math.floor(math.sqrt(max_val) / test_context.num_bits)
+
+    def _make_inputs(self, test_context):
         min_val = -(2 ** (test_context.num_bits - 1))
         max_val = 2 ** (test_context.num_bits - 1) - 1
 
-        # The maximum value of all elements which will not overflow when
-        # computing the L2 norm squared of the flattened gradient.
-        max_grad = math.floor(math.sqrt(max_val) / test_context.num_bits)
+        max_grad = self._max_grad(test_context)
         min_grad = -max_grad
         self.assertGreater(max_grad, 0)
 
@@ -109,6 +113,21 @@ class TestClipAndNoise(tf.test.TestCase):
         )
         c = tf.constant(512, dtype=test_context.dtype)
 
+        if tf.reduce_sum(g * g) > c:
+            correct = c + n
+        else:
+            correct = g + n
+
+        # Emulate overflow of 2's complement addition between `Bitwidth`
+        # integers from when g + n is computed. Any overflow in the masking /
+        # unmasking from g + r - r will cancel out.
+        correct = tf.where(correct > max_val, min_val + (correct - max_val), correct)
+
+        return g, r, n, c, correct
+
+    def _test_clip_and_noise(self, test_context, **op_kwargs):
+        g, r, n, c, correct = self._make_inputs(test_context)
+
         # Run the labels party in a separate process. Note EMP requires each
         # party to be run in a separate process.
         pid = os.fork()
@@ -120,6 +139,7 @@ class TestClipAndNoise(tf.test.TestCase):
                 Bitwidth=test_context.num_bits,
                 StartPort=5555,
                 FeaturePartyHost="127.0.0.1",
+                **op_kwargs,
             )
             os._exit(0)
         else:  # parent process
@@ -128,19 +148,10 @@ class TestClipAndNoise(tf.test.TestCase):
                 Bitwidth=test_context.num_bits,
                 StartPort=5555,
                 LabelPartyHost="127.0.0.1",
+                **op_kwargs,
             )
             os.waitpid(pid, 0)  # Wait for child process to finish.
 
-        if tf.reduce_sum(g * g) > c:
-            correct = c + n
-        else:
-            correct = g + n
-
-        # Emulate overflow of 2's complement addition between `Bitwidth`
-        # integers from when g + n is computed. Any overflow in the masking /
-        # unmasking from g + r - r will cancel out.
-        correct = tf.where(correct > max_val, min_val + (correct - max_val), correct)
-
         self.assertAllEqual(clipped_noised_grad, correct)
 
     def test_clip_and_noise(self):
@@ -148,6 +159,173 @@ class TestClipAndNoise(tf.test.TestCase):
             with self.subTest(f"{self._testMethodName} with context `{test_context}`."):
                 self._test_clip_and_noise(test_context)
 
+    def test_clip_and_noise_reduced_grad_bitwidth(self):
+        for test_context in self.test_contexts:
+            # The gradients are sampled in [-max_grad, max_grad], which fits
+            # in max_grad's bits plus a sign bit (two's complement). The
+            # squares then fit in fewer bits than Bitwidth.
+            grad_bitwidth = self._max_grad(test_context).bit_length() + 1
+            self.assertLess(2 * grad_bitwidth, test_context.num_bits)
+            with self.subTest(
+                f"{self._testMethodName} with context `{test_context}` and grad_bitwidth {grad_bitwidth}."
+            ):
+                self._test_clip_and_noise(test_context, GradBitwidth=grad_bitwidth)
+
+    def test_clip_and_noise_grad_bitwidth_overflow(self):
+        # A gradient element which does not fit in GradBitwidth bits must not
+        # be silently truncated. The squared norm is small, but the overflow
+        # forces the gradient to be clipped.
+        test_context = ClipAndNoiseTestContext(
+            shape=[2, 3], dtype=tf.int64, num_bits=37
+        )
+        grad_bitwidth = 4
+        g, r, n, c, _ = self._make_inputs(test_context)
+        g = tf.tensor_scatter_nd_update(
+            tf.zeros_like(g),
+            [[0, 0]],
+            tf.constant([2 ** (grad_bitwidth - 1)], dtype=g.dtype),
+        )
+        self.assertLess(tf.reduce_sum(g * g), c)
+        correct = c + n
+
+        pid = os.fork()
+        if pid == 0:  # child process
+            tf_shell.clip_and_noise_labels_party(
+                g + r,
+                c,
+                n,
+                Bitwidth=test_context.num_bits,
+                StartPort=5557,
+                FeaturePartyHost="127.0.0.1",
+                GradBitwidth=grad_bitwidth,
+            )
+            os._exit(0)
+        else:  # parent process
+            clipped_noised_grad = tf_shell.clip_and_noise_features_party(
+                r,
+                Bitwidth=test_context.num_bits,
+                StartPort=5557,
+                LabelPartyHost="127.0.0.1",
+                GradBitwidth=grad_bitwidth,
+            )
+            os.waitpid(pid, 0)  # Wait for child process to finish.
+
+        self.assertAllEqual(clipped_noised_grad, correct)
+
+    def test_clip_and_noise_mismatched_params(self):
+        # Both parties must abort when their circuit parameters differ.
+        test_context = ClipAndNoiseTestContext(
+            shape=[2, 3], dtype=tf.int64, num_bits=37
+        )
+        g, r, n, c, _ = self._make_inputs(test_context)
+
+        pid = os.fork()
+        if pid == 0:  # child process
+            try:
+                tf_shell.clip_and_noise_labels_party(
+                    g + r,
+                    c,
+                    n,
+                    Bitwidth=test_context.num_bits,
+                    StartPort=5558,
+                    FeaturePartyHost="127.0.0.1",
+                    GradBitwidth=8,
+                )
+            except tf.errors.InvalidArgumentError:
+                os._exit(0)
+            os._exit(1)
+        else:  # parent process
+            with self.assertRaises(tf.errors.InvalidArgumentError):
+                tf_shell.clip_and_noise_features_party(
+                    r,
+                    Bitwidth=test_context.num_bits,
+                    StartPort=5558,
+                    LabelPartyHost="127.0.0.1",
+                )
+            _, status = os.waitpid(pid, 0)  # Wait for child process to finish.
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+    def test_clip_and_noise_reuse_connection(self):
+        # Run several steps over one persistent connection, processing the
+        # gradient in windows smaller than the gradient itself.
+        test_context = ClipAndNoiseTestContext(
+            shape=[4, 5, 6], dtype=tf.int64, num_bits=37
+        )
+        num_steps = 3
+        steps = [self._make_inputs(test_context) for _ in range(num_steps)]
+
+        pid = os.fork()
+        if pid == 0:  # child process
+            for g, r, n, c, _ in steps:
+                tf_shell.clip_and_noise_labels_party(
+                    g + r,
+                    c,
+                    n,
+                    Bitwidth=test_context.num_bits,
+                    StartPort=5556,
+                    FeaturePartyHost="127.0.0.1",
+                    ReuseConnection=True,
+                    WindowSize=7,
+                )
+            os._exit(0)
+        else:  # parent process
+            results = []
+            for _, r, _, _, _ in steps:
+                results.append(
+                    tf_shell.clip_and_noise_features_party(
+                        r,
+                        Bitwidth=test_context.num_bits,
+                        StartPort=5556,
+                        LabelPartyHost="127.0.0.1",
+                        ReuseConnection=True,
+                        WindowSize=7,
+                    )
+                )
+            os.waitpid(pid, 0)  # Wait for child process to finish.
+
+        for res, (_, _, _, _, correct) in zip(results, steps):
+            self.assertAllEqual(res, correct)
+
+    def test_clip_and_noise_evict_connection(self):
+        # Use more persistent connections than are cached, then revisit the
+        # first, which both parties have closed and must reconnect.
+        test_context = ClipAndNoiseTestContext(
+            shape=[2, 3], dtype=tf.int64, num_bits=37
+        )
+        ports = list(range(5560, 5569)) + [5560]
+        steps = [self._make_inputs(test_context) for _ in ports]
+
+        pid = os.fork()
+        if pid == 0:  # child process
+            for port, (g, r, n, c, _) in zip(ports, steps):
+                tf_shell.clip_and_noise_labels_party(
+                    g + r,
+                    c,
+                    n,
+                    Bitwidth=test_context.num_bits,
+                    StartPort=port,
+                    FeaturePartyHost="127.0.0.1",
+                    ReuseConnection=True,
+                )
+            os._exit(0)
+        else:  # parent process
+            results = []
+            for port, (_, r, _, _, _) in zip(ports, steps):
+                results.append(
+                    tf_shell.clip_and_noise_features_party(
+                        r,
+                        Bitwidth=test_context.num_bits,
+                        StartPort=port,
+                        LabelPartyHost="127.0.0.1",
+                        ReuseConnection=True,
+                    )
+                )
+            os.waitpid(pid, 0)  # Wait for child process to finish.
+
+        for res, (_, _, _, _, correct) in zip(results, steps):
+            self.assertAllEqual(res, correct)
+
 
 if __name__ == "__main__":
     tf.test.main()
@@ -143,6 +143,145 @@ class TestConv2d(tf.test.TestCase):
             with self.subTest(f"{self._testMethodName} with config `{c}`."):
                 self._test_conv2d_pt_ct(c[0], c[1], c[2], c[3], c[4], c[5], c[6], True)
 
+    def _test_conv2d_packed(
+        self, test_context, im_shape, filter_shape, stride, padding, dilations
+    ):
+        im_shape = [test_context.shell_context.num_slots] + im_shape
+        filter_shape = [test_context.shell_context.num_slots] + filter_shape
+
+        im = tf.random.uniform(im_shape, minval=0, maxval=3, dtype=tf.int64)
+        im = tf.cast(im, tf.float32)
+        filt = tf.random.uniform(filter_shape, minval=0, maxval=10, dtype=tf.int64)
+        filt = tf.cast(filt, tf.float32)
+        check = tf_shell.conv2d(im, filt, stride, padding, dilations)
+
+        # Encrypt the image, then the filter.
+        e_im = tf_shell.to_encrypted(im, test_context.key, test_context.shell_context)
+        e_filt = tf_shell.to_encrypted(
+            filt, test_context.key, test_context.shell_context
+        )
+        for x, f in [(e_im, filt), (im, e_filt)]:
+            for packed in [True, False]:
+                e_out = tf_shell.conv2d(x, f, stride, padding, dilations, packed=packed)
+                out = tf_shell.to_tensorflow(e_out, test_context.key)
+                self.assertAllClose(out, check, atol=1e-3)
+
+    def test_conv2d_packed(self):
+        test_configs = [
+            # fmt: off
+            # Context,          im_shape,    filter_shape, stride,       padding,      dilation
+            (self.test_context, [9, 9, 1],   [3, 3, 1, 1], [1, 1, 1, 1], [2, 2, 2, 2], [1,1,1,1]),
+            (self.test_context, [12, 12, 1], [4, 4, 1, 8], [1, 2, 2, 1], [0, 0, 0, 0], [1,1,1,1]),
+            (self.test_context, [13, 13, 3], [5, 5, 3, 2], [1, 2, 2, 1], [1, 1, 1, 1], [1,2,2,1]),
+            # fmt: on
+        ]
+        for c in test_configs:
+            with self.subTest(f"{self._testMethodName} with config `{c}`."):
+                self._test_conv2d_packed(c[0], c[1], c[2], c[3], c[4], c[5])
+
+    def _test_conv2d_winograd(
+        self, test_context, im_shape, filter_shape, padding, with_channel
+    ):
+        im_shape = [test_context.shell_context.num_slots] + im_shape
+        filter_shape = [test_context.shell_context.num_slots] + filter_shape
+        stride = [1, 1, 1, 1]
+        dilations = [1, 1, 1, 1]
+
+        im = tf.random.uniform(im_shape, minval=0, maxval=3, dtype=tf.int64)
+        filt = tf.random.uniform(filter_shape, minval=0, maxval=10, dtype=tf.int64)
+
+        # The extra scaling factor of Winograd convolution cannot be decoded
+        # from integer types.
+        e_int_filt = tf_shell.to_encrypted(
+            filt, test_context.key, test_context.shell_context
+        )
+        with self.assertRaises(ValueError):
+            tf_shell.conv2d(
+                im, e_int_filt, stride, padding, dilations, with_channel, winograd=True
+            )
+
+        im = tf.cast(im, tf.float32)
+        filt = tf.cast(filt, tf.float32)
+        e_filt = tf_shell.to_encrypted(
+            filt, test_context.key, test_context.shell_context
+        )
+        e_out = tf_shell.conv2d(
+            im, e_filt, stride, padding, dilations, with_channel, winograd=True
+        )
+        out = tf_shell.to_tensorflow(e_out, test_context.key)
+
+        check = tf_shell.conv2d(im, filt, stride, padding, dilations, with_channel)
+        self.assertAllClose(out, check, atol=1e-3)
+
+    def test_conv2d_winograd(self):
+        test_configs = [
+            # fmt: off
+            # Context,          im_shape,    filter_shape, padding,      with_channel
+            # The output is exactly one 3x3 tile.
+            (self.test_context, [5, 5, 1],   [3, 3, 1, 1], [0, 0, 0, 0], False),
+            # Partial output tiles and filter chunks.
+            (self.test_context, [9, 9, 1],   [3, 3, 1, 1], [1, 1, 1, 1], False),
+            (self.test_context, [8, 7, 2],   [4, 5, 2, 3], [0, 0, 0, 0], False),
+            (self.test_context, [12, 12, 3], [6, 6, 3, 2], [2, 1, 0, 2], False),
+            # A weight gradient, where the ciphertext filter is larger than
+            # the output.
+            (self.test_context, [12, 12, 1], [9, 9, 1, 4], [0, 0, 0, 0], True),
+            (self.test_context, [13, 13, 3], [5, 5, 1, 2], [1, 1, 1, 1], True),
+            # fmt: on
+        ]
+        for c in test_configs:
+            with self.subTest(f"{self._testMethodName} with config `{c}`."):
+                self._test_conv2d_winograd(c[0], c[1], c[2], c[3], c[4])
+
+        with self.assertRaises(ValueError):
+            tf_shell.conv2d(
+                tf.ones([self.test_context.shell_context.num_slots, 5, 5, 1]),
+                tf_shell.to_encrypted(
+                    tf.ones([self.test_context.shell_context.num_slots, 3, 3, 1, 1]),
+                    self.test_context.key,
+                    self.test_context.shell_context,
+                ),
+                strides=[1, 2, 2, 1],
+                winograd=True,
+            )
+
+    def _test_conv2d_transpose_broadcast_filter(
+        self, test_context, im_shape, filter_shape, stride, padding
+    ):
+        num_slots = test_context.shell_context.num_slots
+        im_shape = [num_slots] + im_shape
+
+        im = tf.random.uniform(im_shape, minval=0, maxval=3, dtype=tf.int64)
+        im = tf.cast(im, tf.float32)
+        filt = tf.random.uniform(filter_shape, minval=-5, maxval=5, dtype=tf.int64)
+        filt = tf.cast(filt, tf.float32)
+
+        # The broadcast filter must match repeating it across the batch.
+        repeated_filt = tf.repeat(tf.expand_dims(filt, 0), num_slots, axis=0)
+        check = tf_shell.conv2d_transpose(im, repeated_filt, stride, padding)
+        self.assertAllClose(tf_shell.conv2d_transpose(im, filt, stride, padding), check)
+
+        e_im = tf_shell.to_encrypted(im, test_context.key, test_context.shell_context)
+        for f in [filt, tf.expand_dims(filt, 0)]:
+            e_out = tf_shell.conv2d_transpose(e_im, f, stride, padding)
+            out = tf_shell.to_tensorflow(e_out, test_context.key)
+            self.assertAllClose(out, check, atol=1e-3)
+
+    def test_conv2d_transpose_broadcast_filter(self):
+        test_configs = [
+            # fmt: off
+            # Context,          im_shape,  filter_shape, stride,       padding
+            (self.test_context, [3, 3, 1], [2, 2, 1, 1], [1, 1, 1, 1], [0, 0, 0, 0]),
+            (self.test_context, [2, 2, 3], [2, 2, 4, 3], [1, 1, 1, 1], [1, 1, 1, 1]),
+            (self.test_context, [4, 4, 3], [4, 4, 1, 3], [1, 3, 3, 1], [2, 2, 2, 2]),
+            # fmt: on
+        ]
+        for c in test_configs:
+            with self.subTest(f"{self._testMethodName} with config `{c}`."):
+                self._test_conv2d_transpose_broadcast_filter(
+                    c[0], c[1], c[2], c[3], c[4]
+                )
+
 
 if __name__ == "__main__":
     tf.test.main()
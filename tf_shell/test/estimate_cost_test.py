@@ -0,0 +1,142 @@
+import tensorflow as tf
+import tf_shell
+import test_utils
+from tensorflow.python.framework import op_def_registry
+from tf_shell.python import shell_cost_model
+from tf_shell.python import shell_ops
+
+log_n = 11
+main_moduli = [8556589057, 8388812801]
+plaintext_modulus = 40961
+
+
+@tf.function
+def encrypted_step(a):
+    context = tf_shell.create_context64(
+        log_n=log_n, main_moduli=main_moduli, plaintext_modulus=plaintext_modulus
+    )
+    key = tf_shell.create_key64(context)
+    ct = tf_shell.to_encrypted(a, key, context)
+    ct = tf_shell.mod_reduce_tensor64(ct)
+    return tf_shell.to_tensorflow(ct + ct, key)
+
+
+@tf.function
+def encrypted_step_with_args(a, shell_context, key):
+    ct = tf_shell.to_encrypted(a, key, shell_context)
+    return tf_shell.to_tensorflow(ct + ct, key)
+
+
+class TestEstimateCost(tf.test.TestCase):
+    def test_counts(self):
+        a = tf.ones([2**log_n, 3], dtype=tf.int64)
+        func = encrypted_step.get_concrete_function(a)
+        cost = tf_shell.estimate_cost(func)
+
+        self.assertEqual(cost["log_n"], log_n)
+        self.assertEqual(cost["num_moduli"], len(main_moduli))
+        self.assertEqual(cost["ops"][("Encrypt64", 2)]["ciphertexts"], 3)
+        self.assertEqual(cost["ops"][("ModulusReduceCt64", 2)]["nodes"], 1)
+        # The addition happens after the modulus reduction.
+        self.assertEqual(cost["ops"][("AddCtCt64", 1)]["ciphertexts"], 3)
+        self.assertEqual(cost["cost_by_op"]["decrypt"]["count"], 3)
+        self.assertEqual(cost["unknown_shapes"], 0)
+
+        # At least the encrypted input, with two polynomials per ciphertext, is
+        # alive at once.
+        self.assertGreaterEqual(
+            cost["peak_ciphertext_bytes"], 3 * 2 * 2**log_n * len(main_moduli) * 8
+        )
+        self.assertEqual(cost["cross_device_bytes"], 0)
+
+        # Without a cost model, only the counts are estimated.
+        self.assertIsNone(cost["step_ns"])
+
+    def test_step_time(self):
+        a = tf.ones([2**log_n, 3], dtype=tf.int64)
+        func = encrypted_step.get_concrete_function(a)
+        cost_model = {
+            (log_n, num_moduli, op): 1000.0 * num_moduli
+            for num_moduli in [1, 2]
+            for op in ["encrypt", "decrypt", "add", "modulus_reduce"]
+        }
+        cost = tf_shell.estimate_cost(func, cost_model)
+
+        self.assertAllClose(cost["cost_by_op"]["encrypt"]["ns"], 3 * 2000.0)
+        self.assertAllClose(cost["cost_by_op"]["add"]["ns"], 3 * 1000.0)
+        self.assertAllClose(
+            cost["step_ns"], sum(op["ns"] for op in cost["cost_by_op"].values())
+        )
+        self.assertAllClose(cost["example_ns"], cost["step_ns"] / 2**log_n)
+
+    def test_context_argument(self):
+        test_context = test_utils.TestContext(
+            outer_shape=[3],
+            plaintext_dtype=tf.int32,
+            log_n=log_n,
+            main_moduli=main_moduli,
+            aux_moduli=[],
+            plaintext_modulus=plaintext_modulus,
+            scaling_factor=1,
+        )
+        a = tf.ones([2**log_n, 3], dtype=tf.int32)
+        func = encrypted_step_with_args.get_concrete_function(
+            a, test_context.shell_context, test_context.key
+        )
+
+        # The parameters of a context passed as an argument are not known.
+        with self.assertRaises(ValueError):
+            tf_shell.estimate_cost(func)
+
+        cost = tf_shell.estimate_cost(func, log_n=log_n, num_moduli=2)
+        self.assertEqual(cost["ops"][("AddCtCt64", 2)]["ciphertexts"], 3)
+
+    def test_registered_ops_covered(self):
+        # The op tables of estimate_cost are kept by hand in sync with the
+        # ModuliAutotuneOptimizer. Every registered op must be classified, so a
+        # new ciphertext op is not silently counted as free.
+        untracked_ops = {
+            # Contexts, keys, and optimizer and profiler state.
+            "ContextImport64",
+            "AutoShellContext64",
+            "TakeAutotunedParams64",
+            "TakeShellOptimizerStats64",
+            "EnableShellProfiling64",
+            "TakeShellProfile64",
+            "KeyGen64",
+            "RotationKeyGen64",
+            "FastRotationKeyGen64",
+            "ModulusReduceContext64",
+            "ModulusReduceKey64",
+            # Ops on TensorFlow tensors.
+            "PolynomialExport64",
+            "ReduceSumWithModulusPt64",
+            "ClipAndNoiseFeaturesParty",
+            "ClipAndNoiseLabelsParty",
+            "SampleCenteredGaussianF64",
+            "SampleCenteredGaussianL64",
+            # Reshapes the input, which keeps its level.
+            "ExpandDimsVariant",
+        }
+        registered_ops = {
+            name
+            for name in dir(shell_ops.shell_ops)
+            if name[:1].isupper() and op_def_registry.get(name) is not None
+        }
+        self.assertNotEmpty(registered_ops)
+
+        tables = [
+            shell_cost_model._ciphertext_ops,
+            shell_cost_model._plaintext_ops,
+            shell_cost_model._decrypt_ops,
+            untracked_ops,
+        ]
+        for name in registered_ops:
+            with self.subTest(name):
+                self.assertEqual(sum(name in table for table in tables), 1)
+        for table in tables:
+            self.assertEmpty(table - registered_ops)
+
+
+if __name__ == "__main__":
+    tf.test.main()
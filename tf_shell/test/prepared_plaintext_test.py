@@ -0,0 +1,143 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import tensorflow as tf
+import tf_shell
+import test_utils
+
+
+class TestPreparedPlaintext(tf.test.TestCase):
+    test_context = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_context = test_utils.TestContext(
+            outer_shape=[3, 2, 3],
+            plaintext_dtype=tf.int64,
+            # Num plaintext bits: 22, noise bits: 64
+            # Max representable value: 65728
+            log_n=11,
+            main_moduli=[144115188076060673, 268460033],
+            aux_moduli=[],
+            plaintext_modulus=4206593,
+            scaling_factor=1,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.test_context = None
+
+    def _uniform(self, shape):
+        return tf.random.uniform(shape, minval=-8, maxval=8, dtype=tf.int64)
+
+    def test_matmul(self):
+        context = self.test_context.shell_context
+        key = self.test_context.key
+        a = self._uniform([context.num_slots, 5])
+        b = tf.Variable(self._uniform([5, 7]))
+        ea = tf_shell.to_encrypted(a, key, context)
+        pb = tf_shell.PreparedPlaintext(b)
+
+        for _ in range(2):
+            ec = tf_shell.matmul(ea, pb)
+            self.assertAllEqual(tf_shell.to_tensorflow(ec, key), tf.matmul(a, b))
+        self.assertLen(pb._cache, 1)
+
+        # invalidate() drops the encodings.
+        pb.invalidate()
+        self.assertEqual(pb.version, 1)
+        self.assertEmpty(pb._cache)
+        ec = tf_shell.matmul(ea, pb)
+        self.assertAllEqual(tf_shell.to_tensorflow(ec, key), tf.matmul(a, b))
+
+    def test_variable_assignment(self):
+        context = self.test_context.shell_context
+        key = self.test_context.key
+        a = self._uniform([context.num_slots, 5])
+        b = tf.Variable(self._uniform([5, 7]))
+        ea = tf_shell.to_encrypted(a, key, context)
+        pb = tf_shell.PreparedPlaintext(b)
+
+        @tf.function
+        def matmul_fn(ea):
+            return tf_shell.matmul(ea, pb)
+
+        for _ in range(2):
+            # The encoding made before the assignment is not reused, eagerly or
+            # in a tf.function traced before the assignment.
+            ec = tf_shell.matmul(ea, pb)
+            self.assertAllEqual(tf_shell.to_tensorflow(ec, key), tf.matmul(a, b))
+            ec = matmul_fn(ea)
+            self.assertAllEqual(tf_shell.to_tensorflow(ec, key), tf.matmul(a, b))
+            self.assertLen(pb._cache, 1)
+            b.assign(b + 1)
+
+        # Assignments in a tf.function are tracked too.
+        @tf.function
+        def assign_fn():
+            b.assign_add(tf.ones_like(b))
+
+        assign_fn()
+        ec = tf_shell.matmul(ea, pb)
+        self.assertAllEqual(tf_shell.to_tensorflow(ec, key), tf.matmul(a, b))
+
+    def test_transform(self):
+        context = self.test_context.shell_context
+        key = self.test_context.key
+        a = self._uniform([context.num_slots, 5])
+        b = tf.Variable(self._uniform([5, 7]))
+        ea = tf_shell.to_encrypted(a, key, context)
+        pb = tf_shell.PreparedPlaintext(b, transform=lambda b: b * 2)
+        self.assertEqual(pb.shape, [5, 7])
+
+        for _ in range(2):
+            ec = tf_shell.matmul(ea, pb)
+            self.assertAllEqual(tf_shell.to_tensorflow(ec, key), tf.matmul(a, b * 2))
+            b.assign(b - 1)
+
+    def test_mul_and_add(self):
+        context = self.test_context.shell_context
+        key = self.test_context.key
+        a = self._uniform([context.num_slots, 3])
+        b = self._uniform([context.num_slots, 3])
+        ea = tf_shell.to_encrypted(a, key, context)
+        pb = tf_shell.PreparedPlaintext(b)
+
+        self.assertAllEqual(tf_shell.to_tensorflow(ea * pb, key), a * b)
+        self.assertAllEqual(tf_shell.to_tensorflow(ea + pb, key), a + b)
+        self.assertAllEqual(tf_shell.to_tensorflow(ea - pb, key), a - b)
+        self.assertAllEqual(tf_shell.to_tensorflow(pb - ea, key), b - a)
+
+        # The plaintext is encoded at the ciphertext's level.
+        reduced_ea = tf_shell.mod_reduce_tensor64(ea)
+        self.assertAllEqual(tf_shell.to_tensorflow(reduced_ea * pb, key), a * b)
+        self.assertLen(pb._cache, 2)
+
+    def test_conv2d(self):
+        context = self.test_context.shell_context
+        key = self.test_context.key
+        # The plaintext conv2d used for the check only supports floats.
+        im = tf.cast(self._uniform([context.num_slots, 5, 5, 2]), tf.float32)
+        filt = tf.cast(self._uniform([context.num_slots, 2, 2, 2, 3]), tf.float32)
+        eim = tf_shell.to_encrypted(im, key, context)
+        pfilt = tf_shell.PreparedPlaintext(filt)
+
+        expected = tf_shell.conv2d(im, filt)
+        for _ in range(2):
+            out = tf_shell.conv2d(eim, pfilt)
+            self.assertAllClose(tf_shell.to_tensorflow(out, key), expected)
+        self.assertLen(pfilt._cache, 1)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,68 @@
+import tensorflow as tf
+import tf_shell
+import test_utils
+
+
+class TestProfiler(tf.test.TestCase):
+    test_contexts = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_contexts = []
+
+        cls.test_contexts.append(
+            test_utils.TestContext(
+                outer_shape=[3],
+                plaintext_dtype=tf.int32,
+                log_n=11,
+                main_moduli=[144115188076060673, 268460033],
+                aux_moduli=[],
+                plaintext_modulus=4206593,
+                scaling_factor=1,
+                generate_rotation_keys=True,
+            )
+        )
+
+    def _records_for_op(self, records, op):
+        return [r for r in records.values() if r["op"] == op]
+
+    def _test_profile(self, test_context):
+        a = test_utils.uniform_for_n_muls(test_context, 1)
+
+        with tf_shell.profile() as records:
+            ct = tf_shell.to_encrypted(a, test_context.key, test_context.shell_context)
+            ct = ct * a
+            ct = tf_shell.roll(ct, 1, test_context.rotation_key)
+            tf_shell.to_tensorflow(ct, test_context.key)
+
+        num_cts = 3
+        level = int(test_context.shell_context.level)
+        for op in ["Encrypt64", "MulCtPt64", "Roll64", "Decrypt64"]:
+            with self.subTest(f"Profile of {op}."):
+                op_records = self._records_for_op(records, op)
+                self.assertNotEmpty(op_records)
+                self.assertEqual(sum(r["elements"] for r in op_records), num_cts)
+                self.assertEqual(op_records[0]["level"], level)
+                self.assertGreater(op_records[0]["bytes_allocated"], 0)
+                self.assertGreaterEqual(
+                    op_records[0]["total_us"], op_records[0]["arithmetic_us"]
+                )
+
+        roll = self._records_for_op(records, "Roll64")[0]
+        self.assertEqual(roll["key_switches_estimate"], num_cts)
+        encrypt = self._records_for_op(records, "Encrypt64")[0]
+        self.assertEqual(encrypt["ntts_estimate"], num_cts)
+        self.assertEqual(encrypt["key_switches_estimate"], 0)
+
+        # Nothing is recorded once profiling is disabled.
+        tf_shell.to_encrypted(a, test_context.key, test_context.shell_context)
+        self.assertEmpty(tf_shell.take_profile())
+
+    def test_profile(self):
+        for test_context in self.test_contexts:
+            with self.subTest(f"Profile with context `{test_context}`."):
+                self._test_profile(test_context)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,129 @@
+import tensorflow as tf
+import tf_shell
+import test_utils
+
+# These test cases are for the RotationFusionOptimizer, which uses the linearity
+# of rotations to rewrite rotate(a) + rotate(b) to rotate(a + b) when both
+# rotations use the same key and shift.
+
+
+@tf.function
+def reduce_sum_add(a, b, c, shell_context, key, rotation_key):
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    ct_b = tf_shell.to_encrypted(b, key, shell_context)
+    ct_c = tf_shell.to_encrypted(c, key, shell_context)
+    result = (
+        tf_shell.reduce_sum(ct_a, axis=0, rotation_key=rotation_key)
+        + tf_shell.reduce_sum(ct_b, axis=0, rotation_key=rotation_key)
+        - tf_shell.reduce_sum(ct_c, axis=0, rotation_key=rotation_key)
+    )
+    return tf_shell.to_tensorflow(result, key)
+
+
+@tf.function
+def roll_add(a, b, c, shell_context, key, rotation_key):
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    ct_b = tf_shell.to_encrypted(b, key, shell_context)
+    result = tf_shell.roll(ct_a, 2, rotation_key) + tf_shell.roll(ct_b, 2, rotation_key)
+    return tf_shell.to_tensorflow(result, key)
+
+
+@tf.function
+def roll_different_shift_no_opt(a, b, c, shell_context, key, rotation_key):
+    # Rotations by different amounts cannot be fused.
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    ct_b = tf_shell.to_encrypted(b, key, shell_context)
+    result = tf_shell.roll(ct_a, 1, rotation_key) + tf_shell.roll(ct_b, 2, rotation_key)
+    return tf_shell.to_tensorflow(result, key)
+
+
+@tf.function
+def roll_reused_no_opt(a, b, c, shell_context, key, rotation_key):
+    # The rotation of `a` is needed elsewhere, so fusing would not save work.
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    ct_b = tf_shell.to_encrypted(b, key, shell_context)
+    rolled_a = tf_shell.roll(ct_a, 2, rotation_key)
+    result = (rolled_a + tf_shell.roll(ct_b, 2, rotation_key)) * rolled_a
+    return tf_shell.to_tensorflow(result, key)
+
+
+def count_ops(graph, op_name):
+    num_ops = 0
+    for node in graph.as_graph_def().node:
+        if node.op == op_name:
+            num_ops += 1
+    return num_ops
+
+
+class TestRotationFusionOptimizer(tf.test.TestCase):
+    test_contexts = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_contexts = []
+
+        cls.test_contexts.append(
+            test_utils.TestContext(
+                outer_shape=[2],
+                plaintext_dtype=tf.int32,
+                log_n=11,
+                main_moduli=[144115188076060673, 268460033],
+                aux_moduli=[],
+                plaintext_modulus=4206593,
+                scaling_factor=1,
+                generate_rotation_keys=True,
+            )
+        )
+
+    def _test_func(self, test_context, tf_func, op_name, orig_num, expected_num):
+        num_slots = test_context.shell_context.num_slots
+        a = test_utils.uniform_for_n_adds(test_context, num_slots)
+        b = test_utils.uniform_for_n_adds(test_context, num_slots)
+        c = test_utils.uniform_for_n_adds(test_context, num_slots)
+        args = (
+            a,
+            b,
+            c,
+            test_context.shell_context,
+            test_context.key,
+            test_context.rotation_key,
+        )
+
+        func = tf_func.get_concrete_function(*args)
+        self.assertEqual(count_ops(func.graph, op_name), orig_num)
+
+        # Optimize the graph using only the rotation fusion optimizer.
+        optimized_func = tf_shell.optimize_shell_graph(
+            func, ["RotationFusionOptimizer"]
+        )
+        out = optimized_func(*args)
+        # Can remove pack_output above if
+        # https://github.com/tensorflow/tensorflow/pull/67612 is merged.
+        out = optimized_func.function_type.pack_output(out)
+
+        self.assertEqual(count_ops(optimized_func.graph, op_name), expected_num)
+
+        # Check the optimized graph still computes the correct value.
+        self.assertAllClose(out, tf_func(*args))
+
+    def test_func(self):
+        for test_context in self.test_contexts:
+            with self.subTest("Optimizer for func reduce_sum_add."):
+                self._test_func(
+                    test_context, reduce_sum_add, "ReduceSumByRotationCt64", 3, 1
+                )
+
+            with self.subTest("Optimizer for func roll_add."):
+                self._test_func(test_context, roll_add, "Roll64", 2, 1)
+
+            with self.subTest("Optimizer for func roll_different_shift_no_opt."):
+                self._test_func(
+                    test_context, roll_different_shift_no_opt, "Roll64", 2, 2
+                )
+
+            with self.subTest("Optimizer for func roll_reused_no_opt."):
+                self._test_func(test_context, roll_reused_no_opt, "Roll64", 2, 2)
+
+
+if __name__ == "__main__":
+    tf.test.main()
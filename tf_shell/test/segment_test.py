@@ -299,6 +299,79 @@ class TestShellTensor(tf.test.TestCase):
                     f"Note: Skipping test {self._testMethodName} because outer shape {test_context.outer_shape} is too small."
                 )
 
+    def _test_segment_sum_sparse(self, test_context, segment_creator_functor):
+        repeats = 8
+        num_used_segments = test_context.shell_context.num_slots.numpy() // repeats
+        # Only every third segment id is used.
+        num_segments = num_used_segments * 3
+
+        a = self.create_rand_data(test_context, repeats)
+        if a is None:
+            return
+
+        ea = tf_shell.to_encrypted(a, test_context.key, test_context.shell_context)
+
+        segments = segment_creator_functor(test_context, repeats, num_used_segments)
+        segments = tf.where(segments >= 0, segments * 3, -1)
+
+        sparse_ess, counts = tf_shell.segment_sum(
+            ea, segments, num_segments, reduction="none", sparse_output=True
+        )
+        ss = tf_shell.to_tensorflow(sparse_ess.values, test_context.key)
+
+        pt_ss, pt_counts = tf_shell.segment_sum(
+            a, segments, num_segments, reduction="none"
+        )
+
+        # The indices are the sorted segment ids which were used.
+        used = tf.sort(tf.unique(tf.boolean_mask(segments, segments >= 0))[0])
+        self.assertAllEqual(sparse_ess.indices, used)
+        self.assertEqual(sparse_ess.num_segments, num_segments)
+
+        # The values match the dense result at the used segments, and the
+        # other segments are zero.
+        self.assertAllClose(ss, tf.gather(pt_ss, used, axis=1))
+        self.assertAllEqual(counts, tf.gather(pt_counts, used, axis=1))
+        self.assertAllClose(
+            tf.reduce_sum(tf.abs(pt_ss)),
+            tf.reduce_sum(tf.abs(tf.gather(pt_ss, used, axis=1))),
+        )
+
+        # Padding hides the number of used segments. The padding segments
+        # have index num_segments and are zero.
+        max_segments = num_used_segments + 2
+        padded_ess, _ = tf_shell.segment_sum(
+            ea,
+            segments,
+            num_segments,
+            reduction="none",
+            sparse_output=True,
+            max_sparse_segments=max_segments,
+        )
+        padded_ss = tf_shell.to_tensorflow(padded_ess.values, test_context.key)
+        num_used = used.shape[0]
+        self.assertEqual(padded_ess.indices.shape[0], max_segments)
+        self.assertAllEqual(padded_ess.indices[:num_used], used)
+        self.assertAllEqual(
+            padded_ess.indices[num_used:],
+            tf.fill([max_segments - num_used], tf.cast(num_segments, used.dtype)),
+        )
+        self.assertAllClose(padded_ss[:, :num_used], ss)
+        self.assertAllClose(
+            padded_ss[:, num_used:], tf.zeros_like(padded_ss[:, num_used:])
+        )
+
+    def test_segment_sum_sparse(self):
+        for test_context in self.test_contexts:
+            for segment_creator in [
+                self.create_uniform_segments,
+                self.create_nonuniform_segments,
+            ]:
+                with self.subTest(
+                    f"{self._testMethodName} with context `{test_context}` and segment creator `{segment_creator}`."
+                ):
+                    self._test_segment_sum_sparse(test_context, segment_creator)
+
 
 if __name__ == "__main__":
     tf.test.main()
@@ -0,0 +1,125 @@
+import tensorflow as tf
+import tf_shell
+import test_utils
+
+# These test cases are for the ShellCseOptimizer, which removes tf-shell nodes
+# computing the same value as another node, e.g. the same tensor encrypted
+# twice, and tf-shell nodes whose outputs are never used.
+
+
+@tf.function
+def encrypt_twice(a, b, shell_context, key):
+    # Both encryptions of `a` (and their encodings) should be deduplicated.
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    ct_a_again = tf_shell.to_encrypted(a, key, shell_context)
+    result = tf_shell.to_tensorflow(ct_a + ct_a_again, key)
+    return result
+
+
+@tf.function
+def encode_twice(a, b, shell_context, key):
+    # The second encoding of `b` should be deduplicated.
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    pt_b = tf_shell.to_shell_plaintext(b, shell_context)
+    pt_b_again = tf_shell.to_shell_plaintext(b, shell_context)
+    result = tf_shell.to_tensorflow((ct_a + pt_b) * pt_b_again, key)
+    return result
+
+
+@tf.function
+def different_encodings_no_opt(a, b, shell_context, key):
+    # Encodings of different tensors must not be merged.
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    pt_a = tf_shell.to_shell_plaintext(a, shell_context)
+    pt_b = tf_shell.to_shell_plaintext(b, shell_context)
+    result = tf_shell.to_tensorflow((ct_a + pt_a) + pt_b, key)
+    return result
+
+
+@tf.function
+def dead_encode(a, b, shell_context, key):
+    # The encoding of `b` and the product it feeds are never used.
+    ct_a = tf_shell.to_encrypted(a, key, shell_context)
+    pt_b = tf_shell.to_shell_plaintext(b, shell_context)
+    _ = ct_a * pt_b
+    result = tf_shell.to_tensorflow(ct_a, key)
+    return result
+
+
+def count_ops(graph, op_name):
+    num_ops = 0
+    for node in graph.as_graph_def().node:
+        if node.op == op_name:
+            num_ops += 1
+    return num_ops
+
+
+class TestShellCseOptimizer(tf.test.TestCase):
+    test_contexts = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_contexts = []
+
+        cls.test_contexts.append(
+            test_utils.TestContext(
+                outer_shape=[1],
+                plaintext_dtype=tf.float32,
+                log_n=11,
+                main_moduli=[8556589057, 8388812801],
+                aux_moduli=[],
+                plaintext_modulus=40961,
+                scaling_factor=1,
+            )
+        )
+
+    def _test_func(self, test_context, tf_func, op_name, orig_num, expected_num):
+        a = test_utils.uniform_for_n_muls(test_context, 1)
+        b = test_utils.uniform_for_n_muls(test_context, 1)
+
+        func = tf_func.get_concrete_function(
+            a, b, test_context.shell_context, test_context.key
+        )
+        self.assertEqual(count_ops(func.graph, op_name), orig_num)
+
+        # Optimize the graph using only the shell CSE optimizer.
+        optimized_func = tf_shell.optimize_shell_graph(func, ["ShellCseOptimizer"])
+        c = optimized_func(a, b, test_context.shell_context, test_context.key)
+        # Can remove pack_output above if
+        # https://github.com/tensorflow/tensorflow/pull/67612 is merged.
+        c = optimized_func.function_type.pack_output(c)
+
+        self.assertEqual(count_ops(optimized_func.graph, op_name), expected_num)
+
+        # Check the optimized graph still computes the correct value.
+        self.assertAllClose(
+            c,
+            tf_func(a, b, test_context.shell_context, test_context.key),
+            atol=1 / test_context.shell_context.scaling_factor,
+        )
+
+    def test_func(self):
+        for test_context in self.test_contexts:
+            with self.subTest("Optimizer for func encrypt_twice."):
+                self._test_func(test_context, encrypt_twice, "Encrypt64", 2, 1)
+                self._test_func(test_context, encrypt_twice, "PolynomialImport64", 2, 1)
+
+            with self.subTest("Optimizer for func encode_twice."):
+                self._test_func(test_context, encode_twice, "PolynomialImport64", 3, 2)
+
+            with self.subTest("Optimizer for func different_encodings_no_opt."):
+                self._test_func(
+                    test_context,
+                    different_encodings_no_opt,
+                    "PolynomialImport64",
+                    3,
+                    3,
+                )
+
+            with self.subTest("Optimizer for func dead_encode."):
+                self._test_func(test_context, dead_encode, "MulCtPt64", 1, 0)
+                self._test_func(test_context, dead_encode, "PolynomialImport64", 2, 1)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -52,6 +52,7 @@ class Conv2D(keras.layers.Layer):
         self.kernel_initializer = initializers.get(kernel_initializer)
         self.is_first_layer = is_first_layer
         self.grad_reduction = grad_reduction
+        self._encoded_weights = {}
 
         if grad_reduction not in ["galois", "fast", "none"]:
             raise ValueError(
@@ -152,6 +153,45 @@ class Conv2D(keras.layers.Layer):
 
         return outputs
 
+    def clear_encoded_weights(self):
+        self._encoded_weights = {}
+
+    def _prepared_weights(self, context, input_scale):
+        """Returns the kernel repeated across the slots as a
+        tf_shell.PreparedPlaintext, see ShellDense._prepared_weights()."""
+        cache_key = (context.id_str, input_scale)
+        if tf.executing_eagerly() and cache_key in self._encoded_weights:
+            return self._encoded_weights[cache_key]
+
+        num_slots = context.num_slots
+
+        def transform(kernel):
+            if input_scale != 1.0:
+                kernel *= input_scale
+            # tf-shell convolves a batch of filters, one per slot.
+            return tf.repeat(tf.expand_dims(kernel, axis=0), num_slots, axis=0)
+
+        filt = tf_shell.PreparedPlaintext(self.weights[0], transform=transform)
+
+        if tf.executing_eagerly():
+            self._encoded_weights[cache_key] = filt
+        return filt
+
+    def call_encrypted(self, inputs, input_scale=1.0):
+        """Forward pass on an encrypted batch of inputs using only ct-pt ops.
+        See ShellDense.call_encrypted()."""
+        if self.activation is not None:
+            raise ValueError(
+                f"Layer {self.name} has a non-linear activation which cannot be applied to encrypted inputs."
+            )
+
+        filt = self._prepared_weights(inputs._context, input_scale)
+        outputs = tf_shell.conv2d(
+            inputs, filt, strides=self.strides, padding=self.padding
+        )
+
+        return outputs, 1.0
+
     def backward(self, dy, rotation_key=None, sensitivity_analysis_factor=None):
         """Compute the gradient."""
         kernel = tf.identity(self.weights[0])
@@ -172,7 +212,6 @@ class Conv2D(keras.layers.Layer):
             z = tf.concat([tf.identity(z) for z in self._layer_intermediate], axis=0)
 
         grad_weights = []
-        batch_size = tf.shape(x)[0]
 
         # On the forward pass, x may be batched differently than the
         # ciphertext scheme. Pad them to match the ciphertext scheme.
@@ -189,11 +228,11 @@ class Conv2D(keras.layers.Layer):
         if self.is_first_layer:
             d_x = None  # no gradient needed for first layer
         else:
-            exp_kernel = tf.expand_dims(kernel, axis=0)
-            exp_kernel = tf.repeat(exp_kernel, batch_size, axis=0)
+            # The kernel is shared by every example in the batch, so it is
+            # passed without a batching dimension.
             d_x = tf_shell.conv2d_transpose(
                 dy,
-                exp_kernel,
+                kernel,
                 strides=self.strides,
                 padding=self.padding,
                 output_shape=x.shape.as_list(),
@@ -44,6 +44,7 @@ class ShellDense(keras.layers.Layer):
         self.bias_initializer = initializers.get(bias_initializer)
         self.is_first_layer = is_first_layer
         self.grad_reduction = grad_reduction
+        self._encoded_weights = {}
 
         if grad_reduction not in ["galois", "fast", "none"]:
             raise ValueError(
@@ -116,6 +117,64 @@ class ShellDense(keras.layers.Layer):
 
         return outputs
 
+    def clear_encoded_weights(self):
+        self._encoded_weights = {}
+
+    def _prepared_weights(self, context, input_scale):
+        """Returns the kernel and bias as tf_shell.PreparedPlaintexts for a
+        ct-pt forward pass, so serving many requests with the same weights
+        only encodes them once. The PreparedPlaintexts read the weight
+        variables and are kept in eager mode, where they encode the weights
+        again once the variables are assigned, e.g. by training or
+        set_weights()."""
+        cache_key = (context.id_str, input_scale)
+        if tf.executing_eagerly() and cache_key in self._encoded_weights:
+            return self._encoded_weights[cache_key]
+
+        kernel = tf_shell.PreparedPlaintext(
+            self.weights[0],
+            transform=None if input_scale == 1.0 else lambda k: k * input_scale,
+        )
+
+        bias = None
+        if self.use_bias:
+            num_slots = context.num_slots
+            bias = tf_shell.PreparedPlaintext(
+                self.weights[1],
+                transform=lambda b: tf.repeat(
+                    tf.expand_dims(b, axis=0), num_slots, axis=0
+                ),
+            )
+
+        if tf.executing_eagerly():
+            self._encoded_weights[cache_key] = (kernel, bias)
+        return kernel, bias
+
+    def call_encrypted(self, inputs, input_scale=1.0):
+        """Forward pass on an encrypted batch of inputs using only ct-pt ops.
+
+        input_scale is a multiplier deferred by the previous layer which is
+        folded into the kernel. Returns the encrypted outputs and the scale
+        deferred to the next layer.
+        """
+        if self.activation is not None:
+            raise ValueError(
+                f"Layer {self.name} has a non-linear activation which cannot be applied to encrypted inputs."
+            )
+
+        kernel, bias = self._prepared_weights(inputs._context, input_scale)
+        outputs = tf_shell.matmul(inputs, kernel)
+        if bias is not None:
+            # The bias is added after the matmul, so encode it at the scaling
+            # factor of the matmul output.
+            outputs = outputs + bias.plaintext(
+                outputs._context,
+                outputs._num_mod_reductions,
+                scaling_factor=outputs._scaling_factor,
+            )
+
+        return outputs, 1.0
+
     def backward(self, dy, rotation_key=None, sensitivity_analysis_factor=None):
         """dense backward"""
         kernel = tf.identity(self.weights[0])
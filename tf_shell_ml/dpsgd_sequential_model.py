@@ -14,13 +14,63 @@
 import tensorflow as tf
 import tf_shell
 from tf_shell_ml.model_base import SequentialBase
+from tf_shell_ml.dropout import ShellDropout
 from tf_shell_ml import large_tensor
 
 
+def _static_bytes(tensors, batch_size=None):
+    """Returns the size in bytes of the tensors in a nested structure. An
+    unknown leading (batch) dimension is taken to be batch_size. Returns None
+    if the shape of a tensor is not known otherwise."""
+    total = 0
+    for t in tf.nest.flatten(tensors):
+        if not tf.is_tensor(t):
+            continue
+        shape = t.shape
+        if shape.rank is not None and shape.rank > 0 and batch_size is not None:
+            shape = tf.TensorShape([shape[0] or batch_size]).concatenate(shape[1:])
+        if not shape.is_fully_defined():
+            return None
+        total += shape.num_elements() * t.dtype.size
+    return total
+
+
 class DpSgdSequential(SequentialBase):
+    def __init__(
+        self,
+        layers,
+        *args,
+        rematerialization_budget_bytes=None,
+        sensitivity_pfor=False,
+        sensitivity_pfor_iterations=None,
+        **kwargs,
+    ):
+        super().__init__(layers, *args, **kwargs)
+        # When sensitivity_pfor is set, the sensitivity analysis backpropagates
+        # all possible labels at once with tf.vectorized_map instead of one
+        # label at a time. sensitivity_pfor_iterations bounds how many labels
+        # are vectorized together, to bound memory. None means all labels.
+        self.sensitivity_pfor = sensitivity_pfor
+        self.sensitivity_pfor_iterations = sensitivity_pfor_iterations
+        if sensitivity_pfor_iterations is not None and sensitivity_pfor_iterations < 1:
+            raise ValueError(
+                f"sensitivity_pfor_iterations must be at least 1. Got {sensitivity_pfor_iterations}."
+            )
+
+        # When set, the layers' forward state is not kept for the whole batch
+        # until the backward pass. Instead, the layers are grouped into
+        # segments whose state fits in the budget, only the input of each
+        # segment is kept, and the segment's forward pass is recomputed right
+        # before its backward pass. This trades compute for memory.
+        self.rematerialization_budget_bytes = rematerialization_budget_bytes
+        self._segment_inputs = None
+        self._rematerialization_segments = None
+
     def call(self, features, training=False, with_softmax=True):
         predictions = features
-        for l in self.layers:
+        for i, l in enumerate(self.layers):
+            if training and getattr(self, "_segment_inputs", None) is not None:
+                self._segment_inputs[i].append(predictions)
             predictions = l(predictions, training=training, split_forward_mode=True)
 
         if not with_softmax:
@@ -34,15 +84,141 @@ class DpSgdSequential(SequentialBase):
         # last layer pre-activation.
         dJ_dw = []  # Derivatives of the loss with respect to the weights.
         dJ_dx = [dJ_dz]  # Derivatives of the loss with respect to the inputs.
-        for l in reversed(self.layers):
-            dw, dx = l.backward(
-                dJ_dx[-1], sensitivity_analysis_factor=sensitivity_analysis_factor
-            )
-            dJ_dw.extend(dw)
-            dJ_dx.append(dx)
+
+        # Sensitivity analysis runs right after each forward pass, before any
+        # state is dropped, so it never needs to rematerialize.
+        if (
+            sensitivity_analysis_factor is None
+            and self._rematerialization_segments is not None
+        ):
+            segments = self._rematerialization_segments
+        else:
+            segments = [(0, len(self.layers), None)]
+
+        for start, end, segment_inputs in reversed(segments):
+            if segment_inputs is not None:
+                self._rematerialize(start, end, segment_inputs, dJ_dx[-1])
+
+            for l in reversed(self.layers[start:end]):
+                dw, dx = l.backward(
+                    dJ_dx[-1], sensitivity_analysis_factor=sensitivity_analysis_factor
+                )
+                dJ_dw.extend(dw)
+                dJ_dx.append(dx)
+
+            if segment_inputs is not None:
+                # Drop the recomputed state as soon as it has been used.
+                for l in self.layers[start:end]:
+                    l.reset_split_forward_mode()
 
         return [g for g in reversed(dJ_dw)]
 
+    def _plan_rematerialization(self, batch_size):
+        """Groups the layers into segments for rematerialization, using the
+        forward state the layers saved for the whole batch. The state of a
+        segment's layers is dropped and only the segment's inputs are kept.
+        batch_size is the number of examples per jacobian device, used where
+        the batch dimension of the state is not static.
+
+        Segments are filled greedily up to the budget. A layer larger than the
+        budget, or whose state has an unknown size, is a segment on its own.
+        Dropout layers are never recomputed since their masks are random, so
+        they keep their state and end a segment.
+        """
+        segments = []
+        start = 0
+        segment_bytes = 0
+
+        def _end_segment(end, recompute):
+            if end > start:
+                segments.append(
+                    (start, end, self._segment_inputs[start] if recompute else None)
+                )
+
+        for i, l in enumerate(self.layers):
+            if isinstance(l, ShellDropout):
+                _end_segment(i, recompute=True)
+                start = i
+                _end_segment(i + 1, recompute=False)
+                start, segment_bytes = i + 1, 0
+                continue
+
+            layer_bytes = _static_bytes(
+                [
+                    getattr(l, "_layer_input", []),
+                    getattr(l, "_layer_intermediate", []),
+                ],
+                batch_size=batch_size,
+            )
+            if layer_bytes is None:
+                print(
+                    f"WARNING: The size of the forward state of layer {l.name} is unknown. Recomputing it on its own for rematerialization."
+                )
+                layer_bytes = self.rematerialization_budget_bytes + 1
+            if (
+                i > start
+                and segment_bytes + layer_bytes > self.rematerialization_budget_bytes
+            ):
+                _end_segment(i, recompute=True)
+                start, segment_bytes = i, 0
+            segment_bytes += layer_bytes
+        _end_segment(len(self.layers), recompute=True)
+
+        for seg_start, seg_end, segment_inputs in segments:
+            if segment_inputs is not None:
+                for l in self.layers[seg_start:seg_end]:
+                    l.reset_split_forward_mode()
+
+        self._segment_inputs = None
+        self._rematerialization_segments = segments
+
+    def _rematerialize(self, start, end, segment_inputs, dy):
+        """Recomputes the forward pass of layers [start, end) on every
+        jacobian device, restoring the state their backward pass needs."""
+        # Only start recomputing once the gradient reaches this segment, so
+        # the recomputed state is not held any longer than necessary.
+        if isinstance(dy, tf_shell.ShellTensor64):
+            dy = dy._raw_tensor
+        control_inputs = [] if dy is None else [dy]
+
+        with tf.name_scope("rematerialize"), tf.control_dependencies(control_inputs):
+            for d, x in zip(self.jacobian_devices, segment_inputs):
+                with tf.device(d):
+                    x = tf.identity(x)
+                    for l in self.layers[start:end]:
+                        x = l(x, training=True, split_forward_mode=True)
+
+    def _vectorized_sensitivity(self, label_sensitivity):
+        """Computes label_sensitivity for every possible label with
+        tf.vectorized_map, stacking the one-hot labels in an extra dimension,
+        and returns the maximum. When sensitivity_pfor_iterations is set, the
+        labels are vectorized in chunks of that size, one chunk after the
+        other."""
+        labels = tf.eye(self.out_classes, dtype=tf.keras.backend.floatx())
+        chunk_size = self.sensitivity_pfor_iterations
+
+        if chunk_size is None or chunk_size >= self.out_classes:
+            return tf.reduce_max(tf.vectorized_map(label_sensitivity, labels))
+
+        def cond(chunk_start, sensitivity):
+            return chunk_start < self.out_classes
+
+        def body(chunk_start, sensitivity):
+            chunk = labels[chunk_start : chunk_start + chunk_size]
+            chunk_sensitivity = tf.reduce_max(
+                tf.vectorized_map(label_sensitivity, chunk)
+            )
+            return chunk_start + chunk_size, tf.maximum(sensitivity, chunk_sensitivity)
+
+        chunk_start = tf.constant(0)
+        sensitivity = tf.constant(0.0, dtype=tf.keras.backend.floatx())
+        return tf.while_loop(
+            cond,
+            body,
+            [chunk_start, sensitivity],
+            parallel_iterations=1,
+        )[1]
+
     def compute_grads(self, features, enc_labels):
         scaling_factor = (
             enc_labels.scaling_factor
@@ -55,6 +231,12 @@ class DpSgdSequential(SequentialBase):
         for l in self.layers:
             l.reset_split_forward_mode()
 
+        rematerialize = self.rematerialization_budget_bytes is not None
+        self._rematerialization_segments = None
+        if rematerialize:
+            # Record the input of every layer, the candidate segment inputs.
+            self._segment_inputs = [[] for _ in self.layers]
+
         predictions_list = []
         max_two_norms_list = []
 
@@ -62,6 +244,7 @@ class DpSgdSequential(SequentialBase):
             split_features, end_pad = self.split_with_padding(
                 features, len(self.jacobian_devices)
             )
+        split_batch_size = split_features[0].shape[0]
 
         for i, d in enumerate(self.jacobian_devices):
             with tf.device(d):
@@ -86,41 +269,51 @@ class DpSgdSequential(SequentialBase):
                         prediction, scaling_factor
                     )
 
-                    def cond(possible_label_i, sensitivity):
-                        return possible_label_i < self.out_classes
-
-                    def body(possible_label_i, sensitivity):
-                        possible_label = tf.one_hot(
-                            possible_label_i,
-                            self.out_classes,
-                            dtype=tf.keras.backend.floatx(),
-                        )
+                    def label_sensitivity(possible_label):
                         dJ_dz = worst_case_prediction - possible_label
                         possible_grads = self._backward(
                             dJ_dz, sensitivity_analysis_factor=scaling_factor
                         )
+                        # Rows of sparse gradients which are not listed are
+                        # zero and do not contribute to the norm.
+                        possible_grads, _ = self.split_sparse_grads(possible_grads)
                         if i == len(self.jacobian_devices) - 1 and end_pad > 0:
                             # The last device's features may have been padded.
                             # Remove the extra gradients before computing the norm.
                             possible_grads = [g[:-end_pad] for g in possible_grads]
 
-                        max_norm = self.max_per_example_global_norm(possible_grads)
+                        return self.max_per_example_global_norm(possible_grads)
+
+                    def cond(possible_label_i, sensitivity):
+                        return possible_label_i < self.out_classes
+
+                    def body(possible_label_i, sensitivity):
+                        possible_label = tf.one_hot(
+                            possible_label_i,
+                            self.out_classes,
+                            dtype=tf.keras.backend.floatx(),
+                        )
+                        max_norm = label_sensitivity(possible_label)
                         sensitivity = tf.maximum(sensitivity, max_norm)
                         return possible_label_i + 1, sensitivity
 
-                    # Using a tf.while_loop (vs. a python for loop) is preferred as
-                    # it does not encode the unrolled loop into the graph, which may
-                    # require lots of memory. The `parallel_iterations` argument
-                    # allows explicit control over the loop's parallelism.
-                    # Increasing parallel_iterations may be faster at the expense of
-                    # memory usage.
-                    possible_label_i = tf.constant(0)
-                    sensitivity = tf.while_loop(
-                        cond,
-                        body,
-                        [possible_label_i, sensitivity],
-                        parallel_iterations=1,
-                    )[1]
+                    if self.sensitivity_pfor:
+                        sensitivity = self._vectorized_sensitivity(label_sensitivity)
+                    else:
+                        # Using a tf.while_loop (vs. a python for loop) is
+                        # preferred as it does not encode the unrolled loop into
+                        # the graph, which may require lots of memory. The
+                        # `parallel_iterations` argument allows explicit control
+                        # over the loop's parallelism. Increasing
+                        # parallel_iterations may be faster at the expense of
+                        # memory usage.
+                        possible_label_i = tf.constant(0)
+                        sensitivity = tf.while_loop(
+                            cond,
+                            body,
+                            [possible_label_i, sensitivity],
+                            parallel_iterations=1,
+                        )[1]
 
                     if i == len(self.jacobian_devices) - 1 and end_pad > 0:
                         # The last device's features may have been padded.
@@ -166,6 +359,9 @@ class DpSgdSequential(SequentialBase):
                 )
 
             # Backward pass.
+            if rematerialize:
+                self._plan_rematerialization(split_batch_size)
             grads = self._backward(dJ_dz)
+            self._rematerialization_segments = None
 
         return grads, max_two_norm, predictions
@@ -81,6 +81,10 @@ class ShellDropout(keras.layers.Layer):
         output = inputs * dropout_mask
         return output
 
+    def call_encrypted(self, inputs, input_scale=1.0):
+        # Dropout is the identity at inference time.
+        return inputs, input_scale
+
     def backward(self, dy, rotation_key=None, sensitivity_analysis_factor=None):
         if sensitivity_analysis_factor is not None:
             # When performing sensitivity analysis, use the most recent
@@ -25,6 +25,8 @@ class ShellEmbedding(keras.layers.Layer):
         embeddings_initializer="uniform",
         skip_embeddings_below_index=0,
         grad_reduction="none",
+        sparse_grads=False,
+        sparse_grads_max_rows=None,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -33,11 +35,15 @@ class ShellEmbedding(keras.layers.Layer):
         self.embeddings_initializer = initializers.get(embeddings_initializer)
         self.skip_embeddings_below_index = skip_embeddings_below_index
         self.grad_reduction = grad_reduction
+        self.sparse_grads = sparse_grads
+        self.sparse_grads_max_rows = sparse_grads_max_rows
 
         if grad_reduction not in ["galois", "none"]:
             raise ValueError(
                 f"Invalid grad_reduction type: {grad_reduction} (must be 'galois' or 'none')"
             )
+        if sparse_grads and grad_reduction != "none":
+            raise ValueError("Sparse gradients require grad_reduction 'none'.")
 
     def get_config(self):
         config = super().get_config()
@@ -50,6 +56,8 @@ class ShellEmbedding(keras.layers.Layer):
                 ),
                 "skip_embeddings_below_index": self.skip_embeddings_below_index,
                 "grad_reduction": self.grad_reduction,
+                "sparse_grads": self.sparse_grads,
+                "sparse_grads_max_rows": self.sparse_grads_max_rows,
             }
         )
         return config
@@ -109,6 +117,15 @@ class ShellEmbedding(keras.layers.Layer):
         (input_dimension, output_dimension) and each element is a ciphertext
         with (2*batch_size) slots. tf_shell.segment_sum must pull apart the
         packing dimension of the values by masking with a one-hot.
+
+        When sparse_grads is enabled, the gradient is a
+        tf_shell.ShellIndexedSlices holding only the rows of the embedding
+        table which appear in the inputs, so its size scales with the number
+        of distinct tokens in the batch rather than input_dim. Note this
+        reveals the number of distinct tokens in the batch to the party which
+        decrypts the gradient. Set sparse_grads_max_rows to pad the gradient
+        to that many rows, which hides it as long as no batch has more
+        distinct tokens. Padding rows have index input_dim.
         """
         if sensitivity_analysis_factor is not None:
             # When performing sensitivity analysis, use the most recent
@@ -122,9 +139,6 @@ class ShellEmbedding(keras.layers.Layer):
             raise ValueError(
                 f"Embedding layer dy ndims exptected {indices + 1}. Got {dy}."
             )
-        sentence_len = dy.shape[1]
-
-        values = dy
 
         indices = tf.where(
             indices < self.skip_embeddings_below_index,
@@ -132,6 +146,11 @@ class ShellEmbedding(keras.layers.Layer):
             indices,
         )
 
+        return self._segment_sum_grads(dy, indices, rotation_key), None
+
+    def _segment_sum_grads(self, values, indices, rotation_key):
+        """Sums the rows of values which have the same index into the gradient
+        of the embedding table. Negative indices are skipped."""
         summedvalues, _ = tf_shell.segment_sum(
             values,
             indices,
@@ -139,9 +158,11 @@ class ShellEmbedding(keras.layers.Layer):
             rotation_key,
             reduction=self.grad_reduction,
             skip_pt_counts=True,
+            sparse_output=self.sparse_grads,
+            max_sparse_segments=self.sparse_grads_max_rows,
         )
 
-        return [summedvalues], None
+        return [summedvalues]
 
     @staticmethod
     def unpack(plaintext_packed_dx):
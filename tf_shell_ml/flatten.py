@@ -33,6 +33,12 @@ class Flatten(keras.layers.Layer):
         self.batch_size = tf.shape(inputs)[0]
         return tf.reshape(inputs, [self.batch_size] + self.flat_shape)
 
+    def call_encrypted(self, inputs, input_scale=1.0):
+        outputs = tf_shell.reshape(
+            inputs, [inputs._context.num_slots] + self.flat_shape
+        )
+        return outputs, input_scale
+
     def backward(self, dy, rotation_key=None, sensitivity_analysis_factor=None):
         new_shape = list(self.input_shape)
         # On the forward pass, inputs may be batched differently than the
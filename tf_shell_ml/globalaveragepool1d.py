@@ -36,6 +36,13 @@ class GlobalAveragePooling1D(keras.layers.Layer):
 
         return outputs
 
+    def call_encrypted(self, inputs, input_scale=1.0):
+        # Dividing a ciphertext by the length would round to zero at small
+        # scaling factors, so only sum here and defer the division to the
+        # next layer's weights.
+        outputs = tf_shell.reduce_sum(inputs, axis=1)
+        return outputs, input_scale / inputs.shape[1]
+
     def backward(self, dy, rotation_key=None, sensitivity_analysis_factor=None):
         avg_dim = tf.identity(self._layer_intermediate)
         dx = tf_shell.expand_dims(dy, axis=1)
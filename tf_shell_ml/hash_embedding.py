@@ -0,0 +1,155 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import tensorflow as tf
+import tf_shell
+from tf_shell_ml.embedding import ShellEmbedding
+
+# Constants of the splitmix64 finalizer, which mixes the bits of the ids so
+# nearby ids fall into unrelated buckets.
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_MIX_MULTIPLIER_1 = 0xBF58476D1CE4E5B9
+_MIX_MULTIPLIER_2 = 0x94D049BB133111EB
+
+
+def hash_buckets(ids, num_buckets, hash_index=0):
+    """Hashes int64 ids into [0, num_buckets). Different hash_index values give
+    independent hash functions."""
+
+    def _mul(x, c):
+        return x * tf.constant(c, dtype=tf.uint64)
+
+    def _xor_shift(x, shift):
+        return tf.bitwise.bitwise_xor(
+            x, tf.bitwise.right_shift(x, tf.constant(shift, dtype=tf.uint64))
+        )
+
+    with tf.name_scope("hash_buckets"):
+        x = tf.bitcast(tf.cast(ids, tf.int64), tf.uint64)
+        x = x + tf.constant((_GOLDEN_GAMMA * (hash_index + 1)) % 2**64, dtype=tf.uint64)
+        x = _mul(_xor_shift(x, 30), _MIX_MULTIPLIER_1)
+        x = _mul(_xor_shift(x, 27), _MIX_MULTIPLIER_2)
+        x = _xor_shift(x, 31)
+
+        # Drop the top bit so the hash fits in a non-negative int64.
+        x = tf.bitcast(tf.bitwise.right_shift(x, tf.constant(1, tf.uint64)), tf.int64)
+        return tf.math.floormod(x, num_buckets)
+
+
+class ShellHashEmbedding(ShellEmbedding):
+    """An embedding layer for very large vocabularies which hashes the ids into
+    a fixed number of buckets.
+
+    Each id is hashed with `num_hashes` independent hash functions and its
+    embedding is the sum of the rows of its buckets. The embedding table, and
+    the encrypted segment reduction in the backward pass, have `num_buckets`
+    rows no matter how many ids there are. Fewer buckets are cheaper under
+    encryption but more ids collide, which costs accuracy. Using more than one
+    hash makes it unlikely that two ids share all of their buckets.
+    """
+
+    def __init__(
+        self,
+        num_buckets,
+        output_dim,
+        num_hashes=1,
+        embeddings_initializer="uniform",
+        skip_embeddings_below_index=0,
+        grad_reduction="none",
+        sparse_grads=False,
+        sparse_grads_max_rows=None,
+        **kwargs,
+    ):
+        super().__init__(
+            num_buckets,
+            output_dim,
+            embeddings_initializer=embeddings_initializer,
+            skip_embeddings_below_index=skip_embeddings_below_index,
+            grad_reduction=grad_reduction,
+            sparse_grads=sparse_grads,
+            sparse_grads_max_rows=sparse_grads_max_rows,
+            **kwargs,
+        )
+        self.num_buckets = int(num_buckets)
+        self.num_hashes = int(num_hashes)
+
+        if self.num_hashes < 1:
+            raise ValueError(f"num_hashes must be at least 1. Got {num_hashes}.")
+
+    def get_config(self):
+        config = super().get_config()
+        del config["input_dim"]
+        config.update(
+            {
+                "num_buckets": self.num_buckets,
+                "num_hashes": self.num_hashes,
+            }
+        )
+        return config
+
+    def call(self, inputs, training=False, split_forward_mode=False):
+        if inputs.dtype != tf.int64:
+            # When using model.fit() keras will cast the input to float.
+            inputs = tf.cast(inputs, tf.int64)
+
+        if inputs.ndim != 2:
+            raise ValueError(f"Embedding layer expects rank 2 input. Got {inputs}.")
+
+        buckets = [
+            hash_buckets(inputs, self.num_buckets, k) for k in range(self.num_hashes)
+        ]
+
+        if training:
+            # Store the buckets of every hash side by side, which is how the
+            # backward pass lays out dy. Skipped ids have no gradient.
+            all_buckets = tf.concat(buckets, axis=1)
+            all_buckets = tf.where(
+                tf.tile(inputs, [1, self.num_hashes])
+                < self.skip_embeddings_below_index,
+                tf.constant(-1, dtype=all_buckets.dtype),
+                all_buckets,
+            )
+            if split_forward_mode:
+                self._layer_intermediate.append(all_buckets)
+            else:
+                self._layer_intermediate = [all_buckets]
+
+        outputs = tf.experimental.numpy.take(self.embeddings, buckets[0], axis=0)
+        for b in buckets[1:]:
+            outputs += tf.experimental.numpy.take(self.embeddings, b, axis=0)
+        return outputs
+
+    def backward(self, dy, rotation_key=None, sensitivity_analysis_factor=None):
+        """
+        dy is shape (batch_size, sentence_length, output_dimension).
+
+        Every bucket of an id receives the id's gradient, so dy is repeated
+        once per hash and summed by bucket with tf_shell.segment_sum, as in
+        ShellEmbedding.
+        """
+        if sensitivity_analysis_factor is not None:
+            # When performing sensitivity analysis, use the most recent
+            # intermediate state.
+            buckets = self._layer_intermediate[-1]
+        else:
+            buckets = tf.concat(
+                [tf.identity(z) for z in self._layer_intermediate], axis=0
+            )
+        if dy.ndim != buckets.ndim + 1:
+            raise ValueError(
+                f"Embedding layer dy ndims expected {buckets.ndim + 1}. Got {dy}."
+            )
+
+        values = tf_shell.concat([dy] * self.num_hashes, axis=1)
+
+        return self._segment_sum_grads(values, buckets, rotation_key), None
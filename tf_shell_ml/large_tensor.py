@@ -149,6 +149,10 @@ def split_tensor(tensor):
         if isinstance(tensor, tf_shell.ShellTensor64):
             shape = tf_shell.shape(tensor)
             total_elements = tensor._raw_tensor.shape.num_elements()
+            if total_elements is None:
+                # E.g. sparse gradients, where the number of rows is only known
+                # at runtime.
+                total_elements = tf.size(tensor._raw_tensor, out_type=tf.int64)
 
             # Calculate split sizes
             split_sizes = calculate_tf_shell_split_sizes(
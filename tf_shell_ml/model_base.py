@@ -17,6 +17,8 @@ from tensorflow.keras.callbacks import CallbackList
 import tf_shell
 import time
 import gc
+import collections
+from concurrent.futures import ThreadPoolExecutor
 import tf_shell_ml
 
 
@@ -33,6 +35,8 @@ class SequentialBase(keras.Sequential):
         noise_max_scale=5.0e9,
         noise_base_scale=7.6,
         cache_path=None,
+        autotune_cost_model_path=None,
+        auto_mod_reduce=False,
         jacobian_pfor=False,
         jacobian_pfor_iterations=None,
         jacobian_devices=None,
@@ -51,6 +55,8 @@ class SequentialBase(keras.Sequential):
         self.labels_party_dev = labels_party_dev
         self.features_party_dev = features_party_dev
         self.cache_path = cache_path
+        self.autotune_cost_model_path = autotune_cost_model_path
+        self.auto_mod_reduce = auto_mod_reduce
         self.jacobian_pfor = jacobian_pfor
         self.jacobian_pfor_iterations = jacobian_pfor_iterations
         self.jacobian_devices = (
@@ -143,9 +149,85 @@ class SequentialBase(keras.Sequential):
             features, labels, read_key_from_cache, apply_gradients
         )
 
+    @tf.function
+    def compute_step_tf_func(self, features, labels, read_key_from_cache):
+        """
+        tf.function wrapper around shell compute step.
+        """
+        return self.shell_compute_step(features, labels, read_key_from_cache)
+
+    @tf.function
+    def apply_step_tf_func(self, grads, sparse_info, labels, predictions):
+        """
+        tf.function wrapper around shell apply step.
+        """
+        return self.shell_apply_step(
+            grads, sparse_info, labels, predictions, apply_gradients=True
+        )
+
     def compute_grads(self, features, enc_labels):
         raise NotImplementedError()  # Should be overloaded by the subclass.
 
+    def predict_encrypted(self, enc_features):
+        """
+        Runs inference on encrypted features without decrypting them.
+
+        Every layer is evaluated with ct-pt kernels only, so the layers must
+        be linear tf_shell_ml layers (ShellDense and Conv2D without hidden
+        activations, Flatten, GlobalAveragePooling1D, ShellDropout). Keras
+        layers, and hence PostScaleSequential, are not supported. When compiled with CCE loss the
+        final softmax is left to the caller, i.e. the output is the encrypted
+        logits. The encoded weights are cached across calls made in eager
+        mode and encoded again when the weights change, e.g. by training or
+        set_weights().
+
+        Args:
+            enc_features (ShellTensor64): The encrypted input features, one
+                example per slot.
+
+        Returns:
+            ShellTensor64: The encrypted model outputs.
+        """
+        if not isinstance(enc_features, tf_shell.ShellTensor64) or (
+            not enc_features.is_encrypted
+        ):
+            raise ValueError(
+                f"predict_encrypted() expects an encrypted ShellTensor64. Got {type(enc_features)}."
+            )
+        if not self.built:
+            raise ValueError("The model must be built before predict_encrypted().")
+
+        outputs = enc_features
+        scale = 1.0
+        for layer in self.layers:
+            if not hasattr(layer, "call_encrypted"):
+                raise ValueError(
+                    f"Layer {layer.name} does not support encrypted inference."
+                )
+            outputs, scale = layer.call_encrypted(outputs, input_scale=scale)
+
+        # Apply any scale which was not folded into a layer's weights.
+        if scale != 1.0:
+            outputs = outputs * tf.constant(scale, dtype=outputs._underlying_dtype)
+
+        return outputs
+
+    def clear_encoded_weights(self):
+        """
+        Drops the weight encodings cached by predict_encrypted() to free
+        their memory. Encodings of stale weights are never reused.
+        """
+        for layer in self.layers:
+            if hasattr(layer, "clear_encoded_weights"):
+                layer.clear_encoded_weights()
+
+    def _autotune_cache_path(self):
+        # Persist the autotuned encryption parameters alongside the cached
+        # contexts and keys.
+        if self.cache_path is None:
+            return None
+        return self.cache_path + "/autotune_params"
+
     def batch_size_from_trace(self, train_features, train_labels):
         """
         Determine the batch size from the graph.
@@ -160,31 +242,31 @@ class SequentialBase(keras.Sequential):
             apply_gradients=False,
         )
 
-        # Optimize the graph using tf_shells HE-specific optimizers.
-        optimized_func = tf_shell.optimize_shell_graph(
-            func, skip_convert_to_constants=True
+        # Run tf_shell's HE-specific optimizers on the graph. If autocontext is
+        # used, the parameters are not known until the graph optimization pass
+        # is finished, so they are read back from the optimizer.
+        params = tf_shell.autotune_shell_params(
+            func,
+            autotune_cache_path=self._autotune_cache_path(),
+            autotune_cost_model_path=self.autotune_cost_model_path,
+            auto_mod_reduce=self.auto_mod_reduce,
         )
-        optimized_graph = optimized_func.graph
-
-        def find_node_by_op(g, name):
-            for node in g.as_graph_def().node:
-                if node.op == name:
-                    return node
-            raise ValueError(f"Node {name} not found in graph.")
-
-        # Using parameters in the optimized graph, create the context and
-        # keys for use during training. The parameters are pulled from the
-        # graph because if autocontext is used, these parameters are not
-        # known until the graph optimization pass is finished.
-        context_node = find_node_by_op(optimized_graph, "ContextImport64")
-
-        def get_tensor_by_name(g, name):
-            for node in g.as_graph_def().node:
-                if node.name == name:
-                    return tf.make_ndarray(node.attr["value"].tensor)
-            raise ValueError(f"Node {name} not found in graph.")
-
-        log_n = get_tensor_by_name(optimized_graph, context_node.input[0]).tolist()
+
+        if params is not None:
+            log_n = params["log_n"]
+        else:
+            # Without autocontext, the parameters are constant inputs of the
+            # context in the traced graph.
+            context_ops = [
+                op for op in func.graph.get_operations() if op.type == "ContextImport64"
+            ]
+            if not context_ops:
+                raise ValueError("Node ContextImport64 not found in graph.")
+            log_n = tf.get_static_value(context_ops[0].inputs[0])
+            if log_n is None:
+                raise ValueError("Could not determine log_n from the graph.")
+            log_n = int(log_n)
+
         batch_size = 2**log_n
         return batch_size
 
@@ -249,6 +331,7 @@ class SequentialBase(keras.Sequential):
         steps_per_epoch=None,
         verbose=1,
         initial_epoch=0,
+        max_staleness=0,
     ):
         """
         Train the model.
@@ -276,6 +359,14 @@ class SequentialBase(keras.Sequential):
                 next epoch. Defaults to None.
             verbose (int, optional): Verbosity mode. 0 = silent, 1 = progress
                 bar. Defaults to 1.
+            max_staleness (int, optional): Maximum number of model updates
+                missing from the weights a training step reads. When greater
+                than 0, up to `max_staleness + 1` steps run concurrently so one
+                party's phase of a step (e.g. backpropagation on the features
+                party) overlaps the other party's phase of another step (e.g.
+                decryption on the labels party). Only the gradient computation
+                runs concurrently, the gradients are applied one step at a time
+                in step order. Defaults to 0, i.e. steps run synchronously.
 
         Returns:
             History: A keras `History` object. Its `History.history` attribute
@@ -288,7 +379,11 @@ class SequentialBase(keras.Sequential):
         tf.config.set_soft_device_placement(False)
 
         # Turn on the shell optimizers.
-        tf_shell.enable_optimization()
+        tf_shell.enable_optimization(
+            autotune_cache_path=self._autotune_cache_path(),
+            autotune_cost_model_path=self.autotune_cost_model_path,
+            auto_mod_reduce=self.auto_mod_reduce,
+        )
 
         # Enable randomized rounding.
         tf_shell.enable_randomized_rounding()
@@ -319,6 +414,12 @@ class SequentialBase(keras.Sequential):
         if self.noise_multiplier == 0.0:
             self.disable_noise = True
 
+        if max_staleness < 0:
+            raise ValueError(f"max_staleness must be >= 0. Saw {max_staleness}.")
+        executor = None
+        if max_staleness > 0:
+            executor = ThreadPoolExecutor(max_workers=max_staleness + 1)
+
         # Calculate samples if possible.
         if steps_per_epoch is None:
             samples = None
@@ -345,79 +446,133 @@ class SequentialBase(keras.Sequential):
         logs = {}
         subsequent_run = False
 
-        for epoch in range(initial_epoch, epochs):
-            if self.stop_training:
-                break
-            callback_list.on_epoch_begin(epoch, logs)
-            start_time = time.time()
-            self.reset_metrics()
-
-            # Training loop.
-            for step, (batch_x, batch_y) in enumerate(
-                zip(features_dataset, labels_dataset)
-            ):
-                callback_list.on_train_batch_begin(step, logs)
-                # The caches for encryption keys and contexts have already been
-                # populated during the dataset preparation step. Set
-                # read_key_from_cache to True.
-                logs, batch_size_should_be = self.train_step_tf_func(
-                    batch_x,
-                    batch_y,
-                    read_key_from_cache=subsequent_run,
-                    apply_gradients=True,
-                )
-                subsequent_run = True
-                callback_list.on_train_batch_end(step, logs)
-                gc.collect()
-                if steps_per_epoch is not None and step + 1 >= steps_per_epoch:
+        try:
+            for epoch in range(initial_epoch, epochs):
+                if self.stop_training:
                     break
-
-            # Validation loop.
-            if validation_data is not None:
-                # Reset metrics
+                callback_list.on_epoch_begin(epoch, logs)
+                start_time = time.time()
                 self.reset_metrics()
 
-                for val_x_batch, val_y_batch in validation_data:
-                    val_y_pred = self(
-                        val_x_batch,
-                        training=False,
-                        with_softmax=self.uses_cce_and_softmax,
+                # Training loop.
+                in_flight = collections.deque()
+
+                def _apply_oldest_step():
+                    # Gradients are applied one step at a time, in step order, on
+                    # this thread only, so concurrent steps never race on the
+                    # optimizer, the metrics or the weights.
+                    done_step, future = in_flight.popleft()
+                    grads, sparse_info, labels, predictions, _ = future.result()
+                    step_logs = self.apply_step_tf_func(
+                        grads, sparse_info, labels, predictions
                     )
-                    # Update validation metrics
-                    for m in self.metrics:
-                        if m.name == "loss":
-                            loss = self.compiled_loss(val_y_batch, val_y_pred)
-                            m.update_state(loss)
-                        else:
-                            m.update_state(val_y_batch, val_y_pred)
-                metric_results = {m.name: m.result() for m in self.metrics}
-
-                # TensorFlow 2.18.0 added a "CompiledMetrics" metric which holds
-                # metrics passed to compile in it's own dictionary. Keras wants
-                # all metrics to be returned as a flat dictionary. Here we
-                # flatten the dictionary.
-                result = {}
-                for key, value in metric_results.items():
-                    if isinstance(value, dict):
-                        result.update(value)  # add subdict directly into the dict
+                    callback_list.on_train_batch_end(done_step, step_logs)
+                    gc.collect()
+                    return step_logs
+
+                for step, (batch_x, batch_y) in enumerate(
+                    zip(features_dataset, labels_dataset)
+                ):
+                    callback_list.on_train_batch_begin(step, logs)
+                    if executor is not None and subsequent_run:
+                        # Compute the step's gradients in the background.
+                        # TensorFlow releases the GIL while executing, so the
+                        # parties' phases of concurrent steps overlap. Once more
+                        # than max_staleness steps are in flight, apply the oldest.
+                        # A new step is only started once all but max_staleness of
+                        # the earlier steps have been applied, which bounds the
+                        # number of updates missing from the weights it reads.
+                        in_flight.append(
+                            (
+                                step,
+                                executor.submit(
+                                    self.compute_step_tf_func,
+                                    batch_x,
+                                    batch_y,
+                                    read_key_from_cache=True,
+                                ),
+                            )
+                        )
+                        while len(in_flight) > max_staleness:
+                            logs = _apply_oldest_step()
                     else:
-                        result[key] = value  # non-subdict elements are just copied
-
-                logs.update({f"val_{name}": result for name, result in result.items()})
+                        # The caches for encryption keys and contexts have already
+                        # been populated during the dataset preparation step. Set
+                        # read_key_from_cache to True.
+                        logs, batch_size_should_be = self.train_step_tf_func(
+                            batch_x,
+                            batch_y,
+                            read_key_from_cache=subsequent_run,
+                            apply_gradients=True,
+                        )
+                        subsequent_run = True
+                        callback_list.on_train_batch_end(step, logs)
+                        gc.collect()
+                    if steps_per_epoch is not None and step + 1 >= steps_per_epoch:
+                        break
+
+                # Drain the pipeline before validating.
+                while in_flight:
+                    logs = _apply_oldest_step()
+
+                # Validation loop.
+                if validation_data is not None:
+                    # Reset metrics
+                    self.reset_metrics()
+
+                    for val_x_batch, val_y_batch in validation_data:
+                        val_y_pred = self(
+                            val_x_batch,
+                            training=False,
+                            with_softmax=self.uses_cce_and_softmax,
+                        )
+                        # Update validation metrics
+                        for m in self.metrics:
+                            if m.name == "loss":
+                                loss = self.compiled_loss(val_y_batch, val_y_pred)
+                                m.update_state(loss)
+                            else:
+                                m.update_state(val_y_batch, val_y_pred)
+                    metric_results = {m.name: m.result() for m in self.metrics}
+
+                    # TensorFlow 2.18.0 added a "CompiledMetrics" metric which holds
+                    # metrics passed to compile in it's own dictionary. Keras wants
+                    # all metrics to be returned as a flat dictionary. Here we
+                    # flatten the dictionary.
+                    result = {}
+                    for key, value in metric_results.items():
+                        if isinstance(value, dict):
+                            result.update(value)  # add subdict directly into the dict
+                        else:
+                            result[key] = value  # non-subdict elements are just copied
 
-            # End of epoch.
-            logs["time"] = time.time() - start_time
+                    logs.update(
+                        {f"val_{name}": result for name, result in result.items()}
+                    )
 
-            # Update the steps in callback parameters with actual steps completed
-            if steps_per_epoch is None:
-                steps_per_epoch = step + 1
-                samples = steps_per_epoch * self.batch_size
-                callback_list.params["steps"] = steps_per_epoch
-                callback_list.params["samples"] = samples
-            callback_list.on_epoch_end(epoch, logs)
+                # End of epoch.
+                logs["time"] = time.time() - start_time
+
+                # Update the steps in callback parameters with actual steps completed
+                if steps_per_epoch is None:
+                    steps_per_epoch = step + 1
+                    samples = steps_per_epoch * self.batch_size
+                    callback_list.params["steps"] = steps_per_epoch
+                    callback_list.params["samples"] = samples
+                callback_list.on_epoch_end(epoch, logs)
+        finally:
+            # Stop the background steps if training ends early, e.g. on an
+            # exception or KeyboardInterrupt, so their threads don't outlive
+            # fit().
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
 
         # End of training.
         callback_list.on_train_end(logs)
+
+        # The weights have changed, so free the encodings cached for encrypted
+        # inference.
+        self.clear_encoded_weights()
         return self.history
 
     def split_with_padding(self, tensor, num_splits, axis=0, padding_value=0):
@@ -492,6 +647,70 @@ class SequentialBase(keras.Sequential):
 
         return grads
 
+    def split_sparse_grads(self, grads):
+        """
+        Separates the values of sparse gradients, e.g. from a ShellEmbedding
+        layer with sparse_grads enabled, from the rows of the weights they
+        belong to. The values are handled like any other gradient.
+
+        Args:
+            grads (list): Gradients, some of which may be
+                tf_shell.ShellIndexedSlices.
+
+        Returns:
+            tuple: A tuple containing:
+                - list: The gradients, with sparse gradients replaced by their
+                  values.
+                - list: For each gradient, its tf_shell.ShellIndexedSlices
+                  without values if it is sparse, otherwise None.
+        """
+        values = []
+        sparse_info = []
+        for g in grads:
+            if isinstance(g, tf_shell.ShellIndexedSlices):
+                values.append(g.values)
+                sparse_info.append(g._replace(values=None))
+            else:
+                values.append(g)
+                sparse_info.append(None)
+        return values, sparse_info
+
+    def join_sparse_grads(self, grads, sparse_info):
+        """
+        Recombines the values of sparse gradients, summed over the batch, with
+        their indices as tf.IndexedSlices which the optimizer applies to only
+        the listed rows of the weights.
+
+        Args:
+            grads (list of tf.Tensor): The gradients.
+            sparse_info (list): The sparse information from split_sparse_grads.
+
+        Returns:
+            list: The gradients, with sparse gradients as tf.IndexedSlices.
+        """
+        joined = []
+        for g, info in zip(grads, sparse_info):
+            if info is None:
+                joined.append(g)
+            else:
+                dense_shape = tf.concat(
+                    [
+                        tf.cast([info.num_segments], tf.int64),
+                        tf.shape(g, out_type=tf.int64)[1:],
+                    ],
+                    axis=0,
+                )
+                # Drop the padding rows, see tf_shell.segment_sum().
+                used = info.indices < info.num_segments
+                joined.append(
+                    tf.IndexedSlices(
+                        tf.boolean_mask(g, used),
+                        tf.boolean_mask(info.indices, used),
+                        dense_shape,
+                    )
+                )
+        return joined
+
     def _per_example_global_norm_squared(self, grads):
         if len(grads) == 0:
             return tf.constant(0.0, dtype=tf.keras.backend.floatx())
@@ -819,6 +1038,33 @@ class SequentialBase(keras.Sequential):
             batch_size_should_be: Number of slots in encryption (ciphertext ring
                 degree), or None if encryption is disabled.
         """
+        grads, sparse_info, labels, predictions, batch_size_should_be = (
+            self.shell_compute_step(features, labels, read_key_from_cache)
+        )
+        result = self.shell_apply_step(
+            grads, sparse_info, labels, predictions, apply_gradients
+        )
+        return result, batch_size_should_be
+
+    def shell_compute_step(self, features, labels, read_key_from_cache):
+        """
+        Computes the noised gradients of one training step without modifying
+        the model, its optimizer, or its metrics.
+
+        Args:
+            features (tf.Tensor): Training features.
+            labels (tf.Tensor): Training labels.
+            read_key_from_cache: Boolean whether to read keys from cache.
+
+        Returns:
+            tuple: A tuple containing:
+                - list: The gradients, summed over the batch.
+                - list: The sparse information from split_sparse_grads.
+                - tf.Tensor: The labels, cast to floatx.
+                - tf.Tensor: The predictions.
+                - batch_size_should_be: Number of slots in encryption
+                  (ciphertext ring degree), or None if encryption is disabled.
+        """
         with tf.device(self.labels_party_dev):
             labels = tf.cast(labels, tf.keras.backend.floatx())
             if self.disable_encryption:
@@ -836,6 +1082,11 @@ class SequentialBase(keras.Sequential):
         # Call the derived class to compute the gradients.
         grads, max_two_norm, predictions = self.compute_grads(features, enc_labels)
 
+        # Sparse gradients are masked, sent, decrypted, and noised as their
+        # values only. The indices stay with the features party, which knows
+        # them already.
+        grads, sparse_info = self.split_sparse_grads(grads)
+
         # If clipping is enabled, clip the per-example gradients to the maximum
         # L2 norm to mimic the DP-SGD algorithm.
         if self.clipping_threshold is not None:
@@ -1038,9 +1289,38 @@ class SequentialBase(keras.Sequential):
             # the gradients are ints. Convert them to floats.
             grads = [tf.cast(g, dtype=tf.keras.backend.floatx()) for g in grads]
 
+            if not self.disable_encryption:
+                ret_batch_size = tf.identity(backprop_context.num_slots)
+            elif not self.disable_noise:
+                ret_batch_size = tf.identity(noise_context.num_slots)
+            else:
+                ret_batch_size = None
+
+            return grads, sparse_info, labels, predictions, ret_batch_size
+
+    def shell_apply_step(
+        self, grads, sparse_info, labels, predictions, apply_gradients
+    ):
+        """
+        Applies the gradients from shell_compute_step to the model and updates
+        the metrics.
+
+        Args:
+            grads (list of tf.Tensor): The gradients.
+            sparse_info (list): The sparse information from split_sparse_grads.
+            labels (tf.Tensor): Training labels.
+            predictions (tf.Tensor): The predictions.
+            apply_gradients: Boolean whether to apply gradients.
+
+        Returns:
+            result: Dictionary of metric results.
+        """
+        with tf.device(self.features_party_dev):
             # Apply the gradients to the model.
             if apply_gradients:
-                self.optimizer.apply_gradients(zip(grads, self.weights))
+                self.optimizer.apply_gradients(
+                    zip(self.join_sparse_grads(grads, sparse_info), self.weights)
+                )
             else:
                 # If the gradients should not be applied, add zeros instead so
                 # the optimizer internal variables are created. To ensure the
@@ -1051,7 +1331,9 @@ class SequentialBase(keras.Sequential):
                     for g in grads
                 ]
                 zeros = [tf.zeros_like(g) for g in grads]
-                self.optimizer.apply_gradients(zip(zeros, self.weights))
+                self.optimizer.apply_gradients(
+                    zip(self.join_sparse_grads(zeros, sparse_info), self.weights)
+                )
 
             for metric in self.metrics:
                 if metric.name == "loss":
@@ -1081,11 +1363,4 @@ class SequentialBase(keras.Sequential):
                 else:
                     result[key] = value  # non-subdict elements are just copied
 
-            if not self.disable_encryption:
-                ret_batch_size = tf.identity(backprop_context.num_slots)
-            elif not self.disable_noise:
-                ret_batch_size = tf.identity(noise_context.num_slots)
-            else:
-                ret_batch_size = None
-
-            return result, ret_batch_size
+            return result
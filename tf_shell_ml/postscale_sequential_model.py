@@ -40,6 +40,19 @@ class PostScaleSequential(SequentialBase):
         # purposes.
         return tf.nn.softmax(prediction)
 
+    def predict_encrypted(self, enc_features):
+        """Not supported. Encrypted inference evaluates each layer with
+        tf-shell's ct-pt kernels through the layer's call_encrypted(), which
+        only tf_shell_ml layers implement, and PostScaleSequential is built
+        from Keras layers. Use tf_shell_ml.DpSgdSequential with tf_shell_ml
+        layers instead.
+        """
+        raise NotImplementedError(
+            "PostScaleSequential does not support encrypted inference since its "
+            "Keras layers have no call_encrypted(). Use DpSgdSequential with "
+            "tf_shell_ml layers instead."
+        )
+
     def _predict_and_jacobian(self, features):
         """
         Predicts the output for the given features and optionally computes the
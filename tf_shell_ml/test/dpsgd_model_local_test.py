@@ -21,6 +21,25 @@ import os
 import tempfile
 
 
+class StalenessRecordingModel(tf_shell_ml.DpSgdSequential):
+    """Records how many updates had been applied to the model when each
+    training step started computing its gradients."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_iterations = []
+
+    def shell_compute_step(self, features, labels, read_key_from_cache):
+        def _record(iterations):
+            self.read_iterations.append(int(iterations))
+            return iterations
+
+        recorded = tf.py_function(_record, [self.optimizer.iterations], tf.int64)
+        # Every op of the step runs after the number of updates is recorded.
+        with tf.control_dependencies([recorded]):
+            return super().shell_compute_step(features, labels, read_key_from_cache)
+
+
 class TestModel(tf.test.TestCase):
     def _test_model(
         self,
@@ -29,6 +48,9 @@ class TestModel(tf.test.TestCase):
         disable_noise,
         clipping_threshold,
         cache,
+        max_staleness=0,
+        rematerialization_budget_bytes=None,
+        model_cls=tf_shell_ml.DpSgdSequential,
     ):
         # Prepare the dataset.
         (x_train, y_train), (x_test, y_test) = keras.datasets.mnist.load_data()
@@ -49,7 +71,7 @@ class TestModel(tf.test.TestCase):
         val_dataset = tf.data.Dataset.from_tensor_slices((x_test, y_test))
         val_dataset = val_dataset.batch(32)
 
-        m = tf_shell_ml.DpSgdSequential(
+        m = model_cls(
             [
                 tf_shell_ml.ShellDense(
                     64,
@@ -81,6 +103,7 @@ class TestModel(tf.test.TestCase):
             cache_path=cache,
             check_overflow_INSECURE=True,
             clipping_threshold=clipping_threshold,
+            rematerialization_budget_bytes=rematerialization_budget_bytes,
         )
 
         m.compile(
@@ -99,9 +122,11 @@ class TestModel(tf.test.TestCase):
             epochs=1,
             verbose=2,
             validation_data=val_dataset,
+            max_staleness=max_staleness,
         )
 
         self.assertGreater(history.history["val_categorical_accuracy"][-1], 0.25)
+        return m
 
     def test_model(self):
         with tempfile.TemporaryDirectory() as cache_dir:
@@ -113,6 +138,142 @@ class TestModel(tf.test.TestCase):
             self._test_model(True, True, True, None, cache_dir)
             self._test_model(True, True, True, 1.0, cache_dir)
 
+    def test_model_pipelined(self):
+        num_steps = 4  # steps_per_epoch of _test_model.
+        for max_staleness in [1, 2]:
+            with self.subTest(f"max_staleness={max_staleness}"):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    m = self._test_model(
+                        False,
+                        False,
+                        False,
+                        None,
+                        cache_dir,
+                        max_staleness=max_staleness,
+                        model_cls=StalenessRecordingModel,
+                    )
+
+                # Every step is applied exactly once.
+                self.assertLen(m.read_iterations, num_steps)
+                first = min(m.read_iterations)
+                self.assertEqual(int(m.optimizer.iterations) - first, num_steps)
+
+                # Step k must read weights with at least k - max_staleness and
+                # at most k updates applied. Steps may start out of order, so
+                # compare the sorted reads against the sorted bounds.
+                for k, read in enumerate(sorted(m.read_iterations)):
+                    self.assertGreaterEqual(read - first, k - max_staleness)
+                    self.assertLessEqual(read - first, k)
+
+    def test_model_rematerialized(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # A one byte budget recomputes every layer separately.
+            self._test_model(
+                False,
+                False,
+                False,
+                None,
+                cache_dir,
+                rematerialization_budget_bytes=1,
+            )
+            self._test_model(
+                True, True, True, None, cache_dir, rematerialization_budget_bytes=1
+            )
+        self._test_rematerialized_grads()
+
+    def _test_rematerialized_grads(self):
+        features = tf.random.uniform([32, 20])
+        labels = tf.one_hot(tf.random.uniform([32], maxval=10, dtype=tf.int32), 10)
+
+        def _make_model(**kwargs):
+            m = tf_shell_ml.DpSgdSequential(
+                [
+                    tf_shell_ml.ShellDense(
+                        16,
+                        activation=tf_shell_ml.relu,
+                        activation_deriv=tf_shell_ml.relu_deriv,
+                    ),
+                    tf_shell_ml.ShellDense(
+                        16,
+                        activation=tf_shell_ml.relu,
+                        activation_deriv=tf_shell_ml.relu_deriv,
+                    ),
+                    tf_shell_ml.ShellDense(
+                        10,
+                        activation=tf.nn.softmax,
+                    ),
+                ],
+                backprop_context_fn=None,
+                noise_context_fn=None,
+                disable_encryption=True,
+                disable_masking=True,
+                disable_noise=True,
+                **kwargs,
+            )
+            m.compile(
+                loss=tf.keras.losses.CategoricalCrossentropy(),
+                optimizer=tf.keras.optimizers.Adam(0.01),
+            )
+            m.build([None, 20])
+            return m
+
+        expected_model = _make_model()
+        expected_grads, _, _ = expected_model.compute_grads(features, labels)
+
+        # Recompute every layer on its own, and the first two layers (8704
+        # bytes of float32 state) together.
+        for budget in [1, 9000]:
+            model = _make_model(rematerialization_budget_bytes=budget)
+            model.set_weights(expected_model.get_weights())
+            grads, _, _ = model.compute_grads(features, labels)
+            self.assertEqual(len(grads), len(expected_grads))
+            for g, expected in zip(grads, expected_grads):
+                self.assertAllClose(g, expected)
+
+    def test_vectorized_sensitivity(self):
+        features = tf.random.uniform([32, 20])
+        labels = tf.one_hot(tf.random.uniform([32], maxval=10, dtype=tf.int32), 10)
+
+        def _make_model(**kwargs):
+            m = tf_shell_ml.DpSgdSequential(
+                [
+                    tf_shell_ml.ShellDense(
+                        16,
+                        activation=tf_shell_ml.relu,
+                        activation_deriv=tf_shell_ml.relu_deriv,
+                    ),
+                    tf_shell_ml.ShellDense(
+                        10,
+                        activation=tf.nn.softmax,
+                    ),
+                ],
+                backprop_context_fn=None,
+                noise_context_fn=None,
+                disable_encryption=True,
+                disable_masking=True,
+                disable_noise=True,
+                **kwargs,
+            )
+            m.compile(
+                loss=tf.keras.losses.CategoricalCrossentropy(),
+                optimizer=tf.keras.optimizers.Adam(0.01),
+            )
+            m.build([None, 20])
+            return m
+
+        looped = _make_model()
+        vectorized = _make_model(sensitivity_pfor=True)
+        chunked = _make_model(sensitivity_pfor=True, sensitivity_pfor_iterations=3)
+        vectorized.set_weights(looped.get_weights())
+        chunked.set_weights(looped.get_weights())
+
+        _, expected_norm, _ = looped.compute_grads(features, labels)
+        _, vectorized_norm, _ = vectorized.compute_grads(features, labels)
+        _, chunked_norm, _ = chunked.compute_grads(features, labels)
+
+        self.assertAllClose(vectorized_norm, expected_norm)
+        self.assertAllClose(chunked_norm, expected_norm)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -146,6 +146,108 @@ class TestEmbedding(tf.test.TestCase):
         self._test_embedding("galois")
         self._test_embedding("none")
 
+    def test_embedding_sparse_grads(self):
+        input_dim = 100
+        output_dim = 16
+        embedding_layer = tf_shell_ml.ShellEmbedding(
+            input_dim,
+            output_dim,
+            skip_embeddings_below_index=1,
+            sparse_grads=True,
+        )
+
+        x = tf.random.uniform(
+            (context.num_slots, 3), minval=0, maxval=10, dtype=tf.int64
+        )
+        y = embedding_layer(x, training=True)
+        dy = tf.random.uniform(tf.shape(y), minval=-5, maxval=5, dtype=tf.int64)
+        dy = tf.cast(dy, tf.float32)
+        enc_dy = tf_shell.to_encrypted(dy, key, context)
+
+        enc_dws, _ = embedding_layer.backward(enc_dy, rotation_key)
+        pt_dws, _ = embedding_layer.backward(dy)
+
+        # Only the rows of the tokens in x which are not skipped are computed.
+        used = tf.sort(tf.unique(tf.boolean_mask(x, x >= 1))[0])
+        self.assertAllEqual(enc_dws[0].indices, used)
+        self.assertAllEqual(pt_dws[0].indices, used)
+
+        dw = tf.reduce_sum(tf_shell.to_tensorflow(enc_dws[0].values, key), axis=0)
+        pt_dw = tf.reduce_sum(pt_dws[0].values, axis=0)
+        check = tf.gather(
+            tf.math.unsorted_segment_sum(
+                dy, tf.where(x >= 1, x, -1), num_segments=input_dim
+            ),
+            used,
+        )
+        self.assertAllClose(dw, check, atol=1e-3)
+        self.assertAllClose(pt_dw, check, atol=1e-3)
+
+        # With sparse_grads_max_rows, the gradient always has that many rows.
+        padded_layer = tf_shell_ml.ShellEmbedding(
+            input_dim,
+            output_dim,
+            skip_embeddings_below_index=1,
+            sparse_grads=True,
+            sparse_grads_max_rows=20,
+        )
+        padded_layer(x, training=True)
+        padded_dws, _ = padded_layer.backward(dy)
+        self.assertEqual(padded_dws[0].indices.shape[0], 20)
+        self.assertAllEqual(padded_dws[0].indices[: used.shape[0]], used)
+
+        with self.assertRaises(ValueError):
+            tf_shell_ml.ShellEmbedding(
+                input_dim, output_dim, grad_reduction="galois", sparse_grads=True
+            )
+
+    def test_hash_embedding(self):
+        num_buckets = 50
+        output_dim = 8
+        num_hashes = 2
+        layer = tf_shell_ml.ShellHashEmbedding(
+            num_buckets,
+            output_dim,
+            num_hashes=num_hashes,
+            skip_embeddings_below_index=1,
+        )
+
+        # Ids from a vocabulary much larger than the number of buckets.
+        x = tf.random.uniform(
+            (context.num_slots, 3), minval=0, maxval=10**9, dtype=tf.int64
+        )
+        x = tf.concat([x, tf.zeros((context.num_slots, 1), dtype=tf.int64)], axis=1)
+        y = layer(x, training=True)
+
+        # The embedding of an id is the sum of the rows of its buckets.
+        buckets = [
+            tf_shell_ml.hash_embedding.hash_buckets(x, num_buckets, k)
+            for k in range(num_hashes)
+        ]
+        self.assertAllClose(
+            y, sum(tf.gather(layer.embeddings, b) for b in buckets), atol=1e-6
+        )
+
+        dy = tf.random.uniform(tf.shape(y), minval=-5, maxval=5, dtype=tf.int64)
+        dy = tf.cast(dy, tf.float32)
+        enc_dy = tf_shell.to_encrypted(dy, key, context)
+
+        enc_dws, _ = layer.backward(enc_dy, rotation_key)
+        dw = tf.reduce_sum(tf_shell.to_tensorflow(enc_dws[0], key), axis=0)
+        pt_dws, _ = layer.backward(dy)
+        pt_dw = tf.reduce_sum(pt_dws[0], axis=0)
+
+        # Every bucket of an id receives its gradient, except for skipped ids.
+        check = sum(
+            tf.math.unsorted_segment_sum(
+                dy, tf.where(x >= 1, b, -1), num_segments=num_buckets
+            )
+            for b in buckets
+        )
+        self.assertAllEqual(dw.shape, [num_buckets, output_dim])
+        self.assertAllClose(dw, check, atol=1e-3)
+        self.assertAllClose(pt_dw, check, atol=1e-3)
+
 
 if __name__ == "__main__":
     unittest.main()
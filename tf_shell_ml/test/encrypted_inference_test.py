@@ -0,0 +1,157 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+import tensorflow as tf
+import tf_shell
+import tf_shell_ml
+
+# Num plaintext bits: 32, noise bits: 84
+# Max representable value: 654624
+context = tf_shell.create_context64(
+    log_n=9,
+    main_moduli=[288230376151748609, 144115188076060673],
+    plaintext_modulus=4294991873,
+    scaling_factor=3,
+    seed="test_seed",
+)
+
+key = tf_shell.create_key64(context)
+
+
+class TestEncryptedInference(tf.test.TestCase):
+    def _make_model(self, layers):
+        return tf_shell_ml.DpSgdSequential(
+            layers,
+            backprop_context_fn=lambda read_from_cache: context,
+            noise_context_fn=lambda read_from_cache: context,
+        )
+
+    def _set_integer_weights(self, model):
+        # Integer-valued weights avoid rounding error in the comparison.
+        model.set_weights(
+            [
+                tf.cast(
+                    tf.random.uniform(w.shape, minval=-2, maxval=3, dtype=tf.int64),
+                    tf.float32,
+                )
+                for w in model.get_weights()
+            ]
+        )
+
+    def _test_predict_encrypted(self, layers, input_shape):
+        model = self._make_model(layers)
+        x = tf.random.uniform(
+            [context.num_slots] + input_shape, minval=-2, maxval=3, dtype=tf.int64
+        )
+        x = tf.cast(x, tf.float32)
+        model(x)  # Build the model.
+        self._set_integer_weights(model)
+        expected = model(x, training=False, with_softmax=False)
+
+        enc_x = tf_shell.to_encrypted(x, key, context)
+        enc_y = model.predict_encrypted(enc_x)
+        self.assertAllClose(tf_shell.to_tensorflow(enc_y, key), expected)
+        return model, enc_x, expected
+
+    def test_dense(self):
+        self._test_predict_encrypted(
+            [tf_shell_ml.ShellDense(6, use_bias=True), tf_shell_ml.ShellDense(3)],
+            [5],
+        )
+
+    def test_conv(self):
+        self._test_predict_encrypted(
+            [
+                tf_shell_ml.Conv2D(filters=2, kernel_size=2),
+                tf_shell_ml.Flatten(),
+                tf_shell_ml.ShellDense(3),
+            ],
+            [4, 4, 1],
+        )
+
+    def test_global_average_pooling(self):
+        self._test_predict_encrypted(
+            [
+                tf_shell_ml.ShellDropout(0.5),
+                tf_shell_ml.GlobalAveragePooling1D(),
+                tf_shell_ml.ShellDense(3),
+            ],
+            # The pooled length equals the scaling factor so the division,
+            # which is folded into the dense kernel, encodes exactly.
+            [context.scaling_factor, 5],
+        )
+
+    def test_encoded_weights_cached(self):
+        dense = tf_shell_ml.ShellDense(3, use_bias=True)
+        model, enc_x, expected = self._test_predict_encrypted([dense], [5])
+        self.assertLen(dense._encoded_weights, 1)
+
+        # A second request reuses the cached encoding.
+        enc_y = model.predict_encrypted(enc_x)
+        self.assertLen(dense._encoded_weights, 1)
+        self.assertAllClose(tf_shell.to_tensorflow(enc_y, key), expected)
+
+        model.clear_encoded_weights()
+        self.assertEmpty(dense._encoded_weights)
+
+    def test_encoded_weights_follow_assignment(self):
+        dense = tf_shell_ml.ShellDense(3, use_bias=True)
+        conv = tf_shell_ml.Conv2D(filters=2, kernel_size=2)
+        model, enc_x, _ = self._test_predict_encrypted(
+            [conv, tf_shell_ml.Flatten(), dense], [4, 4, 1]
+        )
+        x = tf_shell.to_tensorflow(enc_x, key)
+
+        # Encodings of the old weights must not be reused after set_weights()
+        # or assigning to a variable directly.
+        self._set_integer_weights(model)
+        expected = model(x, training=False, with_softmax=False)
+        enc_y = model.predict_encrypted(enc_x)
+        self.assertAllClose(tf_shell.to_tensorflow(enc_y, key), expected)
+
+        dense.weights[0].assign(dense.weights[0] + 1)
+        conv.weights[0].assign(conv.weights[0] - 1)
+        expected = model(x, training=False, with_softmax=False)
+        enc_y = model.predict_encrypted(enc_x)
+        self.assertAllClose(tf_shell.to_tensorflow(enc_y, key), expected)
+        self.assertLen(dense._encoded_weights, 1)
+
+    def test_nonlinear_activation_fails(self):
+        model = self._make_model(
+            [
+                tf_shell_ml.ShellDense(4, activation=tf_shell_ml.relu),
+                tf_shell_ml.ShellDense(3),
+            ]
+        )
+        x = tf.ones([context.num_slots, 5])
+        model(x)
+        enc_x = tf_shell.to_encrypted(x, key, context)
+        with self.assertRaises(ValueError):
+            model.predict_encrypted(enc_x)
+
+    def test_postscale_unsupported(self):
+        model = tf_shell_ml.PostScaleSequential(
+            [tf.keras.layers.Dense(3)],
+            backprop_context_fn=lambda read_from_cache: context,
+            noise_context_fn=lambda read_from_cache: context,
+        )
+        x = tf.ones([context.num_slots, 5])
+        model(x)
+        enc_x = tf_shell.to_encrypted(x, key, context)
+        with self.assertRaises(NotImplementedError):
+            model.predict_encrypted(enc_x)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -139,6 +139,28 @@ class TestMaxPoll2d(tf.test.TestCase):
                     for channels in [1, 3]:
                         self._test_tf_func(stride, padding, pool_sz, channels)
 
+    def test_constant_input(self):
+        # Every slot has the same argmax, so each pool patch selects the same
+        # output in every slot.
+        im_shape = [context.num_slots] + [12, 12, 3]
+        for stride in [1, 2]:
+            layer = tf_shell_ml.MaxPool2D(
+                pool_size=(2, 2),
+                padding="valid",
+                strides=stride,
+            )
+            layer.build(im_shape)
+
+            y = layer(tf.ones(im_shape), training=True)
+            dy = tf.random.uniform(tf.shape(y), minval=0, maxval=5, dtype=tf.int64)
+            dy = tf.cast(dy, tf.float32)
+            enc_dy = tf_shell.to_encrypted(dy, key, context)
+
+            _, enc_dx = layer.backward(enc_dy, rotation_key)
+            dx = tf_shell.to_tensorflow(enc_dx, key)
+            _, pt_dx = layer.backward(dy)
+            self.assertAllClose(dx, pt_dx)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,13 @@
-import random
 import math
 from statistics import mean
+import os
+import sys
+
+# The prime tables are shared with tf-shell. Import them without tensorflow.
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tf_shell", "python")
+)
+import ntt_primes
 
 # This script is used to find parameters for SHELL that can support a given
 # number of plaintext bits, noise bits, and multiplication depth. The script
@@ -24,25 +31,12 @@ max_prime_bits = 58
 two_n = 2 ** (log_n + 1)
 
 
-# Fermat's prime test.
-def check_prime(n, k):
-    if n == 2:
-        return True
-    if not n & 1:
-        return False
-    for _ in range(k):
-        a = random.randint(2, n - 2)
-        if pow(a, n - 1, n) != 1:
-            return False
-    return True
-
-
+# Look up the smallest prime >= 2**bits which is congruent to 1 mod 2n in the
+# precomputed table generated by gen_ntt_primes.py.
 def find_prime_mod_2n(bits, not_in=[]):
-    for i in range(2**bits, 2 ** (bits + 2)):
-        if check_prime(i, 10):
-            if i % two_n == 1:
-                if i not in not_in:
-                    return i
+    prime = ntt_primes.find_prime_mod_2n(log_n, bits, not_in)
+    if prime is not None and prime < 2 ** (bits + 2):
+        return prime
     return None
 
 
@@ -1,6 +1,13 @@
-import random
 import math
 from statistics import mean
+import os
+import sys
+
+# The prime tables are shared with tf-shell. Import them without tensorflow.
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tf_shell", "python")
+)
+import ntt_primes
 
 # This script is used to find parameters for SHELL that can support a given
 # number of plaintext bits, noise bits, and multiplication depth. The script
@@ -31,25 +38,12 @@ max_prime_bits = 58
 two_n = 2 ** (log_n + 1)
 
 
-# Fermat's prime test.
-def check_prime(n, k):
-    if n == 2:
-        return True
-    if not n & 1:
-        return False
-    for _ in range(k):
-        a = random.randint(2, n - 2)
-        if pow(a, n - 1, n) != 1:
-            return False
-    return True
-
-
+# Look up the smallest prime >= 2**bits which is congruent to 1 mod 2n in the
+# precomputed table generated by gen_ntt_primes.py.
 def find_prime_mod_2n(bits, not_in=[]):
-    for i in range(2**bits, 2 ** (bits + 2)):
-        if check_prime(i, 10):
-            if i % two_n == 1:
-                if i not in not_in:
-                    return i
+    prime = ntt_primes.find_prime_mod_2n(log_n, bits, not_in)
+    if prime is not None and prime < 2 ** (bits + 2):
+        return prime
     return None
 
 
@@ -112,12 +106,12 @@ if mul_depth > 0 and desired_scaling_factor > 1:
         p_pos = desired_scaling_factor + i
         p_neg = desired_scaling_factor - i
 
-        if check_prime(p_pos, 10):
+        if ntt_primes.is_prime(p_pos):
             if p_pos % two_n == 1 and p_pos not in found_primes:
                 mul_primes.append(p_pos)
                 if len(mul_primes) == mul_depth:
                     break
-        if check_prime(p_neg, 10):
+        if ntt_primes.is_prime(p_neg):
             if p_neg % two_n == 1 and p_neg not in found_primes:
                 mul_primes.append(p_neg)
                 if len(mul_primes) == mul_depth:
@@ -0,0 +1,205 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Generates the tables of NTT-friendly primes, i.e. primes congruent to 1 mod
+# 2n, used to select BGV moduli. For every supported log_n and bit width b, the
+# tables hold the primes nearest to 2**b, both at or above it and below it.
+# The same tables are written as a C++ header for the moduli autotune optimizer
+# and, with is_prime() below, as a Python module shared by tf-shell and the
+# parameter search scripts in this directory.
+#
+# Usage: python tools/gen_ntt_primes.py, then format the outputs with
+# clang-format and black.
+
+import inspect
+import os
+
+MIN_LOG_N = 10
+MAX_LOG_N = 15
+MIN_BITS = 3
+MAX_BITS = 60
+PRIMES_PER_ENTRY = 4
+
+# Deterministic Miller-Rabin bases for all n < 2**64.
+MILLER_RABIN_BASES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+
+
+def is_prime(n):
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def primes_above(two_n, bits):
+    """The smallest primes >= 2**bits which are congruent to 1 mod two_n."""
+    primes = []
+    i = ((2**bits - 1 + two_n - 1) // two_n) * two_n + 1
+    while len(primes) < PRIMES_PER_ENTRY:
+        if is_prime(i):
+            primes.append(i)
+        i += two_n
+    return primes
+
+
+def primes_below(two_n, bits):
+    """The largest primes < 2**bits which are congruent to 1 mod two_n, padded
+    with zeros if there are fewer than PRIMES_PER_ENTRY."""
+    primes = []
+    i = ((2**bits - 1) // two_n) * two_n + 1
+    while len(primes) < PRIMES_PER_ENTRY and i > 1:
+        if is_prime(i):
+            primes.append(i)
+        i -= two_n
+    return primes + [0] * (PRIMES_PER_ENTRY - len(primes))
+
+
+def generate():
+    above = []
+    below = []
+    for log_n in range(MIN_LOG_N, MAX_LOG_N + 1):
+        two_n = 2 ** (log_n + 1)
+        above.append([primes_above(two_n, b) for b in range(MIN_BITS, MAX_BITS + 1)])
+        below.append([primes_below(two_n, b) for b in range(MIN_BITS, MAX_BITS + 1)])
+    return above, below
+
+
+def write_cc_header(path, above, below):
+    def table(name, primes):
+        lines = [
+            f"constexpr uint64_t const {name}[kNumLogN][kNumBits][kPrimesPerEntry] = {{"
+        ]
+        for log_n, rows in zip(range(MIN_LOG_N, MAX_LOG_N + 1), primes):
+            lines.append(f"    // log_n = {log_n}")
+            lines.append("    {")
+            for row in rows:
+                lines.append("        {" + ", ".join(f"{p}ULL" for p in row) + "},")
+            lines.append("    },")
+        lines.append("};")
+        return "\n".join(lines)
+
+    with open(path, "w") as f:
+        f.write(f"""// Generated by tools/gen_ntt_primes.py. Do not edit.
+#pragma once
+
+#include <cstdint>
+
+namespace tensorflow {{
+namespace grappler {{
+namespace ntt_primes {{
+
+constexpr uint64_t const kMinLogN = {MIN_LOG_N};
+constexpr uint64_t const kMaxLogN = {MAX_LOG_N};
+constexpr uint64_t const kMinBits = {MIN_BITS};
+constexpr uint64_t const kMaxBits = {MAX_BITS};
+constexpr uint64_t const kPrimesPerEntry = {PRIMES_PER_ENTRY};
+constexpr uint64_t const kNumLogN = kMaxLogN - kMinLogN + 1;
+constexpr uint64_t const kNumBits = kMaxBits - kMinBits + 1;
+
+// kPrimesAbove[log_n - kMinLogN][bits - kMinBits] holds the smallest primes
+// >= 2^bits which are congruent to 1 mod 2^(log_n + 1), in increasing order.
+{table("kPrimesAbove", above)}
+
+// kPrimesBelow[log_n - kMinLogN][bits - kMinBits] holds the largest primes
+// < 2^bits which are congruent to 1 mod 2^(log_n + 1), in decreasing order.
+// Missing primes are 0.
+{table("kPrimesBelow", below)}
+
+}}  // namespace ntt_primes
+}}  // namespace grappler
+}}  // namespace tensorflow
+""")
+
+
+def write_py_module(path, above, below):
+    def table(primes):
+        lines = ["["]
+        for log_n, rows in zip(range(MIN_LOG_N, MAX_LOG_N + 1), primes):
+            lines.append(f"    # log_n = {log_n}")
+            lines.append("    [")
+            for row in rows:
+                lines.append("        [" + ", ".join(str(p) for p in row) + "],")
+            lines.append("    ],")
+        lines.append("]")
+        return "\n".join(lines)
+
+    with open(path, "w") as f:
+        f.write(f'''# Generated by tools/gen_ntt_primes.py. Do not edit.
+
+MIN_LOG_N = {MIN_LOG_N}
+MAX_LOG_N = {MAX_LOG_N}
+MIN_BITS = {MIN_BITS}
+MAX_BITS = {MAX_BITS}
+
+# Deterministic Miller-Rabin bases for all n < 2**64.
+MILLER_RABIN_BASES = {MILLER_RABIN_BASES}
+
+
+{inspect.getsource(is_prime)}
+
+# PRIMES_ABOVE[log_n - MIN_LOG_N][bits - MIN_BITS] holds the smallest primes
+# >= 2**bits which are congruent to 1 mod 2**(log_n + 1), in increasing order.
+PRIMES_ABOVE = {table(above)}
+
+# PRIMES_BELOW[log_n - MIN_LOG_N][bits - MIN_BITS] holds the largest primes
+# < 2**bits which are congruent to 1 mod 2**(log_n + 1), in decreasing order.
+# Missing primes are 0.
+PRIMES_BELOW = {table(below)}
+
+
+def find_prime_mod_2n(log_n, bits, not_in=[]):
+    """Returns the smallest prime >= 2**bits which is congruent to 1 mod 2n and
+    not in `not_in`. The table answers most queries, others are searched."""
+    two_n = 2 ** (log_n + 1)
+    i = ((2**bits - 1 + two_n - 1) // two_n) * two_n + 1
+    if MIN_LOG_N <= log_n <= MAX_LOG_N and MIN_BITS <= bits <= MAX_BITS:
+        primes = PRIMES_ABOVE[log_n - MIN_LOG_N][bits - MIN_BITS]
+        for p in primes:
+            if p not in not_in:
+                return p
+        # All tabulated primes are in use, search past them.
+        i = primes[-1] + two_n
+    while i in not_in or not is_prime(i):
+        i += two_n
+    return i
+''')
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    above, below = generate()
+    write_cc_header(
+        os.path.join(root, "tf_shell", "cc", "optimizers", "ntt_primes.h"),
+        above,
+        below,
+    )
+    write_py_module(
+        os.path.join(root, "tf_shell", "python", "ntt_primes.py"), above, below
+    )